@@ -0,0 +1,129 @@
+"""
+Handlers de jobs de análisis de datos (se ejecutan en el proceso worker).
+"""
+import asyncio
+import os
+import uuid
+from typing import Any, Dict, Iterator
+
+import numpy as np
+
+from analytics.application.dataset_diff import DatasetDiff, chunks_from_rows
+from analytics.application.excel_ingestion import analyze_workbook, iter_sheet_chunks
+from analytics.application.uploads import discard_upload, resolve_upload
+from jobs.application.job_registry import JobProgress, register_job
+
+
+def _upload_path(upload_id: str) -> str:
+    path = resolve_upload(upload_id)
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(f"Archivo no encontrado: {upload_id}")
+    return path
+
+
+def _discard_excel_upload(payload: Dict[str, Any]) -> None:
+    """El job agotó sus reintentos: el archivo ya no se va a leer."""
+    if payload.get("delete_after", True):
+        discard_upload(payload.get("upload_id"))
+
+
+@register_job("excel_analysis", on_failure=_discard_excel_upload)
+def excel_analysis_job(payload: Dict[str, Any], progress: JobProgress) -> Dict[str, Any]:
+    """
+    Analiza un Excel subido en streaming.
+    Payload: {"upload_id": ..., "sheets": [...] (opcional), "memory_budget_mb": 512, "delete_after": true}
+
+    El archivo se borra al terminar bien o tras el último intento fallido,
+    para que los reintentos lo sigan encontrando.
+    """
+    result = analyze_workbook(
+        _upload_path(payload["upload_id"]),
+        sheets=payload.get("sheets"),
+        memory_budget_mb=float(payload.get("memory_budget_mb", 512)),
+        max_workers=payload.get("max_workers"),
+        progress=progress
+    )
+    if payload.get("delete_after", True):
+        discard_upload(payload["upload_id"])
+    return result
+
+
+def _fetch_runner_rows(source: Dict[str, Any]) -> list:
+    """
+    Ejecuta la consulta en un Runner (de cualquier worker) vía relay/scheduler.
+
+    Cada llamada corre en su propio event loop (asyncio.run), así que usa un
+    cliente Redis asíncrono propio y un relay/scheduler atados a ese loop: el
+    cliente compartido de RedisConfig queda ligado al primer loop que lo usó y
+    falla en el segundo job del mismo proceso.
+    """
+    from infrastructure.config.redis_config import RedisConfig
+    from runner.application.gather_results import normalize_sql_rows
+    from runner.application.runner_scheduler import RunnerScheduler
+    from runner.application.runner_service import connection_manager
+    from runner.domain.dataModel.model import RunnerCommand
+    from runner.infrastructure.runner_presence import RunnerCommandRelay, runner_presence
+
+    command = RunnerCommand(
+        command_id=str(uuid.uuid4()),
+        command_type="SQL_QUERY",
+        payload={
+            "adapter_type": source["adapter_type"],
+            "query": source["query"],
+            "database": source.get("database")
+        },
+        timeout=int(source.get("timeout", 120))
+    )
+
+    async def run():
+        redis = RedisConfig.create_async_client()
+        relay = RunnerCommandRelay(connection_manager, runner_presence, redis=redis)
+        try:
+            if source.get("runner_id"):
+                return await relay.send_command(
+                    source["runner_id"], command, wait_response=True, timeout=command.timeout
+                )
+            scheduler = RunnerScheduler(connection_manager, presence=runner_presence, sender=relay)
+            _, response, _ = await scheduler.dispatch(
+                command, client_name=source.get("client_name"), timeout=command.timeout
+            )
+            return response
+        finally:
+            await relay.stop()
+            await redis.aclose()
+
+    response = asyncio.run(run())
+    if not response.success:
+        raise RuntimeError(f"Error en la consulta del runner: {response.error}")
+    return normalize_sql_rows(response.data)
+
+
+def _source_chunks(source: Dict[str, Any], memory_budget_mb: float) -> Iterator[Dict[str, np.ndarray]]:
+    if source["type"] == "upload":
+        path = _upload_path(source["upload_id"])
+        for chunk in iter_sheet_chunks(path, source.get("sheet"), memory_budget_mb=memory_budget_mb):
+            yield chunk.columns
+    elif source["type"] == "runner_sql":
+        yield from chunks_from_rows(_fetch_runner_rows(source))
+    else:
+        raise ValueError(f"Tipo de fuente no soportado: {source['type']}")
+
+
+@register_job("dataset_compare")
+def dataset_compare_job(payload: Dict[str, Any], progress: JobProgress) -> Dict[str, Any]:
+    """
+    Cruza dos datasets (Excel subido o consulta de Runner) por columnas llave.
+    Payload: {"left": {...}, "right": {...}, "keys": [...], "compare": [...], "expected_rows": N}
+    """
+    memory_budget_mb = float(payload.get("memory_budget_mb", 512))
+    diff = DatasetDiff(
+        keys=payload["keys"],
+        compare=payload.get("compare"),
+        memory_budget_mb=memory_budget_mb,
+        expected_rows=payload.get("expected_rows")
+    )
+    return diff.compare_datasets(
+        _source_chunks(payload["left"], memory_budget_mb / 2),
+        _source_chunks(payload["right"], memory_budget_mb / 2),
+        progress=progress
+    )
@@ -0,0 +1,283 @@
+"""
+Motor de comparación de datasets ("cruce de datos masivos").
+
+Compara dos datasets columnares (chunks de arrays NumPy) por una o varias
+columnas llave y reporta filas coincidentes, solo-izquierda, solo-derecha y
+cambiadas.
+
+Funcionamiento:
+    1. Particionado: cada chunk se reduce a registros de 24 bytes
+       (hash de la llave, hash de las columnas comparadas, número de fila)
+       y se reparte por hash de llave en archivos de spill por partición.
+    2. Cruce: cada partición se abre con np.memmap, se ordena por llave y se
+       cruza con np.intersect1d. Solo una partición vive en memoria a la vez,
+       por lo que los datasets pueden ser mayores que la RAM.
+
+Las llaves enteras de una sola columna se comparan sin colisiones (el mezclado
+splitmix64 es biyectivo); el resto usa hashes de 64 bits (xxhash para texto).
+
+Cada valor se representa igual sea cual sea el dtype de su chunk: en columnas
+object (tipos mezclados) los enteros, flotantes enteros y fechas toman los
+mismos bits que en las columnas numéricas o de fechas, así el resultado no
+depende de dónde caen los cortes de chunk.
+"""
+import math
+import os
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import xxhash
+
+from analytics.application.excel_ingestion import column_to_array
+
+
+SPILL_RECORD = np.dtype([("key", "<u8"), ("row_hash", "<u8"), ("row", "<u8")])
+NULL_HASH = np.uint64(0x6A09E667F3BCC909)
+
+ColumnChunks = Iterable[Dict[str, np.ndarray]]
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """Mezclado splitmix64 vectorizado (biyectivo sobre uint64)."""
+    with np.errstate(over="ignore"):
+        x = values + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def _scalar_bits(value: Any) -> int:
+    """Bits de un valor de una columna object, iguales a los de la ruta vectorizada."""
+    if value is None:
+        return int(NULL_HASH)
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_)):
+        if isinstance(value, (int, np.integer)) and -2 ** 63 <= value < 2 ** 63:
+            return int(np.int64(value).view(np.uint64))
+        number = float(value)
+        if math.isnan(number):
+            return int(NULL_HASH)
+        if number == math.trunc(number) and abs(number) < 2 ** 53:
+            return int(np.int64(number).view(np.uint64))
+        return int(np.float64(number).view(np.uint64))
+    if isinstance(value, (datetime, date)):
+        return int(np.datetime64(value, "ms").view(np.int64).view(np.uint64))
+    return xxhash.xxh64_intdigest(str(value).encode("utf-8"))
+
+
+def _column_bits(values: np.ndarray) -> np.ndarray:
+    """Representa una columna como uint64 estable para hashing."""
+    kind = values.dtype.kind
+    if kind in "iu":
+        return values.astype(np.int64, copy=False).view(np.uint64)
+    if kind == "b":
+        return values.astype(np.uint64)
+    if kind == "f":
+        # Los flotantes enteros (ej: 3.0 de Excel) se representan como el entero
+        # equivalente para que coincidan con columnas int de la otra fuente
+        floats = values.astype(np.float64)
+        finite = ~np.isnan(floats)
+        integral = finite & (floats == np.trunc(floats)) & (np.abs(floats) < 2 ** 53)
+        bits = floats.view(np.uint64).copy()
+        bits[integral] = floats[integral].astype(np.int64).view(np.uint64)
+        bits[~finite] = NULL_HASH
+        return bits
+    if kind == "M":
+        bits = values.astype("datetime64[ms]").view(np.int64).view(np.uint64).copy()
+        bits[np.isnat(values)] = NULL_HASH
+        return bits
+    return np.fromiter((_scalar_bits(v) for v in values), dtype=np.uint64, count=len(values))
+
+
+def hash_columns(chunk: Dict[str, np.ndarray], columns: List[str]) -> np.ndarray:
+    """Combina las columnas indicadas en un hash uint64 por fila."""
+    n_rows = len(next(iter(chunk.values())))
+    combined = np.zeros(n_rows, dtype=np.uint64)
+    for column in columns:
+        if column not in chunk:
+            raise KeyError(f"La columna '{column}' no existe en el dataset")
+        with np.errstate(over="ignore"):
+            combined = _mix64(combined * np.uint64(31) ^ _column_bits(chunk[column]))
+    return combined
+
+
+class _PartitionWriter:
+    """Reparte registros de spill en archivos por partición."""
+
+    def __init__(self, directory: str, side: str, partitions: int):
+        self.partitions = partitions
+        self.paths = [os.path.join(directory, f"{side}_{index:04d}.bin") for index in range(partitions)]
+        self.files = [open(path, "ab") for path in self.paths]
+        self.rows = 0
+
+    def write(self, records: np.ndarray) -> None:
+        buckets = (records["key"] % np.uint64(self.partitions)).astype(np.int64)
+        order = np.argsort(buckets, kind="stable")
+        records = records[order]
+        bounds = np.searchsorted(buckets[order], np.arange(self.partitions + 1))
+        for index in range(self.partitions):
+            start, end = bounds[index], bounds[index + 1]
+            if end > start:
+                self.files[index].write(records[start:end].tobytes())
+        self.rows += len(records)
+
+    def close(self) -> None:
+        for handle in self.files:
+            handle.close()
+
+
+def _load_partition(path: str) -> np.ndarray:
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return np.empty(0, dtype=SPILL_RECORD)
+    return np.memmap(path, dtype=SPILL_RECORD, mode="r")
+
+
+def _sorted_unique(records: np.ndarray):
+    """Ordena por llave y separa duplicados (se conserva la primera aparición)."""
+    order = np.argsort(records["key"], kind="stable")
+    keys = records["key"][order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    picked = order[first]
+    return keys[first], records["row_hash"][picked], records["row"][picked], int(len(keys) - first.sum())
+
+
+class DatasetDiff:
+    """Comparación por llave de dos datasets columnares con spill a disco."""
+
+    def __init__(
+        self,
+        keys: List[str],
+        compare: Optional[List[str]] = None,
+        memory_budget_mb: float = 512,
+        expected_rows: Optional[int] = None,
+        partitions: Optional[int] = None,
+        sample_size: int = 20,
+        spill_dir: Optional[str] = None
+    ):
+        """
+        Args:
+            keys: Columnas llave
+            compare: Columnas a comparar (por defecto todas las no llave del primer chunk izquierdo)
+            memory_budget_mb: Memoria máxima por partición durante el cruce
+            expected_rows: Filas esperadas por lado (para calcular particiones)
+            partitions: Número de particiones (por defecto según expected_rows)
+            sample_size: Número de filas de ejemplo por categoría
+            spill_dir: Directorio de archivos temporales
+        """
+        self.keys = keys
+        self.compare = compare
+        self.sample_size = sample_size
+        self.spill_dir = spill_dir
+        if partitions is None:
+            # Se deja margen x4 para ordenar y cruzar ambas partes en memoria
+            rows = expected_rows or 10_000_000
+            budget_bytes = memory_budget_mb * 1024 * 1024 / 4
+            partitions = max(1, math.ceil(2 * rows * SPILL_RECORD.itemsize / budget_bytes))
+        self.partitions = partitions
+
+    def _spill(self, chunks: ColumnChunks, writer: _PartitionWriter, side: str) -> None:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if self.compare is None:
+                self.compare = [column for column in chunk if column not in self.keys]
+            n_rows = len(next(iter(chunk.values())))
+            records = np.empty(n_rows, dtype=SPILL_RECORD)
+            records["key"] = hash_columns(chunk, self.keys)
+            records["row_hash"] = hash_columns(chunk, self.compare) if self.compare else 0
+            records["row"] = np.arange(writer.rows, writer.rows + n_rows, dtype=np.uint64)
+            writer.write(records)
+
+    def compare_datasets(self, left: ColumnChunks, right: ColumnChunks, progress=None) -> Dict[str, Any]:
+        """
+        Cruza ambos datasets.
+
+        Args:
+            left: Chunks del dataset izquierdo
+            right: Chunks del dataset derecho
+            progress: Callback opcional (porcentaje, mensaje)
+
+        Returns:
+            Dict con conteos (matched, unchanged, changed, only_left, only_right,
+            duplicados) y filas de ejemplo (número de fila 0-based de cada lado)
+        """
+        started = time.perf_counter()
+        counts = {"matched": 0, "unchanged": 0, "changed": 0, "only_left": 0, "only_right": 0,
+                  "duplicate_keys_left": 0, "duplicate_keys_right": 0}
+        samples: Dict[str, List[Any]] = {"changed": [], "only_left": [], "only_right": []}
+
+        def sample(name: str, values) -> None:
+            missing = self.sample_size - len(samples[name])
+            if missing > 0:
+                samples[name].extend(values[:missing].tolist())
+
+        with tempfile.TemporaryDirectory(prefix="ln1_diff_", dir=self.spill_dir) as directory:
+            left_writer = _PartitionWriter(directory, "left", self.partitions)
+            right_writer = _PartitionWriter(directory, "right", self.partitions)
+            try:
+                self._spill(left, left_writer, "left")
+                if progress:
+                    progress(25, f"Dataset izquierdo particionado ({left_writer.rows} filas)")
+                self._spill(right, right_writer, "right")
+                if progress:
+                    progress(50, f"Dataset derecho particionado ({right_writer.rows} filas)")
+            finally:
+                left_writer.close()
+                right_writer.close()
+
+            for index in range(self.partitions):
+                l_keys, l_hash, l_rows, l_dup = _sorted_unique(_load_partition(left_writer.paths[index]))
+                r_keys, r_hash, r_rows, r_dup = _sorted_unique(_load_partition(right_writer.paths[index]))
+                counts["duplicate_keys_left"] += l_dup
+                counts["duplicate_keys_right"] += r_dup
+
+                _, l_idx, r_idx = np.intersect1d(l_keys, r_keys, assume_unique=True, return_indices=True)
+                changed = l_hash[l_idx] != r_hash[r_idx]
+
+                only_left = np.ones(len(l_keys), dtype=bool)
+                only_left[l_idx] = False
+                only_right = np.ones(len(r_keys), dtype=bool)
+                only_right[r_idx] = False
+
+                counts["matched"] += int(len(l_idx))
+                counts["changed"] += int(changed.sum())
+                counts["only_left"] += int(only_left.sum())
+                counts["only_right"] += int(only_right.sum())
+
+                sample("changed", np.column_stack((l_rows[l_idx][changed], r_rows[r_idx][changed])))
+                sample("only_left", l_rows[only_left])
+                sample("only_right", r_rows[only_right])
+
+                if progress:
+                    progress(50 + 50 * (index + 1) / self.partitions, f"Partición {index + 1}/{self.partitions}")
+
+        counts["unchanged"] = counts["matched"] - counts["changed"]
+        elapsed = time.perf_counter() - started
+        return {
+            "keys": self.keys,
+            "compared_columns": self.compare,
+            "rows_left": left_writer.rows,
+            "rows_right": right_writer.rows,
+            "counts": counts,
+            "samples": {
+                "changed": [{"left_row": int(l), "right_row": int(r)} for l, r in samples["changed"]],
+                "only_left": samples["only_left"],
+                "only_right": samples["only_right"]
+            },
+            "partitions": self.partitions,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round((left_writer.rows + right_writer.rows) / elapsed, 1) if elapsed else None
+        }
+
+
+def chunks_from_rows(rows: List[Dict[str, Any]], chunk_rows: int = 100_000) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Convierte filas (dict) — por ejemplo el resultado SQL de un Runner — en chunks columnares.
+    """
+    columns = list(dict.fromkeys(column for row in rows[:1000] for column in row))
+    for start in range(0, len(rows), chunk_rows):
+        block = rows[start:start + chunk_rows]
+        yield {column: column_to_array([row.get(column) for row in block]) for column in columns}
@@ -0,0 +1,362 @@
+"""
+Ingesta de Excel en streaming con openpyxl (read_only=True).
+
+Lee los libros fila por fila y los convierte en chunks de columnas NumPy tipadas
+sin cargar la hoja completa en memoria. El tamaño del chunk se calcula a partir
+de un presupuesto de memoria y se reduce si el RSS del proceso crece más que el
+presupuesto desde que empezó la lectura (el RSS base del intérprete no cuenta).
+
+Las hojas de un libro se analizan en paralelo en un pool de procesos. El
+presupuesto total se reparte entre los procesos sin bajar de
+MIN_WORKER_BUDGET_MB por proceso: si no alcanza, se usan menos procesos.
+"""
+import multiprocessing
+import os
+import queue
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from openpyxl import load_workbook
+
+
+# Estimación de bytes por celda mientras la fila vive como objeto Python
+BYTES_PER_CELL_ESTIMATE = 96
+MIN_CHUNK_ROWS = 1_000
+MAX_CHUNK_ROWS = 200_000
+# Presupuesto mínimo por proceso del pool
+MIN_WORKER_BUDGET_MB = 128
+
+ProgressCallback = Callable[[float, str], None]
+
+
+class MemoryBudgetExceededError(Exception):
+    """El proceso superó el presupuesto de memoria aun con el chunk mínimo."""
+
+
+def current_rss_mb() -> float:
+    """RSS actual del proceso en MB (Linux /proc; fallback al pico de getrusage)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def chunk_rows_for_budget(n_columns: int, memory_budget_mb: float) -> int:
+    """
+    Calcula cuántas filas caben en un chunk según el presupuesto de memoria.
+    Se usa un cuarto del presupuesto para el buffer de filas.
+    """
+    budget_bytes = memory_budget_mb * 1024 * 1024 / 4
+    rows = int(budget_bytes / max(1, n_columns * BYTES_PER_CELL_ESTIMATE))
+    return max(MIN_CHUNK_ROWS, min(MAX_CHUNK_ROWS, rows))
+
+
+def plan_workers(n_sheets: int, memory_budget_mb: float, max_workers: Optional[int] = None) -> Tuple[int, float]:
+    """
+    Reparte el presupuesto de memoria entre los procesos del pool.
+    Usa min(hojas, max_workers o CPUs) procesos, limitado a los que caben con
+    MIN_WORKER_BUDGET_MB cada uno.
+
+    Returns:
+        Tupla (procesos, presupuesto por proceso en MB)
+    """
+    workers = max(1, min(n_sheets, max_workers or os.cpu_count() or 1))
+    workers = max(1, min(workers, int(memory_budget_mb // MIN_WORKER_BUDGET_MB)))
+    return workers, memory_budget_mb / workers
+
+
+def column_to_array(values: List[Any]) -> np.ndarray:
+    """
+    Convierte los valores de una columna en un array NumPy tipado:
+        - numéricos -> int64 (sin nulos) o float64 (nulos como NaN)
+        - fechas -> datetime64[ms] (nulos como NaT)
+        - resto -> object con los valores originales (texto o tipos mezclados;
+          se conservan para que el hash de llaves no dependa del tipo del chunk)
+    """
+    non_null = [v for v in values if v is not None]
+    if not non_null:
+        return np.full(len(values), np.nan, dtype=np.float64)
+
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in non_null):
+        if len(non_null) == len(values) and all(isinstance(v, int) for v in non_null):
+            try:
+                return np.fromiter(values, dtype=np.int64, count=len(values))
+            except OverflowError:
+                pass
+        return np.fromiter(
+            (np.nan if v is None else v for v in values), dtype=np.float64, count=len(values)
+        )
+
+    if all(isinstance(v, (datetime, date)) for v in non_null):
+        return np.array(
+            [np.datetime64("NaT") if v is None else np.datetime64(v, "ms") for v in values],
+            dtype="datetime64[ms]"
+        )
+
+    mixed = np.empty(len(values), dtype=object)
+    mixed[:] = values
+    return mixed
+
+
+def _header_names(header_row) -> List[str]:
+    names, seen = [], {}
+    for index, value in enumerate(header_row):
+        name = str(value).strip() if value not in (None, "") else f"col_{index + 1}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+class ColumnChunk:
+    """Bloque de filas consecutivas de una hoja como arrays NumPy por columna."""
+
+    def __init__(self, sheet: str, start_row: int, columns: Dict[str, np.ndarray]):
+        self.sheet = sheet
+        self.start_row = start_row
+        self.columns = columns
+
+    @property
+    def n_rows(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+
+def iter_sheet_chunks(
+    path: str,
+    sheet_name: Optional[str] = None,
+    memory_budget_mb: float = 256,
+    chunk_rows: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None
+) -> Iterator[ColumnChunk]:
+    """
+    Recorre una hoja en streaming y entrega chunks de columnas tipadas.
+
+    Args:
+        path: Ruta del archivo .xlsx
+        sheet_name: Hoja a leer (por defecto la activa)
+        memory_budget_mb: Crecimiento máximo del RSS del proceso durante la lectura
+        chunk_rows: Filas por chunk (por defecto según el presupuesto)
+        progress: Callback (porcentaje, mensaje)
+
+    Yields:
+        ColumnChunk con hasta chunk_rows filas
+
+    Raises:
+        MemoryBudgetExceededError: Si el RSS crece más que el presupuesto con el chunk mínimo
+    """
+    baseline_mb = current_rss_mb()
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name] if sheet_name else workbook.active
+        title = worksheet.title
+        total_rows = worksheet.max_row  # Dimensión declarada (puede ser None)
+        rows = worksheet.iter_rows(values_only=True)
+
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        names = _header_names(header_row)
+        n_columns = len(names)
+        rows_per_chunk = chunk_rows or chunk_rows_for_budget(n_columns, memory_budget_mb)
+
+        buffers: List[List[Any]] = [[] for _ in names]
+        start_row, read_rows = 1, 0
+
+        def flush() -> ColumnChunk:
+            chunk = ColumnChunk(
+                sheet=title,
+                start_row=start_row,
+                columns={name: column_to_array(buffer) for name, buffer in zip(names, buffers)}
+            )
+            for buffer in buffers:
+                buffer.clear()
+            return chunk
+
+        for row in rows:
+            for index in range(n_columns):
+                buffers[index].append(row[index] if index < len(row) else None)
+            read_rows += 1
+
+            if len(buffers[0]) >= rows_per_chunk:
+                yield flush()
+                start_row = read_rows + 1
+
+                # Ajustar el chunk si el proceso excede su presupuesto
+                grown_mb = current_rss_mb() - baseline_mb
+                if grown_mb > memory_budget_mb:
+                    if rows_per_chunk <= MIN_CHUNK_ROWS:
+                        raise MemoryBudgetExceededError(
+                            f"El RSS creció {grown_mb:.0f}MB y supera el presupuesto de {memory_budget_mb}MB"
+                        )
+                    rows_per_chunk = max(MIN_CHUNK_ROWS, rows_per_chunk // 2)
+
+                if progress and total_rows:
+                    progress(min(99.0, read_rows * 100 / max(1, total_rows - 1)), f"{title}: {read_rows} filas")
+
+        if buffers[0]:
+            yield flush()
+    finally:
+        workbook.close()
+
+
+class ColumnStats:
+    """Estadísticas incrementales de una columna."""
+
+    def __init__(self):
+        self.kind: Optional[str] = None
+        self.count = 0
+        self.nulls = 0
+        self.sum = 0.0
+        self.min: Any = None
+        self.max: Any = None
+
+    def update(self, values: np.ndarray) -> None:
+        kind = values.dtype.kind
+        # Una columna con tipos mezclados entre chunks pasa a texto
+        if self.kind is None:
+            self.kind = kind
+        elif self.kind != kind:
+            self.kind = "f" if {self.kind, kind} <= {"i", "f"} else "O"
+
+        if kind in "if":
+            mask = ~np.isnan(values) if kind == "f" else np.ones(len(values), dtype=bool)
+            valid = values[mask]
+            self.nulls += int(len(values) - len(valid))
+            self.count += int(len(valid))
+            if len(valid):
+                self.sum += float(valid.sum())
+                chunk_min, chunk_max = float(valid.min()), float(valid.max())
+                self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+                self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+        elif kind == "M":
+            mask = ~np.isnat(values)
+            valid = values[mask]
+            self.nulls += int(len(values) - len(valid))
+            self.count += int(len(valid))
+            if len(valid):
+                chunk_min, chunk_max = valid.min(), valid.max()
+                self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+                self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+        else:
+            nulls = sum(1 for v in values if v is None)
+            self.nulls += nulls
+            self.count += len(values) - nulls
+
+    def to_dict(self) -> Dict[str, Any]:
+        kinds = {"i": "integer", "f": "float", "M": "datetime", "O": "text", "b": "boolean"}
+        data = {"type": kinds.get(self.kind, "text"), "count": self.count, "nulls": self.nulls}
+        if self.kind in ("i", "f") and self.count:
+            data.update({"sum": self.sum, "mean": self.sum / self.count, "min": self.min, "max": self.max})
+        elif self.kind == "M" and self.count:
+            data.update({"min": str(self.min), "max": str(self.max)})
+        return data
+
+
+def analyze_sheet(
+    path: str,
+    sheet_name: Optional[str] = None,
+    memory_budget_mb: float = 256,
+    progress_queue=None
+) -> Dict[str, Any]:
+    """
+    Analiza una hoja en streaming y retorna estadísticas por columna.
+    Se ejecuta dentro de un proceso del pool; el progreso se envía por progress_queue.
+    """
+    started = time.perf_counter()
+    stats: Dict[str, ColumnStats] = {}
+    rows = 0
+
+    def report(percent: float, message: str) -> None:
+        if progress_queue is not None:
+            progress_queue.put((sheet_name, percent, message))
+
+    for chunk in iter_sheet_chunks(path, sheet_name, memory_budget_mb=memory_budget_mb, progress=report):
+        for name, values in chunk.columns.items():
+            stats.setdefault(name, ColumnStats()).update(values)
+        rows += chunk.n_rows
+
+    elapsed = time.perf_counter() - started
+    report(100.0, f"{sheet_name}: completada")
+    return {
+        "sheet": sheet_name,
+        "rows": rows,
+        "columns": {name: column.to_dict() for name, column in stats.items()},
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def analyze_workbook(
+    path: str,
+    sheets: Optional[List[str]] = None,
+    memory_budget_mb: float = 512,
+    max_workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    Analiza las hojas de un libro en paralelo con un pool de procesos.
+
+    Args:
+        path: Ruta del archivo .xlsx
+        sheets: Hojas a analizar (por defecto todas)
+        memory_budget_mb: Presupuesto total; se reparte entre los procesos (ver plan_workers)
+        max_workers: Procesos del pool (por defecto min(hojas, CPUs))
+        progress: Callback (porcentaje, mensaje) con el avance global
+
+    Returns:
+        Dict con el resumen por hoja y totales
+    """
+    if sheets is None:
+        workbook = load_workbook(path, read_only=True)
+        sheets = list(workbook.sheetnames)
+        workbook.close()
+
+    workers, budget_per_worker = plan_workers(len(sheets), memory_budget_mb, max_workers)
+    started = time.perf_counter()
+    sheet_progress = {sheet: 0.0 for sheet in sheets}
+    results: Dict[str, Any] = {}
+
+    with multiprocessing.Manager() as manager:
+        progress_queue = manager.Queue()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(analyze_sheet, path, sheet, budget_per_worker, progress_queue): sheet
+                for sheet in sheets
+            }
+            pending = set(futures)
+            while pending:
+                done = {future for future in pending if future.done()}
+                for future in done:
+                    results[futures[future]] = future.result()
+                pending -= done
+
+                try:
+                    sheet, percent, message = progress_queue.get(timeout=0.5)
+                    sheet_progress[sheet] = percent
+                    if progress:
+                        overall = sum(sheet_progress.values()) / max(1, len(sheet_progress))
+                        progress(overall, message)
+                except queue.Empty:
+                    continue
+
+    total_rows = sum(result["rows"] for result in results.values())
+    elapsed = time.perf_counter() - started
+    return {
+        "file": os.path.basename(path),
+        "sheets": [results[sheet] for sheet in sheets],
+        "total_rows": total_rows,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(total_rows / elapsed, 1) if elapsed else None,
+        "workers": workers,
+        "memory_budget_mb": memory_budget_mb
+    }
@@ -0,0 +1,40 @@
+"""
+Archivos subidos con /excel/upload.
+
+Los jobs y endpoints reciben solo el upload_id (nombre del archivo dentro de
+upload_dir) y lo resuelven aquí; nunca una ruta arbitraria del payload.
+El directorio debe ser compartido entre la API y los workers de jobs.
+
+Configuración en la sección [ANALYTICS] de config.ini:
+    [ANALYTICS]
+    upload_dir = uploads
+"""
+import os
+from configparser import ConfigParser
+from typing import Optional
+
+
+def get_upload_dir() -> str:
+    config = ConfigParser()
+    config.read("config.ini")
+    return config.get("ANALYTICS", "upload_dir", fallback="uploads")
+
+
+def resolve_upload(upload_id: Optional[str], upload_dir: Optional[str] = None) -> Optional[str]:
+    """
+    Ruta absoluta del archivo subido dentro de upload_dir.
+
+    Returns:
+        Ruta del archivo, o None si el upload_id viene vacío
+    """
+    upload_id = os.path.basename(upload_id or "")
+    if not upload_id:
+        return None
+    return os.path.abspath(os.path.join(upload_dir or get_upload_dir(), upload_id))
+
+
+def discard_upload(upload_id: Optional[str], upload_dir: Optional[str] = None) -> None:
+    """Borra el archivo subido si existe."""
+    path = resolve_upload(upload_id, upload_dir)
+    if path and os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, File, Form, UploadFile
+
+from analytics.domain.dataModel.model import DatasetCompareRequest
+from analytics.infrastructure.controller import AnalyticsController
+from infrastructure.security.api_token import require_api_token
+
+
+analytics = APIRouter()
+
+# ---------------------------------------
+# Análisis de archivos
+# ---------------------------------------
+@analytics.post("/excel/analyze", tags=["Analytics"])
+async def analyze_excel(file: UploadFile = File(...), code_user: str = Form(...)):
+    """
+    Sube un Excel (.xlsx) y lo analiza en segundo plano en streaming.
+    Retorna el job_id; el progreso llega por el WebSocket del usuario.
+    """
+    controller = AnalyticsController()
+    return await controller.analyze_excel(file, code_user)
+
+
+@analytics.post("/excel/upload", tags=["Analytics"])
+async def upload_excel(file: UploadFile = File(...)):
+    """
+    Sube un Excel (.xlsx) para usarlo luego como fuente de una comparación.
+    Retorna el upload_id.
+    """
+    controller = AnalyticsController()
+    return await controller.upload_excel(file)
+
+
+@analytics.post("/datasets/compare", tags=["Analytics"], dependencies=[Depends(require_api_token)])
+def compare_datasets(req: DatasetCompareRequest):
+    """
+    Cruza dos datasets (Excel subido o consulta de Runner) por columnas llave
+    en segundo plano. Reporta filas coincidentes, solo-izquierda, solo-derecha y cambiadas.
+    Requiere Authorization: Bearer ([API] token); las fuentes runner_sql solo
+    aceptan consultas de lectura.
+    """
+    controller = AnalyticsController()
+    return controller.compare_datasets(req)
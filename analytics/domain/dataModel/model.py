@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+
+class DatasetSource(BaseModel):
+    type: Literal["upload", "runner_sql"]
+    # type=upload: archivo subido con /excel/upload
+    upload_id: Optional[str] = None
+    sheet: Optional[str] = None
+    # type=runner_sql: consulta ejecutada en un Runner
+    runner_id: Optional[str] = None
+    client_name: Optional[str] = None
+    adapter_type: Optional[str] = None
+    query: Optional[str] = None
+    database: Optional[str] = None
+
+
+class DatasetCompareRequest(BaseModel):
+    code_user: str
+    left: DatasetSource
+    right: DatasetSource
+    keys: List[str]
+    compare: Optional[List[str]] = None
+    expected_rows: Optional[int] = None
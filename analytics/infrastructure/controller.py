@@ -0,0 +1,146 @@
+import os
+import uuid
+from configparser import ConfigParser
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import ORJSONResponse
+
+from analytics.application.uploads import get_upload_dir, resolve_upload
+from analytics.domain.dataModel.model import DatasetCompareRequest, DatasetSource
+from jobs.infrastructure.redis_job_queue import job_queue
+from runner.application.sql_guard import is_read_only_sql
+
+
+class AnalyticsController:
+    ALLOWED_EXTENSIONS = (".xlsx", ".xlsm")
+    READ_CHUNK_BYTES = 1024 * 1024
+
+    def __init__(self):
+        config = ConfigParser()
+        config.read("config.ini")
+
+        # El directorio debe ser compartido entre la API y los workers de jobs
+        self.upload_dir = get_upload_dir()
+        self.max_upload_mb = config.getint("ANALYTICS", "max_upload_mb", fallback=150)
+        self.memory_budget_mb = config.getint("ANALYTICS", "memory_budget_mb", fallback=512)
+        self.origin = "AnalyticsController"
+
+    async def _save_upload(self, file: UploadFile) -> str:
+        """Guarda el archivo en disco por bloques respetando el tamaño máximo."""
+        os.makedirs(self.upload_dir, exist_ok=True)
+        extension = os.path.splitext(file.filename or "")[1].lower()
+        path = os.path.join(self.upload_dir, f"{uuid.uuid4()}{extension}")
+        max_bytes = self.max_upload_mb * 1024 * 1024
+        written = 0
+
+        with open(path, "wb") as output:
+            while chunk := await file.read(self.READ_CHUNK_BYTES):
+                written += len(chunk)
+                if written > max_bytes:
+                    output.close()
+                    os.remove(path)
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"El archivo supera el máximo de {self.max_upload_mb}MB."
+                    )
+                output.write(chunk)
+        return path
+
+    async def analyze_excel(self, file: UploadFile, code_user: str):
+        extension = os.path.splitext(file.filename or "")[1].lower()
+        if extension not in self.ALLOWED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Formato no soportado. Usa: {', '.join(self.ALLOWED_EXTENSIONS)}"
+            )
+
+        try:
+            path = await self._save_upload(file)
+            job_id = job_queue.enqueue(
+                job_type="excel_analysis",
+                payload={
+                    "upload_id": os.path.basename(path),
+                    "filename": file.filename,
+                    "memory_budget_mb": self.memory_budget_mb
+                },
+                code_user=code_user
+            )
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"No se pudo procesar el archivo: {e}")
+
+        return ORJSONResponse(
+            status_code=202,
+            content={
+                "status": True,
+                "msg": "Archivo recibido. El análisis se ejecuta en segundo plano.",
+                "data": {"job_id": job_id}
+            }
+        )
+
+    async def upload_excel(self, file: UploadFile):
+        extension = os.path.splitext(file.filename or "")[1].lower()
+        if extension not in self.ALLOWED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Formato no soportado. Usa: {', '.join(self.ALLOWED_EXTENSIONS)}"
+            )
+
+        path = await self._save_upload(file)
+        return ORJSONResponse(
+            status_code=200,
+            content={
+                "status": True,
+                "msg": "Archivo recibido.",
+                "data": {"upload_id": os.path.basename(path), "filename": file.filename}
+            }
+        )
+
+    def _resolve_source(self, source: DatasetSource) -> dict:
+        if source.type == "upload":
+            # upload_id es solo el nombre de archivo dentro de upload_dir
+            path = resolve_upload(source.upload_id, self.upload_dir)
+            if not path or not os.path.exists(path):
+                raise HTTPException(status_code=404, detail=f"Archivo no encontrado: {source.upload_id}")
+            return {"type": "upload", "upload_id": os.path.basename(path), "sheet": source.sheet}
+
+        if not source.query or not source.adapter_type:
+            raise HTTPException(status_code=400, detail="runner_sql requiere adapter_type y query.")
+        if not is_read_only_sql(source.query):
+            raise HTTPException(
+                status_code=400,
+                detail="runner_sql solo acepta una consulta de lectura (SELECT, WITH, SHOW, DESCRIBE, EXPLAIN)."
+            )
+        return source.model_dump(exclude_none=True)
+
+    def compare_datasets(self, request: DatasetCompareRequest):
+        if not request.keys:
+            raise HTTPException(status_code=400, detail="Debes indicar al menos una columna llave.")
+
+        try:
+            job_id = job_queue.enqueue(
+                job_type="dataset_compare",
+                payload={
+                    "left": self._resolve_source(request.left),
+                    "right": self._resolve_source(request.right),
+                    "keys": request.keys,
+                    "compare": request.compare,
+                    "expected_rows": request.expected_rows,
+                    "memory_budget_mb": self.memory_budget_mb
+                },
+                code_user=request.code_user
+            )
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"No se pudo encolar la comparación: {e}")
+
+        return ORJSONResponse(
+            status_code=202,
+            content={
+                "status": True,
+                "msg": "Comparación encolada. El resultado se procesa en segundo plano.",
+                "data": {"job_id": job_id}
+            }
+        )
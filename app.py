@@ -4,26 +4,96 @@ Coordina agentes IA para diferentes áreas de la empresa.
 """
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_mail import FastMail
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from configparser import ConfigParser
+from contextlib import asynccontextmanager
 import asyncio
 
 from infrastructure.config.redis_config import RedisConfig 
 from infrastructure.config.email_config import EmailConfig 
+from infrastructure.config.gemini_config import GeminiConfig
+from websocket.infrastructure.ws_admission import ws_admission
+from websocket.infrastructure.ws_push import ws_push
  
 # Leer configuración
 config = ConfigParser()
 config.read("config.ini")
 
-# Configurar email usando módulo centralizado
-fm = FastMail(EmailConfig.get_config())
+# Precarga opcional de módulos pesados ([APP] preload). Solo importa código,
+# nunca crea clientes: con gunicorn --preload se ejecuta una vez en el master
+# y los workers lo heredan; los clientes se crean por worker en el lifespan.
+PRELOAD = config.getboolean("APP", "preload", fallback=False)
+
+
+def preload_modules():
+    """Importa el SDK de Gemini, el grafo LangGraph y FastAPI-Mail."""
+    GeminiConfig.preload()
+    import fastapi_mail  # noqa: F401
+    import langgraph.infrastructure.lang_controller  # noqa: F401
+
+
+def preload_shared_state():
+    """
+    Carga el estado inmutable que los workers comparten (copy-on-write) cuando
+    se ejecuta en el master de gunicorn: módulos, grafo compilado, índice de
+    acciones y clasificador local. El cliente Redis usado se cierra antes del
+    fork; cada worker crea el suyo.
+    """
+    preload_modules()
+
+    from langgraph.application.action_index import action_index
+    from langgraph.application.lang_response import LangGraphResponse
+    from langgraph.application.local_classifier import local_classifier
+    from langgraph.domain.graph import get_default_graph
+
+    get_default_graph()
+    try:
+        redis_client = RedisConfig.get_client()
+        action_index.sync(LangGraphResponse.load_actions(redis_client))
+        local_classifier.refresh(redis_client, force=True)
+    except Exception as e:
+        print(f"⚠️ No se pudo precargar el catálogo de acciones: {e}")
+    finally:
+        RedisConfig.reset()
+
+
+def warm_up_providers():
+    """Crea los clientes del worker antes de recibir tráfico."""
+    RedisConfig.get_client()
+    try:
+        GeminiConfig.get_genai()
+        EmailConfig.get_mail()
+    except Exception as e:
+        # Un proveedor mal configurado no debe impedir el arranque del worker
+        print(f"⚠️ Precarga de proveedores incompleta: {e}")
+
+
+if PRELOAD:
+    preload_modules()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranque por worker (después del fork): clientes de proveedores si hay
+    precarga y tareas de fondo (push a los WebSockets de este worker desde
+    cualquier proceso, ej: progreso de jobs; renovación de los cupos de conexión).
+    Sin precarga, los proveedores se cargan de forma perezosa en su primer uso.
+    """
+    if PRELOAD:
+        await asyncio.to_thread(warm_up_providers)
+    ws_push.start()
+    ws_admission.start()
+    yield
+    await ws_admission.stop()
+    await ws_push.stop()
 
-# Inicializar cliente Redis (se crea la instancia singleton)
-redis_client = RedisConfig.get_client()
 
 # Configurar FastAPI
 app = FastAPI(
+    lifespan=lifespan,
+    # Serialización con orjson para todas las respuestas por defecto
+    default_response_class=ORJSONResponse,
     title=config.get("APP", "title", fallback="API LN1 - AI Agents"),
     description=config.get("APP", "description", fallback="""
         Bienvenido a la documentación de **API LN1**.  
@@ -57,7 +127,7 @@ async def timeout_middleware(request: Request, call_next):
     try:
         return await asyncio.wait_for(call_next(request), timeout=240.0)
     except asyncio.TimeoutError:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=408,
             content={
                 "status": False,
@@ -68,8 +138,14 @@ async def timeout_middleware(request: Request, call_next):
 
 
 # Incluir routers
+from analytics.domain.analytics import analytics
 from gemini.domain.gemini import gemini
+from jobs.domain.jobs import jobs
+from langgraph.domain.agent import agent
 from websocket.domain.ws import ws
 
 app.include_router(gemini, prefix="/api/v1")
+app.include_router(jobs, prefix="/api/v1")
+app.include_router(analytics, prefix="/api/v1")
+app.include_router(agent, prefix="/api/v1")
 app.include_router(ws)  # WebSocket no necesita prefijo
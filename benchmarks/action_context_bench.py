@@ -0,0 +1,136 @@
+"""
+Benchmark: tokens y tiempo del contexto de acciones en generate_text_with_tools.
+
+Compara el formato anterior (catálogo completo con json.dumps indent=2) contra el
+contexto compacto (top-N relevantes, una línea por acción, presupuesto de tokens)
+sobre un catálogo sintético de --catalog-size acciones generado a partir del
+fixture de replay. Los mensajes son los de las conversaciones del fixture.
+
+Los tokens se estiman localmente (~4 caracteres por token); con --gemini se
+cuentan además con count_tokens de la API (requiere api_key).
+
+Uso:
+    python -m benchmarks.action_context_bench --catalog-size 300
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+from benchmarks.graph_replay_bench import DEFAULT_FIXTURE, load_fixture
+from langgraph.application.action_context import ActionContextBuilder, estimate_tokens
+from langgraph.application.action_index import ActionIndex
+
+AREAS = ["ventas", "inventario", "logistica", "rrhh", "finanzas", "compras", "marketing", "soporte"]
+VERBS = ["Consulta", "Reporta", "Actualiza", "Exporta", "Compara", "Programa"]
+
+
+def build_catalog(fixture: Dict[str, Any], size: int) -> List[Dict[str, Any]]:
+    """Acciones del fixture más variantes sintéticas por área hasta llegar a size."""
+    actions = [
+        {**action, "params": action.get("params", {}), "source_key": key}
+        for key, group in fixture["actions"].items()
+        for action in group.values()
+    ]
+    i = 0
+    while len(actions) < size:
+        area, verb = AREAS[i % len(AREAS)], VERBS[(i // len(AREAS)) % len(VERBS)]
+        actions.append({
+            "id": f"{area}_{verb.lower()}_{i}",
+            "description": f"{verb} los indicadores de {area} por tienda y periodo (variante {i})",
+            "tags": [area, verb.lower()],
+            "priority": i % 3,
+            "params": {"tienda": "Código de tienda", "periodo": "Mes o rango de fechas"},
+            "required": ["tienda"],
+            "examples": [f"{verb.lower()} {area} de la tienda", f"quiero ver {area} del mes"],
+            "source_key": f"agente:actions:{area}"
+        })
+        i += 1
+    return actions
+
+
+def legacy_context(actions: List[Dict[str, Any]]) -> str:
+    catalog: Dict[str, List[Dict[str, Any]]] = {}
+    for action in actions:
+        catalog.setdefault(action["source_key"], []).append(action)
+    return f"\n\nAcciones disponibles:\n{json.dumps(catalog, indent=2)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokens del contexto de acciones: catálogo completo vs compacto")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--catalog-size", type=int, default=300)
+    parser.add_argument("--top-n", type=int, default=8)
+    parser.add_argument("--max-tokens", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--gemini", action="store_true", help="Contar tokens también con la API de Gemini")
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en este archivo")
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    actions = build_catalog(fixture, args.catalog_size)
+    messages = [
+        turn["message"]
+        for conversation in fixture["conversations"]
+        for turn in conversation["turns"]
+        if not turn["message"].startswith("{")
+    ]
+    builder = ActionContextBuilder(index=ActionIndex(), top_n=args.top_n, max_tokens=args.max_tokens)
+
+    started = time.perf_counter()
+    builder.build(messages[0], actions)
+    cold_ms = (time.perf_counter() - started) * 1000
+
+    timings, compact_tokens, included = [], [], []
+    for _ in range(args.repeat):
+        for message in messages:
+            started = time.perf_counter()
+            result = builder.build(message, actions)
+            timings.append((time.perf_counter() - started) * 1000)
+            compact_tokens.append(result["tokens"])
+            included.append(len(result["action_ids"]))
+
+    legacy = legacy_context(actions)
+    legacy_started = time.perf_counter()
+    for _ in range(args.repeat):
+        legacy_context(actions)
+    legacy_ms = (time.perf_counter() - legacy_started) * 1000 / args.repeat
+
+    report: Dict[str, Any] = {
+        "catalog_size": len(actions),
+        "messages": len(messages),
+        "legacy": {"tokens_est": estimate_tokens(legacy), "chars": len(legacy), "render_ms": round(legacy_ms, 3)},
+        "compact": {
+            "tokens_est_mean": round(statistics.mean(compact_tokens), 1),
+            "tokens_est_max": max(compact_tokens),
+            "actions_mean": round(statistics.mean(included), 1),
+            "build_cold_ms": round(cold_ms, 3),
+            "build_warm_p50_ms": round(statistics.median(timings), 3)
+        }
+    }
+
+    if args.gemini:
+        from infrastructure.config.gemini_config import GeminiConfig
+        model = GeminiConfig.get_genai().GenerativeModel("gemini-2.5-flash-lite")
+        sample = builder.build(messages[0], actions)["context"]
+        report["legacy"]["tokens_gemini"] = model.count_tokens(legacy).total_tokens
+        report["compact"]["tokens_gemini_sample"] = model.count_tokens(sample).total_tokens
+
+    print(f"Catálogo: {report['catalog_size']} acciones, {report['messages']} mensajes")
+    print(f"Anterior: ~{report['legacy']['tokens_est']} tokens por prompt ({report['legacy']['render_ms']} ms)")
+    print(
+        f"Compacto: ~{report['compact']['tokens_est_mean']} tokens (máx {report['compact']['tokens_est_max']}), "
+        f"{report['compact']['actions_mean']} acciones, build {report['compact']['build_warm_p50_ms']} ms "
+        f"(frío {report['compact']['build_cold_ms']} ms)"
+    )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: amplificación de escritura de los checkpoints del grafo.
+
+Reproduce las conversaciones del fixture de replay con el checkpointer
+incremental (RedisCheckpointSaver) y compara, por turno, contra la persistencia
+anterior: un SET del estado completo (conversation:{code_user}) tras cada invoke.
+
+Reporta por turno bytes enviados, comandos y viajes a Redis (un pipeline es un
+viaje) de ambos esquemas, la razón de amplificación (checkpoints / SET) y el
+tamaño almacenado por usuario al final del replay.
+
+Uso:
+    python -m benchmarks.checkpoint_write_bench --iterations 10
+    python -m benchmarks.checkpoint_write_bench --keep 5
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+from typing import Any, Dict, List
+
+from benchmarks.fakes import CountingRedis, FakeLLM, fake_redis_client
+from benchmarks.graph_replay_bench import DEFAULT_FIXTURE, iter_turns, load_fixture, seed_redis
+from infrastructure.concurrency.turn_lock import TurnLock
+from langgraph.application.local_classifier import LocalIntentClassifier
+from langgraph.application.node_context import NodeContext
+from langgraph.application.orchestrator import LangGraphOrchestrator
+from langgraph.domain.graph import build_graph
+from langgraph.infrastructure.redis_checkpointer import RedisCheckpointSaver
+
+
+def stored_bytes(client, pattern: str) -> int:
+    """Bytes de claves y valores guardados bajo un patrón (hashes, zsets y strings)."""
+    total = 0
+    for key in client.scan_iter(match=pattern):
+        total += len(key)
+        kind = client.type(key)
+        kind = kind.decode("utf-8") if isinstance(kind, bytes) else kind
+        if kind == "hash":
+            total += sum(len(field) + len(value) for field, value in client.hgetall(key).items())
+        elif kind == "zset":
+            total += sum(len(member) for member in client.zrange(key, 0, -1))
+        elif kind == "string":
+            total += len(client.get(key))
+    return total
+
+
+def mean(values: List[float]) -> float:
+    return round(statistics.mean(values), 1) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escrituras por turno: checkpoints incrementales vs SET del estado completo")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--keep", type=int, default=20, help="Checkpoints que se conservan por hilo")
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en este archivo")
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    redis_client = fake_redis_client()
+    seed_redis(redis_client, fixture)
+    checkpoint_client = CountingRedis(fake_redis_client(decode_responses=False))
+
+    context = NodeContext(
+        redis=redis_client,
+        llm=FakeLLM(fixture["llm_rules"]),
+        local_classifier=LocalIntentClassifier(shadow_rate=0.0, refresh_interval=3600)
+    )
+    saver = RedisCheckpointSaver(redis=checkpoint_client, keep=args.keep)
+    orchestrator = LangGraphOrchestrator(
+        graph=build_graph(context, checkpointer=saver),
+        redis=redis_client,
+        lock=TurnLock(redis=redis_client)
+    )
+
+    legacy_bytes: List[int] = []
+    checkpoint_bytes: List[int] = []
+    checkpoint_ops: List[int] = []
+    checkpoint_trips: List[int] = []
+    legacy_stored: Dict[str, int] = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for iteration in range(args.iterations):
+            for payload in iter_turns(fixture, iteration):
+                checkpoint_client.reset_counts()
+                state = orchestrator.run(payload)
+                checkpoint_bytes.append(checkpoint_client.bytes_sent)
+                checkpoint_ops.append(checkpoint_client.total_ops)
+                checkpoint_trips.append(checkpoint_client.round_trips)
+
+                # Persistencia anterior: SET conversation:{code_user} con el estado completo
+                key = f"conversation:{payload.code_user}"
+                legacy_bytes.append(len(key) + len(state.model_dump_json().encode("utf-8")))
+                legacy_stored[payload.code_user] = legacy_bytes[-1]
+
+    users = list(legacy_stored)
+    checkpoint_stored = [stored_bytes(checkpoint_client, f"checkpoint:{user}:*") for user in users]
+    report: Dict[str, Any] = {
+        "turns": len(legacy_bytes),
+        "users": len(users),
+        "keep": args.keep,
+        "legacy_set": {"bytes_per_turn": mean(legacy_bytes), "ops_per_turn": 1, "round_trips_per_turn": 1},
+        "checkpoints": {
+            "bytes_per_turn": mean(checkpoint_bytes),
+            "bytes_per_turn_p95": sorted(checkpoint_bytes)[int(len(checkpoint_bytes) * 0.95)],
+            "ops_per_turn": mean(checkpoint_ops),
+            "round_trips_per_turn": mean(checkpoint_trips)
+        },
+        "write_amplification": round(sum(checkpoint_bytes) / sum(legacy_bytes), 2),
+        "stored_bytes_per_user": {"legacy_set": mean(list(legacy_stored.values())), "checkpoints": mean(checkpoint_stored)}
+    }
+
+    print(f"Turnos: {report['turns']} ({report['users']} usuarios, keep={args.keep})")
+    print(
+        f"SET completo: {report['legacy_set']['bytes_per_turn']} B/turno, 1 viaje | "
+        f"checkpoints: {report['checkpoints']['bytes_per_turn']} B/turno, "
+        f"{report['checkpoints']['round_trips_per_turn']} viajes ({report['checkpoints']['ops_per_turn']} comandos)"
+    )
+    print(f"Amplificación de escritura: x{report['write_amplification']}")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
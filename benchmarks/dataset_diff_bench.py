@@ -0,0 +1,91 @@
+"""
+Benchmark: comparación de datasets por llave (filas/s y pico de RSS).
+
+Genera dos datasets sintéticos en chunks (sin materializarlos completos):
+    - derecho = izquierdo - 5% eliminadas + 5% nuevas, con 2% de filas cambiadas
+
+Uso:
+    python -m benchmarks.dataset_diff_bench --rows 10000000 --chunk-rows 1000000
+"""
+import argparse
+import json
+import resource
+import time
+
+import numpy as np
+
+from analytics.application.dataset_diff import DatasetDiff
+from analytics.application.excel_ingestion import current_rss_mb
+
+
+def generate_chunks(rows: int, chunk_rows: int, side: str, seed: int = 42):
+    """
+    Genera chunks columnares. El lado derecho elimina ids % 20 == 0, agrega
+    `rows // 20` ids nuevos y modifica el monto de ids % 50 == 1.
+    """
+    for start in range(0, rows, chunk_rows):
+        ids = np.arange(start, min(rows, start + chunk_rows), dtype=np.int64)
+        rng = np.random.default_rng(seed + start)
+        amount = np.round(rng.uniform(1, 1000, len(ids)), 2)
+        store = np.array([f"T{value:03d}" for value in (ids % 300)], dtype=object)
+        if side == "right":
+            amount = np.where(ids % 50 == 1, amount + 1, amount)
+            keep = ids % 20 != 0
+            ids, amount, store = ids[keep], amount[keep], store[keep]
+        yield {"id": ids, "tienda": store, "monto": amount}
+
+    if side == "right":
+        extra = rows // 20
+        for start in range(0, extra, chunk_rows):
+            ids = np.arange(rows + start, rows + min(extra, start + chunk_rows), dtype=np.int64)
+            yield {
+                "id": ids,
+                "tienda": np.array(["T999"] * len(ids), dtype=object),
+                "monto": np.ones(len(ids), dtype=np.float64)
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de comparación de datasets")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--memory-budget-mb", type=float, default=512)
+    parser.add_argument("--spill-dir", default=None)
+    args = parser.parse_args()
+
+    rss_before = current_rss_mb()
+    diff = DatasetDiff(
+        keys=["id"],
+        memory_budget_mb=args.memory_budget_mb,
+        expected_rows=args.rows,
+        spill_dir=args.spill_dir
+    )
+
+    started = time.perf_counter()
+    result = diff.compare_datasets(
+        generate_chunks(args.rows, args.chunk_rows, "left"),
+        generate_chunks(args.rows, args.chunk_rows, "right"),
+        progress=lambda percent, message: print(f"  {percent:5.1f}% {message}")
+    )
+    elapsed = time.perf_counter() - started
+
+    expected = {
+        "only_left": args.rows // 20,
+        "only_right": args.rows // 20,
+        # ids % 50 == 1 son impares, nunca coinciden con los eliminados (ids % 20 == 0)
+        "changed": len(range(1, args.rows, 50))
+    }
+    print(json.dumps({
+        "rows_per_side": args.rows,
+        "partitions": result["partitions"],
+        "counts": result["counts"],
+        "expected": expected,
+        "elapsed_s": round(elapsed, 2),
+        "rows_per_s": round(2 * args.rows / elapsed, 1),
+        "rss_before_mb": round(rss_before, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
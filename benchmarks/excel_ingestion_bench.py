@@ -0,0 +1,88 @@
+"""
+Benchmark: ingesta de Excel en streaming (filas/s y pico de RSS).
+
+Genera (una sola vez) un libro con N filas usando openpyxl en modo write_only
+y lo recorre con iter_sheet_chunks / analyze_workbook.
+
+Uso:
+    python -m benchmarks.excel_ingestion_bench --rows 1000000 --memory-budget-mb 512
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import time
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+from analytics.application.excel_ingestion import analyze_workbook, current_rss_mb, iter_sheet_chunks
+
+
+def generate_workbook(path: str, rows: int) -> None:
+    """Genera un libro de ventas sintético con columnas de varios tipos."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("ventas")
+    sheet.append(["id", "fecha", "tienda", "producto", "cantidad", "precio", "descuento"])
+    base = datetime(2024, 1, 1)
+    rng = random.Random(42)
+    for index in range(rows):
+        sheet.append([
+            index,
+            base + timedelta(minutes=index),
+            f"T{rng.randint(1, 300):03d}",
+            f"SKU-{rng.randint(1, 50000)}",
+            rng.randint(1, 20),
+            round(rng.uniform(1, 500), 2),
+            None if index % 7 else round(rng.random(), 2),
+        ])
+    workbook.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--memory-budget-mb", type=float, default=512)
+    parser.add_argument("--path", default=None, help="Ruta del libro (se genera si no existe)")
+    args = parser.parse_args()
+
+    path = args.path or f"/tmp/ln1_bench_{args.rows}.xlsx"
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        generate_workbook(path, args.rows)
+        print(f"📄 Libro generado en {time.perf_counter() - started:.1f}s ({os.path.getsize(path) / 1e6:.1f}MB)")
+
+    baseline_rss = current_rss_mb()
+    started = time.perf_counter()
+    rows, chunks = 0, 0
+    for chunk in iter_sheet_chunks(path, memory_budget_mb=args.memory_budget_mb):
+        rows += chunk.n_rows
+        chunks += 1
+    streaming_s = time.perf_counter() - started
+    streaming_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    summary = analyze_workbook(path, memory_budget_mb=args.memory_budget_mb)
+    pool_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+    print(json.dumps({
+        "rows": rows,
+        "file_mb": round(os.path.getsize(path) / 1e6, 1),
+        "streaming": {
+            "chunks": chunks,
+            "elapsed_s": round(streaming_s, 2),
+            "rows_per_s": round(rows / streaming_s, 1),
+            "baseline_rss_mb": round(baseline_rss, 1),
+            "peak_rss_mb": round(streaming_peak, 1),
+        },
+        "analyze_workbook": {
+            "elapsed_s": summary["elapsed_s"],
+            "rows_per_s": summary["rows_per_s"],
+            "peak_child_rss_mb": round(pool_peak, 1),
+        },
+        "memory_budget_mb": args.memory_budget_mb,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
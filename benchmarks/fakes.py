@@ -0,0 +1,348 @@
+"""
+Dobles de prueba para benchmarks: Redis con conteo de operaciones y un LLM
+determinista con latencia configurable (misma interfaz que GeminiLLMAdapter).
+"""
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+from langgraph.application.history import HEADER
+
+HISTORY_HEADER = HEADER.lower()
+
+
+def payload_size(args, kwargs) -> int:
+    """Bytes de claves y valores enviados en un comando (incluye mapping=)."""
+    values = list(args) + list(kwargs.get("mapping", {}).items())
+    size = 0
+    for value in values:
+        if isinstance(value, tuple):
+            size += sum(payload_size((item,), {}) for item in value)
+        elif isinstance(value, dict):
+            size += sum(payload_size((key, item), {}) for key, item in value.items())
+        elif isinstance(value, (bytes, bytearray)):
+            size += len(value)
+        elif isinstance(value, str):
+            size += len(value.encode("utf-8"))
+        elif isinstance(value, (int, float)):
+            size += len(str(value))
+    return size
+
+
+class CountingPipeline:
+    """
+    Pipeline que cuenta los comandos encolados (y sus bytes) al ejecutarse.
+    Tras WATCH los comandos se cuentan (y responden) de inmediato, como en redis-py.
+    """
+
+    def __init__(self, pipeline, counter: Counter, owner=None):
+        self._pipeline = pipeline
+        self._counter = counter
+        self._owner = owner
+        self._queued: List[str] = []
+        self._queued_bytes = 0
+
+    def execute(self, *args, **kwargs):
+        self._counter.update(self._queued)
+        self._counter["(pipeline)"] += 1
+        if self._owner is not None:
+            self._owner.bytes_sent += self._queued_bytes
+            self._owner.round_trips += 1
+        self._queued = []
+        self._queued_bytes = 0
+        return self._pipeline.execute(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._pipeline, name)
+        if not callable(attribute):
+            return attribute
+
+        def queued(*args, **kwargs):
+            immediate = self._pipeline.watching and not self._pipeline.explicit_transaction
+            if name in ("watch", "unwatch", "multi") or immediate:
+                # WATCH pone el pipeline en modo inmediato hasta MULTI: cada comando es un viaje
+                if name != "multi":
+                    self._counter[name] += 1
+                    if self._owner is not None:
+                        self._owner.bytes_sent += payload_size(args, kwargs)
+                        self._owner.round_trips += 1
+                result = attribute(*args, **kwargs)
+                return self if name == "multi" else result
+            self._queued.append(name)
+            self._queued_bytes += payload_size(args, kwargs)
+            attribute(*args, **kwargs)
+            return self
+
+        return queued
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._pipeline.reset()
+
+
+class CountingRedis:
+    """
+    Proxy de un cliente Redis (fakeredis o servidor local) que cuenta cada comando
+    y los bytes enviados (claves y valores). Un pipeline cuenta como un solo viaje.
+    execute_command se cuenta por el nombre del comando (ej: JSON.GET).
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.ops: Counter = Counter()
+        self.bytes_sent = 0
+        self.round_trips = 0
+
+    def reset_counts(self) -> None:
+        self.ops = Counter()
+        self.bytes_sent = 0
+        self.round_trips = 0
+
+    @property
+    def total_ops(self) -> int:
+        return sum(count for name, count in self.ops.items() if name != "(pipeline)")
+
+    def pipeline(self, *args, **kwargs) -> CountingPipeline:
+        return CountingPipeline(self._client.pipeline(*args, **kwargs), self.ops, owner=self)
+
+    def execute_command(self, *args, **kwargs):
+        self.ops[str(args[0]).upper() if args else "execute_command"] += 1
+        self.bytes_sent += payload_size(args, kwargs)
+        self.round_trips += 1
+        return self._client.execute_command(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def counted(*args, **kwargs):
+            self.ops[name] += 1
+            self.bytes_sent += payload_size(args, kwargs)
+            self.round_trips += 1
+            return attribute(*args, **kwargs)
+
+        return counted
+
+
+class SlowPipeline:
+    """Pipeline que agrega la latencia de red una vez por execute (un viaje)."""
+
+    def __init__(self, pipeline, rtt: float):
+        self._pipeline = pipeline
+        self._rtt = rtt
+
+    def execute(self, *args, **kwargs):
+        time.sleep(self._rtt)
+        return self._pipeline.execute(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._pipeline, name)
+        if not callable(attribute):
+            return attribute
+
+        def queued(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            return self if result is self._pipeline else result
+
+        return queued
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._pipeline.reset()
+
+
+class SlowRedis:
+    """
+    Proxy de un cliente Redis que simula la latencia de red: cada comando (o
+    pipeline) duerme rtt_ms antes de responder, como un Redis remoto.
+    """
+
+    def __init__(self, client, rtt_ms: float = 1.0):
+        self._client = client
+        self._rtt = rtt_ms / 1000.0
+
+    def pipeline(self, *args, **kwargs) -> SlowPipeline:
+        return SlowPipeline(self._client.pipeline(*args, **kwargs), self._rtt)
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def delayed(*args, **kwargs):
+            time.sleep(self._rtt)
+            return attribute(*args, **kwargs)
+
+        return delayed
+
+
+class ResourceExhausted(Exception):
+    """Mismo nombre que el 429 de google.api_core (lo reconoce el limitador)."""
+
+
+class DeadlineExceeded(Exception):
+    """Mismo nombre que el timeout de google.api_core."""
+
+
+
+class FakeLLM:
+    """
+    LLM determinista: responde la primera intención cuya palabra clave aparezca
+    en el prompt. Simula latencia fija más jitter opcional (semilla fija) y,
+    con capacity, un proveedor que responde 429 sobre cierta concurrencia.
+    Con hang_rate, una fracción de llamadas no responde (solo las corta el timeout).
+    """
+
+    def __init__(
+        self,
+        rules: List[Tuple[str, str]],
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        default_intent: str = "desconocida",
+        seed: int = 42,
+        capacity: Optional[int] = None,
+        limiter=None,
+        hang_rate: float = 0.0
+    ):
+        """
+        Args:
+            rules: Lista de (palabra_clave, intención), evaluadas en orden
+            latency_ms: Latencia base por llamada
+            jitter_ms: Jitter uniforme adicional [0, jitter_ms]
+            default_intent: Intención si ninguna regla coincide
+            seed: Semilla del jitter
+            capacity: Llamadas concurrentes que acepta el "proveedor" antes de responder 429
+            limiter: AdaptiveLimiter a aplicar como lo hace GeminiLLMAdapter
+            hang_rate: Fracción de llamadas colgadas (0-1)
+        """
+        self.rules = [(keyword.lower(), intent) for keyword, intent in rules]
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.default_intent = default_intent
+        self.capacity = capacity
+        self.limiter = limiter
+        self.hang_rate = hang_rate
+        self.calls = 0
+        self.rejected = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def _sleep(self, timeout: Optional[float] = None) -> None:
+        delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if self.hang_rate and self._rng.random() < self.hang_rate:
+            delay = 3600 * 1000
+        if timeout is not None and delay / 1000 > timeout:
+            time.sleep(timeout)
+            raise DeadlineExceeded(f"504 Deadline Exceeded ({timeout:.1f}s)")
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _call_provider(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            self.calls += 1
+            self._in_flight += 1
+            overloaded = self.capacity is not None and self._in_flight > self.capacity
+        try:
+            self._sleep(timeout)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        if overloaded:
+            self.rejected += 1
+            raise ResourceExhausted("429 Resource has been exhausted")
+
+    def generate_text(self, prompt: str, area: Optional[str] = None, deadline=None) -> Dict[str, Any]:
+        queue_timeout = deadline.timeout("llm_queue") if deadline else None
+        with self.limiter.acquire(area, timeout=queue_timeout) if self.limiter else nullcontext():
+            self._call_provider(deadline.timeout("llm") if deadline else None)
+        lowered = prompt.lower()
+        if lowered.startswith(HISTORY_HEADER):
+            # Como el LLM real, clasifica el mensaje actual y no los del historial
+            lowered = lowered.split("\n\n", 1)[-1]
+        intent = next((intent for keyword, intent in self.rules if keyword in lowered), self.default_intent)
+        text = f"{intent}\nPuedo ayudarte con {intent}."
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(text) // 4)
+        return {
+            "text": text,
+            "tokens": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            },
+            "finish_reason": "STOP"
+        }
+
+    def generate_text_with_tools(self, prompt: str, include_actions: bool = True, area: Optional[str] = None, deadline=None) -> Dict[str, Any]:
+        response = self.generate_text(prompt, area=area, deadline=deadline)
+        return {"success": True, "response": response["text"], "actions_used": []}
+
+
+class FakeProvider:
+    """
+    Proveedor para LLMRouter (interfaz LLMProviderPort) con latencia de cola pesada:
+    latency_ms base, y con probabilidad slow_rate una latencia slow_ms. Con error_rate
+    falla con ResourceExhausted. Respeta cancel_event cortando la espera.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        latency_ms: float = 100.0,
+        jitter_ms: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_ms: float = 2000.0,
+        error_rate: float = 0.0,
+        seed: int = 42
+    ):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.calls = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def generate(self, prompt: str, timeout: Optional[float] = None, area: Optional[str] = None, cancel_event=None) -> Dict[str, Any]:
+        from infrastructure.ports.llm_port import LLMCancelled
+
+        with self._lock:
+            self.calls += 1
+            slow = self._rng.random() < self.slow_rate
+            failed = self._rng.random() < self.error_rate
+            jitter = self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        delay = (self.slow_ms if slow else self.latency_ms + jitter) / 1000
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise DeadlineExceeded(f"504 Deadline Exceeded ({timeout:.1f}s)")
+        if cancel_event is not None and cancel_event.wait(delay):
+            with self._lock:
+                self.cancelled += 1
+            raise LLMCancelled(self.name)
+        if cancel_event is None:
+            time.sleep(delay)
+        if failed:
+            raise ResourceExhausted("429 Resource has been exhausted")
+        return {"text": f"{self.name}: ok", "tokens": {}, "finish_reason": "STOP"}
+
+
+def fake_redis_client(url: Optional[str] = None, decode_responses: bool = True):
+    """Cliente Redis para benchmarks: servidor local si se indica url, si no fakeredis."""
+    if url:
+        import redis
+        return redis.Redis.from_url(url, decode_responses=decode_responses)
+
+    import fakeredis
+    return fakeredis.FakeRedis(decode_responses=decode_responses)
@@ -0,0 +1,252 @@
+"""
+Benchmark: replay offline de conversaciones sobre el grafo LangGraph.
+
+Reproduce turnos grabados (secuencias de WsChatMessageRequest) a través de
+LangGraphOrchestrator con un LLM falso determinista y Redis en memoria
+(fakeredis) o un servidor local. Reporta:
+    - latencia end-to-end y por nodo (p50/p95/p99)
+    - operaciones Redis por turno (total y por comando)
+    - memoria asignada por turno (tracemalloc, en una pasada aparte)
+
+Y compara contra un baseline guardado (falla con exit code 1 si hay regresión).
+
+Uso:
+    python -m benchmarks.graph_replay_bench --iterations 50
+    python -m benchmarks.graph_replay_bench --llm-latency-ms 300 --jitter-ms 100
+    python -m benchmarks.graph_replay_bench --save-baseline
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List
+
+from benchmarks.fakes import CountingRedis, FakeLLM, fake_redis_client
+from infrastructure.concurrency.turn_lock import TurnLock
+from infrastructure.metrics.latency import summarize_latencies
+from langgraph.application.local_classifier import LocalIntentClassifier
+from langgraph.application.node_context import NodeContext
+from langgraph.application.orchestrator import LangGraphOrchestrator
+from langgraph.domain.graph import build_graph
+from langgraph.infrastructure.redis_checkpointer import RedisCheckpointSaver
+from websocket.domain.dataModel.model import WsChatMessageRequest
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURE = os.path.join(BENCH_DIR, "fixtures", "graph_replay.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines", "graph_replay.json")
+
+# Métricas comparadas contra el baseline (por nodo se compara p50: el p95 sub-ms es muy ruidoso)
+COMPARED_METRICS = [
+    ("end_to_end_ms", "p50"),
+    ("end_to_end_ms", "p95"),
+    ("end_to_end_ms", "p99"),
+    ("redis_ops_per_turn", "mean"),
+    ("alloc_kb_per_turn", "mean"),
+]
+# Diferencia absoluta mínima para considerar regresión (evita ruido en valores pequeños)
+ABSOLUTE_FLOOR = {"end_to_end_ms": 0.2, "redis_ops_per_turn": 0.5, "alloc_kb_per_turn": 8.0, "nodes_ms": 0.25}
+
+
+def load_fixture(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def seed_redis(redis_client, fixture: Dict[str, Any]) -> None:
+    """Carga el catálogo de acciones y la regla del clasificador."""
+    for key, actions in fixture["actions"].items():
+        redis_client.set(key, json.dumps(actions, ensure_ascii=False))
+    redis_client.set("agente:rule:intent:classifier", fixture["classifier_rule"])
+
+
+class NodeTimer:
+    """Envoltorio de nodos que acumula su duración en ms."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def __call__(self, name: str, node: Callable) -> Callable:
+        @functools.wraps(node)
+        def timed(state):
+            started = time.perf_counter()
+            try:
+                return node(state)
+            finally:
+                self.samples[name].append((time.perf_counter() - started) * 1000)
+
+        return timed
+
+
+def iter_turns(fixture: Dict[str, Any], iteration: int):
+    """Genera los payloads de cada turno; cada iteración usa usuarios distintos."""
+    for conversation in fixture["conversations"]:
+        code_user = f"{conversation['code_user']}-{iteration}"
+        for turn in conversation["turns"]:
+            yield WsChatMessageRequest(
+                message=turn["message"],
+                code_user=code_user,
+                fullname=conversation["fullname"],
+                area=conversation["area"],
+                params_required=turn.get("params_required")
+            )
+
+
+def build_orchestrator(args, fixture, redis_client, timer=None, checkpoint_client=None):
+    llm = FakeLLM(fixture["llm_rules"], latency_ms=args.llm_latency_ms, jitter_ms=args.jitter_ms)
+    classifier = LocalIntentClassifier(shadow_rate=0.0, refresh_interval=3600, enabled=not args.no_local_classifier)
+    context = NodeContext(redis=redis_client, llm=llm, local_classifier=classifier)
+    checkpointer = RedisCheckpointSaver(redis=checkpoint_client or fake_redis_client(args.redis_url, decode_responses=False))
+    graph = build_graph(context, instrument=timer, checkpointer=checkpointer)
+    return LangGraphOrchestrator(graph=graph, redis=redis_client, lock=TurnLock(redis=redis_client)), llm
+
+
+def run(args) -> Dict[str, Any]:
+    fixture = load_fixture(args.fixture)
+    redis_client = CountingRedis(fake_redis_client(args.redis_url))
+    if not args.redis_url:
+        redis_client.flushdb()
+    seed_redis(redis_client, fixture)
+    # Checkpoints del grafo (cliente binario); se descartan los de corridas anteriores
+    checkpoint_client = CountingRedis(fake_redis_client(args.redis_url, decode_responses=False))
+    stale = list(checkpoint_client.scan_iter(match="checkpoint:bench-*"))
+    if stale:
+        checkpoint_client.delete(*stale)
+
+    timer = NodeTimer()
+    orchestrator, llm = build_orchestrator(args, fixture, redis_client, timer, checkpoint_client)
+    quiet = contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext()
+
+    end_to_end: List[float] = []
+    redis_ops: List[int] = []
+    redis_bytes: List[int] = []
+    ops_by_command: Counter = Counter()
+
+    with quiet:
+        # Calentamiento (carga del índice local, imports perezosos)
+        for payload in iter_turns(fixture, -1):
+            orchestrator.run(payload)
+        timer.samples.clear()
+        llm.calls = 0
+
+        for iteration in range(args.iterations):
+            for payload in iter_turns(fixture, iteration):
+                redis_client.reset_counts()
+                checkpoint_client.reset_counts()
+                started = time.perf_counter()
+                orchestrator.run(payload)
+                end_to_end.append((time.perf_counter() - started) * 1000)
+                redis_ops.append(redis_client.total_ops + checkpoint_client.total_ops)
+                redis_bytes.append(redis_client.bytes_sent + checkpoint_client.bytes_sent)
+                ops_by_command.update(redis_client.ops)
+                ops_by_command.update(checkpoint_client.ops)
+
+        # Pasada aparte con tracemalloc (distorsiona los tiempos)
+        allocations: List[float] = []
+        tracemalloc.start()
+        try:
+            for iteration in range(args.alloc_iterations):
+                for payload in iter_turns(fixture, args.iterations + iteration):
+                    tracemalloc.reset_peak()
+                    before, _ = tracemalloc.get_traced_memory()
+                    orchestrator.run(payload)
+                    _, peak = tracemalloc.get_traced_memory()
+                    allocations.append((peak - before) / 1024)
+        finally:
+            tracemalloc.stop()
+
+    turns = len(end_to_end)
+    return {
+        "config": {
+            "fixture": os.path.basename(args.fixture),
+            "iterations": args.iterations,
+            "llm_latency_ms": args.llm_latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "redis": "server" if args.redis_url else "fakeredis",
+            "local_classifier": not args.no_local_classifier
+        },
+        "turns": turns,
+        "llm_calls_per_turn": round(llm.calls / turns, 3) if turns else None,
+        "end_to_end_ms": summarize_latencies(end_to_end, digits=3),
+        "nodes_ms": {name: summarize_latencies(samples, digits=3) for name, samples in sorted(timer.samples.items())},
+        "redis_ops_per_turn": summarize_latencies(redis_ops, digits=2),
+        "redis_bytes_per_turn": summarize_latencies(redis_bytes, digits=1),
+        "redis_ops_by_command": {
+            name: round(count / turns, 2) for name, count in ops_by_command.most_common() if turns
+        },
+        "alloc_kb_per_turn": summarize_latencies(allocations, digits=1),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Retorna la lista de regresiones (valor actual > baseline * (1 + tolerancia))."""
+    checks = [
+        (section, section, field, report[section], baseline.get(section, {}))
+        for section, field in COMPARED_METRICS
+    ]
+    for node, summary in report["nodes_ms"].items():
+        checks.append((f"nodes_ms.{node}", "nodes_ms", "p50", summary, baseline.get("nodes_ms", {}).get(node, {})))
+
+    regressions = []
+    for label, section, field, current, previous in checks:
+        now, before = current.get(field), previous.get(field)
+        if now is None or before is None:
+            continue
+        limit = max(before * (1 + tolerance), before + ABSOLUTE_FLOOR[section])
+        status = "REGRESIÓN" if now > limit else "ok"
+        print(f"  {label:45s} {field:5s} {before:>10} -> {now:>10}  {status}")
+        if now > limit:
+            regressions.append(f"{label}.{field}: {before} -> {now}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay offline de conversaciones sobre el grafo")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--alloc-iterations", type=int, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--redis-url", default=None, help="Servidor Redis local (por defecto fakeredis)")
+    parser.add_argument("--no-local-classifier", action="store_true")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--verbose", action="store_true", help="Mostrar los prints de los nodos")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"💾 Baseline guardado en {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️ No hay baseline; usa --save-baseline para crearlo")
+        return
+
+    with open(args.baseline, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    if baseline.get("config") != report["config"]:
+        print("⚠️ La configuración difiere del baseline; la comparación puede no ser válida")
+
+    print(f"\nComparación contra baseline (tolerancia {args.tolerance:.0%}):")
+    regressions = compare(report, baseline, args.tolerance)
+    if regressions:
+        print(f"❌ {len(regressions)} regresiones")
+        sys.exit(1)
+    print("✅ Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
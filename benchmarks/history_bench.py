@@ -0,0 +1,133 @@
+"""
+Benchmark: tamaño del prompt y del historial guardado según el largo de la conversación.
+
+Ejecuta conversaciones largas (un mensaje tras otro del mismo usuario) sobre el
+orquestador con checkpoints en Redis y un LLM falso, y en puntos de control
+(turno 10, 25, 50, ...) reporta:
+    - tokens del prompt del clasificador con el historial acotado (HistoryManager)
+    - tokens que tendría el prompt con la transcripción completa (sin acotar)
+    - bytes del historial guardado en el estado (serializado como en los checkpoints)
+    - resúmenes pedidos al LLM y turnos descartados
+
+Con historial acotado el prompt y el estado deben quedar planos aunque la
+conversación crezca.
+
+Uso:
+    python -m benchmarks.history_bench --turns 200 --users 3
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+from typing import Any, Dict, List
+
+from benchmarks.fakes import FakeLLM, fake_redis_client
+from benchmarks.graph_replay_bench import DEFAULT_FIXTURE, load_fixture, seed_redis
+from infrastructure.concurrency.turn_lock import TurnLock
+from langgraph.application.action_context import estimate_tokens
+from langgraph.application.history import HistoryManager, render_turn
+from langgraph.application.local_classifier import LocalIntentClassifier
+from langgraph.application.node_context import NodeContext
+from langgraph.application.orchestrator import LangGraphOrchestrator
+from langgraph.domain.graph import build_graph
+from langgraph.domain.states import HistoryTurn
+from langgraph.infrastructure.redis_checkpointer import RedisCheckpointSaver, _pack
+from websocket.domain.dataModel.model import WsChatMessageRequest
+
+MESSAGES = [
+    "quiero ver las ventas de hoy de la tienda {i}",
+    "cuánto stock queda del producto {i} en almacén",
+    "necesito mi boleta de pago del mes {i}",
+    "quisiera salir de vacaciones la semana {i}",
+    "hola, una consulta más sobre el pedido {i}"
+]
+CHECKPOINTS = (10, 25, 50, 100, 200, 500, 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt y estado por turno: historial acotado vs transcripción completa")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--turns", type=int, default=200, help="Turnos por conversación")
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--max-turns", type=int, default=6)
+    parser.add_argument("--max-tokens", type=int, default=300)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Latencia del LLM (también la del resumen)")
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en este archivo")
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    redis_client = fake_redis_client()
+    seed_redis(redis_client, fixture)
+    history = HistoryManager(max_turns=args.max_turns, max_tokens=args.max_tokens)
+    context = NodeContext(
+        redis=redis_client,
+        llm=FakeLLM(fixture["llm_rules"], latency_ms=args.llm_latency_ms),
+        # Sin pre-clasificador: todos los turnos arman el prompt del LLM
+        local_classifier=LocalIntentClassifier(enabled=False),
+        history=history
+    )
+    saver = RedisCheckpointSaver(redis=fake_redis_client(decode_responses=False))
+    orchestrator = LangGraphOrchestrator(
+        graph=build_graph(context, checkpointer=saver),
+        redis=redis_client,
+        lock=TurnLock(redis=redis_client)
+    )
+
+    marks = [turn for turn in CHECKPOINTS if turn <= args.turns]
+    samples: Dict[int, Dict[str, List[float]]] = {turn: {"prompt": [], "full": [], "stored": []} for turn in marks}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for user in range(args.users):
+            code_user = f"history-{user}"
+            transcript: List[HistoryTurn] = []
+            for turn in range(1, args.turns + 1):
+                message = MESSAGES[(turn + user) % len(MESSAGES)].format(i=turn)
+                state = orchestrator.run(WsChatMessageRequest(message=message, code_user=code_user, fullname="Bench", area="ventas"))
+                if turn in samples:
+                    template = state.metadata.get("classifier_template") or ""
+                    prompt = state.metadata.get("classifier_prompt") or ""
+                    full = "\n".join(render_turn(item) for item in transcript)
+                    samples[turn]["prompt"].append(estimate_tokens(prompt))
+                    samples[turn]["full"].append(estimate_tokens(full) + estimate_tokens(template) + estimate_tokens(message))
+                    samples[turn]["stored"].append(len(_pack(saver.serde.dumps_typed(state.history))))
+                transcript.append(HistoryTurn(message=message, intent=state.intent))
+                if args.llm_latency_ms:
+                    # Da tiempo al resumen en segundo plano, como entre mensajes reales
+                    time.sleep(args.llm_latency_ms / 1000)
+
+    def mean(values: List[float]) -> float:
+        return round(sum(values) / len(values), 1) if values else 0.0
+
+    report: Dict[str, Any] = {
+        "users": args.users,
+        "turns": args.turns,
+        "max_turns": args.max_turns,
+        "max_tokens": args.max_tokens,
+        "by_turn": {
+            turn: {
+                "prompt_tokens": mean(values["prompt"]),
+                "full_transcript_prompt_tokens": mean(values["full"]),
+                "stored_history_bytes": mean(values["stored"])
+            }
+            for turn, values in samples.items()
+        },
+        "history": history.get_stats()
+    }
+
+    print(f"{'turno':>6} {'prompt acotado':>15} {'transcripción':>14} {'historial guardado':>19}")
+    for turn, row in report["by_turn"].items():
+        print(
+            f"{turn:>6} {row['prompt_tokens']:>12} tk {row['full_transcript_prompt_tokens']:>11} tk "
+            f"{row['stored_history_bytes']:>17} B"
+        )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark: tiempo de importación del módulo de la aplicación (arranque de worker).
+
+Ejecuta `python -X importtime -c "import app"` en subprocesos limpios y reporta:
+    - tiempo total de importación (mediana de las repeticiones)
+    - módulos más costosos por tiempo acumulado (incluye sus dependencias)
+    - módulos importados directamente por la aplicación (paquetes del repo)
+    - costo de la precarga opcional ([APP] preload) con --with-preload
+
+Uso:
+    python -m benchmarks.import_time_bench
+    python -m benchmarks.import_time_bench --module websocket.domain.ws --top 30
+    python -m benchmarks.import_time_bench --with-preload --output import_time.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+# Paquetes propios del repositorio (el resto son dependencias)
+REPO_PACKAGES = ("app", "analytics", "gemini", "infrastructure", "jobs", "langgraph", "runner", "websocket")
+# langgraph/ del repo comparte namespace con la librería instalada
+REPO_LANGGRAPH_LAYERS = ("application", "domain", "infrastructure")
+
+
+def profile_once(statement: str) -> List[Dict[str, Any]]:
+    """Ejecuta el statement con -X importtime y retorna las entradas parseadas (en µs)."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    if completed.returncode != 0:
+        tail = "\n".join(completed.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"Fallo al importar ({statement}):\n{tail}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        entries.append({
+            "module": name,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": len(indent) // 2
+        })
+    return entries
+
+
+def is_repo_module(name: str) -> bool:
+    parts = name.split(".")
+    if parts[0] == "langgraph":
+        return len(parts) > 1 and parts[1] in REPO_LANGGRAPH_LAYERS
+    return parts[0] in REPO_PACKAGES
+
+
+def summarize(runs: List[List[Dict[str, Any]]], module: str, top: int) -> Dict[str, Any]:
+    """Agrega las repeticiones tomando la mediana por módulo."""
+    cumulative: Dict[str, List[int]] = {}
+    self_time: Dict[str, List[int]] = {}
+    depth: Dict[str, int] = {}
+    totals = []
+    for entries in runs:
+        totals.append(sum(entry["self_us"] for entry in entries))
+        for entry in entries:
+            cumulative.setdefault(entry["module"], []).append(entry["cumulative_us"])
+            self_time.setdefault(entry["module"], []).append(entry["self_us"])
+            depth.setdefault(entry["module"], entry["depth"])
+
+    def ms(values: List[int]) -> float:
+        return round(statistics.median(values) / 1000, 1)
+
+    by_cumulative = sorted(cumulative, key=lambda name: statistics.median(cumulative[name]), reverse=True)
+    target_ms = ms(cumulative[module]) if module in cumulative else None
+    repo_modules = [name for name in by_cumulative if is_repo_module(name) and name != module]
+
+    return {
+        "module": module,
+        "runs": len(runs),
+        "modules_imported": len(cumulative),
+        "total_ms": ms(totals),
+        "module_ms": target_ms,
+        "top_cumulative": [
+            {"module": name, "cumulative_ms": ms(cumulative[name]), "self_ms": ms(self_time[name])}
+            for name in by_cumulative[:top]
+        ],
+        "repo_modules": [
+            {"module": name, "cumulative_ms": ms(cumulative[name])}
+            for name in repo_modules[:top]
+        ],
+        "top_level_dependencies": [
+            {"module": name, "cumulative_ms": ms(cumulative[name])}
+            for name in by_cumulative
+            if depth[name] == 0 and not is_repo_module(name)
+        ][:top]
+    }
+
+
+def print_table(title: str, rows: List[Dict[str, Any]], field: str = "cumulative_ms") -> None:
+    print(f"\n{title}")
+    for row in rows:
+        print(f"  {row[field]:>9.1f} ms  {row['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de importación (-X importtime) de la aplicación")
+    parser.add_argument("--module", default="app", help="Módulo a importar (por defecto app)")
+    parser.add_argument("--repeat", type=int, default=5, help="Subprocesos a ejecutar (se reporta la mediana)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--with-preload", action="store_true", help="Medir también app + preload_modules()")
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en este archivo")
+    args = parser.parse_args()
+
+    report = {"python": sys.version.split()[0]}
+    runs = [profile_once(f"import {args.module}") for _ in range(args.repeat)]
+    report["import"] = summarize(runs, args.module, args.top)
+
+    if args.with_preload:
+        statement = "import app; app.preload_modules()"
+        preload_runs = [profile_once(statement) for _ in range(args.repeat)]
+        report["import_with_preload"] = summarize(preload_runs, "app", args.top)
+
+    for key in ("import", "import_with_preload"):
+        if key not in report:
+            continue
+        section = report[key]
+        print(f"\n=== {key}: {section['module']} ({section['runs']} runs) ===")
+        print(f"Total: {section['total_ms']} ms, {section['modules_imported']} módulos")
+        print_table("Más costosos (acumulado):", section["top_cumulative"])
+        print_table("Paquetes del repositorio:", section["repo_modules"])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Microbenchmark: serialización JSON stdlib vs orjson en payloads típicos.
+
+Casos:
+    - parseo de frames entrantes (texto libre y JSON con params_required)
+    - respuesta del chat (ConversationState con acciones coincidentes)
+    - evento de progreso de job
+    - cuerpo HTTP grande (resultado de análisis de Excel)
+
+Uso:
+    python -m benchmarks.json_codec_bench --repeat 5
+"""
+import argparse
+import json
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.graph_replay_bench import DEFAULT_FIXTURE, load_fixture
+from infrastructure.serialization.json_codec import dumps, dumps_str, loads, looks_like_json_object
+from langgraph.domain.states import ConversationState
+from websocket.domain.dataModel.model import WsChatMessageRequest
+from websocket.utils.utils import WSCode, build_success_response
+
+
+def stdlib_send_json(data: Dict[str, Any]) -> str:
+    """Lo que hace WebSocket.send_json de Starlette."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def stdlib_parse_frame(raw: str):
+    """Parseo previo: json.loads sobre cada frame, con excepción en texto libre."""
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+
+
+def codec_parse_frame(raw: str):
+    if not looks_like_json_object(raw):
+        return None
+    try:
+        return loads(raw)
+    except json.JSONDecodeError:
+        return None
+
+
+def build_payloads() -> Dict[str, Any]:
+    fixture = load_fixture(DEFAULT_FIXTURE)
+    actions = [
+        {**action, "params": {}, "source_key": key, "match": "tag"}
+        for key, group in fixture["actions"].items()
+        for action in group.values()
+    ]
+    state = ConversationState(
+        payload=WsChatMessageRequest(message="cuánto vendimos hoy", code_user="USER001", fullname="Juan Pérez", area="ventas"),
+        user_message="cuánto vendimos hoy",
+        llm_response="ventas",
+        intent="ventas",
+        step="waiting_user_input",
+        metadata={
+            "matched_actions": actions,
+            "matched_count": len(actions),
+            "classified_intent": "ventas",
+            "tokens_used": {"prompt_tokens": 412, "completion_tokens": 9, "total_tokens": 421},
+        }
+    )
+    progress = build_success_response(
+        message="ventas: 120000 filas", code_user="USER001", ws_code=WSCode.NORMAL,
+        type="job_progress", job_id="0c8f7a3e-1d2b-4c5d-9e8f-123456789abc", status="running", progress=42.5
+    )
+    analysis = {
+        "status": True,
+        "msg": "Resultado del job obtenido.",
+        "data": {
+            "status": "completed",
+            "result": {
+                "file": "ventas.xlsx",
+                "sheets": [{
+                    "sheet": f"hoja_{sheet}",
+                    "rows": 250000,
+                    "columns": {
+                        f"columna_{column}": {"type": "float", "count": 249000, "nulls": 1000, "sum": 1234567.89,
+                                              "mean": 4958.09, "min": 0.5, "max": 99999.99}
+                        for column in range(40)
+                    },
+                    "elapsed_s": 12.3,
+                    "rows_per_s": 20325.2,
+                } for sheet in range(4)]
+            }
+        }
+    }
+    return {"state": state, "progress": progress, "analysis": analysis}
+
+
+def cases(payloads: Dict[str, Any]) -> List[Tuple[str, Callable, Callable]]:
+    state, progress, analysis = payloads["state"], payloads["progress"], payloads["analysis"]
+    text_frame = "cuánto vendimos hoy en la tienda de miraflores"
+    params_frame = json.dumps({"params_required": {"tienda": "T001", "fecha": "2025-01-31"}})
+    state_dict = state.model_dump(exclude_none=True)
+    progress_dict = progress.model_dump(exclude_none=True)
+
+    return [
+        ("parse frame texto libre", lambda: stdlib_parse_frame(text_frame), lambda: codec_parse_frame(text_frame)),
+        ("parse frame params_required", lambda: stdlib_parse_frame(params_frame), lambda: codec_parse_frame(params_frame)),
+        ("chat: model -> texto (dump + send_json)",
+         lambda: stdlib_send_json(state.model_dump(exclude_none=True)),
+         lambda: state.model_dump_json(exclude_none=True)),
+        ("chat: dict -> texto", lambda: stdlib_send_json(state_dict), lambda: dumps_str(state_dict)),
+        ("progreso de job: dict -> texto", lambda: stdlib_send_json(progress_dict), lambda: dumps_str(progress_dict)),
+        ("HTTP análisis (JSONResponse vs ORJSONResponse)",
+         lambda: json.dumps(analysis, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8"),
+         lambda: dumps(analysis)),
+    ]
+
+
+def measure(function: Callable, repeat: int) -> float:
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark stdlib json vs orjson")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'caso':50s} {'stdlib µs':>10s} {'orjson µs':>10s} {'speedup':>8s}")
+    for name, baseline, candidate in cases(build_payloads()):
+        before, after = measure(baseline, args.repeat), measure(candidate, args.repeat)
+        results.append({"case": name, "stdlib_us": round(before, 2), "orjson_us": round(after, 2),
+                        "speedup": round(before / after, 2)})
+        print(f"{name:50s} {before:10.2f} {after:10.2f} {before / after:7.1f}x")
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: latencia de cola del LLM con y sin router (hedging + failover).
+
+Usa proveedores falsos (benchmarks.fakes.FakeProvider) con cola pesada: la mayoría
+de llamadas tardan --latency-ms y una fracción --slow-rate tarda --slow-ms.
+
+Escenarios:
+    - single: un solo proveedor, sin hedging (comportamiento previo)
+    - hedged: mismo proveedor primario + secundario, hedge tras el p95 observado
+    - failover: el primario falla con --error-rate (429) y el router pasa al secundario
+
+Uso:
+    python -m benchmarks.llm_router_bench --requests 400 --concurrency 8
+"""
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from benchmarks.fakes import FakeProvider
+from infrastructure.adapters.llm_router import LLMRouter
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_scenario(provider, requests: int, concurrency: int, timeout: float) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+
+    def one(_):
+        started = time.perf_counter()
+        try:
+            provider.generate("hola", timeout=timeout, area="bench")
+            return (time.perf_counter() - started) * 1000, None
+        except Exception as e:
+            return (time.perf_counter() - started) * 1000, e
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, error in pool.map(one, range(requests)):
+            if error is None:
+                latencies.append(latency)
+            else:
+                errors += 1
+
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 1) if latencies else None
+    }
+
+
+def build_router(providers, args) -> LLMRouter:
+    return LLMRouter(
+        providers,
+        hedge=not args.no_hedge,
+        hedge_min_delay=args.hedge_min_delay_ms / 1000,
+        hedge_default_delay=args.hedge_default_delay_ms / 1000,
+        max_hedge_ratio=args.max_hedge_ratio,
+        min_samples=20
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de cola del LLM: proveedor único vs router con hedging/failover")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter-ms", type=float, default=40.0)
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Fracción de llamadas lentas (cola pesada)")
+    parser.add_argument("--slow-ms", type=float, default=1500.0)
+    parser.add_argument("--error-rate", type=float, default=0.3, help="Tasa de 429 del primario en el escenario failover")
+    parser.add_argument("--hedge-min-delay-ms", type=float, default=50.0)
+    parser.add_argument("--hedge-default-delay-ms", type=float, default=300.0)
+    parser.add_argument("--max-hedge-ratio", type=float, default=0.1)
+    parser.add_argument("--no-hedge", action="store_true")
+    parser.add_argument("--timeout-s", type=float, default=10.0)
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en este archivo")
+    args = parser.parse_args()
+
+    def provider(name: str, seed: int, **overrides) -> FakeProvider:
+        options = dict(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, slow_rate=args.slow_rate, slow_ms=args.slow_ms)
+        options.update(overrides)
+        return FakeProvider(name, seed=seed, **options)
+
+    report: Dict[str, Any] = {}
+
+    single = provider("primary", seed=1)
+    report["single"] = run_scenario(single, args.requests, args.concurrency, args.timeout_s)
+    report["single"]["attempts_per_request"] = round(single.calls / args.requests, 3)
+
+    primary, secondary = provider("primary", seed=1), provider("secondary", seed=2)
+    router = build_router([primary, secondary], args)
+    report["hedged"] = run_scenario(router, args.requests, args.concurrency, args.timeout_s)
+    report["hedged"]["attempts_per_request"] = round((primary.calls + secondary.calls) / args.requests, 3)
+    report["hedged"]["router"] = router.get_stats()
+
+    primary, secondary = provider("primary", seed=1, error_rate=args.error_rate), provider("secondary", seed=2)
+    router = build_router([primary, secondary], args)
+    report["failover"] = run_scenario(router, args.requests, args.concurrency, args.timeout_s)
+    report["failover"]["attempts_per_request"] = round((primary.calls + secondary.calls) / args.requests, 3)
+    report["failover"]["router"] = router.get_stats()
+
+    print(f"{'escenario':10s} {'ok':>5s} {'err':>5s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'intentos':>9s}")
+    for name, row in report.items():
+        print(
+            f"{name:10s} {row['ok']:5d} {row['errors']:5d} {row['p50_ms'] or 0:8.1f} "
+            f"{row['p95_ms'] or 0:8.1f} {row['p99_ms'] or 0:8.1f} {row['attempts_per_request']:9.3f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: camino crítico del turno con y sin prefetch especulativo.
+
+Reproduce las conversaciones del fixture de replay contra un Redis con latencia
+de red simulada (SlowRedis) y un LLM falso con latencia. Compara:
+    - sin prefetch: regla del clasificador y catálogo se leen en línea, antes y
+      después de la llamada al LLM
+    - con prefetch: ambas lecturas arrancan en entry_router y los nodos solo
+      esperan el resultado
+
+Por turno reporta la latencia total y el I/O que queda en el camino crítico
+(tiempo de build_prompt_classifier + actions_retriever), más la espera y el
+ahorro registrados por el prefetcher. El catálogo se puede inflar con claves de
+relleno para acercarlo al tamaño real (una lectura TYPE + GET por clave).
+
+Uso:
+    python -m benchmarks.prefetch_bench --iterations 5 --rtt-ms 1 --llm-latency-ms 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+from typing import Any, Dict, List
+
+from benchmarks.fakes import FakeLLM, SlowRedis, fake_redis_client
+from benchmarks.graph_replay_bench import DEFAULT_FIXTURE, NodeTimer, iter_turns, load_fixture, seed_redis
+from infrastructure.concurrency.turn_lock import TurnLock
+from infrastructure.metrics.latency import summarize_latencies
+from langgraph.application.local_classifier import LocalIntentClassifier
+from langgraph.application.node_context import NodeContext
+from langgraph.application.orchestrator import LangGraphOrchestrator
+from langgraph.application.prefetch import TurnPrefetcher
+from langgraph.domain.graph import build_graph
+from langgraph.infrastructure.redis_checkpointer import RedisCheckpointSaver
+
+# Nodos cuyo I/O no depende de la intención (lo que el prefetch saca del camino crítico)
+IO_NODES = ("build_prompt_classifier", "actions_retriever")
+
+
+def seed_catalog_padding(redis_client, keys: int) -> None:
+    """Claves de acciones de relleno (tags que no coinciden con ninguna intención)."""
+    for i in range(keys):
+        redis_client.set(f"agente:actions:relleno:{i}", json.dumps({
+            "id": f"relleno_{i}",
+            "description": f"Acción de relleno {i} para inflar el catálogo",
+            "tags": [f"relleno-{i}"],
+            "priority": 0,
+            "params": {},
+            "required": [],
+            "examples": []
+        }, ensure_ascii=False))
+
+
+def run_mode(args, fixture: Dict[str, Any], prefetch: bool) -> Dict[str, Any]:
+    store = fake_redis_client()
+    seed_redis(store, fixture)
+    seed_catalog_padding(store, args.catalog_keys)
+    redis_client = SlowRedis(store, rtt_ms=args.rtt_ms)
+
+    prefetcher = TurnPrefetcher(enabled=prefetch)
+    context = NodeContext(
+        redis=redis_client,
+        llm=FakeLLM(fixture["llm_rules"], latency_ms=args.llm_latency_ms, jitter_ms=args.jitter_ms),
+        local_classifier=LocalIntentClassifier(shadow_rate=0.0, refresh_interval=3600, enabled=args.local_classifier),
+        prefetcher=prefetcher
+    )
+    timer = NodeTimer()
+    saver = RedisCheckpointSaver(redis=SlowRedis(fake_redis_client(decode_responses=False), rtt_ms=args.rtt_ms))
+    orchestrator = LangGraphOrchestrator(
+        graph=build_graph(context, instrument=timer, checkpointer=saver),
+        redis=redis_client,
+        lock=TurnLock(redis=redis_client)
+    )
+
+    turn_ms: List[float] = []
+    io_ms: List[float] = []
+    for iteration in range(args.iterations):
+        for payload in iter_turns(fixture, iteration):
+            before = {name: len(timer.samples[name]) for name in IO_NODES}
+            started = time.perf_counter()
+            orchestrator.run(payload)
+            turn_ms.append((time.perf_counter() - started) * 1000)
+            io_ms.append(sum(sum(timer.samples[name][before[name]:]) for name in IO_NODES))
+
+    return {
+        "prefetch": prefetch,
+        "turns": len(turn_ms),
+        "turn_ms": summarize_latencies(turn_ms),
+        "critical_io_ms": summarize_latencies(io_ms),
+        "nodes_ms": {name: summarize_latencies(timer.samples[name]) for name in IO_NODES},
+        "prefetcher": prefetcher.get_stats() if prefetch else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Camino crítico por turno: lecturas en línea vs prefetch especulativo")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="Latencia simulada por viaje a Redis")
+    parser.add_argument("--catalog-keys", type=int, default=20, help="Claves de acciones de relleno")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--no-local-classifier", dest="local_classifier", action="store_false")
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en este archivo")
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = {"inline": run_mode(args, fixture, prefetch=False), "prefetch": run_mode(args, fixture, prefetch=True)}
+
+    for name, result in report.items():
+        line = (
+            f"{name:8s} turnos={result['turns']} turno p50/p95={result['turn_ms']['p50']}/{result['turn_ms']['p95']} ms "
+            f"I/O crítico p50/p95={result['critical_io_ms']['p50']}/{result['critical_io_ms']['p95']} ms"
+        )
+        if result["prefetcher"]:
+            stats = result["prefetcher"]
+            line += f" hits={stats['hits']} ahorro p50={stats['saved_ms']['p50']} ms"
+        print(line)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: latencia de despacho directo vs relay entre workers para comandos de Runner.
+
+Levanta un proceso "dueño" que simula un worker con un Runner conectado y mide,
+desde otro proceso, cuánto agrega el relay por Redis pub/sub + BLPOP.
+
+Requiere Redis local configurado en config.ini.
+
+Uso:
+    python -m benchmarks.runner_relay_bench --iterations 500
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+from infrastructure.metrics.latency import summarize_latencies
+from runner.domain.dataModel.model import RunnerCommand, RunnerResponse
+from runner.infrastructure.runner_presence import RunnerCommandRelay, RunnerPresenceRegistry
+
+
+class FakeConnectionManager:
+    """connection_manager mínimo con Runners que responden de inmediato."""
+
+    def __init__(self, runner_ids):
+        self.active_connections = {runner_id: object() for runner_id in runner_ids}
+        self.last_heartbeat = {runner_id: datetime.now() for runner_id in runner_ids}
+        self.registered_runners = {
+            runner_id: SimpleNamespace(
+                client_name="bench", hostname="bench-host", version="bench",
+                capabilities=["SQL_QUERY"], ip_address="127.0.0.1"
+            )
+            for runner_id in runner_ids
+        }
+
+    async def send_command(self, runner_id, command, wait_response=True, timeout=30):
+        return RunnerResponse(success=True, data={"echo": command.payload}, error=None)
+
+
+def _owner_worker(runner_id: str, ready, stop):
+    async def main():
+        manager = FakeConnectionManager([runner_id])
+        relay = RunnerCommandRelay(manager, RunnerPresenceRegistry(), heartbeat_interval=5)
+        await relay.ensure_started()
+        await asyncio.sleep(0.5)
+        ready.set()
+        while not stop.is_set():
+            await asyncio.sleep(0.1)
+        await relay.stop()
+
+    asyncio.run(main())
+
+
+def _command() -> RunnerCommand:
+    return RunnerCommand(
+        command_id=str(uuid.uuid4()),
+        command_type="SQL_QUERY",
+        payload={"adapter_type": "mysql", "query": "SELECT 1", "database": None},
+        timeout=5
+    )
+
+
+async def _measure(relay: RunnerCommandRelay, runner_id: str, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await relay.send_command(runner_id, _command(), wait_response=True, timeout=5)
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize_latencies(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    ready, stop = multiprocessing.Event(), multiprocessing.Event()
+    owner = multiprocessing.Process(target=_owner_worker, args=("bench-remote", ready, stop), daemon=True)
+    owner.start()
+    ready.wait(timeout=10)
+
+    async def run():
+        relay = RunnerCommandRelay(FakeConnectionManager(["bench-local"]), RunnerPresenceRegistry())
+        await relay.ensure_started()
+        direct = await _measure(relay, "bench-local", args.iterations)
+        relayed = await _measure(relay, "bench-remote", args.iterations)
+        await relay.stop()
+        return direct, relayed
+
+    try:
+        direct, relayed = asyncio.run(run())
+    finally:
+        stop.set()
+        owner.join(timeout=5)
+
+    overhead = {
+        key: round(relayed[key] - direct[key], 2)
+        for key in ("p50", "p95", "p99")
+        if relayed[key] is not None and direct[key] is not None
+    }
+    print(json.dumps({"direct_ms": direct, "relay_ms": relayed, "relay_overhead_ms": overhead}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: turnos concurrentes del mismo usuario con y sin TurnLock.
+
+Simula ráfagas de mensajes simultáneos por usuario (dos pestañas, doble envío)
+procesadas por varios hilos (workers) sobre el orquestador con checkpoints en
+Redis y un LLM falso con latencia. Compara:
+    - sin lock: turnos del mismo usuario en paralelo; se cuentan las
+      bifurcaciones del hilo de checkpoints (dos turnos escribiendo sobre el
+      mismo padre = estado pisado)
+    - con lock: turnos serializados por usuario; se reporta la espera por el
+      lock (p50/p95/p99)
+
+En ambos casos la latencia por turno se separa entre usuarios con ráfaga y
+usuarios con un solo mensaje (estos no deberían esperar nunca).
+
+Uso:
+    python -m benchmarks.turn_lock_bench --users 20 --burst 3 --llm-latency-ms 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from benchmarks.fakes import FakeLLM, fake_redis_client
+from benchmarks.graph_replay_bench import DEFAULT_FIXTURE, load_fixture, seed_redis
+from infrastructure.concurrency.turn_lock import TurnLock
+from infrastructure.metrics.latency import summarize_latencies
+from langgraph.application.local_classifier import LocalIntentClassifier
+from langgraph.application.node_context import NodeContext
+from langgraph.application.orchestrator import LangGraphOrchestrator
+from langgraph.domain.graph import build_graph
+from langgraph.infrastructure.redis_checkpointer import RedisCheckpointSaver
+from websocket.domain.dataModel.model import WsChatMessageRequest
+
+MESSAGES = ["quiero ver las ventas de hoy", "dame el inventario", "hola", "ventas del mes"]
+
+
+def count_forks(saver: RedisCheckpointSaver, code_user: str) -> int:
+    """Checkpoints con más de un hijo: dos turnos escribieron sobre el mismo estado."""
+    children = Counter(
+        item.parent_config["configurable"]["checkpoint_id"]
+        for item in saver.list({"configurable": {"thread_id": code_user}})
+        if item.parent_config
+    )
+    return sum(1 for count in children.values() if count > 1)
+
+
+def run_mode(args, fixture: Dict[str, Any], locked: bool) -> Dict[str, Any]:
+    redis_client = fake_redis_client()
+    seed_redis(redis_client, fixture)
+    llm = FakeLLM(fixture["llm_rules"], latency_ms=args.llm_latency_ms, jitter_ms=args.jitter_ms)
+    context = NodeContext(
+        redis=redis_client,
+        llm=llm,
+        local_classifier=LocalIntentClassifier(shadow_rate=0.0, refresh_interval=3600, enabled=False)
+    )
+    saver = RedisCheckpointSaver(redis=fake_redis_client(decode_responses=False), keep=1000)
+    lock = TurnLock(redis=redis_client, max_wait=args.max_wait, enabled=locked)
+    orchestrator = LangGraphOrchestrator(graph=build_graph(context, checkpointer=saver), redis=redis_client, lock=lock)
+
+    # Usuarios con ráfaga (burst mensajes a la vez) y usuarios con un solo mensaje
+    jobs = []
+    for user in range(args.users):
+        burst = args.burst if user < args.users // 2 else 1
+        code_user = f"lock-{'burst' if burst > 1 else 'single'}-{user}"
+        jobs.extend((code_user, MESSAGES[i % len(MESSAGES)]) for i in range(burst))
+
+    latencies: Dict[str, List[float]] = {"burst": [], "single": []}
+    errors: Counter = Counter()
+
+    def turn(job):
+        code_user, message = job
+        started = time.perf_counter()
+        try:
+            orchestrator.run(WsChatMessageRequest(message=message, code_user=code_user, fullname="Bench", area="ventas"))
+        except Exception as e:
+            errors[type(e).__name__] += 1
+            return
+        latencies[code_user.split("-")[1]].append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(turn, jobs))
+    wall = time.perf_counter() - started
+
+    users = sorted({code_user for code_user, _ in jobs})
+    return {
+        "locked": locked,
+        "turns": len(jobs),
+        "wall_s": round(wall, 3),
+        "llm_calls": llm.calls,
+        "forks": sum(count_forks(saver, code_user) for code_user in users),
+        "errors": dict(errors),
+        "turn_ms": {kind: summarize_latencies(samples) for kind, samples in latencies.items()},
+        "lock": lock.get_stats() if locked else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turnos concurrentes por usuario: sin lock vs TurnLock")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--burst", type=int, default=3, help="Mensajes simultáneos por usuario con ráfaga (la mitad de los usuarios)")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--max-wait", type=float, default=20.0)
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en este archivo")
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    # Los nodos imprimen en cada turno; se silencian una vez para todos los hilos
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = {"unlocked": run_mode(args, fixture, locked=False), "locked": run_mode(args, fixture, locked=True)}
+
+    for name, result in report.items():
+        line = (
+            f"{name:9s} turnos={result['turns']} wall={result['wall_s']}s bifurcaciones={result['forks']} "
+            f"p95 ráfaga={result['turn_ms']['burst']['p95']} ms p95 único={result['turn_ms']['single']['p95']} ms"
+        )
+        if result["lock"]:
+            line += f" espera p50/p95={result['lock']['wait_ms']['p50']}/{result['lock']['wait_ms']['p95']} ms"
+        print(line)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
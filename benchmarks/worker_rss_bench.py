@@ -0,0 +1,159 @@
+"""
+Benchmark: memoria por worker de gunicorn con y sin preload_app.
+
+Levanta `gunicorn app:app -c gunicorn.conf.py` dos veces (GUNICORN_PRELOAD=0 y 1),
+espera a que los workers terminen de cargar el estado (grafo, índice de acciones,
+clasificador) y lee de /proc, por proceso:
+    - RSS: memoria residente (cuenta también las páginas compartidas)
+    - PSS: RSS con las páginas compartidas repartidas entre los procesos que las usan
+    - USS: memoria privada del proceso (lo que se libera al matarlo)
+
+La suma de PSS es la memoria real del servicio; con preload el USS por worker
+debe bajar porque módulos, grafo e índices quedan compartidos con el master.
+
+Solo Linux (/proc/<pid>/smaps_rollup). Sin --redis-url se usa la config.ini;
+si Redis no está disponible el catálogo no se precarga (se avisa en el log).
+
+Uso:
+    python -m benchmarks.worker_rss_bench --workers 4
+    python -m benchmarks.worker_rss_bench --workers 4 --settle-s 10 --output worker_rss.json
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_memory_kb(pid: int) -> Dict[str, int]:
+    """RSS, PSS y USS del proceso en KB."""
+    values: Dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as handle:
+        for line in handle:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss_kb": values.get("Rss", 0),
+        "pss_kb": values.get("Pss", 0),
+        "uss_kb": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as handle:
+                stat = handle.read()
+        except OSError:
+            continue
+        # El nombre del comando va entre paréntesis y puede tener espacios
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+def wait_ready(url: str, master: subprocess.Popen, workers: int, timeout: float) -> List[int]:
+    """Espera a que respondan los workers y estén todos creados."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if master.poll() is not None:
+            raise RuntimeError(f"gunicorn terminó con código {master.returncode}")
+        pids = child_pids(master.pid)
+        if len(pids) >= workers:
+            try:
+                with urllib.request.urlopen(url, timeout=2) as response:
+                    if response.status == 200:
+                        return pids
+            except OSError:
+                pass
+        time.sleep(0.5)
+    raise TimeoutError("gunicorn no quedó listo a tiempo")
+
+
+def measure(preload: bool, args) -> Dict[str, Any]:
+    env = {
+        **os.environ,
+        "GUNICORN_PRELOAD": "1" if preload else "0",
+        "WEB_CONCURRENCY": str(args.workers),
+        "GUNICORN_BIND": f"127.0.0.1:{args.port}"
+    }
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py"],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL
+    )
+    try:
+        started = time.monotonic()
+        pids = wait_ready(f"http://127.0.0.1:{args.port}/openapi.json", master, args.workers, args.timeout_s)
+        ready_s = time.monotonic() - started
+        # Los workers sin preload cargan el estado en post_worker_init; dar tiempo a que termine
+        time.sleep(args.settle_s)
+
+        master_memory = read_memory_kb(master.pid)
+        workers = [read_memory_kb(pid) for pid in child_pids(master.pid)]
+    finally:
+        master.send_signal(signal.SIGTERM)
+        try:
+            master.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            master.kill()
+
+    def mean_mb(field: str) -> Optional[float]:
+        values = [worker[field] for worker in workers]
+        return round(statistics.mean(values) / 1024, 1) if values else None
+
+    return {
+        "preload": preload,
+        "workers": len(workers),
+        "ready_s": round(ready_s, 2),
+        "master_rss_mb": round(master_memory["rss_kb"] / 1024, 1),
+        "worker_rss_mb": mean_mb("rss_kb"),
+        "worker_pss_mb": mean_mb("pss_kb"),
+        "worker_uss_mb": mean_mb("uss_kb"),
+        "total_pss_mb": round((master_memory["pss_kb"] + sum(w["pss_kb"] for w in workers)) / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS/PSS/USS por worker de gunicorn con y sin preload")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--settle-s", type=float, default=5.0, help="Espera tras quedar listo antes de medir")
+    parser.add_argument("--timeout-s", type=float, default=120.0)
+    parser.add_argument("--verbose", action="store_true", help="Mostrar el log de gunicorn")
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en este archivo")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("Este benchmark requiere Linux (/proc/<pid>/smaps_rollup)")
+
+    report = {"without_preload": measure(False, args), "with_preload": measure(True, args)}
+    before, after = report["without_preload"], report["with_preload"]
+    report["saved_total_pss_mb"] = round(before["total_pss_mb"] - after["total_pss_mb"], 1)
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"\nUSS por worker: {before['worker_uss_mb']} MB -> {after['worker_uss_mb']} MB")
+    print(f"PSS total:      {before['total_pss_mb']} MB -> {after['total_pss_mb']} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"💾 Reporte guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
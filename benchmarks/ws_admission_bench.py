@@ -0,0 +1,153 @@
+"""
+Benchmark: tormenta de conexiones /ws/chat con y sin control de admisión.
+
+Levanta la app en un servidor uvicorn local (Redis con fakeredis) y simula
+usuarios con pestañas olvidadas: cada usuario abre --tabs sockets a la vez y
+no envía mensajes. Compara:
+    - sin cupos: todas las conexiones se aceptan (comportamiento anterior)
+    - con cupos: max_per_user y max_connections de WSAdmissionController
+
+Reporta conexiones aceptadas y rechazadas por status HTTP (antes del accept),
+sockets abiertos en el worker (gauge), memoria del proceso por socket aceptado
+(servidor y clientes comparten proceso: sirve para comparar los modos) y
+latencia del handshake (p50/p95/p99) de aceptadas y rechazadas.
+
+Uso:
+    python -m benchmarks.ws_admission_bench --users 50 --tabs 8 --max-per-user 3
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import socket
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+import fakeredis
+import uvicorn
+from websockets.asyncio.client import connect
+from websockets.exceptions import InvalidStatus
+
+from analytics.application.excel_ingestion import current_rss_mb
+from infrastructure.config.redis_config import RedisConfig
+from infrastructure.metrics.latency import summarize_latencies
+
+
+def start_server() -> int:
+    """App en un hilo con uvicorn (ws=websockets, como KeepaliveUvicornWorker)."""
+    server_state = fakeredis.FakeServer()
+    RedisConfig._instance = fakeredis.FakeRedis(server=server_state, decode_responses=True)
+    RedisConfig._async_instance = fakeredis.FakeAsyncRedis(server=server_state, decode_responses=True)
+    from app import app
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, ws="websockets", log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return port
+
+
+async def open_tab(url: str, accepted: List[Any], statuses: Counter, accepted_ms: List[float], rejected_ms: List[float]) -> None:
+    started = time.perf_counter()
+    try:
+        connection = await connect(url, open_timeout=30, ping_interval=None)
+    except InvalidStatus as e:
+        rejected_ms.append((time.perf_counter() - started) * 1000)
+        statuses[e.response.status_code] += 1
+        return
+    accepted_ms.append((time.perf_counter() - started) * 1000)
+    statuses[101] += 1
+    accepted.append(connection)
+
+
+async def run_storm(args, port: int, label: str) -> Dict[str, Any]:
+    from websocket.infrastructure.ws_admission import ws_admission
+
+    accepted: List[Any] = []
+    statuses: Counter = Counter()
+    accepted_ms: List[float] = []
+    rejected_ms: List[float] = []
+    rss_before = current_rss_mb()
+
+    urls = [
+        f"ws://127.0.0.1:{port}/ws/chat?token=secret123&code_user=storm-{user}&fullname=Bench"
+        for user in range(args.users)
+        for _ in range(args.tabs)
+    ]
+    for start in range(0, len(urls), args.concurrency):
+        await asyncio.gather(*(
+            open_tab(url, accepted, statuses, accepted_ms, rejected_ms)
+            for url in urls[start:start + args.concurrency]
+        ))
+    await asyncio.sleep(0.2)
+    gauges = ws_admission.get_stats()
+    rss_after = current_rss_mb()
+
+    await asyncio.gather(*(connection.close() for connection in accepted), return_exceptions=True)
+    await asyncio.sleep(0.3)
+
+    return {
+        "mode": label,
+        "attempts": len(urls),
+        "accepted": len(accepted),
+        "rejected_by_status": {str(status): count for status, count in statuses.items() if status != 101},
+        "open_sockets_gauge": gauges["open"],
+        "open_after_close": ws_admission.get_stats()["open"],
+        "rss_delta_mb": round(rss_after - rss_before, 1),
+        "kb_per_accepted": round((rss_after - rss_before) * 1024 / max(1, len(accepted)), 1),
+        "handshake_accepted_ms": summarize_latencies(accepted_ms),
+        "handshake_rejected_ms": summarize_latencies(rejected_ms)
+    }
+
+
+async def run(args, port: int) -> Dict[str, Any]:
+    from websocket.infrastructure.ws_admission import ws_admission
+
+    ws_admission.max_per_user = 0
+    ws_admission.max_connections = 0
+    without = await run_storm(args, port, "sin cupos")
+
+    ws_admission.max_per_user = args.max_per_user
+    ws_admission.max_connections = args.max_connections
+    limited = await run_storm(args, port, "con cupos")
+    return {"without_limits": without, "with_limits": limited}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tormenta de conexiones WebSocket con y sin control de admisión")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tabs", type=int, default=8, help="Sockets abiertos por usuario (pestañas olvidadas)")
+    parser.add_argument("--max-per-user", type=int, default=3)
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50, help="Handshakes simultáneos")
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en este archivo")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        port = start_server()
+        report = asyncio.run(run(args, port))
+
+    for result in report.values():
+        print(
+            f"{result['mode']:10s} intentos={result['attempts']} aceptadas={result['accepted']} "
+            f"rechazadas={result['rejected_by_status']} abiertas={result['open_sockets_gauge']} "
+            f"memoria={result['rss_delta_mb']} MB ({result['kb_per_accepted']} KB/socket) "
+            f"handshake p50 aceptada/rechazada={result['handshake_accepted_ms']['p50']}/"
+            f"{result['handshake_rejected_ms']['p50']} ms"
+        )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
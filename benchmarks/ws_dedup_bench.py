@@ -0,0 +1,130 @@
+"""
+Benchmark: reenvíos de mensajes con y sin client_message_id (ws_dedup).
+
+Reproduce las conversaciones del fixture de replay sobre el orquestador con
+checkpoints en Redis y un LLM falso con latencia. Una fracción de los mensajes
+se reenvía (como un cliente móvil con red inestable): la mitad mientras el
+original sigue en curso y la otra mitad después de su respuesta. Compara:
+    - sin id: cada reenvío vuelve a ejecutar el grafo
+    - con id: el reenvío recibe la respuesta guardada del original
+
+Reporta ejecuciones del grafo, llamadas al LLM, reenvíos cuya respuesta
+difiere de la del original (estado mutado dos veces) y la latencia de los
+reenvíos (p50/p95/p99).
+
+Uso:
+    python -m benchmarks.ws_dedup_bench --iterations 3 --resend-rate 0.3 --llm-latency-ms 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List
+
+from benchmarks.fakes import fake_redis_client
+from benchmarks.graph_replay_bench import DEFAULT_FIXTURE, build_orchestrator, iter_turns, load_fixture, seed_redis
+from infrastructure.metrics.latency import summarize_latencies
+from websocket.infrastructure.ws_dedup import WSMessageDeduplicator
+
+
+def run_mode(args, fixture: Dict[str, Any], dedup_enabled: bool) -> Dict[str, Any]:
+    redis_client = fake_redis_client()
+    seed_redis(redis_client, fixture)
+    replay_args = argparse.Namespace(
+        llm_latency_ms=args.llm_latency_ms, jitter_ms=0.0,
+        no_local_classifier=not args.local_classifier, redis_url=None
+    )
+    orchestrator, llm = build_orchestrator(replay_args, fixture, redis_client)
+    dedup = WSMessageDeduplicator(redis=redis_client, enabled=dedup_enabled)
+    rng = random.Random(11)
+
+    graph_runs = 0
+    runs_lock = threading.Lock()
+
+    def handle(payload, client_message_id: str) -> str:
+        def run_turn():
+            nonlocal graph_runs
+            with runs_lock:
+                graph_runs += 1
+            return orchestrator.run(payload).model_dump_json(exclude_none=True), True
+        return dedup.run(payload.code_user, client_message_id, run_turn)
+
+    originals = 0
+    resend_ms: List[float] = []
+    mismatched = 0
+    for iteration in range(args.iterations):
+        for index, payload in enumerate(iter_turns(fixture, iteration)):
+            originals += 1
+            client_message_id = f"{iteration}-{index}"
+            if rng.random() >= args.resend_rate:
+                handle(payload, client_message_id)
+                continue
+
+            duplicate = payload.model_copy()
+            resend: Dict[str, Any] = {}
+
+            def send_duplicate():
+                started = time.perf_counter()
+                resend["response"] = handle(duplicate, client_message_id)
+                resend["ms"] = (time.perf_counter() - started) * 1000
+
+            if rng.random() < 0.5:
+                # Reenvío mientras el original sigue en curso (reconexión en otro socket)
+                worker = threading.Timer(args.overlap_ms / 1000, send_duplicate)
+                worker.start()
+                original = handle(payload, client_message_id)
+                worker.join()
+            else:
+                original = handle(payload, client_message_id)
+                send_duplicate()
+            resend_ms.append(resend["ms"])
+            if resend["response"] != original:
+                mismatched += 1
+
+    return {
+        "dedup": dedup_enabled,
+        "messages": originals,
+        "resends": len(resend_ms),
+        "graph_runs": graph_runs,
+        "llm_calls": llm.calls,
+        "mismatched_resends": mismatched,
+        "resend_ms": summarize_latencies(resend_ms),
+        "dedup_stats": dedup.get_stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reenvíos de mensajes: sin id vs client_message_id con deduplicación")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--resend-rate", type=float, default=0.3, help="Fracción de mensajes que se reenvían")
+    parser.add_argument("--overlap-ms", type=float, default=10.0, help="Retraso del reenvío concurrente")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--no-local-classifier", dest="local_classifier", action="store_false")
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en este archivo")
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = {"without_id": run_mode(args, fixture, False), "with_id": run_mode(args, fixture, True)}
+
+    for name, result in report.items():
+        print(
+            f"{name:10s} mensajes={result['messages']} reenvíos={result['resends']} "
+            f"grafo={result['graph_runs']} LLM={result['llm_calls']} "
+            f"respuestas distintas={result['mismatched_resends']} "
+            f"reenvío p50/p95={result['resend_ms']['p50']}/{result['resend_ms']['p95']} ms"
+        )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Generador de carga y prueba de resistencia (soak) para /ws/chat.
+
+Abre N conexiones autenticadas (query params token/code_user/fullname/area),
+cada una envía mensajes según una mezcla configurable:
+    text    -> texto libre (clasificación)
+    action  -> id de acción (de la última respuesta o del catálogo del fixture)
+    params  -> JSON {"params_required": {...}}
+
+Registra histogramas de latencia por tipo de mensaje, códigos de error
+(ws_code 1008/1011 en la respuesta y códigos de cierre), reconexiones y el RSS
+del servidor (--server-pid, mismo host) a lo largo de la prueba.
+
+Uso (servidor con LLM simulado):
+    python -m benchmarks.ws_stub_server --port 8765 --pid-file /tmp/ws_stub.pid &
+    python -m benchmarks.ws_load --url ws://127.0.0.1:8765/ws/chat --connections 2000 \\
+        --ramp-s 30 --duration-s 1800 --server-pid $(cat /tmp/ws_stub.pid)
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import websockets
+from websockets.exceptions import ConnectionClosed, InvalidStatus
+
+from benchmarks.graph_replay_bench import DEFAULT_FIXTURE, load_fixture
+from infrastructure.metrics.latency import LatencyHistogram
+
+
+def process_rss_mb(pid: int) -> Optional[float]:
+    """RSS de otro proceso del mismo host (Linux /proc)."""
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def parse_mix(raw: str) -> Dict[str, float]:
+    """'text=0.6,action=0.25,params=0.15' -> pesos normalizados."""
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {"text", "action", "params"}
+    if unknown:
+        raise ValueError(f"Tipos de mensaje no soportados: {unknown}")
+    total = sum(mix.values())
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def raise_open_files_limit() -> int:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        return hard
+    except (ValueError, OSError):
+        return soft
+
+
+class LoadStats:
+    """Métricas agregadas de todas las conexiones."""
+
+    def __init__(self):
+        self.latency = {kind: LatencyHistogram() for kind in ("text", "action", "params")}
+        self.connect = LatencyHistogram()
+        self.sent = 0
+        self.received = 0
+        self.timeouts = 0
+        self.ws_codes: Counter = Counter()      # ws_code en respuestas de error
+        self.close_codes: Counter = Counter()   # códigos de cierre del servidor
+        self.connect_errors: Counter = Counter()
+        self.open_connections = 0
+        self.reconnects = 0
+        self.rss_samples: List[Dict[str, float]] = []
+
+
+class LoadGenerator:
+    def __init__(self, args, fixture: Dict[str, Any]):
+        self.args = args
+        self.mix = parse_mix(args.mix)
+        self.stats = LoadStats()
+        self.deadline = 0.0
+        self.texts = [turn["message"] for conv in fixture["conversations"] for turn in conv["turns"]
+                      if not turn["message"].startswith("{") and "_" not in turn["message"]]
+        self.actions = {
+            action["id"]: action.get("required", [])
+            for actions in fixture["actions"].values()
+            for action in actions.values()
+        }
+
+    def _url(self, index: int) -> str:
+        query = urlencode({
+            "token": self.args.token,
+            "code_user": f"{self.args.user_prefix}{index:06d}",
+            "fullname": f"Usuario Carga {index}",
+            "area": self.args.area
+        })
+        return f"{self.args.url}?{query}"
+
+    def _next_message(self, rng: random.Random, last_actions: List[str]):
+        kind = rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        if kind == "action":
+            action_id = rng.choice(last_actions or list(self.actions))
+            return kind, action_id
+        if kind == "params":
+            action_id = rng.choice(list(self.actions))
+            params = {name: f"valor-{rng.randint(1, 999)}" for name in self.actions[action_id]}
+            return kind, json.dumps({"params_required": params or {"dummy": "1"}})
+        return kind, rng.choice(self.texts)
+
+    async def _session(self, index: int) -> None:
+        """Una conexión: envía mensajes hasta el deadline y reconecta si el servidor cierra."""
+        rng = random.Random(self.args.seed + index)
+        stats = self.stats
+
+        while time.monotonic() < self.deadline:
+            started = time.perf_counter()
+            try:
+                connection = await asyncio.wait_for(
+                    websockets.connect(self._url(index), max_queue=None, open_timeout=None),
+                    timeout=self.args.connect_timeout_s
+                )
+            except InvalidStatus as e:
+                stats.connect_errors[f"http_{e.response.status_code}"] += 1
+                await asyncio.sleep(self.args.reconnect_delay_s)
+                continue
+            except (OSError, asyncio.TimeoutError) as e:
+                stats.connect_errors[type(e).__name__] += 1
+                await asyncio.sleep(self.args.reconnect_delay_s)
+                continue
+
+            stats.connect.record((time.perf_counter() - started) * 1000)
+            stats.open_connections += 1
+            last_actions: List[str] = []
+            try:
+                async with connection:
+                    while time.monotonic() < self.deadline:
+                        kind, message = self._next_message(rng, last_actions)
+                        sent_at = time.perf_counter()
+                        await connection.send(message)
+                        stats.sent += 1
+                        try:
+                            raw = await asyncio.wait_for(connection.recv(), timeout=self.args.response_timeout_s)
+                        except asyncio.TimeoutError:
+                            stats.timeouts += 1
+                            continue
+                        stats.latency[kind].record((time.perf_counter() - sent_at) * 1000)
+                        stats.received += 1
+
+                        body = json.loads(raw)
+                        if body.get("success") is False:
+                            stats.ws_codes[body.get("ws_code")] += 1
+                        matched = (body.get("metadata") or {}).get("matched_actions") or []
+                        if matched:
+                            last_actions = [action["id"] for action in matched if action.get("id")]
+
+                        # Tiempo de "pensar" exponencial alrededor de think_ms
+                        await asyncio.sleep(rng.expovariate(1000 / self.args.think_ms) if self.args.think_ms else 0)
+            except ConnectionClosed as e:
+                code = e.rcvd.code if e.rcvd else 1006
+                stats.close_codes[code] += 1
+            finally:
+                stats.open_connections -= 1
+
+            if time.monotonic() < self.deadline:
+                stats.reconnects += 1
+                await asyncio.sleep(self.args.reconnect_delay_s)
+
+    async def _sampler(self, started: float) -> None:
+        """Muestra periódica de progreso y RSS del servidor/cliente."""
+        last_received = 0
+        while time.monotonic() < self.deadline:
+            await asyncio.sleep(self.args.sample_s)
+            stats = self.stats
+            sample = {
+                "t_s": round(time.monotonic() - started, 1),
+                "open": stats.open_connections,
+                "msgs_per_s": round((stats.received - last_received) / self.args.sample_s, 1),
+                "client_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            }
+            if self.args.server_pid:
+                server_rss = process_rss_mb(self.args.server_pid)
+                sample["server_rss_mb"] = round(server_rss, 1) if server_rss is not None else None
+            last_received = stats.received
+            stats.rss_samples.append(sample)
+            text_p95 = stats.latency["text"].percentile(95)
+            print(
+                f"[{sample['t_s']:>7}s] abiertas={sample['open']:>5} msg/s={sample['msgs_per_s']:>7} "
+                f"p95_text={text_p95 if text_p95 is None else round(text_p95, 1)}ms "
+                f"errores={dict(stats.ws_codes)} cierres={dict(stats.close_codes)} "
+                f"server_rss={sample.get('server_rss_mb')}MB"
+            )
+
+    async def run(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        self.deadline = started + self.args.ramp_s + self.args.duration_s
+        sampler = asyncio.create_task(self._sampler(started))
+
+        sessions = []
+        delay = self.args.ramp_s / max(1, self.args.connections)
+        for index in range(self.args.connections):
+            sessions.append(asyncio.create_task(self._session(index)))
+            if delay:
+                await asyncio.sleep(delay)
+
+        await asyncio.gather(*sessions)
+        sampler.cancel()
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        stats = self.stats
+        all_latency = LatencyHistogram()
+        for histogram in stats.latency.values():
+            all_latency.merge(histogram)
+
+        return {
+            "config": {
+                "url": self.args.url,
+                "connections": self.args.connections,
+                "ramp_s": self.args.ramp_s,
+                "duration_s": self.args.duration_s,
+                "think_ms": self.args.think_ms,
+                "mix": self.mix
+            },
+            "elapsed_s": round(elapsed, 1),
+            "sent": stats.sent,
+            "received": stats.received,
+            "timeouts": stats.timeouts,
+            "throughput_msgs_per_s": round(stats.received / elapsed, 1) if elapsed else None,
+            "latency_ms": {"all": all_latency.summary(), **{k: h.summary() for k, h in stats.latency.items()}},
+            "connect_ms": stats.connect.summary(),
+            "error_ws_codes": {str(code): count for code, count in stats.ws_codes.items()},
+            "close_codes": {str(code): count for code, count in stats.close_codes.items()},
+            "connect_errors": dict(stats.connect_errors),
+            "reconnects": stats.reconnects,
+            "memory": self._memory_growth(),
+        }
+
+    def _memory_growth(self) -> Dict[str, Any]:
+        """Crecimiento de RSS del servidor tras el ramp-up (pendiente en MB/hora)."""
+        samples = [s for s in self.stats.rss_samples if s.get("server_rss_mb") is not None]
+        if not samples:
+            return {"samples": self.stats.rss_samples}
+
+        steady = [s for s in samples if s["t_s"] >= self.args.ramp_s] or samples
+        xs = [s["t_s"] for s in steady]
+        ys = [s["server_rss_mb"] for s in steady]
+        slope = None
+        if len(steady) > 1:
+            mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+            denominator = sum((x - mean_x) ** 2 for x in xs)
+            if denominator:
+                slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator * 3600
+
+        return {
+            "server_rss_start_mb": samples[0]["server_rss_mb"],
+            "server_rss_after_ramp_mb": steady[0]["server_rss_mb"],
+            "server_rss_end_mb": samples[-1]["server_rss_mb"],
+            "server_rss_max_mb": max(s["server_rss_mb"] for s in samples),
+            "server_rss_slope_mb_per_hour": round(slope, 2) if slope is not None else None,
+            "samples": self.stats.rss_samples,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga y soak test para /ws/chat")
+    parser.add_argument("--url", default="ws://127.0.0.1:8765/ws/chat")
+    parser.add_argument("--token", default=None, help="Por defecto [WS] secret de config.ini")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--ramp-s", type=float, default=20.0)
+    parser.add_argument("--duration-s", type=float, default=120.0)
+    parser.add_argument("--think-ms", type=float, default=7000.0, help="Pausa media entre mensajes (el rate limit es 10/min)")
+    parser.add_argument("--mix", default="text=0.6,action=0.25,params=0.15")
+    parser.add_argument("--area", default="general")
+    parser.add_argument("--user-prefix", default="LOAD")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--response-timeout-s", type=float, default=30.0)
+    parser.add_argument("--connect-timeout-s", type=float, default=15.0)
+    parser.add_argument("--reconnect-delay-s", type=float, default=1.0)
+    parser.add_argument("--sample-s", type=float, default=5.0)
+    parser.add_argument("--server-pid", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en un archivo")
+    args = parser.parse_args()
+
+    if args.token is None:
+        from websocket.infrastructure.ws_security import SECRET_TOKEN
+        args.token = SECRET_TOKEN
+
+    limit = raise_open_files_limit()
+    if limit < args.connections + 64:
+        print(f"⚠️ Límite de archivos abiertos ({limit}) menor que las conexiones solicitadas")
+
+    report = asyncio.run(LoadGenerator(args, load_fixture(args.fixture)).run())
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output)
+
+
+if __name__ == "__main__":
+    main()
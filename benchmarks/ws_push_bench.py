@@ -0,0 +1,179 @@
+"""
+Benchmark: latencia de entrega del push a WebSockets entre workers (ws_push).
+
+Levanta varios procesos worker (cada uno con su event loop, el listener de
+ws:push:{worker_id} y sockets falsos registrados con presencia en Redis) y un
+productor en el proceso principal (sin sockets, como el worker de jobs) que:
+    - envía mensajes sueltos a usuarios repartidos entre los workers
+    - simula jobs que reportan progreso en ráfaga (mismo coalesce_key)
+
+Reporta la latencia push -> entrega en el socket (p50/p95/p99), mensajes
+entregados, coalescidos, lotes enviados y mensajes por PUBLISH.
+
+Sin --redis-url usa un servidor fakeredis TCP en un hilo (latencias mayores que
+un Redis real; sirve para comparar configuraciones entre sí).
+
+Uso:
+    python -m benchmarks.ws_push_bench --workers 4 --users 200 --messages 2000
+    python -m benchmarks.ws_push_bench --redis-url redis://localhost:6379/0 --linger-ms 0
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from infrastructure.metrics.latency import summarize_latencies
+
+
+class FakeSocket:
+    """Pipeline falso: registra la latencia de cada mensaje recibido."""
+
+    def __init__(self, latencies: List[float]):
+        self.latencies = latencies
+
+    async def send_json(self, data: Dict[str, Any], coalesce_key: Optional[str] = None) -> None:
+        self.latencies.append((time.time() - data["sent_at"]) * 1000)
+
+
+def configure_redis(url: str) -> None:
+    import redis
+    import redis.asyncio
+    from infrastructure.config.redis_config import RedisConfig
+
+    RedisConfig._instance = redis.Redis.from_url(url, decode_responses=True)
+    RedisConfig._async_instance = redis.asyncio.Redis.from_url(url, decode_responses=True)
+
+
+def worker_main(url: str, users: List[str], linger_ms: float, ready, done, results) -> None:
+    configure_redis(url)
+    from websocket.infrastructure.ws_push import ws_push
+
+    ws_push.linger = linger_ms / 1000.0
+    latencies: List[float] = []
+
+    async def run():
+        ws_push.start()
+        for code_user in users:
+            await ws_push.register(code_user, FakeSocket(latencies))
+        # Da tiempo a que el listener se suscriba antes de avisar
+        await asyncio.sleep(0.3)
+        ready.set()
+        while not done.is_set():
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.2)
+        stats = ws_push.get_stats()
+        await ws_push.stop()
+        return stats
+
+    stats = asyncio.run(run())
+    results.put({"latencies": latencies, "stats": stats})
+
+
+def start_fake_server() -> str:
+    from fakeredis import TcpFakeServer
+
+    server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    # Los hilos por conexión no deben impedir que el benchmark termine
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de entrega de ws_push entre workers")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=200, help="Usuarios conectados (repartidos entre workers)")
+    parser.add_argument("--messages", type=int, default=2000, help="Mensajes sueltos")
+    parser.add_argument("--rate", type=float, default=2000.0, help="Mensajes por segundo del productor")
+    parser.add_argument("--jobs", type=int, default=50, help="Jobs que reportan progreso en ráfaga")
+    parser.add_argument("--job-steps", type=int, default=20, help="Eventos de progreso por job")
+    parser.add_argument("--linger-ms", type=float, default=2.0)
+    parser.add_argument("--redis-url", default=None, help="Servidor Redis (por defecto fakeredis TCP)")
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON en este archivo")
+    args = parser.parse_args()
+
+    url = args.redis_url or start_fake_server()
+    configure_redis(url)
+    from websocket.infrastructure.ws_push import ws_push
+
+    ws_push.linger = args.linger_ms / 1000.0
+    users = [f"push-user-{i}" for i in range(args.users)]
+    context = multiprocessing.get_context("spawn")
+    done = context.Event()
+    results = context.Queue()
+    processes, readies = [], []
+    for index in range(args.workers):
+        ready = context.Event()
+        process = context.Process(
+            target=worker_main,
+            args=(url, users[index::args.workers], args.linger_ms, ready, done, results)
+        )
+        process.start()
+        processes.append(process)
+        readies.append(ready)
+    for ready in readies:
+        ready.wait(timeout=60)
+
+    rng = random.Random(7)
+    started = time.perf_counter()
+    interval = 1.0 / args.rate if args.rate else 0.0
+    for i in range(args.messages):
+        ws_push.push(rng.choice(users), {"type": "notification", "n": i, "sent_at": time.time()})
+        for job in range(args.jobs if i == args.messages // 2 else 0):
+            # Ráfaga de progreso: solo el último evento de cada job debería viajar
+            code_user = users[job % len(users)]
+            for step in range(args.job_steps):
+                ws_push.push(
+                    code_user,
+                    {"type": "job_progress", "job_id": job, "progress": step, "sent_at": time.time()},
+                    coalesce_key=f"job:{job}"
+                )
+        if interval:
+            time.sleep(interval)
+    ws_push.flush(timeout=30)
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    reports = [results.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join(timeout=10)
+
+    latencies = [sample for report in reports for sample in report["latencies"]]
+    producer = ws_push.get_stats()
+    pushed = args.messages + args.jobs * args.job_steps
+    report = {
+        "workers": args.workers,
+        "users": args.users,
+        "linger_ms": args.linger_ms,
+        "redis": args.redis_url or "fakeredis-tcp",
+        "pushed": pushed,
+        "producer_s": round(elapsed, 3),
+        "delivered": len(latencies),
+        "coalesced": producer["coalesced"],
+        "batches": producer["batches"],
+        "publishes": producer["published"],
+        "messages_per_publish": round((pushed - producer["coalesced"]) / max(1, producer["published"]), 2),
+        "delivery_ms": summarize_latencies(latencies),
+        "per_worker_delivered": [report["stats"]["delivered"] for report in reports]
+    }
+
+    print(
+        f"{args.workers} workers, {args.users} usuarios: {report['delivered']}/{pushed} entregados "
+        f"({report['coalesced']} coalescidos), {report['publishes']} PUBLISH "
+        f"({report['messages_per_publish']} mensajes c/u), latencia p50/p95/p99="
+        f"{report['delivery_ms']['p50']}/{report['delivery_ms']['p95']}/{report['delivery_ms']['p99']} ms"
+    )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Servidor local para pruebas de carga de /ws/chat con dependencias simuladas.
+
+Levanta la app real (app.py) pero con:
+    - Redis en memoria (fakeredis, clientes sync, async y binario compartiendo servidor)
+      o un Redis local con --redis-url
+    - FakeLLM determinista con latencia configurable en lugar de Gemini
+      (pasa por el limitador de concurrencia real; --llm-capacity simula 429)
+    - Catálogo de acciones y regla del clasificador del fixture de replay
+
+Uso:
+    python -m benchmarks.ws_stub_server --port 8765 --llm-latency-ms 400 --jitter-ms 200
+"""
+import argparse
+import json
+import os
+
+import uvicorn
+
+from benchmarks.fakes import FakeLLM
+from benchmarks.graph_replay_bench import DEFAULT_FIXTURE, load_fixture, seed_redis
+from infrastructure.concurrency.adaptive_limiter import llm_limiter
+from infrastructure.config.redis_config import RedisConfig
+
+
+def install_fakes(args, fixture) -> None:
+    """Reemplaza Redis y el LLM antes de importar la app."""
+    if args.redis_url:
+        import redis
+        import redis.asyncio
+        RedisConfig._instance = redis.Redis.from_url(args.redis_url, decode_responses=True)
+        RedisConfig._async_instance = redis.asyncio.Redis.from_url(args.redis_url, decode_responses=True)
+        RedisConfig._binary_instance = redis.Redis.from_url(args.redis_url, decode_responses=False)
+    else:
+        import fakeredis
+        server = fakeredis.FakeServer()
+        RedisConfig._instance = fakeredis.FakeRedis(server=server, decode_responses=True)
+        RedisConfig._async_instance = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+        RedisConfig._binary_instance = fakeredis.FakeRedis(server=server, decode_responses=False)
+
+    seed_redis(RedisConfig.get_client(), fixture)
+
+    import langgraph.application.node_context as node_context
+    rules = fixture["llm_rules"]
+    limiter = None if args.no_limiter else llm_limiter
+    node_context.GeminiLLMAdapter = lambda: FakeLLM(
+        rules,
+        latency_ms=args.llm_latency_ms,
+        jitter_ms=args.jitter_ms,
+        capacity=args.llm_capacity,
+        limiter=limiter,
+        hang_rate=args.llm_hang_rate
+    )
+
+    if args.rate_limit is not None:
+        from websocket.application.response import WsChatAplicationResponse
+        WsChatAplicationResponse.MAX_MESSAGES_PER_MINUTE = args.rate_limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor /ws/chat con Redis y LLM simulados")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--llm-capacity", type=int, default=None, help="Concurrencia que acepta el LLM simulado antes de responder 429")
+    parser.add_argument("--no-limiter", action="store_true", help="No aplicar el limitador de concurrencia de Gemini")
+    parser.add_argument("--llm-hang-rate", type=float, default=0.0, help="Fracción de llamadas al LLM simulado que se cuelgan (0-1)")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Mensajes por minuto por usuario (por defecto el de producción)")
+    parser.add_argument("--pid-file", default=None, help="Escribe el PID para que ws_load muestree su RSS")
+    args = parser.parse_args()
+
+    install_fakes(args, load_fixture(args.fixture))
+
+    from app import app
+
+    if args.pid_file:
+        with open(args.pid_file, "w") as handle:
+            handle.write(str(os.getpid()))
+
+    print(json.dumps({"stub_server": f"ws://{args.host}:{args.port}/ws/chat", "pid": os.getpid()}))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
-import google.generativeai as genai
+import math
+
 from fastapi import HTTPException
-from configparser import ConfigParser
 from gemini.domain.dataModel.model import GeminiRequest
+from infrastructure.concurrency.adaptive_limiter import LimiterOverloaded, llm_limiter
+from infrastructure.config.gemini_config import GeminiConfig
 
 
 class GeminiService:
@@ -13,16 +15,12 @@ class GeminiService:
     def __init__(self, request: GeminiRequest = None):
         self.request = request
 
-        # Leer config.ini
-        config = ConfigParser()
-        config.read("config.ini")
-
-        self.api_key = config.get("GEMINI", "api_key", fallback=None)
+        self.api_key = GeminiConfig.get_api_key()
         if not self.api_key:
             raise HTTPException(status_code=500, detail="API key de Gemini no configurada.")
 
-        # Inicializar cliente oficial
-        genai.configure(api_key=self.api_key)
+        # Cliente oficial (importado y configurado una vez por proceso)
+        self.genai = GeminiConfig.get_genai()
 
     # ------------------------------------------------------------
     # Construir prompt
@@ -42,16 +40,23 @@ class GeminiService:
             raise HTTPException(status_code=400, detail="No se recibió solicitud válida.")
 
         try:
-            model = genai.GenerativeModel(self.request.model)
-
-            response = model.generate_content(
-                self.build_prompt(),
-                generation_config={
-                    "temperature": self.request.temperature,
-                    "max_output_tokens": 512, 
-                }
+            model = self.genai.GenerativeModel(self.request.model)
+
+            with llm_limiter.acquire(self.request.area):
+                response = model.generate_content(
+                    self.build_prompt(),
+                    generation_config={
+                        "temperature": self.request.temperature,
+                        "max_output_tokens": 512, 
+                    }
+                )
+
+        except LimiterOverloaded as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Servicio de Gemini saturado, intente de nuevo en unos segundos ({e})",
+                headers={"Retry-After": str(math.ceil(e.retry_after))}
             )
-
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error interno en Gemini: {str(e)}")
 
@@ -91,7 +96,7 @@ class GeminiService:
     # ------------------------------------------------------------
     def list_models(self):
         try:
-            models = genai.list_models()
+            models = self.genai.list_models()
             return {"models": [m.name for m in models]}
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error al obtener modelos: {e}")
@@ -6,4 +6,5 @@ class GeminiRequest(BaseModel):
     context: Optional[str] = "Responde de forma clara, breve y en español."  # contexto por defecto
     model: Optional[str] = "gemini-2.5-flash"
     temperature: Optional[float] = 0.7
+    area: Optional[str] = "general"  # equidad en la cola del limitador de Gemini
     
@@ -1,4 +1,4 @@
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi import HTTPException
 from gemini.application.gemini_service import GeminiService
 
@@ -13,13 +13,13 @@ class GeminiController:
 
             if self.dataModel:
                 result = service.generate()
-                return JSONResponse(
+                return ORJSONResponse(
                     status_code=200,
                     content={"status": True, "msg": "Texto generado exitosamente.", "data": result}
                 )
 
             models = service.list_models()
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=200,
                 content={"status": True, "msg": "Modelos obtenidos correctamente.", "models": models}
             )
@@ -0,0 +1,54 @@
+"""
+Configuración de gunicorn para la API.
+
+Con preload_app la aplicación se importa una vez en el master: el grafo
+compilado, el índice de acciones y el clasificador local se cargan antes del
+fork y los workers los comparten copy-on-write (gc.freeze evita que el GC los
+toque y duplique las páginas). Los clientes de red nunca se heredan: post_fork
+descarta las referencias y cada worker crea los suyos en el primer uso.
+
+Variables de entorno:
+    WEB_CONCURRENCY   -> cantidad de workers (por defecto 4)
+    GUNICORN_PRELOAD  -> 0 para cargar el estado en cada worker (sin compartir)
+
+Uso:
+    gunicorn app:app -c gunicorn.conf.py
+"""
+import gc
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8001")
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+# Ping/pong de protocolo en los WebSockets ([WS] en config.ini)
+worker_class = "infrastructure.config.uvicorn_worker.KeepaliveUvicornWorker"
+timeout = 240
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+
+def when_ready(server):
+    """Master: precarga el estado compartido y lo congela antes de crear workers."""
+    if not preload_app:
+        return
+    from app import preload_shared_state
+
+    preload_shared_state()
+    gc.freeze()
+    server.log.info("Estado compartido precargado en el master (pid %s)", os.getpid())
+
+
+def post_fork(server, worker):
+    """Worker recién creado: descarta los clientes heredados del master."""
+    from infrastructure.config.gemini_config import GeminiConfig
+    from infrastructure.config.redis_config import RedisConfig
+
+    RedisConfig.reset_after_fork()
+    GeminiConfig.reset()
+
+
+def post_worker_init(worker):
+    """Sin preload, cada worker carga su propia copia del estado antes de atender."""
+    if preload_app:
+        return
+    from app import preload_shared_state
+
+    preload_shared_state()
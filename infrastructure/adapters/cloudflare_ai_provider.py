@@ -0,0 +1,102 @@
+"""
+Proveedor Cloudflare Workers AI (API REST /ai/run) para el router de LLM.
+Se usa como secundario cuando Gemini está lento, saturado o fallando.
+"""
+import os
+import threading
+from configparser import ConfigParser
+from typing import Any, Dict, Optional
+
+import requests
+
+from infrastructure.ports.llm_port import LLMCancelled, LLMProviderPort
+
+
+class CloudflareAIProvider(LLMProviderPort):
+    """
+    Llama a un modelo de Workers AI. La sesión HTTP se crea por proceso
+    (no se comparte entre workers de gunicorn).
+    """
+
+    API_URL = "https://api.cloudflare.com/client/v4/accounts/{account_id}/ai/run/{model}"
+
+    def __init__(
+        self,
+        model: str = "@cf/meta/llama-3.1-8b-instruct",
+        account_id: Optional[str] = None,
+        api_token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: float = 30.0,
+        max_tokens: int = 512
+    ):
+        """
+        Args:
+            model: Modelo de Workers AI
+            account_id: Cuenta de Cloudflare (si no, [CLOUDFLARE_AI] de config.ini)
+            api_token: Token con permiso Workers AI (si no, [CLOUDFLARE_AI] de config.ini)
+            base_url: URL alternativa (ej: un Worker propio que hace de gateway)
+            timeout: Timeout por defecto en segundos
+            max_tokens: Tokens máximos de la respuesta
+        """
+        if account_id is None or api_token is None:
+            config = ConfigParser()
+            config.read("config.ini")
+            account_id = account_id or config.get("CLOUDFLARE_AI", "account_id", fallback=None)
+            api_token = api_token or config.get("CLOUDFLARE_AI", "api_token", fallback=None)
+            base_url = base_url or config.get("CLOUDFLARE_AI", "base_url", fallback=None)
+
+        if not base_url and not account_id:
+            raise ValueError("Cloudflare Workers AI requiere account_id o base_url en [CLOUDFLARE_AI]")
+
+        self.model = model
+        self.name = f"cloudflare:{model}"
+        self.url = base_url or self.API_URL.format(account_id=account_id, model=model)
+        self.api_token = api_token
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self._session: Optional[requests.Session] = None
+        self._session_pid: Optional[int] = None
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None or self._session_pid != os.getpid():
+            self._session = requests.Session()
+            if self.api_token:
+                self._session.headers["Authorization"] = f"Bearer {self.api_token}"
+            self._session_pid = os.getpid()
+        return self._session
+
+    def generate(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None,
+        area: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        if cancel_event is not None and cancel_event.is_set():
+            raise LLMCancelled(self.name)
+
+        response = self.session.post(
+            self.url,
+            json={"prompt": prompt, "max_tokens": self.max_tokens},
+            timeout=timeout or self.timeout
+        )
+        if response.status_code == 429:
+            raise RuntimeError(f"429 Workers AI: {response.text[:200]}")
+        response.raise_for_status()
+
+        body = response.json()
+        if not body.get("success", True):
+            raise RuntimeError(f"Workers AI devolvió error: {body.get('errors')}")
+
+        result = body.get("result") or {}
+        usage = result.get("usage") or {}
+        return {
+            "text": result.get("response", ""),
+            "tokens": {
+                "prompt_tokens": usage.get("prompt_tokens"),
+                "completion_tokens": usage.get("completion_tokens"),
+                "total_tokens": usage.get("total_tokens")
+            } if usage else {},
+            "finish_reason": "STOP"
+        }
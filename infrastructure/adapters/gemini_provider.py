@@ -0,0 +1,63 @@
+"""
+Proveedor Gemini (google.generativeai) para el router de LLM.
+"""
+import threading
+from typing import Any, Dict, Optional
+
+from infrastructure.concurrency.adaptive_limiter import llm_limiter
+from infrastructure.config.gemini_config import GeminiConfig
+from infrastructure.ports.llm_port import LLMCancelled, LLMProviderPort
+
+
+class GeminiProvider(LLMProviderPort):
+    """
+    Llama a un modelo de Gemini pasando por el limitador de concurrencia compartido.
+    """
+
+    def __init__(self, model_name: str = "gemini-2.5-flash-lite"):
+        self.model_name = model_name
+        self.name = f"gemini:{model_name}"
+        self._model = None
+
+    @property
+    def model(self):
+        # El SDK se importa y configura con la primera llamada del proceso
+        if self._model is None:
+            self._model = GeminiConfig.get_genai().GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None,
+        area: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        with llm_limiter.acquire(area, timeout=timeout):
+            if cancel_event is not None and cancel_event.is_set():
+                # El hedge ya respondió mientras se esperaba cupo: no gastar la llamada
+                raise LLMCancelled(self.name)
+            response = self.model.generate_content(
+                prompt,
+                request_options={"timeout": timeout} if timeout else None
+            )
+
+        # Extraer información de tokens
+        tokens_info = {}
+        if hasattr(response, 'usage_metadata'):
+            tokens_info = {
+                "prompt_tokens": response.usage_metadata.prompt_token_count,
+                "completion_tokens": response.usage_metadata.candidates_token_count,
+                "total_tokens": response.usage_metadata.total_token_count
+            }
+
+        # Extraer razón de finalización (indicador de confianza)
+        finish_reason = "FINISH_REASON_UNSPECIFIED"
+        if hasattr(response, 'candidates') and response.candidates:
+            finish_reason = response.candidates[0].finish_reason
+
+        return {
+            "text": response.text,
+            "tokens": tokens_info,
+            "finish_reason": finish_reason
+        }
@@ -0,0 +1,383 @@
+"""
+Router de proveedores de LLM con hedging, failover y ruteo por latencia.
+
+Los proveedores se ordenan en cada llamada por salud y latencia:
+    - error_rate (EWMA): sobre max_error_rate el proveedor queda en enfriamiento
+      (cooldown) y solo se usa como último recurso
+    - latencia (EWMA): entre los sanos, primero el más rápido; sin muestras se
+      respeta el orden configurado
+
+Hedging (desactivado por defecto, hedge = true para activarlo): si el primer
+proveedor no respondió cuando se cumple su p95 observado, se lanza una petición
+de respaldo al siguiente (o al mismo si es el único). Gana la primera
+respuesta; a la otra se le activa cancel_event y su resultado se descarta.
+Costo: cada hedge es una segunda petición facturada aunque se cancele, y con
+gemini-2.5-flash como respaldo de flash-lite cuesta varias veces la original.
+Los hedges están acotados a max_hedge_ratio de las llamadas (bucket de tokens,
+ráfaga máxima de 10) para no duplicar la carga ni el gasto cuando el
+proveedor entero está lento.
+
+Failover: si un proveedor falla (error, 429, cupo local agotado) se intenta el
+siguiente, siempre dentro del timeout total de la llamada.
+
+Configuración en la sección [LLM_ROUTER] de config.ini:
+    [LLM_ROUTER]
+    providers = gemini:gemini-2.5-flash-lite, gemini:gemini-2.5-flash, cloudflare:@cf/meta/llama-3.1-8b-instruct
+    hedge = false
+    max_hedge_ratio = 0.05
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from configparser import ConfigParser
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from infrastructure.concurrency.adaptive_limiter import LimiterOverloaded
+from infrastructure.concurrency.deadline import Deadline, DeadlineExpired
+from infrastructure.ports.llm_port import LLMCancelled, LLMProviderPort
+
+# Hedges acumulables como máximo (ráfaga tras un periodo sin hedges)
+HEDGE_BURST = 10.0
+
+
+class ProviderStats:
+    """Latencia y errores observados de un proveedor."""
+
+    def __init__(self, alpha: float, window: int = 200):
+        self.alpha = alpha
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.last_failure = 0.0
+        self.counts = {"calls": 0, "ok": 0, "errors": 0, "saturated": 0, "wins": 0, "hedges": 0, "cancelled": 0}
+
+    def record_success(self, latency: float) -> None:
+        self.counts["ok"] += 1
+        self.latencies.append(latency)
+        self.ewma_latency = latency if self.ewma_latency is None else (
+            self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+        )
+        self.error_rate = (1 - self.alpha) * self.error_rate
+
+    def record_failure(self) -> None:
+        self.counts["errors"] += 1
+        self.error_rate = (1 - self.alpha) * self.error_rate + self.alpha
+        self.last_failure = time.monotonic()
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class LLMRouter(LLMProviderPort):
+    """Proveedor compuesto: elige, cubre (hedge) y reemplaza (failover) proveedores."""
+
+    name = "router"
+
+    def __init__(
+        self,
+        providers: List[LLMProviderPort],
+        hedge: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_delay: float = 0.3,
+        hedge_default_delay: float = 2.0,
+        max_hedge_ratio: float = 0.05,
+        ewma_alpha: float = 0.2,
+        max_error_rate: float = 0.5,
+        cooldown: float = 30.0,
+        min_samples: int = 20,
+        max_workers: int = 32
+    ):
+        """
+        Args:
+            providers: Proveedores en orden de preferencia (el primero es el principal)
+            hedge: Habilitar peticiones de respaldo (cada una es una petición extra facturada)
+            hedge_percentile: Percentil de latencia tras el que se lanza el hedge
+            hedge_min_delay: Espera mínima antes de un hedge (segundos)
+            hedge_default_delay: Espera antes de un hedge mientras no hay min_samples
+            max_hedge_ratio: Fracción máxima de llamadas con hedge (tope del sobrecosto)
+            ewma_alpha: Peso de la última muestra en latencia y tasa de error
+            max_error_rate: Tasa de error sobre la que el proveedor entra en enfriamiento
+            cooldown: Segundos de enfriamiento tras el último fallo
+            min_samples: Muestras mínimas para usar el percentil observado
+            max_workers: Hilos para llamadas concurrentes (principal + hedges)
+        """
+        if not providers:
+            raise ValueError("LLMRouter requiere al menos un proveedor")
+        self.providers = providers
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+
+        self.stats: Dict[str, ProviderStats] = {p.name: ProviderStats(ewma_alpha) for p in providers}
+        self._hedge_tokens = 1.0
+        self._requests = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, default_model: str = "gemini-2.5-flash-lite") -> "LLMRouter":
+        config = ConfigParser()
+        config.read("config.ini")
+        section = "LLM_ROUTER"
+        specs = config.get(section, "providers", fallback=f"gemini:{default_model}, gemini:gemini-2.5-flash")
+        return cls(
+            providers=build_providers(specs),
+            hedge=config.getboolean(section, "hedge", fallback=False),
+            hedge_percentile=config.getfloat(section, "hedge_percentile", fallback=95.0),
+            hedge_min_delay=config.getfloat(section, "hedge_min_delay", fallback=0.3),
+            hedge_default_delay=config.getfloat(section, "hedge_default_delay", fallback=2.0),
+            max_hedge_ratio=config.getfloat(section, "max_hedge_ratio", fallback=0.05),
+            ewma_alpha=config.getfloat(section, "ewma_alpha", fallback=0.2),
+            max_error_rate=config.getfloat(section, "max_error_rate", fallback=0.5),
+            cooldown=config.getfloat(section, "cooldown", fallback=30.0),
+            min_samples=config.getint(section, "min_samples", fallback=20),
+            max_workers=config.getint(section, "max_workers", fallback=32)
+        )
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Pool por proceso: no se hereda de un master con --preload
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm-call")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    # ------------------------------------------------------------
+    # Ruteo
+    # ------------------------------------------------------------
+    def _is_cooling_down(self, stats: ProviderStats) -> bool:
+        return stats.error_rate > self.max_error_rate and time.monotonic() - stats.last_failure < self.cooldown
+
+    def ranked(self) -> List[LLMProviderPort]:
+        """Proveedores ordenados: sanos primero, luego por latencia EWMA y orden configurado."""
+        with self._lock:
+            keys = {
+                provider.name: (
+                    self._is_cooling_down(self.stats[provider.name]),
+                    self.stats[provider.name].ewma_latency if self.stats[provider.name].ewma_latency is not None else float("inf"),
+                    index
+                )
+                for index, provider in enumerate(self.providers)
+            }
+        return sorted(self.providers, key=lambda provider: keys[provider.name])
+
+    def _hedge_delay(self, provider: LLMProviderPort) -> float:
+        stats = self.stats[provider.name]
+        observed = stats.percentile(self.hedge_percentile) if len(stats.latencies) >= self.min_samples else None
+        return max(self.hedge_min_delay, observed if observed is not None else self.hedge_default_delay)
+
+    def _take_hedge_token(self) -> bool:
+        with self._lock:
+            if self._hedge_tokens >= 1.0:
+                self._hedge_tokens -= 1.0
+                return True
+            return False
+
+    def _record(self, provider: LLMProviderPort, started: float, future: Future) -> None:
+        """Callback al terminar cada intento (incluidos los perdedores de un hedge)."""
+        if future.cancelled():
+            return
+        error = future.exception()
+        with self._lock:
+            stats = self.stats[provider.name]
+            if error is None:
+                stats.record_success(time.monotonic() - started)
+            elif isinstance(error, LimiterOverloaded):
+                # Cupo local agotado: no es falla del proveedor
+                stats.counts["saturated"] += 1
+            elif not isinstance(error, LLMCancelled):
+                stats.record_failure()
+
+    def _launch(
+        self,
+        provider: LLMProviderPort,
+        prompt: str,
+        deadline: Optional[Deadline],
+        area: Optional[str]
+    ) -> Tuple[Future, threading.Event]:
+        cancel_event = threading.Event()
+        timeout = deadline.timeout(f"llm:{provider.name}") if deadline else None
+        started = time.monotonic()
+        future = self.executor.submit(provider.generate, prompt, timeout, area, cancel_event)
+        future.add_done_callback(lambda done: self._record(provider, started, done))
+        with self._lock:
+            self.stats[provider.name].counts["calls"] += 1
+        return future, cancel_event
+
+    # ------------------------------------------------------------
+    # Llamada
+    # ------------------------------------------------------------
+    def generate(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None,
+        area: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        """
+        Genera texto con el mejor proveedor disponible.
+
+        Returns:
+            Dict del proveedor ganador más provider y hedged
+
+        Raises:
+            DeadlineExpired: Si se agota el timeout sin respuesta
+            LimiterOverloaded: Si todos los proveedores fallaron por cupo local
+            Exception: El último error si todos los proveedores fallaron
+        """
+        deadline = Deadline.after(timeout) if timeout else None
+        ranked = self.ranked()
+        with self._lock:
+            self._requests += 1
+            self._hedge_tokens = min(HEDGE_BURST, self._hedge_tokens + self.max_hedge_ratio)
+
+        pending: Dict[Future, Tuple[LLMProviderPort, threading.Event]] = {}
+        next_index = 0
+        errors: List[BaseException] = []
+        hedged = False
+        hedge_at: Optional[float] = None
+
+        def launch_next() -> bool:
+            nonlocal next_index
+            if next_index >= len(ranked):
+                return False
+            provider = ranked[next_index]
+            next_index += 1
+            future, event = self._launch(provider, prompt, deadline, area)
+            pending[future] = (provider, event)
+            return True
+
+        def cancel_pending() -> None:
+            for future, (provider, event) in pending.items():
+                event.set()
+                future.cancel()
+                with self._lock:
+                    self.stats[provider.name].counts["cancelled"] += 1
+            pending.clear()
+
+        launch_next()
+        if self.hedge:
+            hedge_at = time.monotonic() + self._hedge_delay(ranked[0])
+
+        try:
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise LLMCancelled(self.name)
+
+                waits = []
+                if hedge_at is not None and not hedged:
+                    waits.append(max(0.0, hedge_at - time.monotonic()))
+                if deadline is not None:
+                    waits.append(deadline.remaining())
+                done, _ = wait(list(pending), timeout=min(waits) if waits else None, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    if deadline is not None and deadline.expired:
+                        raise DeadlineExpired("llm")
+                    # Se cumplió el p95 sin respuesta: respaldo al siguiente (o al mismo si es el único)
+                    hedged = True
+                    if self._take_hedge_token():
+                        target = ranked[next_index] if next_index < len(ranked) else ranked[0]
+                        if next_index < len(ranked):
+                            next_index += 1
+                        future, event = self._launch(target, prompt, deadline, area)
+                        pending[future] = (target, event)
+                        with self._lock:
+                            self.stats[target.name].counts["hedges"] += 1
+                    continue
+
+                for future in done:
+                    provider, _ = pending.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        cancel_pending()
+                        with self._lock:
+                            self.stats[provider.name].counts["wins"] += 1
+                        return {**future.result(), "provider": provider.name, "hedged": hedged}
+                    if not isinstance(error, LLMCancelled):
+                        print(f"⚠️ Proveedor LLM {provider.name} falló: {error}")
+                        errors.append(error)
+
+                # Failover: si no queda ningún intento en curso, probar el siguiente proveedor
+                if not pending and not launch_next():
+                    break
+        finally:
+            cancel_pending()
+
+        if deadline is not None and deadline.expired:
+            raise DeadlineExpired("llm")
+        # Solo se informa saturación (1013 / 503) si ningún proveedor falló por otra causa
+        provider_errors = [error for error in errors if not isinstance(error, LimiterOverloaded)]
+        if provider_errors:
+            raise provider_errors[-1]
+        if errors:
+            raise errors[-1]
+        raise DeadlineExpired("llm")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "providers": [
+                    {
+                        "name": provider.name,
+                        "cooling_down": self._is_cooling_down(self.stats[provider.name]),
+                        "ewma_latency_s": round(self.stats[provider.name].ewma_latency, 3)
+                        if self.stats[provider.name].ewma_latency is not None else None,
+                        "p95_s": round(self.stats[provider.name].percentile(95), 3)
+                        if self.stats[provider.name].latencies else None,
+                        "error_rate": round(self.stats[provider.name].error_rate, 3),
+                        **self.stats[provider.name].counts
+                    }
+                    for provider in self.providers
+                ]
+            }
+
+
+def build_providers(specs: str) -> List[LLMProviderPort]:
+    """
+    Construye proveedores desde "tipo:modelo, tipo:modelo".
+    Los que no se pueden crear (ej: Cloudflare sin credenciales) se omiten con aviso.
+    """
+    from infrastructure.adapters.cloudflare_ai_provider import CloudflareAIProvider
+    from infrastructure.adapters.gemini_provider import GeminiProvider
+
+    factories = {"gemini": GeminiProvider, "cloudflare": CloudflareAIProvider}
+    providers: List[LLMProviderPort] = []
+    for spec in (item.strip() for item in specs.split(",")):
+        if not spec:
+            continue
+        kind, _, model = spec.partition(":")
+        if kind not in factories:
+            raise ValueError(f"Proveedor LLM desconocido: {kind}")
+        try:
+            providers.append(factories[kind](model) if model else factories[kind]())
+        except ValueError as e:
+            print(f"⚠️ Proveedor {spec} omitido: {e}")
+    return providers
+
+
+_router: Optional[LLMRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_llm_router() -> LLMRouter:
+    """Router compartido por el proceso (las estadísticas de latencia se acumulan entre turnos)."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = LLMRouter.from_config()
+    return _router
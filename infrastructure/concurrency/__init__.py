@@ -0,0 +1 @@
+"""Módulo de control de concurrencia (limitadores adaptativos)"""
@@ -0,0 +1,282 @@
+"""
+Limitador de concurrencia adaptativo (AIMD) con cola acotada por área.
+
+Limita cuántas llamadas a un proveedor (ej: generate_content de Gemini) se
+ejecutan a la vez en este proceso:
+    - Aumento aditivo: cada llamada exitosa y rápida sube el límite ~1 por ventana
+    - Disminución multiplicativa: un 429/timeout del proveedor o una latencia
+      sobre latency_target multiplica el límite por backoff_ratio
+
+Cuando no hay cupo, la llamada espera en una cola acotada con deadline. Las
+colas son por área (tenant) y se atienden en round-robin, así un área con
+ráfaga no deja sin turno a las demás. Si la cola está llena, si la espera
+estimada (cola / límite * latencia media) supera el deadline o si este vence,
+se lanza LimiterOverloaded (fail fast, sin colgarse).
+
+Uso:
+    with llm_limiter.acquire(area="ventas"):
+        response = model.generate_content(prompt)
+"""
+import threading
+import time
+from collections import deque
+from configparser import ConfigParser
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+# Excepciones del proveedor que indican saturación (por nombre, sin importar google.api_core)
+OVERLOAD_ERRORS = ("ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded", "TimeoutError")
+# Segundos entre reducciones: las llamadas que ya estaban en vuelo no la repiten
+BACKOFF_WINDOW = 1.0
+# Peso de la última muestra en la latencia media (EWMA)
+LATENCY_ALPHA = 0.2
+
+
+class LimiterOverloaded(Exception):
+    """No hay cupo para la llamada: cola llena o deadline vencido."""
+
+    def __init__(self, message: str, reason: str, retry_after: float):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """True si el error del proveedor indica saturación (429, 503, timeout)."""
+    if type(error).__name__ in OVERLOAD_ERRORS:
+        return True
+    text = str(error)
+    return "429" in text or "Resource has been exhausted" in text
+
+
+class _Waiter:
+    __slots__ = ("area", "event", "granted", "cancelled")
+
+    def __init__(self, area: str):
+        self.area = area
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class AdaptiveLimiter:
+    """Límite de concurrencia AIMD compartido por los hilos del proceso."""
+
+    def __init__(
+        self,
+        name: str = "llm",
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        max_queue: int = 100,
+        max_wait: float = 10.0,
+        latency_target: float = 8.0,
+        backoff_ratio: float = 0.7,
+        enabled: bool = True
+    ):
+        """
+        Args:
+            name: Nombre para logs y métricas
+            initial_limit: Concurrencia inicial
+            min_limit: Concurrencia mínima (nunca baja de aquí)
+            max_limit: Concurrencia máxima
+            max_queue: Llamadas en espera como máximo (todas las áreas)
+            max_wait: Segundos máximos de espera en cola
+            latency_target: Segundos; una llamada más lenta cuenta como congestión (0 = ignorar)
+            backoff_ratio: Factor multiplicativo al detectar congestión
+            enabled: Si es False no limita (solo cuenta)
+        """
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("backoff_ratio debe estar entre 0 y 1")
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.enabled = enabled
+
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._queues: Dict[str, Deque[_Waiter]] = {}
+        self._turns: Deque[str] = deque()
+        self._queued = 0
+        self._last_backoff = 0.0
+        self._avg_latency: Optional[float] = None
+        self._lock = threading.Lock()
+
+        self.stats = {"acquired": 0, "waited": 0, "rejected": 0, "timeouts": 0,
+                      "overloads": 0, "slow": 0, "backoffs": 0}
+
+    @classmethod
+    def from_config(cls, section: str = "LLM_LIMITER", name: str = "llm") -> "AdaptiveLimiter":
+        config = ConfigParser()
+        config.read("config.ini")
+        return cls(
+            name=name,
+            initial_limit=config.getint(section, "initial_limit", fallback=8),
+            min_limit=config.getint(section, "min_limit", fallback=1),
+            max_limit=config.getint(section, "max_limit", fallback=64),
+            max_queue=config.getint(section, "max_queue", fallback=100),
+            max_wait=config.getfloat(section, "max_wait", fallback=10.0),
+            latency_target=config.getfloat(section, "latency_target", fallback=8.0),
+            backoff_ratio=config.getfloat(section, "backoff_ratio", fallback=0.7),
+            enabled=config.getboolean(section, "enabled", fallback=True)
+        )
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    # ------------------------------------------------------------
+    # Cupos
+    # ------------------------------------------------------------
+    def _retry_after(self) -> float:
+        """Estimación simple de cuándo reintentar (segundos)."""
+        return round(min(self.max_wait, 1.0 + self._queued / max(1, self.limit)), 1)
+
+    def _dispatch(self) -> None:
+        """Entrega cupos libres a los que esperan, un área por turno. Requiere el lock."""
+        while self._turns and self._in_flight < self.limit:
+            area = self._turns.popleft()
+            queue = self._queues[area]
+            while queue and queue[0].cancelled:
+                queue.popleft()
+            if not queue:
+                del self._queues[area]
+                continue
+
+            waiter = queue.popleft()
+            self._queued -= 1
+            self._in_flight += 1
+            waiter.granted = True
+            waiter.event.set()
+
+            if queue:
+                self._turns.append(area)
+            else:
+                del self._queues[area]
+
+    def _estimated_wait(self) -> float:
+        """Segundos que tardaría en atenderse una llamada nueva al final de la cola."""
+        if self._avg_latency is None:
+            return 0.0
+        return (self._queued + 1) / max(1, self.limit) * self._avg_latency
+
+    def _wait_for_slot(self, area: str, timeout: float) -> None:
+        with self._lock:
+            if not self.enabled or (self._in_flight < self.limit and not self._queued):
+                self._in_flight += 1
+                self.stats["acquired"] += 1
+                return
+
+            if self._queued >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise LimiterOverloaded(
+                    f"Límite de concurrencia '{self.name}' saturado ({self._queued} en cola)",
+                    reason="queue_full",
+                    retry_after=self._retry_after()
+                )
+
+            estimated = self._estimated_wait()
+            if estimated > timeout:
+                # No alcanzaría a atenderse: rechazar ya en lugar de ocupar un hilo esperando
+                self.stats["rejected"] += 1
+                raise LimiterOverloaded(
+                    f"Límite de concurrencia '{self.name}' saturado (espera estimada {estimated:.1f}s)",
+                    reason="estimated_wait",
+                    retry_after=self._retry_after()
+                )
+
+            waiter = _Waiter(area)
+            if area not in self._queues:
+                self._queues[area] = deque()
+                self._turns.append(area)
+            self._queues[area].append(waiter)
+            self._queued += 1
+            self.stats["waited"] += 1
+
+        waiter.event.wait(timeout)
+
+        with self._lock:
+            if waiter.granted:
+                self.stats["acquired"] += 1
+                return
+            waiter.cancelled = True
+            self._queued -= 1
+            self.stats["timeouts"] += 1
+            retry_after = self._retry_after()
+
+        raise LimiterOverloaded(
+            f"Sin cupo en '{self.name}' tras {timeout:.1f}s de espera",
+            reason="timeout",
+            retry_after=retry_after
+        )
+
+    def _release(self, latency: Optional[float], overloaded: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            slow = latency is not None and self.latency_target > 0 and latency > self.latency_target
+            if latency is not None and not overloaded:
+                self._avg_latency = latency if self._avg_latency is None else (
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * self._avg_latency
+                )
+
+            if overloaded or slow:
+                self.stats["overloads" if overloaded else "slow"] += 1
+                now = time.monotonic()
+                if now - self._last_backoff >= BACKOFF_WINDOW:
+                    self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                    self._last_backoff = now
+                    self.stats["backoffs"] += 1
+            elif latency is not None and self._in_flight + 1 >= self._limit / 2:
+                # Solo crece si el límite se está usando (evita inflarlo con poco tráfico)
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+
+            self._dispatch()
+
+    @contextmanager
+    def acquire(self, area: Optional[str] = None, timeout: Optional[float] = None) -> Iterator[None]:
+        """
+        Ejecuta el bloque con un cupo del limitador.
+
+        Args:
+            area: Tenant para la equidad de la cola
+            timeout: Segundos máximos de espera (por defecto max_wait)
+
+        Raises:
+            LimiterOverloaded: Si la cola está llena o vence la espera
+        """
+        wait = self.max_wait if timeout is None else max(0.0, min(timeout, self.max_wait))
+        self._wait_for_slot(area or "general", wait)
+
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            # Los errores que no son de saturación no cambian el límite
+            self._release(time.monotonic() - started if is_overload_error(e) else None, is_overload_error(e))
+            raise
+        else:
+            self._release(time.monotonic() - started, False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "enabled": self.enabled,
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "avg_latency_s": round(self._avg_latency, 3) if self._avg_latency is not None else None,
+                "queued_by_area": {
+                    area: sum(1 for waiter in queue if not waiter.cancelled)
+                    for area, queue in self._queues.items()
+                },
+                **self.stats
+            }
+
+
+# Instancia compartida por proceso para las llamadas a Gemini
+llm_limiter = AdaptiveLimiter.from_config()
@@ -0,0 +1,74 @@
+"""
+Deadlines por turno: presupuesto de tiempo que se propaga a cada etapa.
+
+Un turno de /ws/chat crea un Deadline al recibir el frame; cada nodo, la cola
+del limitador y la llamada al LLM consultan el tiempo restante y lo usan como
+su propio timeout. Al agotarse se lanza DeadlineExpired y el turno responde un
+timeout limpio en lugar de dejar el socket esperando.
+
+El timeout se configura por área en la sección [DEADLINES] de config.ini:
+    [DEADLINES]
+    default = 30
+    ventas = 20
+"""
+import time
+from configparser import ConfigParser
+from typing import Optional
+
+
+class DeadlineExpired(TimeoutError):
+    """Se agotó el presupuesto de tiempo del turno."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Tiempo del turno agotado en '{stage}'")
+        self.stage = stage
+
+
+class Deadline:
+    """Instante límite (reloj monotónico) de una operación."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        """Segundos restantes (0 si ya venció)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage: str) -> None:
+        """
+        Raises:
+            DeadlineExpired: Si el presupuesto ya se agotó
+        """
+        if self.expired:
+            raise DeadlineExpired(stage)
+
+    def timeout(self, stage: str, cap: Optional[float] = None) -> float:
+        """
+        Tiempo restante para usar como timeout de una llamada (opcionalmente acotado).
+
+        Raises:
+            DeadlineExpired: Si el presupuesto ya se agotó
+        """
+        self.check(stage)
+        remaining = self.remaining()
+        return min(remaining, cap) if cap is not None else remaining
+
+
+def turn_timeout_for_area(area: Optional[str]) -> float:
+    """Segundos de presupuesto por turno para el área ([DEADLINES] de config.ini)."""
+    config = ConfigParser()
+    config.read("config.ini")
+    default = config.getfloat("DEADLINES", "default", fallback=30.0)
+    if not area:
+        return default
+    return config.getfloat("DEADLINES", area.strip().lower(), fallback=default)
@@ -0,0 +1,194 @@
+"""
+Lock distribuido por usuario para serializar los turnos de conversación.
+
+Dos pestañas o mensajes seguidos del mismo usuario pueden llegar a workers
+distintos; sin coordinación ambos ejecutan el grafo sobre el mismo hilo de
+checkpoints y repiten llamadas al LLM. Cada turno toma un lease en Redis:
+
+    turn:lock:{code_user}    id del dueño actual (SET NX PX, expira solo)
+    turn:fence:{code_user}   contador de tokens de fencing (INCR)
+
+El INCR y el SET NX van en la misma transacción (MULTI), así el token de quien
+obtiene el lease siempre es mayor que el de cualquier dueño anterior. El token viaja en
+la configuración del grafo y el checkpointer lo usa como score del índice: si
+un dueño cuyo lease venció sigue escribiendo, sus checkpoints quedan por debajo
+de los del nuevo dueño y nunca se leen como los más recientes.
+
+Los usuarios distintos no comparten claves (no compiten entre sí). Quien no
+obtiene el lease reintenta con backoff exponencial hasta max_wait o el deadline
+del turno. El tiempo de espera se registra (p50/p95/p99) en get_stats().
+
+Configuración en la sección [TURN_LOCK] de config.ini:
+    [TURN_LOCK]
+    enabled = true
+    lease = 60
+    max_wait = 20
+"""
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from configparser import ConfigParser
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from redis.exceptions import WatchError
+
+from infrastructure.concurrency.deadline import Deadline, DeadlineExpired
+from infrastructure.config.redis_config import RedisConfig
+from infrastructure.metrics.latency import summarize_latencies
+
+# Espera entre intentos (segundos): crece x2 desde el mínimo hasta el máximo
+MIN_BACKOFF = 0.005
+MAX_BACKOFF = 0.1
+# Muestras de espera que se conservan para los percentiles
+WAIT_SAMPLES = 1024
+
+
+class TurnLockTimeout(Exception):
+    """Otro turno del mismo usuario sigue en curso tras la espera máxima."""
+
+    def __init__(self, code_user: str, waited: float, retry_after: float):
+        super().__init__(f"Turno anterior de '{code_user}' en curso tras {waited:.1f}s de espera")
+        self.code_user = code_user
+        self.waited = waited
+        self.retry_after = retry_after
+
+
+class TurnLock:
+    """Lease por usuario con token de fencing, compartido por los hilos del proceso."""
+
+    LOCK_KEY = "turn:lock:{code_user}"
+    FENCE_KEY = "turn:fence:{code_user}"
+
+    def __init__(self, redis=None, lease: float = 60.0, max_wait: float = 20.0, enabled: bool = True):
+        """
+        Args:
+            redis: Cliente Redis (por defecto RedisConfig.get_client(), resuelto en cada uso)
+            lease: Segundos de vida del lock si el dueño no lo libera (caída del worker)
+            max_wait: Segundos máximos de espera por el turno anterior
+            enabled: Si es False no serializa (token None)
+        """
+        self._redis = redis
+        self.lease = lease
+        self.max_wait = max_wait
+        self.enabled = enabled
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self._held = 0
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "contended": 0, "timeouts": 0, "expired_on_release": 0}
+
+    @classmethod
+    def from_config(cls) -> "TurnLock":
+        config = ConfigParser()
+        config.read("config.ini")
+        return cls(
+            lease=config.getfloat("TURN_LOCK", "lease", fallback=60.0),
+            max_wait=config.getfloat("TURN_LOCK", "max_wait", fallback=20.0),
+            enabled=config.getboolean("TURN_LOCK", "enabled", fallback=True)
+        )
+
+    @property
+    def redis(self):
+        return self._redis if self._redis is not None else RedisConfig.get_client()
+
+    def _try_acquire(self, code_user: str, owner: str, lease_ms: int) -> Optional[int]:
+        """Un intento (una transacción): retorna el token si se obtuvo el lease."""
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.incr(self.FENCE_KEY.format(code_user=code_user))
+        pipe.set(self.LOCK_KEY.format(code_user=code_user), owner, nx=True, px=lease_ms)
+        token, acquired = pipe.execute()
+        return int(token) if acquired else None
+
+    def _release(self, code_user: str, owner: str) -> None:
+        """Borra el lock solo si sigue siendo nuestro (compare-and-delete con WATCH)."""
+        key = self.LOCK_KEY.format(code_user=code_user)
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = pipe.get(key)
+                if isinstance(current, bytes):
+                    current = current.decode("utf-8")
+                if current != owner:
+                    pipe.unwatch()
+                    with self._lock:
+                        self.stats["expired_on_release"] += 1
+                    return
+                pipe.multi()
+                pipe.delete(key)
+                pipe.execute()
+            except WatchError:
+                # Otro dueño tomó el lock entre el GET y el DEL: ya no es nuestro
+                with self._lock:
+                    self.stats["expired_on_release"] += 1
+
+    @contextmanager
+    def hold(self, code_user: str, deadline: Optional[Deadline] = None) -> Iterator[Optional[int]]:
+        """
+        Ejecuta el bloque como único turno en curso del usuario.
+
+        Args:
+            code_user: Usuario (hilo de conversación)
+            deadline: Presupuesto del turno; acota la espera y el lease
+
+        Yields:
+            Token de fencing del turno (None si el lock está deshabilitado)
+
+        Raises:
+            TurnLockTimeout: Si el turno anterior no termina dentro de max_wait
+            DeadlineExpired: Si el turno se quedó sin tiempo esperando
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        # El lease cubre el turno completo: no hace falta renovarlo mientras corre
+        lease = max(self.lease, deadline.remaining() + 1.0) if deadline is not None else self.lease
+        wait_limit = min(self.max_wait, deadline.remaining()) if deadline is not None else self.max_wait
+        owner = uuid.uuid4().hex
+        started = time.monotonic()
+        backoff = MIN_BACKOFF
+        token = self._try_acquire(code_user, owner, int(lease * 1000))
+        if token is None:
+            with self._lock:
+                self.stats["contended"] += 1
+        while token is None:
+            waited = time.monotonic() - started
+            if waited >= wait_limit:
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                    self._waits.append(waited)
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExpired("turn_lock")
+                raise TurnLockTimeout(code_user, waited, retry_after=round(min(self.lease, 1.0 + waited), 1))
+            time.sleep(min(backoff * (0.5 + random.random()), wait_limit - waited))
+            backoff = min(MAX_BACKOFF, backoff * 2)
+            token = self._try_acquire(code_user, owner, int(lease * 1000))
+
+        with self._lock:
+            self.stats["acquired"] += 1
+            self._waits.append(time.monotonic() - started)
+            self._held += 1
+        try:
+            yield token
+        finally:
+            with self._lock:
+                self._held -= 1
+            self._release(code_user, owner)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits_ms = [wait * 1000 for wait in self._waits]
+            return {
+                "enabled": self.enabled,
+                "lease_s": self.lease,
+                "max_wait_s": self.max_wait,
+                "held": self._held,
+                "wait_ms": summarize_latencies(waits_ms),
+                **self.stats
+            }
+
+
+# Instancia compartida por proceso para los turnos del grafo
+turn_lock = TurnLock.from_config()
@@ -2,18 +2,21 @@
 Configuración centralizada de Email usando FastAPI-Mail.
 Proporciona una única instancia de configuración de email.
 """
-from fastapi_mail import ConnectionConfig
 from configparser import ConfigParser
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from fastapi_mail import ConnectionConfig, FastMail
 
 
 class EmailConfig:
     """Singleton para gestionar la configuración de email"""
     
-    _config: Optional[ConnectionConfig] = None
+    _config: Optional["ConnectionConfig"] = None
+    _mail: Optional["FastMail"] = None
     
     @classmethod
-    def get_config(cls) -> ConnectionConfig:
+    def get_config(cls) -> "ConnectionConfig":
         """
         Obtiene la configuración de email.
         Si no existe, la crea desde config.ini
@@ -22,6 +25,9 @@ class EmailConfig:
             ConnectionConfig: Configuración de FastAPI-Mail
         """
         if cls._config is None:
+            # fastapi_mail se importa solo al usarse (es costoso al arrancar)
+            from fastapi_mail import ConnectionConfig
+
             config = ConfigParser()
             config.read("config.ini")
             
@@ -36,3 +42,17 @@ class EmailConfig:
                 USE_CREDENTIALS=True,
             )
         return cls._config
+
+    @classmethod
+    def get_mail(cls) -> "FastMail":
+        """
+        Obtiene el cliente FastMail compartido, creado en el primer uso.
+
+        Returns:
+            FastMail: Cliente de envío de correos
+        """
+        if cls._mail is None:
+            from fastapi_mail import FastMail
+
+            cls._mail = FastMail(cls.get_config())
+        return cls._mail
@@ -0,0 +1,64 @@
+"""
+Configuración centralizada de Gemini (google.generativeai).
+El SDK se importa y configura de forma perezosa: importar este módulo no
+tiene costo y no crea clientes (compatible con gunicorn --preload).
+"""
+import os
+import threading
+from configparser import ConfigParser
+from typing import Any, Optional
+
+
+class GeminiConfig:
+    """Singleton para configurar el SDK de Gemini una vez por proceso"""
+
+    _api_key: Optional[str] = None
+    _configured_pid: Optional[int] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_api_key(cls) -> Optional[str]:
+        """Lee la api_key de la sección [GEMINI] de config.ini (se cachea)."""
+        if cls._api_key is None:
+            config = ConfigParser()
+            config.read("config.ini")
+            cls._api_key = config.get("GEMINI", "api_key", fallback=None)
+        return cls._api_key
+
+    @classmethod
+    def get_genai(cls) -> Any:
+        """
+        Obtiene el módulo google.generativeai configurado para este proceso.
+        Si el proceso es un fork (worker de gunicorn), se vuelve a configurar
+        para no reutilizar clientes gRPC creados en el proceso padre.
+
+        Returns:
+            Módulo google.generativeai
+
+        Raises:
+            RuntimeError: Si la api_key no está configurada
+        """
+        import google.generativeai as genai
+
+        if cls._configured_pid == os.getpid():
+            return genai
+
+        with cls._lock:
+            if cls._configured_pid != os.getpid():
+                api_key = cls.get_api_key()
+                if not api_key:
+                    raise RuntimeError("API key de Gemini no configurada.")
+                genai.configure(api_key=api_key)
+                cls._configured_pid = os.getpid()
+        return genai
+
+    @staticmethod
+    def preload() -> None:
+        """Importa el SDK sin configurarlo (para compartirlo entre workers con --preload)."""
+        import google.generativeai  # noqa: F401
+
+    @classmethod
+    def reset(cls):
+        """Fuerza a reconfigurar el SDK en el próximo uso (útil tras un fork o en testing)"""
+        cls._configured_pid = None
+        cls._api_key = None
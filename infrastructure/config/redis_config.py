@@ -3,6 +3,7 @@ Configuración centralizada de Redis usando patrón Singleton.
 Proporciona una única instancia del cliente Redis para toda la aplicación.
 """
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 from configparser import ConfigParser
 from typing import Optional
 
@@ -11,6 +12,37 @@ class RedisConfig:
     """Singleton para gestionar la conexión a Redis"""
     
     _instance: Optional[Redis] = None
+    _binary_instance: Optional[Redis] = None
+    _async_instance: Optional[AsyncRedis] = None
+    
+    @staticmethod
+    def _connection_kwargs() -> dict:
+        """Lee los parámetros de conexión desde config.ini"""
+        config = ConfigParser()
+        config.read("config.ini")
+        
+        return {
+            "host": config.get("REDIS", "host"),
+            "port": config.getint("REDIS", "port"),
+            "password": config.get("REDIS", "password"),
+            "db": config.getint("REDIS", "db"),
+            "decode_responses": True
+        }
+    
+    @staticmethod
+    def _timeout_kwargs() -> dict:
+        """
+        Timeouts de socket del cliente síncrono (los turnos del chat no pueden
+        quedar colgados en Redis). Deben superar el block de XREADGROUP del
+        worker de jobs (5s). El cliente asíncrono no los usa: hace pub/sub y BLPOP.
+        """
+        config = ConfigParser()
+        config.read("config.ini")
+        
+        return {
+            "socket_timeout": config.getfloat("REDIS", "socket_timeout", fallback=10.0),
+            "socket_connect_timeout": config.getfloat("REDIS", "socket_connect_timeout", fallback=5.0)
+        }
     
     @classmethod
     def get_client(cls) -> Redis:
@@ -22,21 +54,67 @@ class RedisConfig:
             Redis: Cliente Redis configurado
         """
         if cls._instance is None:
-            config = ConfigParser()
-            config.read("config.ini")
-            
-            cls._instance = Redis(
-                host=config.get("REDIS", "host"),
-                port=config.getint("REDIS", "port"),
-                password=config.get("REDIS", "password"),
-                db=config.getint("REDIS", "db"),
-                decode_responses=True
-            )
+            cls._instance = Redis(**cls._connection_kwargs(), **cls._timeout_kwargs())
         return cls._instance
     
+    @classmethod
+    def get_binary_client(cls) -> Redis:
+        """
+        Cliente Redis síncrono sin decode_responses, para valores binarios
+        (checkpoints del grafo serializados con msgpack).
+        
+        Returns:
+            Redis: Cliente Redis que retorna bytes
+        """
+        if cls._binary_instance is None:
+            cls._binary_instance = Redis(**{**cls._connection_kwargs(), "decode_responses": False}, **cls._timeout_kwargs())
+        return cls._binary_instance
+    
+    @classmethod
+    def get_async_client(cls) -> AsyncRedis:
+        """
+        Obtiene la instancia única del cliente Redis asíncrono (redis.asyncio).
+        Se usa en tareas de fondo del event loop (pub/sub, BLPOP, streams).
+        
+        Returns:
+            AsyncRedis: Cliente Redis asíncrono configurado
+        """
+        if cls._async_instance is None:
+            cls._async_instance = AsyncRedis(**cls._connection_kwargs())
+        return cls._async_instance
+    
+    @classmethod
+    def create_async_client(cls) -> AsyncRedis:
+        """
+        Crea un cliente Redis asíncrono nuevo, fuera del singleton.
+        Para código que levanta su propio event loop (asyncio.run en un job):
+        el cliente compartido queda atado al primer loop que lo usó. Quien lo
+        crea debe cerrarlo con aclose() antes de que termine su loop.
+        
+        Returns:
+            AsyncRedis: Cliente Redis asíncrono no compartido
+        """
+        return AsyncRedis(**cls._connection_kwargs())
+    
     @classmethod
     def reset(cls):
         """Resetea la instancia (útil para testing)"""
         if cls._instance:
             cls._instance.close()
             cls._instance = None
+        if cls._binary_instance:
+            cls._binary_instance.close()
+            cls._binary_instance = None
+        # El cliente asíncrono se cierra desde su event loop; aquí solo se descarta
+        cls._async_instance = None
+
+    @classmethod
+    def reset_after_fork(cls):
+        """
+        Descarta los clientes heredados del proceso padre sin cerrarlos
+        (sus sockets pertenecen al master). Se llama en el post_fork de gunicorn;
+        cada worker crea sus propios clientes en el primer uso.
+        """
+        cls._instance = None
+        cls._binary_instance = None
+        cls._async_instance = None
@@ -0,0 +1,37 @@
+"""
+Worker de gunicorn con el ping/pong WebSocket del servidor uvicorn.
+
+El ping/pong se hace a nivel de protocolo (implementación websockets de
+uvicorn): el servidor envía un ping cada ping_interval y, si el cliente no
+responde el pong en ping_timeout, cierra la conexión (par caído, ej: red móvil
+cortada sin FIN). Los navegadores responden los pings solos, sin cambios en
+el cliente.
+
+Configuración en la sección [WS] de config.ini:
+    [WS]
+    ping_interval = 20
+    ping_timeout = 20
+
+Uso (gunicorn.conf.py):
+    worker_class = "infrastructure.config.uvicorn_worker.KeepaliveUvicornWorker"
+"""
+from configparser import ConfigParser
+
+from uvicorn.workers import UvicornWorker
+
+
+def websocket_kwargs() -> dict:
+    """Ping/pong WebSocket de uvicorn leído de config.ini (0 lo desactiva)."""
+    config = ConfigParser()
+    config.read("config.ini")
+    ping_interval = config.getfloat("WS", "ping_interval", fallback=20.0)
+    ping_timeout = config.getfloat("WS", "ping_timeout", fallback=20.0)
+    return {
+        "ws": "websockets",
+        "ws_ping_interval": ping_interval or None,
+        "ws_ping_timeout": ping_timeout or None
+    }
+
+
+class KeepaliveUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, **websocket_kwargs()}
@@ -0,0 +1,14 @@
+"""
+Identidad del proceso worker actual (host + pid).
+Se usa para indexar en Redis qué worker mantiene cada conexión.
+"""
+import os
+import socket
+
+
+def current_worker_id() -> str:
+    """
+    Retorna el identificador del worker actual con formato "hostname:pid".
+    Se calcula en cada llamada para que sea correcto después de un fork de gunicorn.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
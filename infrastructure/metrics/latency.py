@@ -0,0 +1,159 @@
+"""
+Utilidades de latencia compartidas: percentiles y resúmenes estadísticos.
+Se usan para reportar p50/p95/p99 de comandos, llamadas LLM y benchmarks.
+"""
+import bisect
+import math
+from typing import Dict, Iterable, List, Optional
+
+
+def percentile(values: Iterable[float], pct: float) -> Optional[float]:
+    """
+    Calcula un percentil por interpolación lineal entre rangos.
+    
+    Args:
+        values: Muestras de latencia (en cualquier unidad)
+        pct: Percentil a calcular (0-100)
+        
+    Returns:
+        Valor del percentil o None si no hay muestras
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    if len(ordered) == 1:
+        return ordered[0]
+
+    rank = (len(ordered) - 1) * (pct / 100.0)
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return ordered[int(rank)]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize_latencies(values: Iterable[float], digits: int = 2) -> Dict[str, Optional[float]]:
+    """
+    Construye un resumen estadístico de latencias.
+    
+    Args:
+        values: Muestras de latencia
+        digits: Decimales a conservar en el resumen
+        
+    Returns:
+        Dict con count, min, max, mean, p50, p95 y p99
+    """
+    samples = list(values)
+    if not samples:
+        return {"count": 0, "min": None, "max": None, "mean": None, "p50": None, "p95": None, "p99": None}
+
+    def _round(value: Optional[float]) -> Optional[float]:
+        return round(value, digits) if value is not None else None
+
+    return {
+        "count": len(samples),
+        "min": _round(min(samples)),
+        "max": _round(max(samples)),
+        "mean": _round(sum(samples) / len(samples)),
+        "p50": _round(percentile(samples, 50)),
+        "p95": _round(percentile(samples, 95)),
+        "p99": _round(percentile(samples, 99)),
+    }
+
+
+class EWMA:
+    """
+    Media móvil exponencial (EWMA) para latencias y tasas de error observadas.
+    """
+
+    def __init__(self, alpha: float = 0.3, initial: Optional[float] = None):
+        """
+        Args:
+            alpha: Peso de la muestra más reciente (0-1)
+            initial: Valor inicial (None hasta recibir la primera muestra)
+        """
+        self.alpha = alpha
+        self.value = initial
+
+    def update(self, sample: float) -> float:
+        """Registra una muestra y retorna el nuevo valor suavizado."""
+        if self.value is None:
+            self.value = sample
+        else:
+            self.value = self.alpha * sample + (1 - self.alpha) * self.value
+        return self.value
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias con buckets logarítmicos (memoria constante).
+    Pensado para pruebas largas donde guardar cada muestra no es viable.
+    """
+
+    def __init__(self, min_value: float = 0.1, max_value: float = 120_000.0, growth: float = 1.1):
+        """
+        Args:
+            min_value: Límite superior del primer bucket
+            max_value: Valor máximo esperado (lo mayor cae en el último bucket)
+            growth: Factor entre bordes consecutivos (1.1 = error relativo máximo ~10%)
+        """
+        self.edges: List[float] = []
+        edge = min_value
+        while edge < max_value:
+            self.edges.append(edge)
+            edge *= growth
+        self.edges.append(max_value)
+        self.counts = [0] * (len(self.edges) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.edges, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Suma otro histograma con los mismos buckets."""
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Percentil aproximado (borde superior del bucket, acotado por el máximo observado)."""
+        if not self.count:
+            return None
+        target = math.ceil(self.count * pct / 100.0)
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= max(1, target):
+                upper = self.edges[index] if index < len(self.edges) else self.max
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self, digits: int = 2) -> Dict[str, Optional[float]]:
+        """Mismo formato que summarize_latencies."""
+        if not self.count:
+            return summarize_latencies([], digits)
+
+        def _round(value: Optional[float]) -> Optional[float]:
+            return round(value, digits) if value is not None else None
+
+        return {
+            "count": self.count,
+            "min": _round(self.min),
+            "max": _round(self.max),
+            "mean": _round(self.total / self.count),
+            "p50": _round(self.percentile(50)),
+            "p95": _round(self.percentile(95)),
+            "p99": _round(self.percentile(99)),
+        }
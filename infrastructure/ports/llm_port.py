@@ -0,0 +1,42 @@
+"""
+Puerto para proveedores de LLM (Gemini, Cloudflare Workers AI, fakes).
+Define el contrato que usa el router de proveedores.
+"""
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+class LLMCancelled(Exception):
+    """La llamada se abandonó porque otra (hedge) respondió primero."""
+
+
+class LLMProviderPort(ABC):
+    """
+    Puerto/Interface para proveedores de LLM.
+    """
+
+    name: str = "llm"
+
+    @abstractmethod
+    def generate(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None,
+        area: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        """
+        Genera texto para el prompt.
+
+        Args:
+            prompt: Prompt completo
+            timeout: Segundos máximos de la llamada (None = el del proveedor)
+            area: Área del usuario (equidad en limitadores)
+            cancel_event: Se activa si el resultado ya no se necesita; los
+                proveedores que pueden cortar la llamada deben respetarlo
+
+        Returns:
+            Dict con text, tokens (prompt_tokens, completion_tokens, total_tokens) y finish_reason
+        """
+        pass
@@ -0,0 +1 @@
+"""Módulo de seguridad de la API HTTP (autenticación por token)"""
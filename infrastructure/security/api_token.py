@@ -0,0 +1,39 @@
+"""
+Autenticación de endpoints HTTP sensibles con Bearer token.
+
+Los endpoints que la usan exigen el header:
+    Authorization: Bearer <token>
+
+Sin token configurado esos endpoints quedan deshabilitados (503), nunca
+abiertos.
+
+Configuración en la sección [API] de config.ini:
+    [API]
+    token = <secreto compartido con los clientes internos>
+"""
+import hmac
+from configparser import ConfigParser
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+
+def get_api_token() -> str:
+    config = ConfigParser()
+    config.read("config.ini")
+    return config.get("API", "token", fallback="").strip()
+
+
+def require_api_token(authorization: Optional[str] = Header(default=None)) -> None:
+    """Dependencia de FastAPI: valida el Bearer token contra [API] token."""
+    expected = get_api_token()
+    if not expected:
+        raise HTTPException(status_code=503, detail="Autenticación de la API no configurada ([API] token).")
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip(), expected):
+        raise HTTPException(
+            status_code=401,
+            detail="Token inválido o no proporcionado.",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
@@ -0,0 +1 @@
+"""Módulo de serialización JSON rápida (orjson)"""
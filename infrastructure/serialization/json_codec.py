@@ -0,0 +1,53 @@
+"""
+Capa única de serialización JSON basada en orjson.
+
+Se usa en las respuestas HTTP (ORJSONResponse), en los frames de WebSocket
+y en el parseo de mensajes entrantes. orjson serializa datetime, UUID y
+arrays NumPy de forma nativa y no escapa caracteres no ASCII
+(equivalente a ensure_ascii=False).
+"""
+from typing import Any, Union
+
+import orjson
+from pydantic import BaseModel
+
+
+DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    """Tipos que orjson no serializa de forma nativa."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "item"):
+        # Escalares NumPy (np.int64, np.float32, ...)
+        return value.item()
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """Serializa a JSON (bytes UTF-8)."""
+    return orjson.dumps(value, default=_default, option=DUMPS_OPTIONS)
+
+
+def dumps_str(value: Any) -> str:
+    """Serializa a JSON como str (para frames de texto de WebSocket)."""
+    return orjson.dumps(value, default=_default, option=DUMPS_OPTIONS).decode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parsea JSON.
+
+    Raises:
+        ValueError: Si el contenido no es JSON válido (orjson.JSONDecodeError hereda de ValueError)
+    """
+    return orjson.loads(data)
+
+
+def looks_like_json_object(text: str) -> bool:
+    """Chequeo barato para evitar intentar parsear texto libre."""
+    stripped = text.lstrip() if text else ""
+    return stripped.startswith("{")
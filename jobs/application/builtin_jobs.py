@@ -0,0 +1,22 @@
+"""
+Jobs básicos incluidos con el worker.
+"""
+import socket
+import time
+from typing import Any, Dict
+
+from jobs.application.job_registry import JobProgress, register_job
+
+
+@register_job("healthcheck")
+def healthcheck_job(payload: Dict[str, Any], progress: JobProgress) -> Dict[str, Any]:
+    """
+    Verifica que un worker esté consumiendo la cola.
+    Payload opcional: {"steps": 3, "sleep": 0.5}
+    """
+    steps = int(payload.get("steps", 1))
+    for step in range(1, steps + 1):
+        time.sleep(float(payload.get("sleep", 0)))
+        progress(step * 100 / steps, f"Paso {step}/{steps}")
+
+    return {"worker": socket.gethostname(), "steps": steps}
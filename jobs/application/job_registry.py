@@ -0,0 +1,65 @@
+"""
+Registro de handlers de jobs en segundo plano.
+
+Un handler recibe el payload del job y un callback de progreso, y retorna
+un dict serializable con el resultado:
+
+    @register_job("excel_analysis")
+    def analyze(payload: dict, progress: JobProgress) -> dict:
+        progress(50, "Procesando hojas...")
+        return {...}
+
+on_failure (opcional) se llama con el payload cuando el job agota sus
+reintentos, para liberar recursos que los reintentos aún necesitaban.
+"""
+import importlib
+from typing import Any, Callable, Dict, Optional
+
+JobProgress = Callable[[float, str], None]
+JobHandler = Callable[[Dict[str, Any], JobProgress], Dict[str, Any]]
+JobFailureHook = Callable[[Dict[str, Any]], None]
+
+# Módulos que registran handlers (se importan en el proceso worker)
+HANDLER_MODULES = [
+    "jobs.application.builtin_jobs",
+    "analytics.application.analytics_jobs",
+]
+
+# Tipos que se pueden encolar directamente por POST /jobs. El resto (ej: los de
+# analytics) solo los encola su controller, que valida y arma el payload
+PUBLIC_JOB_TYPES = frozenset({"healthcheck"})
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+JOB_FAILURE_HOOKS: Dict[str, JobFailureHook] = {}
+
+
+def register_job(job_type: str, on_failure: Optional[JobFailureHook] = None):
+    """Decorador que registra un handler (y su limpieza tras el fallo definitivo) para un tipo de job."""
+    def decorator(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[job_type] = handler
+        if on_failure is not None:
+            JOB_FAILURE_HOOKS[job_type] = on_failure
+        return handler
+    return decorator
+
+
+def get_job_handler(job_type: str) -> Optional[JobHandler]:
+    """Retorna el handler registrado para el tipo de job (None si no existe)."""
+    return JOB_HANDLERS.get(job_type)
+
+
+def get_job_failure_hook(job_type: str) -> Optional[JobFailureHook]:
+    """Retorna la limpieza tras el fallo definitivo del tipo de job (None si no tiene)."""
+    return JOB_FAILURE_HOOKS.get(job_type)
+
+
+def is_public_job(job_type: str) -> bool:
+    """Indica si el tipo de job se puede encolar desde la API genérica de jobs."""
+    return job_type in PUBLIC_JOB_TYPES
+
+
+def load_job_handlers() -> Dict[str, JobHandler]:
+    """Importa los módulos de HANDLER_MODULES para registrar sus handlers."""
+    for module_name in HANDLER_MODULES:
+        importlib.import_module(module_name)
+    return JOB_HANDLERS
@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict
+
+
+class JobRequest(BaseModel):
+    job_type: str
+    code_user: str
+    payload: Dict[str, Any] = {}
+    max_retries: int = Field(default=3, ge=0, le=10)
@@ -0,0 +1,38 @@
+from fastapi import APIRouter
+
+from jobs.domain.dataModel.model import JobRequest
+from jobs.infrastructure.controller import JobController
+
+
+jobs = APIRouter()
+
+# ---------------------------------------
+# Jobs en segundo plano
+# ---------------------------------------
+@jobs.post("/jobs", tags=["Jobs"])
+def enqueue_job(req: JobRequest):
+    """
+    Encola un job para un worker. Solo acepta los tipos de PUBLIC_JOB_TYPES;
+    el análisis de Excel y la comparación de datasets se encolan desde /analytics.
+    El progreso se notifica por el WebSocket del usuario (code_user).
+    """
+    controller = JobController(req)
+    return controller.enqueue()
+
+
+@jobs.get("/jobs/{job_id}", tags=["Jobs"])
+def job_status(job_id: str):
+    """
+    Consulta el estado y progreso de un job.
+    """
+    controller = JobController()
+    return controller.status(job_id)
+
+
+@jobs.get("/jobs/{job_id}/result", tags=["Jobs"])
+def job_result(job_id: str):
+    """
+    Obtiene el resultado de un job terminado.
+    """
+    controller = JobController()
+    return controller.result(job_id)
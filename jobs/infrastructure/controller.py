@@ -0,0 +1,67 @@
+from fastapi.responses import ORJSONResponse
+from fastapi import HTTPException
+from jobs.application.job_registry import PUBLIC_JOB_TYPES, is_public_job
+from jobs.domain.dataModel.model import JobRequest
+from jobs.infrastructure.redis_job_queue import job_queue
+
+
+class JobController:
+    def __init__(self, dataModel: JobRequest = None):
+        self.dataModel = dataModel
+        self.queue = job_queue
+        self.origin = "JobController"
+
+    def enqueue(self):
+        if not is_public_job(self.dataModel.job_type):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tipo de job no permitido: {self.dataModel.job_type}. Usa: {', '.join(sorted(PUBLIC_JOB_TYPES))}"
+            )
+
+        try:
+            job_id = self.queue.enqueue(
+                job_type=self.dataModel.job_type,
+                payload=self.dataModel.payload,
+                code_user=self.dataModel.code_user,
+                max_retries=self.dataModel.max_retries
+            )
+            return ORJSONResponse(
+                status_code=202,
+                content={"status": True, "msg": "Job encolado correctamente.", "data": {"job_id": job_id}}
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"No se pudo encolar el job: {e}")
+
+    def status(self, job_id: str):
+        try:
+            job = self.queue.get_status(job_id)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"No se pudo obtener el job: {e}")
+
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job no encontrado.")
+
+        return ORJSONResponse(
+            status_code=200,
+            content={"status": True, "msg": "Estado del job obtenido.", "data": job}
+        )
+
+    def result(self, job_id: str):
+        try:
+            result = self.queue.get_result(job_id)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"No se pudo obtener el resultado: {e}")
+
+        if result is None:
+            raise HTTPException(status_code=404, detail="Job no encontrado.")
+
+        if result["status"] != "completed":
+            return ORJSONResponse(
+                status_code=202 if result["status"] != "failed" else 200,
+                content={"status": False, "msg": f"Job en estado {result['status']}.", "data": result}
+            )
+
+        return ORJSONResponse(
+            status_code=200,
+            content={"status": True, "msg": "Resultado del job obtenido.", "data": result}
+        )
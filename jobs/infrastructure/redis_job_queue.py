@@ -0,0 +1,331 @@
+"""
+Cola de jobs en segundo plano sobre Redis Streams.
+
+Estructura en Redis:
+    jobs:stream            -> Stream con un mensaje {job_id} por intento
+    jobs:workers           -> Consumer group de los procesos worker
+    jobs:job:{job_id}      -> HASH con estado, progreso, intentos y resultado
+    jobs:retry             -> ZSET job_id -> epoch del próximo intento (reintentos con backoff)
+    jobs:dead              -> Stream de jobs que agotaron sus reintentos
+
+El progreso se envía al WebSocket del usuario con ws_push (al worker que tenga
+su socket, coalesciendo eventos del mismo job).
+
+Visibilidad: un mensaje leído y no confirmado (XACK) durante visibility_timeout
+segundos es reclamado por otro worker con XAUTOCLAIM. Los jobs largos renuevan
+su visibilidad cada vez que reportan progreso.
+
+Reintentos: un job fallido no vuelve al stream de inmediato; se agenda en
+jobs:retry con backoff exponencial (retry_backoff * 2^(intento-1), hasta
+retry_backoff_max) y los workers lo devuelven al stream cuando vence.
+"""
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis.exceptions import ResponseError, WatchError
+
+from infrastructure.config.redis_config import RedisConfig
+from websocket.infrastructure.ws_push import ws_push
+from websocket.utils.utils import WSCode, build_success_response
+
+
+class RedisJobQueue:
+    """Cola de jobs con consumer groups, reintentos y timeout de visibilidad."""
+
+    STREAM_KEY = "jobs:stream"
+    GROUP = "jobs:workers"
+    RETRY_KEY = "jobs:retry"
+    DEAD_LETTER_KEY = "jobs:dead"
+    JOB_KEY_PREFIX = "jobs:job:"
+
+    def __init__(
+        self,
+        visibility_timeout: int = 300,
+        result_ttl: int = 86400,
+        retry_backoff: float = 5.0,
+        retry_backoff_max: float = 300.0
+    ):
+        """
+        Args:
+            visibility_timeout: Segundos antes de que otro worker reclame un job sin confirmar
+            result_ttl: Segundos que se conserva el estado/resultado de un job terminado
+            retry_backoff: Segundos de espera antes del primer reintento (se duplica en cada intento)
+            retry_backoff_max: Espera máxima entre reintentos
+        """
+        self.visibility_timeout = visibility_timeout
+        self.result_ttl = result_ttl
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+
+    @property
+    def redis(self):
+        return RedisConfig.get_client()
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.JOB_KEY_PREFIX}{job_id}"
+
+    def ensure_group(self) -> None:
+        """Crea el stream y el consumer group si no existen."""
+        try:
+            self.redis.xgroup_create(self.STREAM_KEY, self.GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    # ------------------------------------------------------------
+    # API de productor
+    # ------------------------------------------------------------
+    def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        code_user: str,
+        max_retries: int = 3
+    ) -> str:
+        """
+        Encola un job.
+
+        Returns:
+            job_id asignado
+        """
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+
+        pipe = self.redis.pipeline()
+        pipe.hset(self._job_key(job_id), mapping={
+            "job_id": job_id,
+            "job_type": job_type,
+            "code_user": code_user,
+            "payload": json.dumps(payload, ensure_ascii=False),
+            "status": "queued",
+            "attempts": 0,
+            "max_retries": max_retries,
+            "progress": 0,
+            "message": "En cola",
+            "created_at": now,
+            "updated_at": now,
+        })
+        pipe.xadd(self.STREAM_KEY, {"job_id": job_id})
+        pipe.execute()
+
+        self._publish(job_id, code_user, "queued", 0, "En cola")
+        return job_id
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna el estado del job sin el resultado (None si no existe)."""
+        job = self.redis.hgetall(self._job_key(job_id))
+        if not job:
+            return None
+
+        job.pop("result", None)
+        job["payload"] = json.loads(job.get("payload") or "{}")
+        for field in ("attempts", "max_retries"):
+            job[field] = int(job.get(field, 0))
+        job["progress"] = float(job.get("progress", 0))
+        return job
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna {status, result, error} del job (None si no existe)."""
+        status, result, error = self.redis.hmget(self._job_key(job_id), "status", "result", "error")
+        if status is None:
+            return None
+        return {
+            "status": status,
+            "result": json.loads(result) if result else None,
+            "error": error
+        }
+
+    # ------------------------------------------------------------
+    # API de consumidor
+    # ------------------------------------------------------------
+    def read(self, consumer: str, block_ms: int = 5000, count: int = 1) -> List[Tuple[str, str]]:
+        """
+        Lee nuevos mensajes para el consumidor.
+
+        Returns:
+            Lista de (message_id, job_id)
+        """
+        response = self.redis.xreadgroup(
+            self.GROUP, consumer, streams={self.STREAM_KEY: ">"}, count=count, block=block_ms
+        )
+        return [
+            (message_id, fields["job_id"])
+            for _, messages in (response or [])
+            for message_id, fields in messages
+        ]
+
+    def reclaim(self, consumer: str, count: int = 10) -> List[Tuple[str, str]]:
+        """
+        Reclama mensajes cuyo worker no confirmó dentro del timeout de visibilidad.
+
+        Returns:
+            Lista de (message_id, job_id)
+        """
+        response = self.redis.xautoclaim(
+            self.STREAM_KEY,
+            self.GROUP,
+            consumer,
+            min_idle_time=self.visibility_timeout * 1000,
+            start_id="0-0",
+            count=count
+        )
+        messages = response[1] if response else []
+        return [(message_id, fields["job_id"]) for message_id, fields in messages if fields]
+
+    def promote_due_retries(self, count: int = 100) -> int:
+        """
+        Devuelve al stream los reintentos cuyo backoff ya venció.
+
+        La lectura y el traspaso van en una transacción con WATCH: si otro
+        worker promueve al mismo tiempo, este desiste y lo intenta en la
+        siguiente vuelta (cada reintento entra una sola vez al stream).
+
+        Returns:
+            Cantidad de jobs devueltos al stream
+        """
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(self.RETRY_KEY)
+                due = pipe.zrangebyscore(self.RETRY_KEY, "-inf", time.time(), start=0, num=count)
+                if not due:
+                    pipe.unwatch()
+                    return 0
+                pipe.multi()
+                pipe.zrem(self.RETRY_KEY, *due)
+                for job_id in due:
+                    pipe.xadd(self.STREAM_KEY, {"job_id": job_id})
+                pipe.execute()
+            except WatchError:
+                return 0
+        return len(due)
+
+    def retry_delay(self, attempts: int) -> float:
+        """Segundos de espera antes del siguiente intento (backoff exponencial acotado)."""
+        return min(self.retry_backoff * 2 ** max(0, attempts - 1), self.retry_backoff_max)
+
+    def touch(self, consumer: str, message_id: str) -> None:
+        """Renueva la visibilidad de un mensaje en proceso (resetea su idle time)."""
+        self.redis.xclaim(self.STREAM_KEY, self.GROUP, consumer, 0, [message_id], justid=True)
+
+    def start_attempt(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Marca el job como en ejecución e incrementa sus intentos.
+
+        Returns:
+            Estado del job o None si ya no existe
+        """
+        key = self._job_key(job_id)
+        if not self.redis.exists(key):
+            return None
+
+        pipe = self.redis.pipeline()
+        pipe.hincrby(key, "attempts", 1)
+        pipe.hset(key, mapping={"status": "running", "updated_at": datetime.now().isoformat()})
+        pipe.execute()
+
+        job = self.get_status(job_id)
+        self._publish(job_id, job["code_user"], "running", job["progress"], "En ejecución")
+        return job
+
+    def report_progress(
+        self,
+        job_id: str,
+        code_user: str,
+        progress: float,
+        message: str = "",
+        consumer: Optional[str] = None,
+        message_id: Optional[str] = None
+    ) -> None:
+        """Actualiza el progreso, renueva la visibilidad y notifica al usuario."""
+        self.redis.hset(self._job_key(job_id), mapping={
+            "progress": round(progress, 2),
+            "message": message,
+            "updated_at": datetime.now().isoformat()
+        })
+        if consumer and message_id:
+            self.touch(consumer, message_id)
+        self._publish(job_id, code_user, "running", progress, message)
+
+    def complete(self, message_id: str, job_id: str, code_user: str, result: Dict[str, Any]) -> None:
+        """Guarda el resultado, confirma el mensaje y notifica al usuario."""
+        key = self._job_key(job_id)
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping={
+            "status": "completed",
+            "progress": 100,
+            "message": "Completado",
+            "result": json.dumps(result, ensure_ascii=False, default=str),
+            "updated_at": datetime.now().isoformat()
+        })
+        pipe.hdel(key, "error")
+        pipe.expire(key, self.result_ttl)
+        pipe.xack(self.STREAM_KEY, self.GROUP, message_id)
+        pipe.xdel(self.STREAM_KEY, message_id)
+        pipe.execute()
+
+        self._publish(job_id, code_user, "completed", 100, "Completado")
+
+    def fail(self, message_id: str, job: Dict[str, Any], error: str) -> str:
+        """
+        Registra un fallo: agenda un reintento con backoff si quedan o mueve a dead letter.
+
+        Returns:
+            Nuevo estado del job ("retrying" o "failed")
+        """
+        job_id = job["job_id"]
+        key = self._job_key(job_id)
+        retry = job["attempts"] <= job["max_retries"]
+        status = "retrying" if retry else "failed"
+        delay = self.retry_delay(job["attempts"]) if retry else 0
+
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping={
+            "status": status,
+            "error": error,
+            "message": f"Reintentando en {delay:g}s ({job['attempts']}/{job['max_retries']})" if retry else "Fallido",
+            "updated_at": datetime.now().isoformat()
+        })
+        if retry:
+            pipe.zadd(self.RETRY_KEY, {job_id: time.time() + delay})
+        else:
+            pipe.xadd(self.DEAD_LETTER_KEY, {"job_id": job_id, "error": error[:500]})
+            pipe.expire(key, self.result_ttl)
+        pipe.xack(self.STREAM_KEY, self.GROUP, message_id)
+        pipe.xdel(self.STREAM_KEY, message_id)
+        pipe.execute()
+
+        self._publish(job_id, job["code_user"], status, job["progress"], error)
+        return status
+
+    def discard(self, message_id: str) -> None:
+        """Confirma y elimina un mensaje cuyo job ya no existe."""
+        pipe = self.redis.pipeline()
+        pipe.xack(self.STREAM_KEY, self.GROUP, message_id)
+        pipe.xdel(self.STREAM_KEY, message_id)
+        pipe.execute()
+
+    # ------------------------------------------------------------
+    # Notificaciones
+    # ------------------------------------------------------------
+    def _publish(self, job_id: str, code_user: str, status: str, progress: float, message: str) -> None:
+        response = build_success_response(
+            message=message or status,
+            code_user=code_user,
+            ws_code=WSCode.NORMAL,
+            type="job_progress",
+            job_id=job_id,
+            status=status,
+            progress=round(float(progress), 2)
+        )
+        try:
+            # Solo interesa el último estado de cada job si hay varios en cola
+            ws_push.push(code_user, response.model_dump(exclude_none=True), coalesce_key=f"job:{job_id}")
+        except Exception as e:
+            print(f"⚠️ No se pudo publicar progreso del job {job_id}: {e}")
+
+
+# Instancia compartida por proceso
+job_queue = RedisJobQueue()
@@ -0,0 +1,135 @@
+"""
+Proceso worker para jobs en segundo plano.
+
+Uso:
+    python -m jobs.infrastructure.worker --consumer worker-1
+
+Cada proceso es un consumidor del consumer group jobs:workers. Para escalar,
+levantar más procesos con distinto --consumer.
+"""
+import argparse
+import os
+import socket
+import time
+import traceback
+
+from jobs.application.job_registry import get_job_failure_hook, get_job_handler, load_job_handlers
+from jobs.infrastructure.redis_job_queue import RedisJobQueue
+from websocket.infrastructure.ws_push import ws_push
+
+
+class JobWorker:
+    """Consume jobs del stream, ejecuta su handler y gestiona reintentos."""
+
+    def __init__(
+        self,
+        queue: RedisJobQueue,
+        consumer: str,
+        block_ms: int = 5000,
+        reclaim_interval: int = 30
+    ):
+        """
+        Args:
+            queue: Cola de jobs
+            consumer: Nombre único del consumidor dentro del grupo
+            block_ms: Milisegundos de espera bloqueante por nuevos mensajes
+            reclaim_interval: Segundos entre revisiones de mensajes abandonados
+        """
+        self.queue = queue
+        self.consumer = consumer
+        self.block_ms = block_ms
+        self.reclaim_interval = reclaim_interval
+        self._running = False
+
+    def process(self, message_id: str, job_id: str) -> None:
+        """Ejecuta un intento de un job."""
+        job = self.queue.start_attempt(job_id)
+        if job is None:
+            self.queue.discard(message_id)
+            return
+
+        # Job reclamado que ya agotó sus intentos (worker caído repetidamente)
+        if job["attempts"] > job["max_retries"] + 1:
+            self.fail(message_id, job, "Intentos agotados por timeout de visibilidad")
+            return
+
+        handler = get_job_handler(job["job_type"])
+        if handler is None:
+            job["attempts"] = job["max_retries"] + 1
+            self.queue.fail(message_id, job, f"Tipo de job no soportado: {job['job_type']}")
+            return
+
+        def progress(percent: float, message: str = "") -> None:
+            self.queue.report_progress(
+                job_id, job["code_user"], percent, message,
+                consumer=self.consumer, message_id=message_id
+            )
+
+        started = time.perf_counter()
+        try:
+            result = handler(job["payload"], progress)
+            self.queue.complete(message_id, job_id, job["code_user"], result or {})
+            print(f"✅ Job {job_id} ({job['job_type']}) completado en {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            status = self.fail(message_id, job, f"{type(e).__name__}: {e}")
+            print(f"❌ Job {job_id} ({job['job_type']}) {status}: {e}")
+            traceback.print_exc()
+
+    def fail(self, message_id: str, job: dict, error: str) -> str:
+        """Registra el fallo y, si ya no quedan reintentos, ejecuta la limpieza del tipo de job."""
+        status = self.queue.fail(message_id, job, error)
+        hook = get_job_failure_hook(job["job_type"])
+        if status == "failed" and hook is not None:
+            try:
+                hook(job["payload"])
+            except Exception as e:
+                print(f"⚠️ No se pudo limpiar el job {job['job_id']} ({job['job_type']}): {e}")
+        return status
+
+    def run_forever(self) -> None:
+        """Bucle principal: reclama mensajes abandonados, promueve reintentos vencidos y consume nuevos."""
+        self.queue.ensure_group()
+        self._running = True
+        last_reclaim = 0.0
+        print(f"🚀 Worker {self.consumer} escuchando {self.queue.STREAM_KEY}")
+
+        while self._running:
+            if time.monotonic() - last_reclaim >= self.reclaim_interval:
+                for message_id, job_id in self.queue.reclaim(self.consumer):
+                    self.process(message_id, job_id)
+                last_reclaim = time.monotonic()
+
+            self.queue.promote_due_retries()
+            for message_id, job_id in self.queue.read(self.consumer, block_ms=self.block_ms):
+                self.process(message_id, job_id)
+
+    def stop(self) -> None:
+        self._running = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de jobs en segundo plano")
+    parser.add_argument("--consumer", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--visibility-timeout", type=int, default=300)
+    parser.add_argument("--block-ms", type=int, default=5000)
+    args = parser.parse_args()
+
+    handlers = load_job_handlers()
+    print(f"📦 Handlers registrados: {', '.join(sorted(handlers))}")
+
+    worker = JobWorker(
+        RedisJobQueue(visibility_timeout=args.visibility_timeout),
+        consumer=args.consumer,
+        block_ms=args.block_ms
+    )
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+    finally:
+        # Último progreso encolado (ej: "completed") antes de salir
+        ws_push.flush()
+
+
+if __name__ == "__main__":
+    main()
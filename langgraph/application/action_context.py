@@ -0,0 +1,159 @@
+"""
+Contexto compacto de acciones para el prompt del LLM.
+
+En lugar de volcar el catálogo completo (json.dumps con indent=2), se eligen
+las top-N acciones más relevantes para el mensaje con el índice local
+(action_index) y se serializa cada una en una sola línea:
+
+    - ventas_dia: Consulta las ventas del día por tienda [ventas] (tienda*)
+
+Los fragmentos renderizados se guardan en caché por huella de acción y se
+renuevan solo cuando cambia la versión del catálogo. Las líneas se agregan en
+orden de relevancia hasta agotar el presupuesto de tokens.
+
+Configuración en la sección [ACTION_CONTEXT] de config.ini:
+    [ACTION_CONTEXT]
+    top_n = 8
+    max_tokens = 600
+    min_score = 0.05
+"""
+import json
+import threading
+from configparser import ConfigParser
+from typing import Any, Dict, List, Optional, Tuple
+
+from langgraph.application.action_index import ActionIndex, action_index
+
+
+HEADER = "\n\nAcciones disponibles (id: descripción [tags] (parámetros, * = requerido)):\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación local de tokens (~4 caracteres por token), sin llamar a la API."""
+    return (len(text) + 3) // 4
+
+
+def render_action(action: Dict[str, Any]) -> str:
+    """Una línea por acción: id, descripción, tags y parámetros."""
+    tags = action.get("tags") or []
+    if not isinstance(tags, list):
+        tags = [tags]
+    params = action.get("params") or {}
+    names = list(params) if isinstance(params, (dict, list)) else []
+    required = [str(name) for name in action.get("required") or []]
+    names.extend(name for name in required if name not in names)
+
+    line = f"- {action.get('id', 'unknown')}: {action.get('description') or ''}"
+    if tags:
+        line += f" [{', '.join(str(tag) for tag in tags)}]"
+    if names:
+        line += f" ({', '.join(f'{name}*' if name in required else str(name) for name in names)})"
+    return line
+
+
+class ActionContextBuilder:
+    """Selecciona y serializa las acciones relevantes dentro de un presupuesto de tokens."""
+
+    def __init__(
+        self,
+        index: Optional[ActionIndex] = None,
+        top_n: int = 8,
+        max_tokens: int = 600,
+        min_score: float = 0.05
+    ):
+        """
+        Args:
+            index: Índice de acciones (por defecto el compartido del proceso)
+            top_n: Máximo de acciones en el contexto
+            max_tokens: Presupuesto de tokens del contexto de acciones
+            min_score: Similitud mínima para considerar relevante una acción
+        """
+        self.index = index or action_index
+        self.top_n = top_n
+        self.max_tokens = max_tokens
+        self.min_score = min_score
+        self._version: Optional[str] = None
+        self._fragments: Dict[str, Tuple[str, int]] = {}  # huella -> (línea, tokens)
+        self._full_tokens = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "ActionContextBuilder":
+        config = ConfigParser()
+        config.read("config.ini")
+        return cls(
+            top_n=config.getint("ACTION_CONTEXT", "top_n", fallback=8),
+            max_tokens=config.getint("ACTION_CONTEXT", "max_tokens", fallback=600),
+            min_score=config.getfloat("ACTION_CONTEXT", "min_score", fallback=0.05)
+        )
+
+    def _refresh_fragments(self) -> None:
+        """Re-renderiza solo las acciones nuevas o modificadas al cambiar la versión del catálogo."""
+        if self._version == self.index.version:
+            return
+        with self._lock:
+            if self._version == self.index.version:
+                return
+            actions = self.index.actions()
+            fragments = {}
+            for action in actions:
+                fingerprint = self.index.fingerprint(self.index.key_fn(action))
+                fragment = self._fragments.get(fingerprint)
+                if fragment is None:
+                    line = render_action(action)
+                    fragment = (line, estimate_tokens(line + "\n"))
+                fragments[fingerprint] = fragment
+
+            # Referencia: tokens del catálogo completo en el formato anterior
+            catalog: Dict[str, List[Dict[str, Any]]] = {}
+            for action in actions:
+                catalog.setdefault(action.get("source_key", ""), []).append(action)
+            self._full_tokens = estimate_tokens(f"\n\nAcciones disponibles:\n{json.dumps(catalog, indent=2)}")
+            self._fragments = fragments
+            self._version = self.index.version
+
+    def build(self, message: str, actions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Construye el contexto de acciones para un mensaje.
+
+        Args:
+            message: Mensaje del usuario (consulta de relevancia)
+            actions: Catálogo normalizado (LangGraphResponse.load_actions)
+
+        Returns:
+            Dict con context, action_ids, tokens, full_tokens, catalog_size y catalog_version
+        """
+        self.index.sync(actions)
+        self._refresh_fragments()
+
+        ranked = [action for action, _ in self.index.search(message, top_k=self.top_n, min_score=self.min_score)]
+        if not ranked:
+            # Sin acciones relevantes: las de mayor prioridad para que el LLM tenga opciones
+            ranked = sorted(self.index.actions(), key=lambda action: action.get("priority", 0), reverse=True)[:self.top_n]
+
+        lines, action_ids = [], []
+        tokens = estimate_tokens(HEADER)
+        for action in ranked:
+            line, line_tokens = self._fragments.get(
+                self.index.fingerprint(self.index.key_fn(action)),
+                (render_action(action), None)
+            )
+            line_tokens = line_tokens or estimate_tokens(line + "\n")
+            if tokens + line_tokens > self.max_tokens:
+                break
+            lines.append(line)
+            action_ids.append(action.get("id"))
+            tokens += line_tokens
+
+        return {
+            "context": HEADER + "\n".join(lines) if lines else "",
+            "action_ids": action_ids,
+            "tokens": tokens if lines else 0,
+            "full_tokens": self._full_tokens,
+            "catalog_size": len(self.index),
+            "catalog_version": self._version
+        }
+
+
+# Instancia compartida por proceso
+action_context_builder = ActionContextBuilder.from_config()
@@ -0,0 +1,211 @@
+"""
+Índice vectorial local de acciones del agente.
+
+Cada acción se representa con su description, tags y examples usando un
+vectorizador de n-gramas de caracteres (3-5) y palabras con feature hashing
+y pesos TF-IDF. Los vectores se guardan normalizados en una matriz NumPy
+float32, por lo que una búsqueda es un único producto matriz-vector
+restringido a las columnas no nulas de la consulta (sub-milisegundo para
+catálogos de cientos de acciones).
+
+Actualización incremental: solo se re-vectorizan las acciones cuyo contenido
+cambió (huella por acción); el resto reutiliza sus conteos ya calculados.
+"""
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+DEFAULT_DIMENSIONS = 2 ** 13
+_WORD_RE = re.compile(r"[a-z0-9ñ]+")
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas y sin tildes (la ñ se conserva)."""
+    text = (text or "").lower().replace("ñ", "\0")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return text.replace("\0", "ñ")
+
+
+def _features(text: str, ngram_range: Tuple[int, int] = (3, 5)) -> List[str]:
+    """Palabras completas + n-gramas de caracteres con límites de palabra."""
+    features = []
+    for word in _WORD_RE.findall(normalize_text(text)):
+        features.append(f"w:{word}")
+        padded = f" {word} "
+        for size in range(ngram_range[0], ngram_range[1] + 1):
+            features.extend(padded[i:i + size] for i in range(len(padded) - size + 1))
+    return features
+
+
+def action_text(action: Dict[str, Any]) -> str:
+    """Texto indexable de una acción."""
+    tags = action.get("tags") or []
+    if not isinstance(tags, list):
+        tags = [tags]
+    examples = action.get("examples") or []
+    if not isinstance(examples, list):
+        examples = [examples]
+    parts = [str(action.get("id", "")).replace("_", " "), action.get("description") or ""]
+    # Los tags se repiten para darles más peso que al texto libre
+    parts.extend(str(tag) for tag in tags for _ in range(2))
+    parts.extend(str(example) for example in examples)
+    return " ".join(parts)
+
+
+def action_fingerprint(action: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(action, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ActionIndex:
+    """Índice TF-IDF de acciones con búsqueda top-k por similitud coseno."""
+
+    def __init__(
+        self,
+        dimensions: int = DEFAULT_DIMENSIONS,
+        text_fn: Optional[Callable[[Dict[str, Any]], str]] = None,
+        key_fn: Optional[Callable[[Dict[str, Any]], str]] = None
+    ):
+        """
+        Args:
+            dimensions: Tamaño del espacio de feature hashing
+            text_fn: Texto a indexar por documento (por defecto action_text)
+            key_fn: Identificador único por documento (por defecto source_key|id)
+        """
+        self.dimensions = dimensions
+        self.text_fn = text_fn or action_text
+        self.key_fn = key_fn or self._action_key
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # action_key -> (índices, conteos)
+        self._fingerprints: Dict[str, str] = {}
+        self._actions: Dict[str, Dict[str, Any]] = {}
+        self._keys: List[str] = []
+        self._rows: List[Dict[str, Any]] = []
+        self._matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self._idf = np.ones(dimensions, dtype=np.float32)
+        self.version = ""
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _hash_counts(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        # crc32 es estable entre procesos (hash() de Python no lo es)
+        buckets = np.fromiter(
+            (zlib.crc32(feature.encode("utf-8")) % self.dimensions for feature in _features(text)),
+            dtype=np.int64
+        )
+        return np.unique(buckets, return_counts=True)
+
+    def _vectorize(self, indices: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        # TF sublineal
+        vector[indices] = (1 + np.log(counts)) * self._idf[indices]
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _action_key(action: Dict[str, Any]) -> str:
+        return f"{action.get('source_key', '')}|{action.get('id', '')}"
+
+    def sync(self, actions: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Sincroniza el índice con el catálogo actual.
+        Solo se re-vectorizan las acciones nuevas o modificadas.
+
+        Returns:
+            Dict con added, updated, removed
+        """
+        current = {self.key_fn(action): action for action in actions}
+        stats = {"added": 0, "updated": 0, "removed": 0}
+
+        with self._lock:
+            for key in list(self._fingerprints):
+                if key not in current:
+                    self._fingerprints.pop(key)
+                    self._counts.pop(key)
+                    self._actions.pop(key)
+                    stats["removed"] += 1
+
+            for key, action in current.items():
+                fingerprint = action_fingerprint(action)
+                previous = self._fingerprints.get(key)
+                if previous == fingerprint:
+                    continue
+                self._counts[key] = self._hash_counts(self.text_fn(action))
+                self._fingerprints[key] = fingerprint
+                self._actions[key] = action
+                stats["updated" if previous else "added"] += 1
+
+            if any(stats.values()):
+                self._rebuild()
+        return stats
+
+    def _rebuild(self) -> None:
+        """Recalcula IDF y la matriz normalizada a partir de los conteos en caché."""
+        keys = list(self._counts)
+        document_frequency = np.zeros(self.dimensions, dtype=np.float32)
+        for indices, _ in self._counts.values():
+            document_frequency[indices] += 1
+        self._idf = (np.log((1 + len(keys)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        matrix = np.zeros((len(keys), self.dimensions), dtype=np.float32)
+        for row, key in enumerate(keys):
+            matrix[row] = self._vectorize(*self._counts[key])
+        self._keys = keys
+        self._rows = [self._actions[key] for key in keys]
+        self._matrix = matrix
+        # Versión del catálogo: cambia si se agrega, modifica o elimina alguna acción
+        self.version = hashlib.sha1(
+            "\n".join(f"{key}:{self._fingerprints[key]}" for key in sorted(keys)).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def fingerprint(self, key: str) -> Optional[str]:
+        """Huella de contenido de un documento indexado."""
+        return self._fingerprints.get(key)
+
+    def actions(self) -> List[Dict[str, Any]]:
+        """Documentos indexados (en el orden de la matriz)."""
+        return list(self._rows)
+
+    def search(self, query: str, top_k: int = 5, min_score: float = 0.0) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Retorna las top_k acciones más similares a la consulta.
+
+        Returns:
+            Lista de (acción, score) ordenada por score descendente
+        """
+        if not query or not self._keys:
+            return []
+
+        indices, counts = self._hash_counts(query)
+        if not len(indices):
+            return []
+
+        with self._lock:
+            # La consulta es dispersa: solo se multiplican sus columnas no nulas
+            weights = (1 + np.log(counts)) * self._idf[indices]
+            norm = float(np.linalg.norm(weights))
+            if not norm:
+                return []
+            scores = self._matrix[:, indices] @ (weights / norm).astype(np.float32)
+            rows = self._rows
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (rows[i], float(scores[i]))
+            for i in top
+            if scores[i] > min_score
+        ]
+
+
+# Instancia compartida por proceso
+action_index = ActionIndex()
@@ -0,0 +1,254 @@
+"""
+Historial acotado de la conversación con resumen incremental.
+
+El estado guarda un ConversationHistory por usuario (canal del grafo, persistido
+con los checkpoints; sin cambios entre pasos solo viaja su referencia):
+
+    turns    anillo con los últimos max_turns turnos (mensaje + intención)
+    pending  turnos que salieron del anillo y aún no entran al resumen
+    summary  resumen de todo lo anterior, acotado a summary_max_tokens
+
+El resumen se refresca de forma perezosa: solo cuando los turnos pendientes
+superan summary_trigger_tokens se pide al LLM, en segundo plano y fuera del
+camino crítico del turno. El resultado se incorpora al inicio del siguiente turno
+del usuario (si corre en otro worker, se vuelve a pedir ahí). Si el LLM falla,
+los pendientes se recortan a un máximo para que el estado no crezca.
+
+Al prompt del clasificador se inyecta el resumen y los turnos más recientes
+que quepan en max_tokens: el tamaño del prompt no depende del largo de la conversación.
+
+Configuración en la sección [HISTORY] de config.ini:
+    [HISTORY]
+    enabled = true
+    max_turns = 6
+    max_tokens = 300
+    summary_trigger_tokens = 200
+    summary_max_tokens = 120
+    message_max_chars = 240
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from configparser import ConfigParser
+from typing import Any, Dict, List, Optional, Tuple
+
+from langgraph.application.action_context import estimate_tokens
+from langgraph.domain.states import ConversationHistory, HistoryTurn
+
+# Resúmenes en curso que se recuerdan (los más antiguos se descartan)
+MAX_INFLIGHT = 1024
+
+HEADER = "Historial de la conversación (solo contexto, clasifica el mensaje actual):\n"
+
+SUMMARY_PROMPT = (
+    "Resume en español, en máximo {max_words} palabras, lo que el usuario ha pedido en "
+    "esta conversación. Conserva intenciones, datos concretos (fechas, tiendas, montos) "
+    "y pedidos sin resolver. Responde solo con el resumen.\n\n"
+    "Resumen anterior:\n{summary}\n\nTurnos nuevos:\n{turns}"
+)
+
+
+def render_turn(turn: HistoryTurn) -> str:
+    line = f"- Usuario: {turn.message}"
+    if turn.intent:
+        line += f" -> {turn.intent}"
+    return line
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Recorta un texto a un presupuesto de tokens (misma estimación que estimate_tokens)."""
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max(0, max_chars - 1)].rstrip() + "…"
+
+
+class HistoryManager:
+    """Anillo de turnos, resumen en segundo plano y render dentro de un presupuesto."""
+
+    def __init__(
+        self,
+        max_turns: int = 6,
+        max_tokens: int = 300,
+        summary_trigger_tokens: int = 200,
+        summary_max_tokens: int = 120,
+        message_max_chars: int = 240,
+        enabled: bool = True
+    ):
+        """
+        Args:
+            max_turns: Turnos recientes que se conservan textuales
+            max_tokens: Presupuesto del historial dentro del prompt del clasificador
+            summary_trigger_tokens: Tokens pendientes que disparan el refresco del resumen
+            summary_max_tokens: Tamaño máximo del resumen
+            message_max_chars: Largo máximo de cada mensaje guardado
+            enabled: Si es False no se registra ni se inyecta historial
+        """
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.summary_trigger_tokens = summary_trigger_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.message_max_chars = message_max_chars
+        self.enabled = enabled
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        # code_user -> (resumen base, pendientes incluidos, futuro del resumen)
+        self._inflight: "OrderedDict[str, Tuple[str, List[HistoryTurn], Future]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "summaries": 0, "summary_errors": 0, "dropped_turns": 0}
+
+    @classmethod
+    def from_config(cls) -> "HistoryManager":
+        config = ConfigParser()
+        config.read("config.ini")
+        return cls(
+            max_turns=config.getint("HISTORY", "max_turns", fallback=6),
+            max_tokens=config.getint("HISTORY", "max_tokens", fallback=300),
+            summary_trigger_tokens=config.getint("HISTORY", "summary_trigger_tokens", fallback=200),
+            summary_max_tokens=config.getint("HISTORY", "summary_max_tokens", fallback=120),
+            message_max_chars=config.getint("HISTORY", "message_max_chars", fallback=240),
+            enabled=config.getboolean("HISTORY", "enabled", fallback=True)
+        )
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # Por proceso: con gunicorn --preload los hilos del master no existen en los workers
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    @staticmethod
+    def _tokens(turns: List[HistoryTurn]) -> int:
+        return sum(estimate_tokens(render_turn(turn)) for turn in turns)
+
+    def record(self, history: ConversationHistory, message: str, intent: Optional[str]) -> ConversationHistory:
+        """
+        Agrega un turno al anillo; los que salen pasan a pendientes.
+
+        Returns:
+            Nuevo historial (el recibido no se modifica)
+        """
+        if not self.enabled or not message:
+            return history
+        if len(message) > self.message_max_chars:
+            message = message[:self.message_max_chars - 1].rstrip() + "…"
+
+        turns = history.turns + [HistoryTurn(message=message, intent=intent)]
+        evicted, turns = turns[:-self.max_turns], turns[-self.max_turns:]
+        pending = history.pending + evicted
+
+        # Si el resumen no llega (LLM caído), los pendientes más antiguos se descartan
+        dropped = 0
+        while pending and self._tokens(pending) > self.summary_trigger_tokens * 3:
+            pending = pending[1:]
+            dropped += 1
+
+        with self._lock:
+            self.stats["recorded"] += 1
+            self.stats["dropped_turns"] += dropped
+        return ConversationHistory(summary=history.summary, turns=turns, pending=pending)
+
+    def needs_summary(self, history: ConversationHistory) -> bool:
+        return self.enabled and self._tokens(history.pending) >= self.summary_trigger_tokens
+
+    def schedule_summary(self, code_user: str, history: ConversationHistory, llm, area: Optional[str] = None) -> None:
+        """Pide el resumen en segundo plano (uno a la vez por usuario)."""
+        if not self.needs_summary(history):
+            return
+        with self._lock:
+            if code_user in self._inflight:
+                return
+            prompt = SUMMARY_PROMPT.format(
+                max_words=self.summary_max_tokens * 3 // 4,
+                summary=history.summary or "(sin resumen)",
+                turns="\n".join(render_turn(turn) for turn in history.pending)
+            )
+            future = self._pool().submit(llm.generate_text, prompt, area=area)
+            self._inflight[code_user] = (history.summary, list(history.pending), future)
+            while len(self._inflight) > MAX_INFLIGHT:
+                self._inflight.popitem(last=False)
+
+    def apply_summary(self, code_user: str, history: ConversationHistory) -> ConversationHistory:
+        """
+        Incorpora el resumen pedido en un turno anterior si ya terminó (no espera).
+
+        Returns:
+            Historial con el resumen nuevo y sin los pendientes resumidos, o el mismo historial
+        """
+        with self._lock:
+            inflight = self._inflight.get(code_user)
+            if inflight is None or not inflight[2].done():
+                return history
+            self._inflight.pop(code_user, None)
+        base, summarized, future = inflight
+
+        # Otro worker ya resumió (o se descartaron todos los turnos incluidos): resultado obsoleto
+        remaining = self._without_summarized(history.pending, summarized)
+        if history.summary != base or remaining is None:
+            return history
+
+        try:
+            summary = (future.result().get("text") or "").strip()
+        except Exception as e:
+            print(f"⚠️ No se pudo resumir el historial de {code_user}: {e}")
+            summary = ""
+        if not summary:
+            with self._lock:
+                self.stats["summary_errors"] += 1
+            return history
+
+        with self._lock:
+            self.stats["summaries"] += 1
+        return ConversationHistory(
+            summary=truncate_to_tokens(summary, self.summary_max_tokens),
+            turns=history.turns,
+            pending=remaining
+        )
+
+    @staticmethod
+    def _without_summarized(pending: List[HistoryTurn], summarized: List[HistoryTurn]) -> Optional[List[HistoryTurn]]:
+        """
+        Pendientes actuales sin los que entraron al resumen.
+
+        Los pendientes crecen por el final y se descartan por el inicio, así que los
+        resumidos que siguen presentes son un prefijo. None si ya no queda ninguno.
+        """
+        for dropped in range(len(summarized)):
+            kept = summarized[dropped:]
+            if pending[:len(kept)] == kept:
+                return pending[len(kept):]
+        return None
+
+    def render(self, history: ConversationHistory) -> str:
+        """
+        Texto del historial para el prompt, dentro de max_tokens.
+
+        Prioridad: los turnos más recientes primero, luego el resumen con el
+        presupuesto que quede. Retorna "" si no hay historial.
+        """
+        if not self.enabled or not (history.turns or history.summary):
+            return ""
+
+        budget = self.max_tokens - estimate_tokens(HEADER)
+        lines: List[str] = []
+        for turn in reversed(history.turns):
+            line = render_turn(turn)
+            cost = estimate_tokens(line) + 1
+            if cost > budget:
+                break
+            lines.insert(0, line)
+            budget -= cost
+
+        summary = ""
+        if history.summary and budget > 8:
+            summary = "Resumen: " + truncate_to_tokens(history.summary, budget - 3) + "\n"
+        if not lines and not summary:
+            return ""
+        return HEADER + summary + "\n".join(lines)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"enabled": self.enabled, "summaries_in_flight": len(self._inflight), **self.stats}
+
+
+# Instancia compartida por proceso
+history_manager = HistoryManager.from_config()
@@ -1,36 +1,63 @@
 import json
+from configparser import ConfigParser
+
 from infrastructure.config.redis_config import RedisConfig
+from langgraph.application.action_index import action_index
+
+
+config = ConfigParser()
+config.read("config.ini")
+
+# Búsqueda semántica cuando el intent no coincide exactamente con un tag
+ACTION_INDEX_TOP_K = config.getint("ACTION_INDEX", "top_k", fallback=5)
+ACTION_INDEX_MIN_SCORE = config.getfloat("ACTION_INDEX", "min_score", fallback=0.25)
+
 
 class LangGraphResponse:
 
     @staticmethod
-    def fetch_and_filter_actions(redis_client, intent: str) -> list:
+    def load_actions(redis_client) -> list:
         """
-        Función helper que realiza el parseo y filtrado de acciones desde Redis.
-        
+        Lee y normaliza todas las acciones del catálogo en Redis (agente:actions:*).
+
         Args:
             redis_client: Cliente de Redis
-            intent: Intención clasificada para filtrar acciones
-        
+
         Returns:
-            Lista de acciones coincidentes ordenadas por prioridad
+            Lista de acciones normalizadas (id, description, tags, priority, params, required, examples, source_key)
         """
         action_keys = redis_client.keys("agente:actions:*")
-        matched_actions = []
-        intent_lower = intent.lower()
-                
+        actions = []
+
+        # Tres viajes a Redis en total (KEYS, TYPE de todas, lectura de todas) en vez de dos por clave
+        pipe = redis_client.pipeline(transaction=False)
         for key in action_keys:
+            pipe.type(key)
+        key_types = pipe.execute(raise_on_error=False)
+
+        pipe = redis_client.pipeline(transaction=False)
+        readable = []
+        for key, key_type in zip(action_keys, key_types):
+            if key_type == "ReJSON-RL":
+                pipe.execute_command('JSON.GET', key)
+            elif key_type == "string":
+                pipe.get(key)
+            else:
+                continue
+            readable.append((key, key_type))
+        raw_values = pipe.execute(raise_on_error=False) if readable else []
+
+        for (key, key_type), raw in zip(readable, raw_values):
             try:
-                key_type = redis_client.type(key)
+                if isinstance(raw, Exception):
+                    raise raw
                 actions_data = None
                 
                 # Leer según el tipo de dato
                 if key_type == "ReJSON-RL":
-                    json_data = redis_client.execute_command('JSON.GET', key)
-                    actions_data = json.loads(json_data) if isinstance(json_data, str) else json_data
+                    actions_data = json.loads(raw) if isinstance(raw, str) else raw
                 elif key_type == "string":
-                    json_str = redis_client.get(key)
-                    actions_data = json.loads(json_str) if json_str else None
+                    actions_data = json.loads(raw) if raw else None
                 
                 if not actions_data:
                     continue
@@ -53,30 +80,120 @@ class LangGraphResponse:
                     if not isinstance(action_detail, dict):
                         continue
                     
-                    action_id = action_detail.get("id", "unknown")
                     tags = action_detail.get("tags", [])
                     if not isinstance(tags, list):
                         tags = [tags]
-                    tags_lower = [tag.lower() for tag in tags]
-                                        
-                    # Si hay coincidencia
-                    if intent_lower in tags_lower:
-                        matched_actions.append({
-                            "id": action_detail.get("id", action_id),
-                            "description": action_detail.get("description", ""),
-                            "tags": tags,
-                            "priority": action_detail.get("priority", 0),
-                            "params": action_detail.get("params", {}),
-                            "required": action_detail.get("required", []),
-                            "examples": action_detail.get("examples", []),
-                            "source_key": key
-                        })
+
+                    actions.append({
+                        "id": action_detail.get("id", "unknown"),
+                        "description": action_detail.get("description", ""),
+                        "tags": tags,
+                        "priority": action_detail.get("priority", 0),
+                        "params": action_detail.get("params", {}),
+                        "required": action_detail.get("required", []),
+                        "examples": action_detail.get("examples", []),
+                        "source_key": key
+                    })
             
             except Exception as e:
                 print(f"  ⚠️ Error procesando {key}: {e}")
                 continue
+
+        return actions
+
+    @staticmethod
+    def load_indexed_actions(redis_client) -> list:
+        """
+        Carga el catálogo y sincroniza el índice de acciones.
+
+        No depende de la intención: el prefetch lo ejecuta mientras el LLM clasifica.
+
+        Args:
+            redis_client: Cliente de Redis
+
+        Returns:
+            Lista de acciones normalizadas (ver load_actions)
+        """
+        actions = LangGraphResponse.load_actions(redis_client)
+        action_index.sync(actions)
+        return actions
+
+    @staticmethod
+    def load_classifier_rule(redis_client, rule_key: str = "agente:rule:intent:classifier"):
+        """
+        Lee la plantilla del prompt del clasificador (RedisJSON o string).
+
+        Args:
+            redis_client: Cliente de Redis
+            rule_key: Clave de la regla
+
+        Returns:
+            Plantilla del prompt o None si no existe
+        """
+        rule_type = redis_client.type(rule_key)
+
+        if rule_type == "ReJSON-RL":
+            rule_json = redis_client.execute_command("JSON.GET", rule_key)
+            if rule_json:
+                return json.loads(rule_json).get("prompt")
+
+        elif rule_type == "string":
+            return redis_client.get(rule_key)
+
+        return None
+
+    @staticmethod
+    def filter_actions(actions: list, intent: str, synced: bool = False) -> list:
+        """
+        Filtra acciones ya cargadas por intención.
+
+        Primero busca coincidencia exacta del intent con los tags. Si no hay,
+        usa el índice vectorial local (description, tags y examples) y retorna
+        las acciones más similares.
+
+        Args:
+            actions: Acciones normalizadas (load_actions)
+            intent: Intención clasificada para filtrar acciones
+            synced: True si el índice ya se sincronizó con estas acciones
+
+        Returns:
+            Lista de acciones coincidentes ordenadas por prioridad
+            (o por similitud en la búsqueda semántica)
+        """
+        intent_lower = intent.lower()
+
+        matched_actions = [
+            {**action, "match": "tag"}
+            for action in actions
+            if intent_lower in [str(tag).lower() for tag in action["tags"]]
+        ]
+
+        if matched_actions:
+            # Ordenar por prioridad (descendente)
+            matched_actions.sort(key=lambda x: x["priority"], reverse=True)
+            return matched_actions
+
+        # Sin coincidencia exacta: búsqueda por similitud (solo re-vectoriza acciones modificadas)
+        if not synced:
+            action_index.sync(actions)
+        return [
+            {**action, "match": "semantic", "score": round(score, 4)}
+            for action, score in action_index.search(
+                intent, top_k=ACTION_INDEX_TOP_K, min_score=ACTION_INDEX_MIN_SCORE
+            )
+        ]
+
+    @staticmethod
+    def fetch_and_filter_actions(redis_client, intent: str) -> list:
+        """
+        Función helper que realiza el parseo y filtrado de acciones desde Redis.
         
-        # Ordenar por prioridad (descendente)
-        matched_actions.sort(key=lambda x: x["priority"], reverse=True)
+        Args:
+            redis_client: Cliente de Redis
+            intent: Intención clasificada para filtrar acciones
         
-        return matched_actions
+        Returns:
+            Lista de acciones coincidentes (ver filter_actions)
+        """
+        actions = LangGraphResponse.load_actions(redis_client)
+        return LangGraphResponse.filter_actions(actions, intent)
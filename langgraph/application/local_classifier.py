@@ -0,0 +1,286 @@
+"""
+Pre-clasificador local de intenciones.
+
+Primera etapa antes del clasificador LLM. Decide la intención sin llamar a
+Gemini cuando la confianza supera un umbral:
+    1. Coincidencia exacta (normalizada) con un example de una acción -> confianza 1.0
+    2. Vecino más cercano (TF-IDF de n-gramas) entre los examples de las acciones
+       y los mensajes ya etiquetados por el LLM sin historial (agente:classifier:labels)
+
+Métricas en Redis (HASH agente:stats:local_classifier):
+    messages          -> mensajes evaluados
+    skipped           -> mensajes resueltos sin LLM
+    shadow_checked    -> predicciones confiables verificadas igual con el LLM (muestreo)
+    shadow_agree      -> de ellas, en las que el LLM coincidió
+    low_conf_checked  -> predicciones bajo el umbral (siempre van al LLM)
+    low_conf_agree    -> de ellas, en las que el LLM coincidió
+"""
+import json
+import random
+import threading
+import time
+from configparser import ConfigParser
+from typing import Any, Dict, List, Optional
+
+from langgraph.application.action_index import ActionIndex, normalize_text
+from langgraph.application.lang_response import LangGraphResponse
+
+
+config = ConfigParser()
+config.read("config.ini")
+
+
+def _document_text(document: Dict[str, Any]) -> str:
+    return document["text"]
+
+
+def _document_key(document: Dict[str, Any]) -> str:
+    return document["key"]
+
+
+class LocalIntentClassifier:
+    """Clasificador por vecino más cercano sobre examples y etiquetas del LLM."""
+
+    LABELS_KEY = "agente:classifier:labels"
+    STATS_KEY = "agente:stats:local_classifier"
+    UNKNOWN_INTENT = "desconocida"
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        min_margin: float = 0.1,
+        shadow_rate: float = 0.05,
+        refresh_interval: int = 30,
+        max_labels: int = 5000,
+        enabled: bool = True
+    ):
+        """
+        Args:
+            threshold: Similitud mínima para decidir sin LLM
+            min_margin: Diferencia mínima con la mejor intención alternativa
+            shadow_rate: Fracción de decisiones locales que igual se verifican con el LLM
+            refresh_interval: Segundos entre recargas del catálogo y las etiquetas
+            max_labels: Máximo de mensajes etiquetados por el LLM que se conservan
+            enabled: Si es False siempre se usa el LLM
+        """
+        self.threshold = threshold
+        self.min_margin = min_margin
+        self.shadow_rate = shadow_rate
+        self.refresh_interval = refresh_interval
+        self.max_labels = max_labels
+        self.enabled = enabled
+        self.index = ActionIndex(text_fn=_document_text, key_fn=_document_key)
+        self._exact: Dict[str, Dict[str, Any]] = {}
+        self._known_intents: set = set()
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "LocalIntentClassifier":
+        return cls(
+            threshold=config.getfloat("LOCAL_CLASSIFIER", "threshold", fallback=0.85),
+            min_margin=config.getfloat("LOCAL_CLASSIFIER", "min_margin", fallback=0.1),
+            shadow_rate=config.getfloat("LOCAL_CLASSIFIER", "shadow_rate", fallback=0.05),
+            refresh_interval=config.getint("LOCAL_CLASSIFIER", "refresh_interval", fallback=30),
+            max_labels=config.getint("LOCAL_CLASSIFIER", "max_labels", fallback=5000),
+            enabled=config.getboolean("LOCAL_CLASSIFIER", "enabled", fallback=True)
+        )
+
+    # ------------------------------------------------------------
+    # Catálogo
+    # ------------------------------------------------------------
+    def _documents(self, actions: List[Dict[str, Any]], labels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        documents = []
+        for action in actions:
+            intents = [str(tag).lower() for tag in action["tags"] if tag]
+            if not intents:
+                continue
+            examples = action["examples"] if isinstance(action["examples"], list) else [action["examples"]]
+            for position, example in enumerate(examples):
+                if not example:
+                    continue
+                documents.append({
+                    "key": f"{action['source_key']}|{action['id']}|{position}",
+                    "text": str(example),
+                    "intent": intents[0],
+                    "intents": intents,
+                    "action_id": action["id"],
+                    "origin": "example"
+                })
+
+        # Las etiquetas llegan de la más reciente a la más antigua (LPUSH): si el
+        # mismo mensaje se etiquetó varias veces, gana la intención más reciente
+        seen_labels = set()
+        for label in labels:
+            key = f"label|{normalize_text(label['message'])}"
+            if key in seen_labels:
+                continue
+            seen_labels.add(key)
+            documents.append({
+                "key": key,
+                "text": label["message"],
+                "intent": label["intent"],
+                "intents": [label["intent"]],
+                "action_id": None,
+                "origin": "llm_label"
+            })
+        return documents
+
+    def refresh(self, redis_client, force: bool = False) -> None:
+        """Recarga acciones y etiquetas si venció refresh_interval."""
+        if not force and time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return
+
+            actions = LangGraphResponse.load_actions(redis_client)
+            known_intents = {str(tag).lower() for action in actions for tag in action["tags"] if tag}
+
+            labels = []
+            for raw in redis_client.lrange(self.LABELS_KEY, 0, self.max_labels - 1):
+                try:
+                    label = json.loads(raw)
+                except (TypeError, ValueError):
+                    continue
+                # Solo etiquetas de intenciones que siguen existiendo en el catálogo
+                if label.get("intent") in known_intents and label.get("message"):
+                    labels.append(label)
+
+            documents = self._documents(actions, labels)
+            self.index.sync(documents)
+            self._exact = {normalize_text(doc["text"]).strip(): doc for doc in documents}
+            self._known_intents = known_intents
+            self._refreshed_at = time.monotonic()
+
+    # ------------------------------------------------------------
+    # Predicción
+    # ------------------------------------------------------------
+    def predict(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Predice la intención del mensaje.
+
+        Returns:
+            Dict con intent, intents, confidence, margin, action_id, origin y decided
+            (None si no hay candidatos)
+        """
+        normalized = normalize_text(message).strip()
+        if not normalized:
+            return None
+
+        exact = self._exact.get(normalized)
+        if exact is not None:
+            return self._prediction(exact, 1.0, 1.0)
+
+        results = self.index.search(message, top_k=10)
+        if not results:
+            return None
+
+        best, confidence = results[0]
+        # Margen frente a la mejor alternativa con otra intención
+        alternative = next((score for doc, score in results[1:] if best["intent"] not in doc["intents"]), 0.0)
+        return self._prediction(best, confidence, confidence - alternative)
+
+    def _prediction(self, document: Dict[str, Any], confidence: float, margin: float) -> Dict[str, Any]:
+        return {
+            "intent": document["intent"],
+            "intents": document["intents"],
+            "action_id": document["action_id"],
+            "origin": document["origin"],
+            "confidence": round(confidence, 4),
+            "margin": round(margin, 4),
+            "decided": confidence >= self.threshold and margin >= self.min_margin
+        }
+
+    def classify(self, redis_client, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Evalúa el mensaje y registra métricas. Si la predicción es confiable,
+        una fracción (shadow_rate) se marca con shadow=True para verificarla con el LLM.
+        """
+        if not self.enabled:
+            return None
+
+        self.refresh(redis_client)
+        prediction = self.predict(message)
+
+        skipped = bool(prediction and prediction["decided"])
+        if skipped and random.random() < self.shadow_rate:
+            prediction["shadow"] = True
+            skipped = False
+        elif prediction:
+            prediction["shadow"] = False
+
+        self._increment(redis_client, messages=1, skipped=int(skipped))
+        return prediction
+
+    # ------------------------------------------------------------
+    # Retroalimentación del LLM
+    # ------------------------------------------------------------
+    def record_llm_result(
+        self,
+        redis_client,
+        message: str,
+        llm_intent: str,
+        prediction: Optional[Dict[str, Any]],
+        store_label: bool = True
+    ) -> None:
+        """
+        Registra la intención del LLM: guarda el mensaje como etiqueta y compara
+        con la predicción local (si existía).
+
+        Args:
+            store_label: False si el LLM clasificó con historial; la intención no
+                depende solo del mensaje y no se guarda como etiqueta
+        """
+        if not self.enabled:
+            return
+
+        if store_label and llm_intent and llm_intent != self.UNKNOWN_INTENT and llm_intent in self._known_intents and message:
+            pipe = redis_client.pipeline()
+            pipe.lpush(self.LABELS_KEY, json.dumps({"message": message[:500], "intent": llm_intent}, ensure_ascii=False))
+            pipe.ltrim(self.LABELS_KEY, 0, self.max_labels - 1)
+            pipe.execute()
+
+        if not prediction:
+            return
+        agree = int(llm_intent in prediction["intents"])
+        if prediction.get("shadow"):
+            self._increment(redis_client, shadow_checked=1, shadow_agree=agree)
+        else:
+            self._increment(redis_client, low_conf_checked=1, low_conf_agree=agree)
+
+    def _increment(self, redis_client, **fields: int) -> None:
+        try:
+            pipe = redis_client.pipeline()
+            for field, amount in fields.items():
+                if amount:
+                    pipe.hincrby(self.STATS_KEY, field, amount)
+            pipe.execute()
+        except Exception as e:
+            print(f"⚠️ No se pudieron registrar métricas del clasificador local: {e}")
+
+    def get_stats(self, redis_client) -> Dict[str, Any]:
+        """Tasa de omisión del LLM y precisión contra las etiquetas del LLM."""
+        raw = redis_client.hgetall(self.STATS_KEY) or {}
+        stats = {field: int(raw.get(field, 0)) for field in (
+            "messages", "skipped", "shadow_checked", "shadow_agree", "low_conf_checked", "low_conf_agree"
+        )}
+
+        def ratio(numerator: int, denominator: int) -> Optional[float]:
+            return round(numerator / denominator, 4) if denominator else None
+
+        stats.update({
+            "skip_rate": ratio(stats["skipped"], stats["messages"]),
+            # Precisión estimada de las decisiones locales (muestreo shadow)
+            "accuracy": ratio(stats["shadow_agree"], stats["shadow_checked"]),
+            "low_conf_accuracy": ratio(stats["low_conf_agree"], stats["low_conf_checked"]),
+            "threshold": self.threshold,
+            "min_margin": self.min_margin,
+            "shadow_rate": self.shadow_rate
+        })
+        return stats
+
+
+# Instancia compartida por proceso
+local_classifier = LocalIntentClassifier.from_config()
@@ -1,11 +1,38 @@
+import os
+
 from infrastructure.config.redis_config import RedisConfig
+from langgraph.application.history import history_manager as default_history
+from langgraph.application.local_classifier import local_classifier as default_local_classifier
+from langgraph.application.prefetch import turn_prefetcher as default_prefetcher
 from langgraph.infrastructure.llm_adapter import GeminiLLMAdapter
 
 
 class NodeContext:
     """
     Contenedor de dependencias compartidas entre nodos LangGraph.
+    Las dependencias se pueden inyectar (ej: fakes en benchmarks).
+
+    Sin inyección, los clientes de red se resuelven en cada uso y por proceso:
+    el grafo compilado puede crearse en el master de gunicorn (--preload) y
+    cada worker usa su propio cliente Redis y su propio adapter de Gemini.
     """
-    def __init__(self):
-        self.redis = RedisConfig.get_client()
-        self.llm = GeminiLLMAdapter()
+    def __init__(self, redis=None, llm=None, local_classifier=None, prefetcher=None, history=None):
+        self._redis = redis
+        self._llm = llm
+        self._llm_pid = None if llm is not None else os.getpid()
+        self.local_classifier = local_classifier if local_classifier is not None else default_local_classifier
+        self.prefetcher = prefetcher if prefetcher is not None else default_prefetcher
+        self.history = history if history is not None else default_history
+
+    @property
+    def redis(self):
+        if self._redis is not None:
+            return self._redis
+        return RedisConfig.get_client()
+
+    @property
+    def llm(self):
+        if self._llm is None or (self._llm_pid is not None and self._llm_pid != os.getpid()):
+            self._llm = GeminiLLMAdapter()
+            self._llm_pid = os.getpid()
+        return self._llm
@@ -1,36 +1,94 @@
+from typing import Any, Dict, Optional
+
+from infrastructure.concurrency.deadline import Deadline
+from infrastructure.concurrency.turn_lock import TurnLock, turn_lock
 from infrastructure.config.redis_config import RedisConfig
-from langgraph.domain.graph import build_graph
+from langgraph.types import Command
+from langgraph.domain.graph import RESUME_NODE, get_default_graph
 from langgraph.domain.states import ConversationState
 from websocket.domain.dataModel.model import WsChatMessageRequest
 
 
 class LangGraphOrchestrator:
 
-    def __init__(self):
-        self.graph = build_graph()
-        self.redis = RedisConfig.get_client()
+    # Estado completo por usuario de la versión anterior (un SET por turno)
+    LEGACY_KEY = "conversation:{code_user}"
 
-    def run(self, payload: WsChatMessageRequest):
+    def __init__(self, graph=None, redis=None, lock: Optional[TurnLock] = None):
+        self.graph = graph or get_default_graph()
+        self.redis = redis if redis is not None else RedisConfig.get_client()
+        self.lock = lock or turn_lock
 
-        key = f"conversation:{payload.code_user}"
+    def _legacy_state(self, code_user: str) -> Dict[str, Any]:
+        """Migra el estado guardado con el SET anterior (una sola vez por usuario)."""
+        key = self.LEGACY_KEY.format(code_user=code_user)
         previous_state_json = self.redis.get(key)
+        if not previous_state_json:
+            return {}
+        self.redis.delete(key)
+        previous_state = ConversationState.model_validate_json(previous_state_json)
+        return {field: getattr(previous_state, field) for field in previous_state.model_fields_set}
+
+    def _recover(self, config: Dict[str, Any], turn: Dict[str, Any]):
+        """Entrada del grafo cuando el último checkpoint no es una pausa limpia."""
+        snapshot = self.graph.get_state(config)
+        if snapshot.next == (RESUME_NODE,):
+            # Pausa con escrituras de un intento fallido: nuevo checkpoint con el mensaje
+            self.graph.update_state(config, turn, as_node="wait_for_user_input")
+            return None
+        if snapshot.next and snapshot.values.get("user_message") == turn["user_message"]:
+            # Turno cortado (caída o timeout) con el mismo mensaje: se retoma en el nodo pendiente
+            self.graph.update_state(config, turn)
+            return None
+        return turn
+
+    def run(self, payload: WsChatMessageRequest, deadline: Optional[Deadline] = None):
+        """
+        Ejecuta un turno de conversación.
+
+        El estado se persiste por paso con el checkpointer del grafo (thread_id = code_user):
+            - si el turno anterior quedó esperando input, se retoma en RESUME_NODE
+            - si el turno anterior se cortó (caída o timeout) y llega el mismo mensaje,
+              se retoma desde el nodo pendiente sin repetir los pasos ya hechos
+            - en otro caso se inicia un turno nuevo desde START con el estado acumulado
+
+        Los turnos del mismo usuario se serializan entre workers con TurnLock; el
+        token de fencing viaja al checkpointer en la configuración del grafo.
 
-        if previous_state_json:
-            previous_state = ConversationState.model_validate_json(previous_state_json)
-            state = previous_state.model_copy(deep=True)
-            state.user_message = payload.message
-            state.payload = payload
+        Args:
+            payload: Mensaje del usuario
+            deadline: Presupuesto de tiempo del turno (se propaga a los nodos)
+
+        Raises:
+            TurnLockTimeout: Si otro turno del usuario sigue en curso tras la espera máxima
+            DeadlineExpired: Si el turno se quedó sin tiempo
+        """
+        with self.lock.hold(payload.code_user, deadline) as fence_token:
+            return self._run_turn(payload, deadline, fence_token)
+
+    def _run_turn(self, payload: WsChatMessageRequest, deadline: Optional[Deadline], fence_token: Optional[int]):
+        config = {"configurable": {"thread_id": payload.code_user, "fence_token": fence_token}}
+        turn = {
+            "payload": payload,
+            "user_message": payload.message,
+            "deadline_at": deadline.expires_at if deadline else None
+        }
+
+        saved = self.graph.checkpointer.get_tuple(config)
+        values = saved.checkpoint["channel_values"] if saved else {}
+        if saved is None:
+            graph_input = {**self._legacy_state(payload.code_user), **turn}
+        elif values.get("step") == "waiting_user_input" and not saved.pending_writes:
+            # Pausado antes de RESUME_NODE: el mensaje se aplica y se retoma ahí
+            graph_input = Command(update=turn)
         else:
-            state = ConversationState(
-                payload=payload,
-                user_message=payload.message
-            )
+            graph_input = self._recover(config, turn)
 
-        result = self.graph.invoke(state)
+        result = self.graph.invoke(graph_input, config)
         validated = ConversationState.model_validate(result)
 
-        # 🔥 Persistir
-        self.redis.set(key, validated.model_dump_json())
+        if deadline is not None:
+            # El usuario ya recibió el timeout: no se responde con un turno que no verá
+            deadline.check("respond")
 
         return validated
-
@@ -0,0 +1,170 @@
+"""
+Prefetch especulativo de I/O independiente de la intención.
+
+El grafo corre en secuencia: prompt del clasificador (Redis) -> LLM (Gemini,
+cientos de ms) -> actions_retriever (Redis). La carga del catálogo, la
+sincronización del índice de acciones y la regla del clasificador no dependen
+de la intención, así que se lanzan en segundo plano en cuanto el turno entra al
+flujo de clasificación y los nodos que las usan solo se unen al resultado:
+
+    entry_router (normal_flow) -> start(code_user, mensaje, cargas)
+    build_prompt_classifier    -> join("classifier_rule")
+    actions_retriever          -> join("actions")
+
+Si la carga no se lanzó, falló o no termina a tiempo, el nodo hace la lectura
+en línea como antes. Cada join registra el tiempo que el turno esperó (lo que
+queda en el camino crítico) y el que tomó la carga; la diferencia es lo que se
+ahorró. Ambos se reportan como p50/p95/p99 en get_stats().
+
+Configuración en la sección [PREFETCH] de config.ini:
+    [PREFETCH]
+    enabled = true
+    workers = 4
+    join_timeout = 5
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from configparser import ConfigParser
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from infrastructure.metrics.latency import summarize_latencies
+
+# Turnos con cargas pendientes que se recuerdan (los más antiguos se descartan)
+MAX_PENDING = 1024
+# Muestras de espera/ahorro que se conservan para los percentiles
+TIMING_SAMPLES = 1024
+
+
+class TurnPrefetcher:
+    """Cargas en segundo plano por turno, unidas después por los nodos."""
+
+    def __init__(self, workers: int = 4, join_timeout: float = 5.0, enabled: bool = True):
+        """
+        Args:
+            workers: Hilos del pool de prefetch (por proceso)
+            join_timeout: Segundos máximos de espera en join() si el turno no trae deadline
+            enabled: Si es False start() no hace nada y los nodos leen en línea
+        """
+        self.workers = workers
+        self.join_timeout = join_timeout
+        self.enabled = enabled
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._waits: Deque[float] = deque(maxlen=TIMING_SAMPLES)
+        self._saved: Deque[float] = deque(maxlen=TIMING_SAMPLES)
+        self._lock = threading.Lock()
+        self.stats = {"started": 0, "hits": 0, "misses": 0, "errors": 0, "timeouts": 0, "unused": 0}
+
+    @classmethod
+    def from_config(cls) -> "TurnPrefetcher":
+        config = ConfigParser()
+        config.read("config.ini")
+        return cls(
+            workers=config.getint("PREFETCH", "workers", fallback=4),
+            join_timeout=config.getfloat("PREFETCH", "join_timeout", fallback=5.0),
+            enabled=config.getboolean("PREFETCH", "enabled", fallback=True)
+        )
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # Por proceso: con gunicorn --preload los hilos del master no existen en los workers
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prefetch")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    @staticmethod
+    def _timed(loader: Callable[[], Any]) -> Callable[[], Tuple[Any, float]]:
+        def run() -> Tuple[Any, float]:
+            started = time.perf_counter()
+            value = loader()
+            return value, (time.perf_counter() - started) * 1000
+        return run
+
+    def start(self, key: str, message: Optional[str], loaders: Dict[str, Callable[[], Any]]) -> None:
+        """
+        Lanza las cargas del turno en segundo plano.
+
+        Args:
+            key: Hilo del turno (code_user; TurnLock garantiza un turno a la vez)
+            message: Mensaje del turno (el join lo compara para no usar cargas de otro turno)
+            loaders: nombre -> función sin argumentos que hace la lectura
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            pool = self._pool()
+            futures = {name: pool.submit(self._timed(loader)) for name, loader in loaders.items()}
+            if self._pending.pop(key, None) is not None:
+                # Cargas del turno anterior que ningún nodo unió (ej: clasificación local)
+                self.stats["unused"] += 1
+            self._pending[key] = {"message": message, "futures": futures}
+            self.stats["started"] += 1
+            while len(self._pending) > MAX_PENDING:
+                self._pending.popitem(last=False)
+                self.stats["unused"] += 1
+
+    def join(self, key: str, message: Optional[str], name: str, timeout: Optional[float] = None) -> Tuple[Optional[Any], Dict[str, Any]]:
+        """
+        Espera una carga lanzada con start().
+
+        Args:
+            key: Hilo del turno
+            message: Mensaje del turno
+            name: Carga a unir
+            timeout: Segundos máximos de espera (por defecto join_timeout)
+
+        Returns:
+            (valor, info) donde info tiene hit, wait_ms y load_ms. El valor es None
+            si no hubo prefetch, falló o no terminó a tiempo (el nodo debe leer en línea)
+        """
+        with self._lock:
+            entry = self._pending.get(key)
+            future: Optional[Future] = None
+            if entry is not None and entry["message"] == message:
+                future = entry["futures"].pop(name, None)
+                if not entry["futures"]:
+                    self._pending.pop(key, None)
+            if future is None:
+                self.stats["misses"] += 1
+                return None, {"hit": False}
+
+        started = time.perf_counter()
+        try:
+            value, load_ms = future.result(timeout=self.join_timeout if timeout is None else max(0.0, timeout))
+        except FutureTimeout:
+            wait_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.stats["timeouts"] += 1
+                self._waits.append(wait_ms)
+            return None, {"hit": False, "wait_ms": round(wait_ms, 3)}
+        except Exception as e:
+            print(f"⚠️ Prefetch '{name}' falló: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+            return None, {"hit": False}
+
+        wait_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.stats["hits"] += 1
+            self._waits.append(wait_ms)
+            self._saved.append(max(0.0, load_ms - wait_ms))
+        return value, {"hit": True, "wait_ms": round(wait_ms, 3), "load_ms": round(load_ms, 3)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "workers": self.workers,
+                "pending": len(self._pending),
+                "wait_ms": summarize_latencies(self._waits),
+                "saved_ms": summarize_latencies(self._saved),
+                **self.stats
+            }
+
+
+# Instancia compartida por proceso
+turn_prefetcher = TurnPrefetcher.from_config()
@@ -0,0 +1,70 @@
+from fastapi import APIRouter
+
+from langgraph.infrastructure.agent_controller import AgentStatsController
+
+
+agent = APIRouter()
+
+# ---------------------------------------
+# Métricas del agente
+# ---------------------------------------
+@agent.get("/agent/classifier/stats", tags=["Agent"])
+def classifier_stats():
+    """
+    Tasa de mensajes resueltos sin LLM por el pre-clasificador local y su
+    precisión estimada contra las etiquetas del LLM.
+    """
+    controller = AgentStatsController()
+    return controller.classifier_stats()
+
+
+@agent.get("/agent/llm/limiter", tags=["Agent"])
+def llm_limiter_stats():
+    """
+    Estado del limitador de concurrencia de Gemini en este worker: límite
+    adaptativo actual, llamadas en vuelo, cola por área y rechazos.
+    """
+    controller = AgentStatsController()
+    return controller.llm_limiter_stats()
+
+
+@agent.get("/agent/llm/providers", tags=["Agent"])
+def llm_provider_stats():
+    """
+    Ruteo de proveedores de LLM en este worker: latencia EWMA y p95, tasa de
+    error, enfriamiento, hedges, failovers y llamadas ganadas por proveedor.
+    """
+    controller = AgentStatsController()
+    return controller.llm_provider_stats()
+
+
+@agent.get("/agent/turn-lock", tags=["Agent"])
+def turn_lock_stats():
+    """
+    Serialización de turnos por usuario en este worker: turnos en curso,
+    esperas por contención (p50/p95/p99), timeouts y leases vencidos.
+    """
+    controller = AgentStatsController()
+    return controller.turn_lock_stats()
+
+
+@agent.get("/agent/prefetch", tags=["Agent"])
+def prefetch_stats():
+    """
+    Prefetch de catálogo y regla del clasificador en este worker: espera que
+    queda en el camino crítico del turno y tiempo ahorrado (p50/p95/p99).
+    """
+    controller = AgentStatsController()
+    return controller.prefetch_stats()
+
+
+@agent.get("/agent/ws", tags=["Agent"])
+def ws_connection_stats():
+    """
+    Conexiones WebSocket de este worker: sockets abiertos y usuarios, cupos,
+    rechazos antes del accept (worker lleno o usuario en su máximo), cierres
+    por inactividad, estado del push entre workers y mensajes reenviados
+    respondidos desde la ventana de deduplicación.
+    """
+    controller = AgentStatsController()
+    return controller.ws_connection_stats()
@@ -1,46 +1,76 @@
+import threading
+from typing import Callable
+
 from langgraph.graph import StateGraph, END
 from langgraph.domain.states import ConversationState
 from langgraph.domain.nodes import (
     entry_router_node,
+    local_classifier_node,
     build_prompt_classifier_node,
     llm_classifier_node,
     actions_retriever_node,
     action_selector_node,
     execute_action_node,
     params_processor_node,
-    wait_for_user_input_node
+    wait_for_user_input_node,
+    with_deadline
 )
 from langgraph.application.node_context import NodeContext
-from langgraph.domain.nodes import entry_router, action_selector_router, params_router
+from langgraph.infrastructure.redis_checkpointer import RedisCheckpointSaver
+from langgraph.domain.nodes import entry_router, local_classifier_router, action_selector_router, params_router
+
+
+_default_graph = None
+_default_graph_lock = threading.Lock()
 
+# Nodo en el que el grafo se pausa esperando el siguiente mensaje del usuario
+RESUME_NODE = "user_input"
 
-def build_graph():
+
+def build_graph(context: NodeContext = None, instrument: Callable[[str, Callable], Callable] = None, checkpointer=None):
+    """
+    Construye y compila el grafo de conversación.
+
+    Args:
+        context: Dependencias de los nodos (por defecto Redis y Gemini reales)
+        instrument: Envoltorio opcional (nombre, nodo) -> nodo, ej: medir tiempos por nodo
+        checkpointer: Checkpointer de LangGraph. Con él, el grafo se pausa antes de
+            RESUME_NODE tras wait_for_user_input y el siguiente turno se retoma ahí
+    """
     graph = StateGraph(ConversationState)
-    context = NodeContext()
+    context = context or NodeContext()
+
+    def add_node(name: str, node: Callable) -> None:
+        # Cada nodo verifica antes de ejecutarse que el turno aún tenga tiempo
+        node = with_deadline(name, node)
+        graph.add_node(name, instrument(name, node) if instrument else node)
 
     # Paso 0: Router de entrada - detecta si es params_required o flujo normal
-    graph.add_node("entry_router", entry_router_node(context))
+    add_node("entry_router", entry_router_node(context))
+
+    # Paso 0.5: Pre-clasificador local (evita el LLM en intenciones de alta confianza)
+    add_node("local_classifier", local_classifier_node(context))
 
     # Paso 1: Construye el prompt para el clasificador
-    graph.add_node("build_prompt_classifier", build_prompt_classifier_node(context))
+    add_node("build_prompt_classifier", build_prompt_classifier_node(context))
     
     # Paso 2: Clasifica la intención del usuario usando LLM
-    graph.add_node("llm_classifier", llm_classifier_node(context))
+    add_node("llm_classifier", llm_classifier_node(context))
     
     # Paso 3: Recupera las acciones disponibles según la clasificación
-    graph.add_node("actions_retriever", actions_retriever_node(context))
+    add_node("actions_retriever", actions_retriever_node(context))
     
     # Paso 4: Selecciona la acción más apropiada
-    graph.add_node("action_selector", action_selector_node(context))
+    add_node("action_selector", action_selector_node(context))
     
     # Paso 5: Ejecuta la acción seleccionada y solicita parámetros
-    graph.add_node("execute_action", execute_action_node(context))
+    add_node("execute_action", execute_action_node(context))
     
     # Paso 6: Procesa los parámetros enviados por el usuario
-    graph.add_node("params_processor", params_processor_node(context))
+    add_node("params_processor", params_processor_node(context))
     
     # Paso 7: Espera input adicional del usuario cuando sea necesario
-    graph.add_node("wait_for_user_input", wait_for_user_input_node(context))
+    add_node("wait_for_user_input", wait_for_user_input_node(context))
 
     # Define el punto de entrada del grafo
     graph.set_entry_point("entry_router")
@@ -50,12 +80,22 @@ def build_graph():
         "entry_router",
         entry_router,
         {
-            "classify": "build_prompt_classifier",
+            "classify": "local_classifier",
             "params": "params_processor",
             "action_select": "action_selector"
         }
     )
 
+    # Si el pre-clasificador decide, se salta el LLM
+    graph.add_conditional_edges(
+        "local_classifier",
+        local_classifier_router,
+        {
+            "local": "actions_retriever",
+            "llm": "build_prompt_classifier"
+        }
+    )
+
     # Conexiones entre nodos del flujo de clasificación
     graph.add_edge("build_prompt_classifier", "llm_classifier")
     graph.add_edge("llm_classifier", "actions_retriever")
@@ -70,5 +110,36 @@ def build_graph():
     # Routing condicional desde params_processor
     graph.add_conditional_edges("params_processor", params_router, {"complete": END, "wait": "wait_for_user_input"})
 
-    return graph.compile()
-# k
\ No newline at end of file
+    if checkpointer is None:
+        return graph.compile()
+
+    # Con checkpoints: el turno termina en pausa antes de RESUME_NODE; el siguiente
+    # mensaje retoma desde ahí (mismo ruteo que entry_router) sin volver a START
+    add_node(RESUME_NODE, entry_router_node(context))
+    graph.add_edge("wait_for_user_input", RESUME_NODE)
+    graph.add_conditional_edges(
+        RESUME_NODE,
+        entry_router,
+        {
+            "classify": "local_classifier",
+            "params": "params_processor",
+            "action_select": "action_selector"
+        }
+    )
+    return graph.compile(checkpointer=checkpointer, interrupt_before=[RESUME_NODE])
+# k
+
+def get_default_graph():
+    """
+    Grafo compilado compartido por el proceso, con las dependencias por defecto
+    y checkpoints incrementales en Redis.
+    Es inmutable (los clientes se resuelven en cada uso desde NodeContext y el
+    checkpointer), así que se compila una sola vez; con gunicorn --preload se
+    compila en el master y los workers lo heredan.
+    """
+    global _default_graph
+    if _default_graph is None:
+        with _default_graph_lock:
+            if _default_graph is None:
+                _default_graph = build_graph(checkpointer=RedisCheckpointSaver.from_config())
+    return _default_graph
@@ -1,9 +1,51 @@
 from langgraph.domain.states import ConversationState
 from langgraph.application.lang_response import LangGraphResponse
 from langgraph.application.node_context import NodeContext
+from typing import Callable, Optional
+
+from infrastructure.concurrency.adaptive_limiter import LimiterOverloaded
+from infrastructure.concurrency.deadline import Deadline, DeadlineExpired
+from infrastructure.serialization.json_codec import loads, looks_like_json_object
 import json
 
 
+def turn_deadline(state: ConversationState) -> Optional[Deadline]:
+    return Deadline(state.deadline_at) if state.deadline_at is not None else None
+
+
+def with_deadline(name: str, node: Callable) -> Callable:
+    """Envuelve un nodo para cortar el turno si ya no queda presupuesto de tiempo."""
+
+    def guarded(state: ConversationState) -> ConversationState:
+        deadline = turn_deadline(state)
+        if deadline is not None:
+            deadline.check(name)
+        return node(state)
+
+    return guarded
+
+
+def start_prefetch(context: NodeContext, state: ConversationState) -> None:
+    """Lanza en segundo plano las lecturas que no dependen de la intención."""
+    redis_client = context.redis
+    context.prefetcher.start(state.payload.code_user, state.user_message, {
+        "classifier_rule": lambda: LangGraphResponse.load_classifier_rule(redis_client),
+        "actions": lambda: LangGraphResponse.load_indexed_actions(redis_client)
+    })
+
+
+def join_prefetch(context: NodeContext, state: ConversationState, name: str, load: Callable):
+    """Resultado de una lectura lanzada por start_prefetch; si no está disponible se lee en línea."""
+    deadline = turn_deadline(state)
+    value, info = context.prefetcher.join(
+        state.payload.code_user,
+        state.user_message,
+        name,
+        timeout=deadline.remaining() if deadline is not None else None
+    )
+    return value if info["hit"] else load(context.redis)
+
+
 def entry_router_node(context: NodeContext):
 
     def node(state: ConversationState) -> ConversationState:
@@ -11,14 +53,20 @@ def entry_router_node(context: NodeContext):
         print("USER MESSAGE:", state.user_message)
         print("PAYLOAD PARAMS:", state.payload.params_required)
 
+        # Resumen del historial pedido en un turno anterior (si ya llegó)
+        state.history = context.history.apply_summary(state.payload.code_user, state.history)
+
         # Detectar si el usuario está enviando params_required
+        # (el socket ya parseó el frame; solo se parsea aquí si llegó por otra vía)
         if not state.payload.params_required and state.user_message:
-            try:
-                parsed_message = json.loads(state.user_message)
-                if isinstance(parsed_message, dict) and "params_required" in parsed_message:
-                    state.payload.params_required = parsed_message.get("params_required")
-            except json.JSONDecodeError:
-                pass
+            parsed_message = state.payload.parsed_message
+            if parsed_message is None and looks_like_json_object(state.user_message):
+                try:
+                    parsed_message = loads(state.user_message)
+                except json.JSONDecodeError:
+                    parsed_message = None
+            if isinstance(parsed_message, dict) and "params_required" in parsed_message:
+                state.payload.params_required = parsed_message.get("params_required")
 
         if state.payload.params_required:
             state.step = "params_received"
@@ -29,6 +77,8 @@ def entry_router_node(context: NodeContext):
                 state.step = "action_id_received"
             else:
                 state.step = "normal_flow"
+                # El turno va a clasificar: catálogo y regla se leen mientras tanto
+                start_prefetch(context, state)
         return state
 
     return node
@@ -42,38 +92,68 @@ def entry_router(state: ConversationState) -> str:
     return "classify"
 
 
-def build_prompt_classifier_node(context: NodeContext):
+def local_classifier_node(context: NodeContext):
 
     def node(state: ConversationState) -> ConversationState:
-        redis_client = context.redis
-        rule_key = "agente:rule:intent:classifier"
+        state.metadata.pop("local_prediction", None)
+        state.metadata["classifier_source"] = "llm"
 
         try:
-            rule_type = redis_client.type(rule_key)
-            classifier_prompt = None
+            prediction = context.local_classifier.classify(context.redis, state.user_message)
+        except Exception as e:
+            print(f"⚠️ Error local_classifier_node: {e}")
+            prediction = None
+
+        if prediction and prediction["decided"] and not prediction["shadow"]:
+            # ⚡ Intención resuelta sin llamar al LLM
+            state.intent = prediction["intent"]
+            state.llm_response = prediction["intent"]
+            state.metadata["classified_intent"] = prediction["intent"]
+            state.metadata["classifier_source"] = "local"
+            state.metadata["local_confidence"] = prediction["confidence"]
+            state.metadata["tokens_used"] = {}
+            state.step = "local_classified"
+            return state
+
+        state.metadata["local_prediction"] = prediction
+        state.step = "local_classifier_miss"
+        return state
+
+    return node
+
 
-            if rule_type == "ReJSON-RL":
-                rule_json = redis_client.execute_command("JSON.GET", rule_key)
-                if rule_json:
-                    rule_data = json.loads(rule_json)
-                    classifier_prompt = rule_data.get("prompt")
+def local_classifier_router(state: ConversationState) -> str:
+    if state.step == "local_classified":
+        return "local"
+    return "llm"
 
-            elif rule_type == "string":
-                classifier_prompt = redis_client.get(rule_key)
+
+def build_prompt_classifier_node(context: NodeContext):
+
+    def node(state: ConversationState) -> ConversationState:
+        try:
+            classifier_prompt = join_prefetch(context, state, "classifier_rule", LangGraphResponse.load_classifier_rule)
 
             if not classifier_prompt:
                 state.metadata["classifier_prompt"] = None
                 state.step = "rule_classified_error"
                 return state
 
+            # Historial acotado: en {history} si la regla lo define, si no antes de la regla
+            history = context.history.render(state.history)
             enriched_prompt = classifier_prompt.replace(
                 "{user_message}", state.user_message
             ).replace(
                 "{fullname}", state.payload.fullname
             )
+            if "{history}" in classifier_prompt:
+                enriched_prompt = enriched_prompt.replace("{history}", history)
+            elif history:
+                enriched_prompt = f"{history}\n\n{enriched_prompt}"
 
             state.metadata["classifier_prompt"] = enriched_prompt
             state.metadata["classifier_template"] = classifier_prompt
+            state.metadata["classifier_had_history"] = bool(history)
             state.step = "rule_classified"
 
             return state
@@ -98,8 +178,9 @@ def llm_classifier_node(context: NodeContext):
             state.step = "llm_classifier_done_error"
             return state
 
+        deadline = turn_deadline(state)
         try:
-            response = context.llm.generate_text(prompt)
+            response = context.llm.generate_text(prompt, area=state.payload.area, deadline=deadline)
             print(f"🧮 Tokens usados: {response.get('tokens', {})}")
 
             raw_text = response.get("text", "")
@@ -117,9 +198,28 @@ def llm_classifier_node(context: NodeContext):
             )
             state.step = "llm_classifier_done"
 
+            try:
+                # Con historial la intención depende del contexto ("sí", "el de ayer"):
+                # no sirve como etiqueta del mensaje suelto para el clasificador local
+                context.local_classifier.record_llm_result(
+                    context.redis,
+                    state.user_message,
+                    intent,
+                    state.metadata.get("local_prediction"),
+                    store_label=not state.metadata.get("classifier_had_history")
+                )
+            except Exception as e:
+                print(f"⚠️ No se pudo registrar la etiqueta del LLM: {e}")
+
             return state
 
+        except (LimiterOverloaded, DeadlineExpired):
+            # Fail fast: el socket responde 1013 (reintentar más tarde)
+            raise
         except Exception as e:
+            if deadline is not None and deadline.expired:
+                # El timeout de Gemini fue el del turno: cortar en lugar de seguir sin intención
+                raise DeadlineExpired("llm_classifier") from e
             print(f"❌ Error llm_classifier_node: {e}")
             state.intent = "desconocida"
             state.step = "llm_classifier_done_error"
@@ -140,11 +240,13 @@ def actions_retriever_node(context: NodeContext):
             state.step = "actions_retriever_error"
             return state
 
+        # Turno clasificado: entra al historial (el resumen, si toca, se pide en segundo plano)
+        state.history = context.history.record(state.history, state.user_message, intent)
+        context.history.schedule_summary(state.payload.code_user, state.history, context.llm, area=state.payload.area)
+
         try:
-            matched_actions = LangGraphResponse.fetch_and_filter_actions(
-                context.redis,
-                intent
-            )
+            actions = join_prefetch(context, state, "actions", LangGraphResponse.load_indexed_actions)
+            matched_actions = LangGraphResponse.filter_actions(actions, intent, synced=True)
 
             state.metadata["matched_actions"] = matched_actions
             state.metadata["matched_count"] = len(matched_actions)
@@ -1,8 +1,22 @@
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from websocket.domain.dataModel.model import WsChatMessageRequest
 
 
+class HistoryTurn(BaseModel):
+    message: str
+    intent: Optional[str] = None
+
+
+class ConversationHistory(BaseModel):
+    """Últimos turnos (anillo acotado) más un resumen de los anteriores."""
+    summary: str = ""
+    # Turnos recientes, del más antiguo al más nuevo (máximo max_turns)
+    turns: List[HistoryTurn] = []
+    # Turnos que salieron del anillo y aún no entran al resumen
+    pending: List[HistoryTurn] = []
+
+
 class ConversationState(BaseModel):
     payload: WsChatMessageRequest
 
@@ -13,3 +27,9 @@ class ConversationState(BaseModel):
     step: str = "start"
 
     metadata: Dict[str, Any] = {}
+
+    # Historial para el prompt del clasificador; se persiste en los checkpoints pero no se envía al cliente
+    history: ConversationHistory = Field(default_factory=ConversationHistory, exclude=True)
+
+    # Límite del turno (time.monotonic); solo vive durante el turno, no se persiste
+    deadline_at: Optional[float] = Field(default=None, exclude=True)
@@ -0,0 +1,63 @@
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+
+from infrastructure.adapters.llm_router import get_llm_router
+from infrastructure.concurrency.adaptive_limiter import llm_limiter
+from infrastructure.concurrency.turn_lock import turn_lock
+from infrastructure.config.redis_config import RedisConfig
+from langgraph.application.local_classifier import local_classifier
+from langgraph.application.prefetch import turn_prefetcher
+from websocket.infrastructure.ws_admission import ws_admission
+from websocket.infrastructure.ws_dedup import ws_dedup
+from websocket.infrastructure.ws_push import ws_push
+
+
+class AgentStatsController:
+    def __init__(self):
+        self.redis = RedisConfig.get_client()
+        self.origin = "AgentStatsController"
+
+    def classifier_stats(self):
+        try:
+            stats = local_classifier.get_stats(self.redis)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"No se pudieron obtener las métricas: {e}")
+
+        return ORJSONResponse(
+            status_code=200,
+            content={"status": True, "msg": "Métricas del clasificador local obtenidas.", "data": stats}
+        )
+
+    def llm_limiter_stats(self):
+        return ORJSONResponse(
+            status_code=200,
+            content={"status": True, "msg": "Estado del limitador de Gemini obtenido.", "data": llm_limiter.get_stats()}
+        )
+
+    def llm_provider_stats(self):
+        return ORJSONResponse(
+            status_code=200,
+            content={"status": True, "msg": "Estado de los proveedores de LLM obtenido.", "data": get_llm_router().get_stats()}
+        )
+
+    def turn_lock_stats(self):
+        return ORJSONResponse(
+            status_code=200,
+            content={"status": True, "msg": "Estado del lock de turnos obtenido.", "data": turn_lock.get_stats()}
+        )
+
+    def prefetch_stats(self):
+        return ORJSONResponse(
+            status_code=200,
+            content={"status": True, "msg": "Estado del prefetch de turnos obtenido.", "data": turn_prefetcher.get_stats()}
+        )
+
+    def ws_connection_stats(self):
+        return ORJSONResponse(
+            status_code=200,
+            content={
+                "status": True,
+                "msg": "Estado de las conexiones WebSocket obtenido.",
+                "data": {"admission": ws_admission.get_stats(), "push": ws_push.get_stats(), "dedup": ws_dedup.get_stats()}
+            }
+        )
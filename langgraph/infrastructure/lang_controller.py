@@ -1,14 +1,18 @@
+from typing import Optional
+
+from infrastructure.concurrency.deadline import Deadline
 from langgraph.application.lang_response import LangGraphResponse
 from websocket.domain.dataModel.model import WsChatMessageRequest
 from langgraph.application.orchestrator import LangGraphOrchestrator
 
 class LangGraphController:
-    def __init__(self, payload: WsChatMessageRequest):
+    def __init__(self, payload: WsChatMessageRequest, deadline: Optional[Deadline] = None):
         self.payload = payload
+        self.deadline = deadline
         self.langResponse = LangGraphResponse()
         self.langOrchestrator = LangGraphOrchestrator()
 
     def langController(self):
-        wsresponse = self.langOrchestrator.run(self.payload)
+        wsresponse = self.langOrchestrator.run(self.payload, deadline=self.deadline)
 
         return wsresponse
@@ -1,85 +1,95 @@
-import configparser
-import google.generativeai as genai
-import json
+from typing import Optional
+from infrastructure.adapters.llm_router import get_llm_router
+from infrastructure.concurrency.adaptive_limiter import LimiterOverloaded
+from infrastructure.concurrency.deadline import Deadline, DeadlineExpired
+from infrastructure.config.redis_config import RedisConfig
+from infrastructure.ports.llm_port import LLMProviderPort
+from langgraph.application.action_context import action_context_builder
+from langgraph.application.lang_response import LangGraphResponse
 from langgraph.infrastructure.tools import LangGraphTools
 
-# Leer config.ini
-config = configparser.ConfigParser()
-config.read("config.ini")
-
-GEMINI_API_KEY = config.get("GEMINI", "api_key")
-
-# Configurar Gemini
-genai.configure(api_key=GEMINI_API_KEY)
-
 
 class GeminiLLMAdapter:
-    def __init__(self, model_name: str = "gemini-2.5-flash-lite"):
-        self.model = genai.GenerativeModel(model_name)
+    def __init__(self, provider: Optional[LLMProviderPort] = None):
+        """
+        Args:
+            provider: Proveedor de LLM (por defecto el router del proceso: Gemini con
+                hedging y failover según [LLM_ROUTER] de config.ini)
+        """
+        self.provider = provider or get_llm_router()
         self.tools = LangGraphTools()
 
-    def generate_text(self, prompt: str) -> dict:
+    def generate_text(self, prompt: str, area: Optional[str] = None, deadline: Optional[Deadline] = None) -> dict:
         """
         Genera texto y retorna respuesta con metadata (tokens, confianza, etc)
+        La llamada pasa por el router de proveedores (hedging/failover) y el limitador
+        de concurrencia; con deadline, la espera en cola y la llamada usan el tiempo restante del turno.
         
         Returns:
             Dict con:
             - text: El texto generado
             - tokens: Dict con información de tokens
             - finish_reason: Razón de finalización
+            - provider: Proveedor que respondió
+
+        Raises:
+            LimiterOverloaded: Si no hay cupo para llamar al LLM (cola llena o espera vencida)
+            DeadlineExpired: Si el turno se quedó sin tiempo
         """
-        response = self.model.generate_content(prompt)
-        
-        # Extraer información de tokens
-        tokens_info = {}
-        if hasattr(response, 'usage_metadata'):
-            tokens_info = {
-                "prompt_tokens": response.usage_metadata.prompt_token_count,
-                "completion_tokens": response.usage_metadata.candidates_token_count,
-                "total_tokens": response.usage_metadata.total_token_count
-            }
-        
-        # Extraer razón de finalización (indicador de confianza)
-        finish_reason = "FINISH_REASON_UNSPECIFIED"
-        if hasattr(response, 'candidates') and response.candidates:
-            finish_reason = response.candidates[0].finish_reason
-        
-        return {
-            "text": response.text,
-            "tokens": tokens_info,
-            "finish_reason": finish_reason
-        }
+        timeout = deadline.timeout("llm") if deadline else None
+        return self.provider.generate(prompt, timeout=timeout, area=area)
     
-    def generate_text_with_tools(self, prompt: str, include_actions: bool = True) -> dict:
+    def generate_text_with_tools(
+        self,
+        prompt: str,
+        include_actions: bool = True,
+        area: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> dict:
         """
         Genera texto con herramientas disponibles y contexto de acciones
         
         Args:
             prompt: El prompt del usuario
             include_actions: Si incluir las acciones disponibles en el contexto
+            area: Área del usuario (equidad en la cola del limitador)
+            deadline: Presupuesto de tiempo del turno (opcional)
         
         Returns:
-            Dict con respuesta y acciones utilizadas
+            Dict con respuesta, acciones incluidas en el contexto y tokens del contexto
+            (context_tokens: estimado del contexto compacto vs el catálogo completo)
         """
-        # Obtener acciones disponibles si se requieren
+        # Solo las acciones relevantes para el mensaje, en formato compacto y con presupuesto de tokens
         actions_context = ""
+        context_info = {"action_ids": [], "tokens": 0, "full_tokens": 0}
         if include_actions:
-            actions_result = self.tools.get_agent_actions()
-            # print(prompt)
-            print("Acciones obtenidas para el LLM:", json.dumps(actions_result, indent=2, ensure_ascii=False))
-            if actions_result["success"]:
-                actions_context = f"\n\nAcciones disponibles:\n{json.dumps(actions_result['actions'], indent=2)}"
+            try:
+                actions = LangGraphResponse.load_actions(RedisConfig.get_client())
+                context_info = action_context_builder.build(prompt, actions)
+                actions_context = context_info["context"]
+                print(
+                    f"🧩 Contexto de acciones: {len(context_info['action_ids'])}/{context_info['catalog_size']} acciones, "
+                    f"~{context_info['tokens']} tokens (catálogo completo ~{context_info['full_tokens']})"
+                )
+            except Exception as e:
+                print(f"⚠️ No se pudo construir el contexto de acciones: {e}")
         
         # Crear prompt mejorado con contexto
         enhanced_prompt = f"{prompt}{actions_context}"
         
         try:
-            response = self.model.generate_content(enhanced_prompt)
+            response = self.generate_text(enhanced_prompt, area=area, deadline=deadline)
             return {
                 "success": True,
-                "response": response.text,
-                "actions_used": []  # Aquí puedes parsear qué acciones usó
+                "response": response["text"],
+                "actions_used": [],  # Aquí puedes parsear qué acciones usó
+                "context_actions": context_info["action_ids"],
+                "context_tokens": {"before": context_info["full_tokens"], "after": context_info["tokens"]},
+                "tokens": response.get("tokens", {})
             }
+        except (LimiterOverloaded, DeadlineExpired):
+            # Saturación o sin tiempo: el llamador responde "reintentar más tarde" en lugar de un error genérico
+            raise
         except Exception as e:
             return {
                 "success": False,
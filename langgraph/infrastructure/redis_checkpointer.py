@@ -0,0 +1,599 @@
+"""
+Checkpointer de LangGraph sobre Redis con escrituras incrementales.
+
+Cada paso del grafo guarda un checkpoint, pero el contenido de los canales se
+almacena direccionado por contenido (hash blake2b): solo se envían a Redis los
+valores que cambiaron respecto del checkpoint padre. Los valores pequeños
+(step, intent, banderas) van embebidos en el propio registro y los grandes se
+comprimen con zlib.
+
+Las escrituras de tareas (put_writes) se retienen en memoria hasta el siguiente
+checkpoint, que las contiene; solo se envían si el paso falla o se interrumpe.
+Si el proceso cae a mitad de un paso, la tarea en curso se vuelve a ejecutar.
+
+Claves por hilo (thread_id = code_user, ns = checkpoint_ns):
+    checkpoint:{thread}:{ns}:index         ZSET con los ids de checkpoint (score = token de fencing,
+                                           a igual score orden lexicográfico = temporal)
+    checkpoint:{thread}:{ns}:{id}          HASH checkpoint, metadata, parent, channels (canal -> ref)
+    checkpoint:{thread}:{ns}:{id}:writes   HASH "{task_id}:{idx}" -> escritura pendiente (ref)
+    checkpoint:{thread}:blobs              HASH hash -> valor serializado
+
+Orden: el índice se recorre por (score, id); los ids de LangGraph (uuid6) son
+crecientes en el tiempo. Con token de fencing el score es el token: un dueño
+con lease vencido queda por debajo del nuevo dueño. Sin token (TURN_LOCK
+desactivado) o con un token menor que el último score visto al iniciar el
+turno (contador de fencing perdido), el checkpoint toma el score más alto del
+índice y el desempate por id lo deja como el más reciente. get_tuple,
+list(before=...) y la poda usan ese mismo orden.
+
+Poda: al superar keep + slack checkpoints se eliminan los más antiguos con sus
+escrituras y los blobs que ya nadie referencia.
+
+Configuración en la sección [CHECKPOINT] de config.ini:
+    [CHECKPOINT]
+    keep = 20
+    ttl = 0
+"""
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from configparser import ConfigParser
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import ormsgpack
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from pydantic import BaseModel
+
+from infrastructure.config.redis_config import RedisConfig
+
+
+MODEL_EXT = 1
+# Valores serializados hasta este tamaño se guardan embebidos (no como blob)
+INLINE_MAX_BYTES = 64
+# Desde este tamaño los valores y registros se comprimen (zlib nivel 1)
+COMPRESS_MIN_BYTES = 256
+COMPRESS_WBITS = 12
+
+
+class MsgpackSerializer:
+    """
+    Serializador compacto (SerializerProtocol de LangGraph): msgpack con los
+    modelos pydantic registrados como extensión con alias corto. Lo que msgpack
+    no soporta (excepciones, objetos internos de LangGraph) usa JsonPlusSerializer.
+    """
+
+    def __init__(self, models: Optional[Dict[str, type]] = None):
+        self.models = models or {}
+        self._aliases = {model: alias for alias, model in self.models.items()}
+        self._fallback = JsonPlusSerializer()
+
+    def _default(self, obj: Any) -> Any:
+        alias = self._aliases.get(type(obj))
+        if alias is None:
+            raise TypeError(f"Tipo no soportado por msgpack: {type(obj).__name__}")
+        return ormsgpack.Ext(MODEL_EXT, ormsgpack.packb([alias, obj.model_dump(mode="json")]))
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        alias, values = ormsgpack.unpackb(data)
+        return self.models[alias].model_validate(values)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        try:
+            return "mp", ormsgpack.packb(obj, default=self._default, option=ormsgpack.OPT_NON_STR_KEYS)
+        except (TypeError, ormsgpack.MsgpackEncodeError):
+            return self._fallback.dumps_typed(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        kind, payload = data
+        if kind == "mp":
+            return ormsgpack.unpackb(payload, ext_hook=self._ext_hook)
+        return self._fallback.loads_typed(data)
+
+
+def _pack(typed: Tuple[str, bytes]) -> bytes:
+    kind, payload = typed
+    if len(payload) >= COMPRESS_MIN_BYTES:
+        # Ventana y memoria chicas: los valores son de pocos KB y el estado por defecto reserva ~256 KB
+        compressor = zlib.compressobj(1, zlib.DEFLATED, COMPRESS_WBITS, 2)
+        return ormsgpack.packb([kind, compressor.compress(payload) + compressor.flush(), True])
+    return ormsgpack.packb([kind, payload])
+
+
+def _unpack(raw: bytes) -> Tuple[str, bytes]:
+    kind, payload, *compressed = ormsgpack.unpackb(raw)
+    return kind, zlib.decompress(payload) if compressed else payload
+
+
+def _pack_channels(channels: Dict[str, Any]) -> bytes:
+    return _pack(("mp", ormsgpack.packb(channels)))
+
+
+def _unpack_channels(raw: Optional[bytes]) -> Dict[str, Any]:
+    return ormsgpack.unpackb(_unpack(raw)[1]) if raw else {}
+
+
+def _digest(typed: Tuple[str, bytes]) -> str:
+    return hashlib.blake2b(typed[0].encode("utf-8") + b"\0" + typed[1], digest_size=12).hexdigest()
+
+
+
+class RedisCheckpointSaver(BaseCheckpointSaver[int]):
+    """Checkpointer síncrono de LangGraph con deltas por canal en Redis."""
+
+    PREFIX = "checkpoint"
+
+    def __init__(
+        self,
+        redis=None,
+        serde=None,
+        keep: int = 20,
+        ttl: int = 0,
+        cache_size: int = 1024
+    ):
+        """
+        Args:
+            redis: Cliente Redis binario (decode_responses=False); por defecto RedisConfig.get_binary_client()
+            serde: Serializador (por defecto MsgpackSerializer con los modelos del estado)
+            keep: Checkpoints que se conservan por hilo
+            ttl: Segundos de vida de las claves del hilo (0 = sin expiración)
+            cache_size: Checkpoints recientes que se recuerdan en memoria (son inmutables)
+        """
+        if serde is None:
+            from langgraph.domain.states import ConversationHistory, ConversationState
+            from websocket.domain.dataModel.model import WsChatMessageRequest
+            serde = MsgpackSerializer({
+                "ws_chat": WsChatMessageRequest,
+                "conversation": ConversationState,
+                "history": ConversationHistory
+            })
+        super().__init__(serde=serde)
+        self._redis = redis
+        self.keep = max(1, keep)
+        self.prune_slack = max(5, self.keep // 2)
+        self.ttl = ttl
+        self.cache_size = cache_size
+        # (thread, ns, id) -> channels (canal -> ref), refs (hashes ya en Redis), record y blobs crudos
+        self._cache: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        # (thread, ns, id) -> escrituras de tareas aún no enviadas (fields, blobs)
+        self._buffered: Dict[Tuple[str, str, str], Dict[str, Dict[str, bytes]]] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+        # (thread, ns) -> score más alto del índice visto por este proceso
+        self._heads: Dict[Tuple[str, str], float] = {}
+        # (thread, ns) -> token de fencing que al iniciar el turno ya era menor que el índice
+        self._fence_resets: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "RedisCheckpointSaver":
+        config = ConfigParser()
+        config.read("config.ini")
+        return cls(
+            keep=config.getint("CHECKPOINT", "keep", fallback=20),
+            ttl=config.getint("CHECKPOINT", "ttl", fallback=0)
+        )
+
+    @property
+    def redis(self):
+        # Se resuelve en cada uso: con gunicorn --preload el grafo se compila en el master
+        return self._redis if self._redis is not None else RedisConfig.get_binary_client()
+
+    # ------------------------------------------------------------
+    # Claves, referencias y caché
+    # ------------------------------------------------------------
+    def _key(self, thread_id: str, ns: str, *parts: str) -> str:
+        return ":".join((self.PREFIX, thread_id, ns, *parts))
+
+    def _blobs_key(self, thread_id: str) -> str:
+        return f"{self.PREFIX}:{thread_id}:blobs"
+
+    def _ref(self, typed: Tuple[str, bytes], blobs: Dict[str, bytes]) -> Any:
+        """Valor embebido si es pequeño; si no, hash del blob (se agrega a blobs)."""
+        if len(typed[1]) <= INLINE_MAX_BYTES:
+            return list(typed)
+        digest = _digest(typed)
+        blobs[digest] = _pack(typed)
+        return digest
+
+    def _load_ref(self, ref: Any, blobs: Dict[str, Optional[bytes]]) -> Any:
+        if isinstance(ref, str):
+            raw = blobs.get(ref)
+            if raw is None:
+                raise KeyError(f"Blob de checkpoint inexistente: {ref}")
+            return self.serde.loads_typed(_unpack(raw))
+        return self.serde.loads_typed((ref[0], ref[1]))
+
+    @staticmethod
+    def _write_refs(raw_writes: Sequence[bytes]) -> Set[str]:
+        refs = set()
+        for raw in raw_writes:
+            ref = ormsgpack.unpackb(raw)[3]
+            if isinstance(ref, str):
+                refs.add(ref)
+        return refs
+
+    def _cached(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _remember(self, key: Tuple[str, str, str], entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _entry(self, thread_id: str, ns: str, checkpoint_id: str) -> Dict[str, Any]:
+        """Canales y referencias de un checkpoint (memoria o Redis)."""
+        entry = self._cached((thread_id, ns, checkpoint_id))
+        if entry is not None:
+            return entry
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hget(self._key(thread_id, ns, checkpoint_id), "channels")
+        pipe.hvals(self._key(thread_id, ns, checkpoint_id, "writes"))
+        raw_channels, raw_writes = pipe.execute()
+        channels = _unpack_channels(raw_channels)
+        entry = {
+            "channels": channels,
+            "refs": {ref for ref in channels.values() if isinstance(ref, str)} | self._write_refs(raw_writes),
+            "record": None,
+            "blobs": {}
+        }
+        self._remember((thread_id, ns, checkpoint_id), entry)
+        return entry
+
+    # ------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        if not checkpoint_id:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zrevrange(self._key(thread_id, ns, "index"), 0, 0, withscores=True)
+            pipe.zcard(self._key(thread_id, ns, "index"))
+            latest, count = pipe.execute()
+            self._counts[(thread_id, ns)] = count
+            self._observe_head(thread_id, ns, latest[0][1] if latest else 0, config["configurable"].get("fence_token"))
+            if not latest:
+                return None
+            checkpoint_id = latest[0][0].decode("utf-8")
+        return self._load(thread_id, ns, checkpoint_id)
+
+    def _observe_head(self, thread_id: str, ns: str, head: float, fence_token: Optional[int]) -> None:
+        """Registra el score más alto del índice al iniciar un turno."""
+        with self._lock:
+            self._heads[(thread_id, ns)] = head
+            if fence_token is not None and fence_token < head:
+                # El turno actual es el dueño del lease: su token bajo indica un contador reiniciado
+                self._fence_resets[(thread_id, ns)] = fence_token
+            else:
+                self._fence_resets.pop((thread_id, ns), None)
+
+    def _score(self, thread_id: str, ns: str, fence_token: Optional[int]) -> float:
+        """Score del índice para un checkpoint nuevo (ver "Orden" en el docstring del módulo)."""
+        with self._lock:
+            head = self._heads.get((thread_id, ns))
+        if head is None:
+            latest = self.redis.zrevrange(self._key(thread_id, ns, "index"), 0, 0, withscores=True)
+            head = latest[0][1] if latest else 0
+        if fence_token is None:
+            score = head
+        elif fence_token >= head:
+            score = fence_token
+        elif self._fence_resets.get((thread_id, ns)) == fence_token:
+            score = head
+        else:
+            # Dueño con lease vencido: queda por debajo de los checkpoints del nuevo dueño
+            score = fence_token
+        with self._lock:
+            self._heads[(thread_id, ns)] = max(head, score)
+        return score
+
+    def _load(self, thread_id: str, ns: str, checkpoint_id: str) -> Optional[CheckpointTuple]:
+        key = (thread_id, ns, checkpoint_id)
+        writes_key = self._key(thread_id, ns, checkpoint_id, "writes")
+        entry = self._cached(key)
+        if entry is not None and entry["record"] is not None:
+            # El checkpoint es inmutable: solo sus escrituras pendientes pueden haber cambiado
+            record, raw_writes = entry["record"], self.redis.hgetall(writes_key)
+            blobs: Dict[str, Optional[bytes]] = dict(entry["blobs"])
+        else:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hgetall(self._key(thread_id, ns, checkpoint_id))
+            pipe.hgetall(writes_key)
+            record, raw_writes = pipe.execute()
+            if not record:
+                return None
+            blobs = {}
+
+        flushed_refs = self._write_refs(raw_writes.values())
+        raw_writes = {field.decode("utf-8"): raw for field, raw in raw_writes.items()}
+        with self._lock:
+            buffered = self._buffered.get(key)
+            if buffered:
+                raw_writes.update({field: raw for field, raw in buffered["fields"].items() if field not in raw_writes})
+                blobs.update(buffered["blobs"])
+
+        channels = _unpack_channels(record[b"channels"])
+        writes = [ormsgpack.unpackb(raw) for _, raw in sorted(raw_writes.items())]
+        channel_refs = {ref for ref in channels.values() if isinstance(ref, str)}
+        missing = sorted(
+            (channel_refs | {write[3] for write in writes if isinstance(write[3], str)}) - blobs.keys()
+        )
+        if missing:
+            blobs.update(zip(missing, self.redis.hmget(self._blobs_key(thread_id), missing)))
+
+        self._remember(key, {
+            "channels": channels,
+            "refs": channel_refs | flushed_refs,
+            "record": record,
+            "blobs": {ref: blobs[ref] for ref in channel_refs if blobs.get(ref) is not None}
+        })
+
+        checkpoint = self.serde.loads_typed(_unpack(record[b"checkpoint"]))
+        checkpoint["channel_values"] = {
+            channel: self._load_ref(ref, blobs)
+            for channel, ref in channels.items()
+            if ref is not None
+        }
+        parent_id = record.get(b"parent", b"").decode("utf-8")
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed(_unpack(record[b"metadata"])),
+            parent_config={
+                "configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id}
+            } if parent_id else None,
+            pending_writes=[
+                (task_id, channel, self._load_ref(ref, blobs))
+                for task_id, channel, _, ref in writes
+            ]
+        )
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[CheckpointTuple]:
+        if config is not None:
+            thread_id = config["configurable"]["thread_id"]
+            ns = config["configurable"].get("checkpoint_ns")
+            pattern = self._key(thread_id, ns, "index") if ns is not None else f"{self.PREFIX}:{thread_id}:*:index"
+        else:
+            pattern = f"{self.PREFIX}:*:index"
+        config_checkpoint_id = get_checkpoint_id(config) if config else None
+        before_id = get_checkpoint_id(before) if before else None
+
+        for index_key in self.redis.scan_iter(match=pattern):
+            thread_id, _, rest = index_key.decode("utf-8")[len(self.PREFIX) + 1:].partition(":")
+            ns = rest[:-len(":index")]
+            # "Anterior" en el mismo orden del índice: (score, id) menor que el de before
+            before_score = self.redis.zscore(index_key, before_id) if before_id else None
+            for raw_id, score in self.redis.zrevrange(index_key, 0, -1, withscores=True):
+                checkpoint_id = raw_id.decode("utf-8")
+                if config_checkpoint_id and checkpoint_id != config_checkpoint_id:
+                    continue
+                if before_id and before_score is not None and (score, checkpoint_id) >= (before_score, before_id):
+                    continue
+                if before_id and before_score is None and checkpoint_id >= before_id:
+                    continue
+                item = self._load(thread_id, ns, checkpoint_id)
+                if item is None:
+                    continue
+                if filter and not all(item.metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                if limit is not None:
+                    if limit <= 0:
+                        return
+                    limit -= 1
+                yield item
+
+    # ------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        checkpoint_id = checkpoint["id"]
+
+        parent = self._entry(thread_id, ns, parent_id) if parent_id else None
+        parent_channels = parent["channels"] if parent else {}
+        known = parent["refs"] if parent else set()
+        with self._lock:
+            # Las escrituras de las tareas del padre quedan contenidas en este checkpoint
+            self._buffered.pop((thread_id, ns, parent_id), None)
+
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        channels: Dict[str, Any] = {}
+        blobs: Dict[str, bytes] = {}
+        for channel in stored["channel_versions"]:
+            if channel not in new_versions and channel in parent_channels:
+                channels[channel] = parent_channels[channel]
+            elif channel in values:
+                channels[channel] = self._ref(self.serde.dumps_typed(values[channel]), blobs)
+            else:
+                channels[channel] = None
+        # Solo viajan los blobs que el checkpoint padre no tenía ya
+        new_blobs = {digest: raw for digest, raw in blobs.items() if digest not in known}
+        record = {
+            b"checkpoint": _pack(self.serde.dumps_typed(stored)),
+            b"metadata": _pack(self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))),
+            b"parent": (parent_id or "").encode("utf-8"),
+            b"channels": _pack_channels(channels)
+        }
+
+        index_key = self._key(thread_id, ns, "index")
+        record_key = self._key(thread_id, ns, checkpoint_id)
+        count = self._counts.get((thread_id, ns))
+        # Score = token de fencing del turno (TurnLock): un dueño con lease vencido no queda como último
+        score = self._score(thread_id, ns, config["configurable"].get("fence_token"))
+        pipe = self.redis.pipeline(transaction=False)
+        if new_blobs:
+            pipe.hset(self._blobs_key(thread_id), mapping=new_blobs)
+        pipe.hset(record_key, mapping=record)
+        pipe.zadd(index_key, {checkpoint_id: score})
+        if count is None:
+            pipe.zcard(index_key)
+        if self.ttl:
+            for key in (index_key, record_key, self._blobs_key(thread_id)):
+                pipe.expire(key, self.ttl)
+        results = pipe.execute()
+        count = results[3 if new_blobs else 2] if count is None else count + 1
+        self._counts[(thread_id, ns)] = count
+
+        channel_refs = {ref for ref in channels.values() if isinstance(ref, str)}
+        available = {**(parent["blobs"] if parent else {}), **blobs}
+        cacheable = channel_refs <= available.keys()
+        self._remember((thread_id, ns, checkpoint_id), {
+            "channels": channels,
+            "refs": channel_refs,
+            "record": record if cacheable else None,
+            "blobs": {ref: available[ref] for ref in channel_refs} if cacheable else {}
+        })
+
+        if count > self.keep + self.prune_slack:
+            self._prune(thread_id, ns)
+
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        """
+        Las escrituras normales quedan en memoria: el siguiente checkpoint (put) las
+        contiene y las reemplaza. Solo se envían a Redis cuando llega una escritura
+        especial (error, interrupción), es decir, cuando el paso no va a completarse.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        key = (thread_id, ns, checkpoint_id)
+
+        blobs: Dict[str, bytes] = {}
+        fields: Dict[str, Tuple[bytes, bool]] = {}
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            entry = ormsgpack.packb([task_id, channel, task_path, self._ref(self.serde.dumps_typed(value), blobs)])
+            fields[f"{task_id}:{write_idx:04d}"] = (entry, write_idx < 0)
+
+        with self._lock:
+            buffered = self._buffered.setdefault(key, {"fields": {}, "blobs": {}})
+            for field, (entry, special) in fields.items():
+                # Las especiales reemplazan; las normales conservan la primera
+                if special or field not in buffered["fields"]:
+                    buffered["fields"][field] = entry
+            buffered["blobs"].update(blobs)
+            if not any(special for _, special in fields.values()):
+                return
+            pending = self._buffered.pop(key)
+
+        self._flush_writes(thread_id, ns, checkpoint_id, pending)
+
+    def _flush_writes(self, thread_id: str, ns: str, checkpoint_id: str, pending: Dict[str, Dict[str, bytes]]) -> None:
+        entry = self._entry(thread_id, ns, checkpoint_id)
+        new_blobs = {digest: raw for digest, raw in pending["blobs"].items() if digest not in entry["refs"]}
+        writes_key = self._key(thread_id, ns, checkpoint_id, "writes")
+
+        pipe = self.redis.pipeline(transaction=False)
+        if new_blobs:
+            pipe.hset(self._blobs_key(thread_id), mapping=new_blobs)
+        pipe.hset(writes_key, mapping=pending["fields"])
+        if self.ttl:
+            pipe.expire(writes_key, self.ttl)
+            pipe.expire(self._blobs_key(thread_id), self.ttl)
+        pipe.execute()
+
+        with self._lock:
+            entry["refs"] = entry["refs"] | set(pending["blobs"])
+
+    def delete_thread(self, thread_id: str) -> None:
+        keys = list(self.redis.scan_iter(match=f"{self.PREFIX}:{thread_id}:*"))
+        if keys:
+            self.redis.delete(*keys)
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == thread_id]:
+                self._cache.pop(key)
+            for key in [key for key in self._buffered if key[0] == thread_id]:
+                self._buffered.pop(key)
+            for key in [key for key in self._counts if key[0] == thread_id]:
+                self._counts.pop(key)
+            for cache in (self._heads, self._fence_resets):
+                for key in [key for key in cache if key[0] == thread_id]:
+                    cache.pop(key)
+
+    def _prune(self, thread_id: str, ns: str) -> None:
+        """Elimina los checkpoints más antiguos y los blobs que solo ellos referenciaban."""
+        index_key = self._key(thread_id, ns, "index")
+        ids = [raw.decode("utf-8") for raw in self.redis.zrange(index_key, 0, -1)]
+        stale, retained = ids[:-self.keep], ids[-self.keep:]
+        self._counts[(thread_id, ns)] = len(retained)
+        if not stale:
+            return
+
+        # Los canales de un checkpoint son inmutables (se reutilizan de la caché);
+        # sus escrituras pueden haber llegado desde otro proceso y se leen siempre
+        ids = stale + retained
+        cached = [self._cached((thread_id, ns, checkpoint_id)) for checkpoint_id in ids]
+        pipe = self.redis.pipeline(transaction=False)
+        for checkpoint_id, entry in zip(ids, cached):
+            if entry is None:
+                pipe.hget(self._key(thread_id, ns, checkpoint_id), "channels")
+            pipe.hvals(self._key(thread_id, ns, checkpoint_id, "writes"))
+        results = iter(pipe.execute())
+
+        refs = []
+        for entry in cached:
+            if entry is None:
+                channels = _unpack_channels(next(results))
+            else:
+                channels = entry["channels"]
+            refs.append({ref for ref in channels.values() if isinstance(ref, str)} | self._write_refs(next(results)))
+
+        stale_refs = set().union(*refs[:len(stale)])
+        live_refs = set().union(*refs[len(stale):])
+        dead = stale_refs - live_refs
+
+        pipe = self.redis.pipeline(transaction=False)
+        for checkpoint_id in stale:
+            pipe.delete(self._key(thread_id, ns, checkpoint_id), self._key(thread_id, ns, checkpoint_id, "writes"))
+        pipe.zrem(index_key, *stale)
+        if dead:
+            pipe.hdel(self._blobs_key(thread_id), *dead)
+        pipe.execute()
+
+        with self._lock:
+            for checkpoint_id in stale:
+                self._cache.pop((thread_id, ns, checkpoint_id), None)
+                self._buffered.pop((thread_id, ns, checkpoint_id), None)
@@ -0,0 +1,128 @@
+"""
+Utilidades para combinar los resultados de un comando ejecutado en varios Runners.
+Normaliza resultados SQL y permite concatenarlos o agregarlos.
+"""
+from typing import Any, Dict, List, Optional
+
+from infrastructure.metrics.latency import summarize_latencies
+
+
+MERGE_MODES = ("concat", "aggregate")
+
+
+def normalize_sql_rows(data: Any) -> List[Dict[str, Any]]:
+    """
+    Convierte el resultado SQL de un Runner en una lista de filas (dict).
+
+    Formatos soportados:
+        - {"columns": [...], "rows": [[...], ...]}
+        - {"rows": [{...}, ...]} o {"data": [{...}, ...]}
+        - [{...}, ...]
+
+    Args:
+        data: Resultado crudo devuelto por el Runner
+
+    Returns:
+        Lista de filas como diccionarios
+    """
+    if data is None:
+        return []
+
+    if isinstance(data, list):
+        return [row for row in data if isinstance(row, dict)]
+
+    if isinstance(data, dict):
+        columns = data.get("columns")
+        rows = data.get("rows", data.get("data"))
+        if columns and isinstance(rows, list):
+            return [
+                dict(zip(columns, row)) if isinstance(row, (list, tuple)) else row
+                for row in rows
+                if isinstance(row, (list, tuple, dict))
+            ]
+        if isinstance(rows, list):
+            return [row for row in rows if isinstance(row, dict)]
+
+    return []
+
+
+def merge_sql_results(
+    results: List[Dict[str, Any]],
+    mode: str = "concat",
+    group_by: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Combina los resultados exitosos de varios Runners.
+
+    Args:
+        results: Resultados por runner (con runner_id, status y data)
+        mode: "concat" agrega todas las filas con su runner_id,
+              "aggregate" suma columnas numéricas agrupando por group_by
+        group_by: Columnas de agrupación para el modo "aggregate"
+
+    Returns:
+        Dict con columns, rows y row_count
+    """
+    if mode not in MERGE_MODES:
+        raise ValueError(f"Modo de merge no soportado: {mode}. Usa: {', '.join(MERGE_MODES)}")
+
+    successful = [r for r in results if r.get("status") == "success"]
+
+    if mode == "concat":
+        rows = []
+        for result in successful:
+            for row in normalize_sql_rows(result.get("data")):
+                rows.append({"runner_id": result["runner_id"], **row})
+        columns = list(dict.fromkeys(col for row in rows for col in row))
+        return {"columns": columns, "rows": rows, "row_count": len(rows)}
+
+    # Modo aggregate: suma por grupo de columnas numéricas
+    group_by = group_by or []
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for result in successful:
+        for row in normalize_sql_rows(result.get("data")):
+            group_key = tuple(row.get(col) for col in group_by)
+            bucket = groups.setdefault(
+                group_key,
+                {**{col: row.get(col) for col in group_by}, "row_count": 0}
+            )
+            bucket["row_count"] += 1
+            for col, value in row.items():
+                if col in group_by or isinstance(value, bool):
+                    continue
+                if isinstance(value, (int, float)):
+                    bucket[col] = bucket.get(col, 0) + value
+
+    rows = list(groups.values())
+    columns = list(dict.fromkeys(col for row in rows for col in row))
+    return {"columns": columns, "rows": rows, "row_count": len(rows)}
+
+
+def build_gather_summary(
+    results: List[Dict[str, Any]],
+    elapsed_ms: float,
+    deadline_exceeded: bool
+) -> Dict[str, Any]:
+    """
+    Construye las estadísticas de un scatter-gather.
+
+    Args:
+        results: Resultados por runner
+        elapsed_ms: Tiempo total de la operación en milisegundos
+        deadline_exceeded: Si se alcanzó el deadline global
+
+    Returns:
+        Dict con conteos por estado y latencias p50/p99
+    """
+    latencies = [r["latency_ms"] for r in results if r.get("latency_ms") is not None]
+    stats = summarize_latencies(latencies)
+
+    return {
+        "total": len(results),
+        "succeeded": sum(1 for r in results if r["status"] == "success"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "timed_out": sum(1 for r in results if r["status"] == "timeout"),
+        "deadline_exceeded": deadline_exceeded,
+        "elapsed_ms": round(elapsed_ms, 2),
+        "latency_ms": {"p50": stats["p50"], "p99": stats["p99"], "max": stats["max"]},
+    }
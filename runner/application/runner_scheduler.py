@@ -0,0 +1,337 @@
+"""
+Scheduler de Runners: elige a qué Runner enviar un comando cuando el cliente
+tiene varios hosts conectados.
+
+Criterios de selección (en orden):
+    1. Runner conectado (en cualquier worker) con heartbeat reciente.
+    2. Coincide con el cliente y la capacidad solicitada.
+    3. Menor cantidad de comandos en vuelo.
+    4. Menor latencia observada (EWMA).
+"""
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from infrastructure.metrics.latency import EWMA
+from runner.application.runner_service import connection_manager
+from runner.application.sql_guard import is_read_only_sql
+from runner.domain.dataModel.model import RunnerCommand, RunnerResponse
+from runner.infrastructure.runner_presence import runner_presence, runner_relay
+from validations.logger import logErrorJson, logInfo
+
+
+# Comandos que se pueden reintentar en otro Runner sin efectos secundarios
+IDEMPOTENT_COMMANDS = {"SYSTEM_INFO"}
+
+
+def is_idempotent(command_type: str, payload: Dict[str, Any]) -> bool:
+    """
+    Indica si un comando se puede reintentar en otro Runner.
+    Las consultas SQL solo se consideran idempotentes si son de lectura.
+    """
+    if command_type in IDEMPOTENT_COMMANDS:
+        return True
+    if command_type == "SQL_QUERY":
+        return is_read_only_sql(payload.get("query") or "")
+    return False
+
+
+def parse_heartbeat(value: Optional[str]) -> Optional[datetime]:
+    """Heartbeat publicado en la presencia (ISO 8601) o None si el Runner aún no envió ninguno."""
+    return datetime.fromisoformat(value) if value else None
+
+
+class NoEligibleRunnerError(Exception):
+    """No hay Runners conectados que cumplan los criterios solicitados."""
+
+
+class RunnerScheduler:
+    """
+    Balanceador de carga para Runners basado en capacidades, comandos en vuelo
+    y latencia observada.
+    """
+
+    def __init__(
+        self,
+        manager,
+        heartbeat_ttl: int = 90,
+        latency_alpha: float = 0.3,
+        presence=None,
+        sender=None
+    ):
+        """
+        Args:
+            manager: Connection manager con active_connections, last_heartbeat y registered_runners
+            heartbeat_ttl: Segundos máximos desde el último heartbeat para considerar vivo un Runner
+            latency_alpha: Peso de la muestra más reciente en la EWMA de latencia
+            presence: Registro de presencia en Redis (Runners de otros workers)
+            sender: Objeto con send_command (relay entre workers); por defecto el manager
+        """
+        self.manager = manager
+        self.heartbeat_ttl = heartbeat_ttl
+        self.latency_alpha = latency_alpha
+        self.presence = presence
+        self.sender = sender or manager
+        self.in_flight: Dict[str, int] = {}
+        self.latency_ms: Dict[str, EWMA] = {}
+        self.origin = "RunnerScheduler"
+
+    # ------------------------------------------------------------
+    # Elegibilidad
+    # ------------------------------------------------------------
+    def read_presence(self) -> List[Dict[str, Any]]:
+        """
+        Registros de presencia en Redis (Runners de cualquier worker).
+        Usa el cliente síncrono: desde el event loop se llama con asyncio.to_thread.
+        """
+        if self.presence is None:
+            return []
+        try:
+            return self.presence.list_runners()
+        except Exception as e:
+            logErrorJson(
+                error_message=f"No se pudo leer la presencia de runners: {str(e)}",
+                error_type=type(e).__name__,
+                origin=self.origin,
+                exception=e
+            )
+            return []
+
+    def _runner_views(self, presence_records: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Vista unificada de Runners: locales (connection_manager) y remotos (presencia en Redis).
+
+        Args:
+            presence_records: Presencia ya leída (ver read_presence); si es None se lee aquí
+        """
+        if presence_records is None:
+            presence_records = self.read_presence()
+
+        views: Dict[str, Dict[str, Any]] = {}
+        for record in presence_records:
+            views[record["runner_id"]] = {
+                "last_heartbeat": parse_heartbeat(record.get("last_heartbeat")),
+                "client_name": record.get("client_name"),
+                "capabilities": record.get("capabilities") or []
+            }
+
+        for runner_id in list(self.manager.active_connections.keys()):
+            reg = self.manager.registered_runners.get(runner_id)
+            views[runner_id] = {
+                "last_heartbeat": self.manager.last_heartbeat.get(runner_id),
+                "client_name": reg.client_name if reg is not None else None,
+                "capabilities": (reg.capabilities or []) if reg is not None else []
+            }
+        return views
+
+    def is_fresh(self, last_heartbeat: Optional[datetime]) -> bool:
+        """Indica si un heartbeat (local o de la presencia) está dentro del TTL."""
+        if last_heartbeat is None:
+            return False
+        now = datetime.now(last_heartbeat.tzinfo)
+        return (now - last_heartbeat).total_seconds() <= self.heartbeat_ttl
+
+    def is_alive(self, runner_id: str) -> bool:
+        """Verifica que el Runner local tenga un heartbeat dentro del TTL."""
+        return self.is_fresh(self.manager.last_heartbeat.get(runner_id))
+
+    def eligible_runners(
+        self,
+        capability: Optional[str] = None,
+        client_name: Optional[str] = None,
+        exclude: Iterable[str] = (),
+        presence_records: Optional[List[Dict[str, Any]]] = None
+    ) -> List[str]:
+        """
+        Lista los Runners vivos (de cualquier worker) que cumplen capacidad y cliente.
+
+        Args:
+            capability: Capacidad requerida (debe estar en capabilities)
+            client_name: Cliente al que debe pertenecer el Runner
+            exclude: Runners a descartar (ej: ya intentados)
+            presence_records: Presencia ya leída en Redis (ver read_presence)
+
+        Returns:
+            Lista de runner_id elegibles
+        """
+        excluded = set(exclude)
+        eligible = []
+        for runner_id, view in self._runner_views(presence_records).items():
+            if runner_id in excluded or not self.is_fresh(view["last_heartbeat"]):
+                continue
+            if client_name and view["client_name"] != client_name:
+                continue
+            if capability and capability not in view["capabilities"]:
+                continue
+            eligible.append(runner_id)
+        return eligible
+
+    def select_runner(
+        self,
+        capability: Optional[str] = None,
+        client_name: Optional[str] = None,
+        exclude: Iterable[str] = (),
+        presence_records: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
+        """
+        Elige el mejor Runner: menos comandos en vuelo y menor latencia EWMA.
+        Los Runners sin latencia observada se prueban primero.
+        Desde código asíncrono, pasar presence_records leído con asyncio.to_thread.
+
+        Raises:
+            NoEligibleRunnerError: Si ningún Runner cumple los criterios
+        """
+        candidates = self.eligible_runners(capability, client_name, exclude, presence_records)
+        if not candidates:
+            raise NoEligibleRunnerError(
+                f"No hay runners disponibles (capability={capability}, client_name={client_name})"
+            )
+
+        def score(runner_id: str) -> Tuple[int, float]:
+            ewma = self.latency_ms.get(runner_id)
+            return self.in_flight.get(runner_id, 0), (ewma.value if ewma and ewma.value is not None else 0.0)
+
+        return min(candidates, key=score)
+
+    # ------------------------------------------------------------
+    # Seguimiento de carga
+    # ------------------------------------------------------------
+    @asynccontextmanager
+    async def track(self, runner_id: str):
+        """
+        Contabiliza un comando en vuelo y registra su latencia al terminar con éxito.
+        """
+        self.in_flight[runner_id] = self.in_flight.get(runner_id, 0) + 1
+        started = time.perf_counter()
+        try:
+            yield
+            latency = (time.perf_counter() - started) * 1000
+            self.latency_ms.setdefault(runner_id, EWMA(self.latency_alpha)).update(latency)
+        finally:
+            self.in_flight[runner_id] -= 1
+            if self.in_flight[runner_id] <= 0:
+                self.in_flight.pop(runner_id, None)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna carga y latencia observada por Runner."""
+        runner_ids = set(self.in_flight) | set(self.latency_ms)
+        return {
+            runner_id: {
+                "in_flight": self.in_flight.get(runner_id, 0),
+                "latency_ewma_ms": round(self.latency_ms[runner_id].value, 2)
+                if runner_id in self.latency_ms else None
+            }
+            for runner_id in runner_ids
+        }
+
+    # ------------------------------------------------------------
+    # Despacho
+    # ------------------------------------------------------------
+    async def dispatch(
+        self,
+        command: RunnerCommand,
+        capability: Optional[str] = None,
+        client_name: Optional[str] = None,
+        timeout: int = 30,
+        idempotent: Optional[bool] = None,
+        max_attempts: int = 2
+    ) -> Tuple[str, RunnerResponse, int]:
+        """
+        Envía un comando al mejor Runner elegible. Si falla por timeout o error
+        de transporte y el comando es idempotente, reintenta en otro Runner.
+        Cada intento se envía con un command_id nuevo; el original solo se usa en los logs.
+
+        Args:
+            command: Comando a ejecutar
+            capability: Capacidad requerida
+            client_name: Cliente dueño de los Runners
+            timeout: Timeout en segundos por intento
+            idempotent: Forzar/denegar reintentos (por defecto según is_idempotent)
+            max_attempts: Número máximo de Runners a intentar
+
+        Returns:
+            Tupla (runner_id, respuesta, intentos realizados)
+
+        Raises:
+            NoEligibleRunnerError: Si no hay Runners elegibles
+            Exception: El último error si todos los intentos fallaron
+        """
+        if idempotent is None:
+            idempotent = is_idempotent(command.command_type, command.payload or {})
+        attempts_allowed = max_attempts if idempotent else 1
+
+        tried: List[str] = []
+        attempt_ids: List[str] = []
+        last_error: Optional[BaseException] = None
+
+        for attempt in range(1, attempts_allowed + 1):
+            # La presencia se lee con el cliente síncrono: fuera del event loop
+            presence_records = await asyncio.to_thread(self.read_presence)
+            try:
+                runner_id = self.select_runner(
+                    capability, client_name, exclude=tried, presence_records=presence_records
+                )
+            except NoEligibleRunnerError as e:
+                logErrorJson(
+                    error_message=str(e) if last_error is None else f"Sin runners para reintentar: {str(last_error)}",
+                    error_type=type(e).__name__ if last_error is None else type(last_error).__name__,
+                    origin=self.origin,
+                    extra_data={"command_id": command.command_id, "command_type": command.command_type, "tried": tried}
+                )
+                if last_error is not None:
+                    raise last_error
+                raise
+            tried.append(runner_id)
+
+            # Cada intento lleva su propio command_id: una respuesta tardía del Runner
+            # que venció no debe tomarse como respuesta del reintento
+            attempt_command = command.model_copy(update={"command_id": str(uuid.uuid4())})
+            attempt_ids.append(attempt_command.command_id)
+
+            try:
+                async with self.track(runner_id):
+                    response = await asyncio.wait_for(
+                        self.sender.send_command(
+                            runner_id=runner_id,
+                            command=attempt_command,
+                            wait_response=True,
+                            timeout=timeout
+                        ),
+                        timeout=timeout
+                    )
+                return runner_id, response, attempt
+            except (asyncio.TimeoutError, TimeoutError, ConnectionError) as e:
+                # Penalizar la latencia del Runner para que no sea elegido de inmediato
+                self.latency_ms.setdefault(runner_id, EWMA(self.latency_alpha)).update(timeout * 1000)
+                last_error = e
+                if attempt < attempts_allowed:
+                    logInfo(
+                        f"Runner {runner_id} falló ({type(e).__name__}), reintentando en otro runner",
+                        origin=self.origin,
+                        extra_data={
+                            "command_id": command.command_id,
+                            "attempt_command_id": attempt_command.command_id,
+                            "attempt": attempt
+                        }
+                    )
+                continue
+
+        logErrorJson(
+            error_message=f"El comando falló en todos los runners intentados: {str(last_error)}",
+            error_type=type(last_error).__name__,
+            origin=self.origin,
+            extra_data={
+                "command_id": command.command_id,
+                "attempt_command_ids": attempt_ids,
+                "command_type": command.command_type,
+                "tried": tried
+            }
+        )
+        raise last_error
+
+
+# Instancia compartida por proceso (igual que connection_manager)
+runner_scheduler = RunnerScheduler(connection_manager, presence=runner_presence, sender=runner_relay)
@@ -0,0 +1,27 @@
+"""
+Validación de consultas SQL de solo lectura enviadas a los Runners.
+
+Se usa para decidir si una consulta se puede reintentar en otro Runner y para
+aceptar consultas que llegan por HTTP (ej: /datasets/compare con runner_sql).
+Es una lista de permitidos conservadora: una sola sentencia, que empieza con
+una palabra de lectura y no contiene palabras de escritura.
+"""
+import re
+
+READ_ONLY_SQL_PREFIXES = ("select", "with", "show", "describe", "explain")
+
+_WRITE_KEYWORDS = re.compile(
+    r"\b(insert|update|delete|merge|upsert|drop|alter|create|truncate|rename|"
+    r"grant|revoke|call|exec|execute|into|lock|set)\b"
+)
+
+
+def is_read_only_sql(query: str) -> bool:
+    """Indica si la consulta es una única sentencia de lectura."""
+    # Sin quitar comentarios: un "--" dentro de un literal podría ocultar una segunda sentencia
+    statement = (query or "").strip().lower().rstrip(";").strip()
+    if not statement or ";" in statement:
+        return False
+    if not re.match(rf"({'|'.join(READ_ONLY_SQL_PREFIXES)})\b", statement):
+        return False
+    return _WRITE_KEYWORDS.search(statement) is None
@@ -1,12 +1,17 @@
 """
 Controlador para gestionar las conexiones y comandos del Runner.
 """
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, AsyncIterator, List
 from datetime import datetime
 import uuid
 
 from runner.application.runner_service import connection_manager
+from runner.application.gather_results import build_gather_summary, merge_sql_results
+from runner.application.runner_scheduler import NoEligibleRunnerError, parse_heartbeat, runner_scheduler
+from runner.infrastructure.runner_presence import runner_presence, runner_relay
 from runner.domain.dataModel.model import RunnerCommand, RunnerResponse
 from validations.logger import logErrorJson, logSuccess, logInfo
 
@@ -20,6 +25,9 @@ class RunnerController:
     
     def __init__(self):
         self.manager = connection_manager
+        self.scheduler = runner_scheduler
+        self.presence = runner_presence
+        self.relay = runner_relay
         self.origin = "RunnerController"
     
     def get_connected_runners(self) -> Dict[str, Any]:
@@ -29,11 +37,16 @@ class RunnerController:
         try:
             logInfo("Obteniendo runners conectados", origin=self.origin)
             runners_list = []
+            load = self.scheduler.snapshot()
             for runner_id in self.manager.active_connections.keys():
                 runner_info = {
                     "runner_id": runner_id,
                     "connected": True,
-                    "last_heartbeat": self.manager.last_heartbeat.get(runner_id).isoformat() if runner_id in self.manager.last_heartbeat else None
+                    "local": True,
+                    "alive": self.scheduler.is_alive(runner_id),
+                    "last_heartbeat": self.manager.last_heartbeat.get(runner_id).isoformat() if runner_id in self.manager.last_heartbeat else None,
+                    "in_flight": load.get(runner_id, {}).get("in_flight", 0),
+                    "latency_ewma_ms": load.get(runner_id, {}).get("latency_ewma_ms")
                 }
                 
                 # Agregar información de registro si existe
@@ -49,6 +62,18 @@ class RunnerController:
                 
                 runners_list.append(runner_info)
             
+            # Runners conectados a otros workers (presencia en Redis)
+            for record in self._remote_presence():
+                runner_info = {
+                    **record,
+                    "connected": True,
+                    "local": False,
+                    "alive": self.scheduler.is_fresh(parse_heartbeat(record.get("last_heartbeat"))),
+                    "in_flight": load.get(record["runner_id"], {}).get("in_flight", 0),
+                    "latency_ewma_ms": load.get(record["runner_id"], {}).get("latency_ewma_ms")
+                }
+                runners_list.append(runner_info)
+            
             logSuccess(f"Se encontraron {len(runners_list)} runner(s) conectado(s)", origin=self.origin)
             return {
                 "status": True,
@@ -108,7 +133,7 @@ class RunnerController:
             )
             
             # Enviar comando y esperar respuesta
-            response = await self.manager.send_command(
+            response = await self.relay.send_command(
                 runner_id=runner_id,
                 command=command,
                 wait_response=True,
@@ -185,7 +210,7 @@ class RunnerController:
                 timeout=timeout
             )
             
-            response = await self.manager.send_command(
+            response = await self.relay.send_command(
                 runner_id=runner_id,
                 command=command,
                 wait_response=True,
@@ -254,7 +279,7 @@ class RunnerController:
                 timeout=timeout
             )
             
-            response = await self.manager.send_command(
+            response = await self.relay.send_command(
                 runner_id=runner_id,
                 command=command,
                 wait_response=True,
@@ -342,3 +367,377 @@ class RunnerController:
                 "data": None,
                 "message": f"Error: {str(e)}"
             }
+    
+    async def execute_routed_command(
+        self,
+        command_type: str,
+        payload: Dict[str, Any],
+        capability: Optional[str] = None,
+        client_name: Optional[str] = None,
+        timeout: int = 30,
+        idempotent: Optional[bool] = None,
+        max_attempts: int = 2
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta un comando sin indicar runner_id: el scheduler elige el Runner
+        por capacidad, cliente, comandos en vuelo y latencia observada.
+        Los comandos idempotentes se reintentan en otro Runner si el primero falla.
+        
+        Args:
+            command_type: Tipo de comando
+            payload: Datos del comando
+            capability: Capacidad requerida en el Runner
+            client_name: Cliente dueño de los Runners
+            timeout: Timeout en segundos por intento
+            idempotent: Forzar/denegar reintentos (por defecto según el comando)
+            max_attempts: Número máximo de Runners a intentar
+            
+        Returns:
+            Diccionario con el resultado, el runner elegido y los intentos
+        """
+        try:
+            logInfo(
+                f"Ejecutando comando {command_type} con routing automático",
+                origin=self.origin,
+                extra_data={"capability": capability, "client_name": client_name}
+            )
+            
+            command = RunnerCommand(
+                command_id=str(uuid.uuid4()),
+                command_type=command_type,
+                payload=payload,
+                timeout=timeout
+            )
+            
+            runner_id, response, attempts = await self.scheduler.dispatch(
+                command=command,
+                capability=capability,
+                client_name=client_name,
+                timeout=timeout,
+                idempotent=idempotent,
+                max_attempts=max_attempts
+            )
+            
+            if response.success:
+                logSuccess(f"Comando {command_type} ejecutado en runner {runner_id}", origin=self.origin)
+                return {
+                    "status": True,
+                    "data": {
+                        "runner_id": runner_id,
+                        "attempts": attempts,
+                        "result": response.data
+                    },
+                    "message": f"Comando {command_type} ejecutado exitosamente"
+                }
+            else:
+                logErrorJson(
+                    error_message=f"Error ejecutando comando: {response.error}",
+                    error_type="RoutedCommandError",
+                    origin=self.origin,
+                    extra_data={"runner_id": runner_id, "command_type": command_type}
+                )
+                return {
+                    "status": False,
+                    "data": {"runner_id": runner_id, "attempts": attempts},
+                    "message": f"Error ejecutando comando: {response.error}"
+                }
+        
+        except NoEligibleRunnerError as e:
+            logErrorJson(
+                error_message=str(e),
+                error_type="NoEligibleRunnerError",
+                origin=self.origin,
+                extra_data={"capability": capability, "client_name": client_name}
+            )
+            return {
+                "status": False,
+                "data": None,
+                "message": str(e)
+            }
+        except (asyncio.TimeoutError, TimeoutError) as e:
+            logErrorJson(
+                error_message=f"Timeout ejecutando comando {command_type}",
+                error_type="TimeoutError",
+                origin=self.origin,
+                extra_data={"command_type": command_type, "timeout": timeout}
+            )
+            return {
+                "status": False,
+                "data": None,
+                "message": f"Timeout ejecutando comando {command_type}"
+            }
+        except Exception as e:
+            logErrorJson(
+                error_message=f"Error ejecutando comando con routing: {str(e)}",
+                error_type=type(e).__name__,
+                origin=self.origin,
+                exception=e
+            )
+            return {
+                "status": False,
+                "data": None,
+                "message": f"Error: {str(e)}"
+            }
+    
+    def _remote_presence(self) -> List[Dict[str, Any]]:
+        """Runners con presencia vigente en Redis que no están conectados a este worker."""
+        try:
+            return [
+                record for record in self.presence.list_runners()
+                if record["runner_id"] not in self.manager.active_connections
+            ]
+        except Exception as e:
+            logErrorJson(
+                error_message=f"No se pudo leer la presencia de runners: {str(e)}",
+                error_type=type(e).__name__,
+                origin=self.origin,
+                exception=e
+            )
+            return []
+    
+    def _all_runner_ids(self) -> List[str]:
+        """IDs de Runners locales y de otros workers."""
+        local_ids = list(self.manager.active_connections.keys())
+        return local_ids + [record["runner_id"] for record in self._remote_presence()]
+    
+    async def _run_on_runner(
+        self,
+        runner_id: str,
+        command_type: str,
+        payload: Dict[str, Any],
+        timeout: int
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta un comando en un Runner y normaliza el resultado para scatter-gather.
+        Nunca lanza excepciones: los fallos se devuelven como status error/timeout.
+        """
+        command = RunnerCommand(
+            command_id=str(uuid.uuid4()),
+            command_type=command_type,
+            payload=payload,
+            timeout=timeout
+        )
+        started = time.perf_counter()
+        
+        try:
+            response = await asyncio.wait_for(
+                self.relay.send_command(
+                    runner_id=runner_id,
+                    command=command,
+                    wait_response=True,
+                    timeout=timeout
+                ),
+                timeout=timeout
+            )
+            latency_ms = (time.perf_counter() - started) * 1000
+            return {
+                "runner_id": runner_id,
+                "command_id": command.command_id,
+                "status": "success" if response.success else "error",
+                "data": response.data if response.success else None,
+                "error": None if response.success else response.error,
+                "latency_ms": round(latency_ms, 2)
+            }
+        except (asyncio.TimeoutError, TimeoutError):
+            return {
+                "runner_id": runner_id,
+                "command_id": command.command_id,
+                "status": "timeout",
+                "data": None,
+                "error": f"Timeout de {timeout}s excedido",
+                "latency_ms": None
+            }
+        except Exception as e:
+            return {
+                "runner_id": runner_id,
+                "command_id": command.command_id,
+                "status": "error",
+                "data": None,
+                "error": str(e),
+                "latency_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+    
+    async def stream_command(
+        self,
+        command_type: str,
+        payload: Dict[str, Any],
+        runner_ids: Optional[List[str]] = None,
+        per_runner_timeout: int = 30,
+        deadline: float = 60
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Envía un comando a varios Runners en paralelo y entrega los resultados
+        a medida que cada Runner responde.
+        
+        Args:
+            command_type: Tipo de comando
+            payload: Datos del comando
+            runner_ids: Runners destino (por defecto todos los conectados)
+            per_runner_timeout: Timeout en segundos por Runner
+            deadline: Tiempo máximo total en segundos para toda la operación
+            
+        Yields:
+            Resultado por runner con runner_id, status (success|error|timeout), data, error y latency_ms
+        """
+        targets = list(runner_ids) if runner_ids is not None else await asyncio.to_thread(self._all_runner_ids)
+        tasks = {
+            asyncio.create_task(self._run_on_runner(runner_id, command_type, payload, per_runner_timeout)): runner_id
+            for runner_id in targets
+        }
+        loop_deadline = time.monotonic() + deadline
+        pending = set(tasks)
+        
+        try:
+            while pending:
+                remaining = loop_deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            
+            # Deadline global alcanzado: los Runners pendientes se reportan como timeout
+            for task in pending:
+                task.cancel()
+                yield {
+                    "runner_id": tasks[task],
+                    "command_id": None,
+                    "status": "timeout",
+                    "data": None,
+                    "error": f"Deadline global de {deadline}s excedido",
+                    "latency_ms": None
+                }
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def gather_command(
+        self,
+        command_type: str,
+        payload: Dict[str, Any],
+        runner_ids: Optional[List[str]] = None,
+        per_runner_timeout: int = 30,
+        deadline: float = 60,
+        merge: Optional[str] = None,
+        group_by: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta un comando en varios Runners (scatter-gather) y recolecta los resultados
+        con semántica de fallo parcial y deadline global.
+        
+        Args:
+            command_type: Tipo de comando
+            payload: Datos del comando
+            runner_ids: Runners destino (por defecto todos los conectados)
+            per_runner_timeout: Timeout en segundos por Runner
+            deadline: Tiempo máximo total en segundos
+            merge: None, "concat" o "aggregate" para combinar resultados SQL
+            group_by: Columnas de agrupación para merge="aggregate"
+            
+        Returns:
+            Diccionario con resultados por runner, merge opcional y estadísticas
+        """
+        try:
+            logInfo(
+                f"Gather de comando en runners",
+                origin=self.origin,
+                extra_data={"command_type": command_type, "runner_ids": runner_ids, "deadline": deadline}
+            )
+            
+            started = time.perf_counter()
+            results = []
+            async for result in self.stream_command(
+                command_type=command_type,
+                payload=payload,
+                runner_ids=runner_ids,
+                per_runner_timeout=per_runner_timeout,
+                deadline=deadline
+            ):
+                results.append(result)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            
+            deadline_exceeded = any(
+                r["status"] == "timeout" and r["command_id"] is None for r in results
+            )
+            summary = build_gather_summary(results, elapsed_ms, deadline_exceeded)
+            merged = merge_sql_results(results, mode=merge, group_by=group_by) if merge else None
+            
+            message = (
+                f"{summary['succeeded']}/{summary['total']} runner(s) respondieron correctamente, "
+                f"{summary['timed_out']} con timeout"
+            )
+            if summary["succeeded"]:
+                logSuccess(message, origin=self.origin, extra_data=summary)
+            else:
+                logErrorJson(
+                    error_message=message,
+                    error_type="GatherCommandError",
+                    origin=self.origin,
+                    extra_data=summary
+                )
+            
+            return {
+                "status": summary["succeeded"] > 0,
+                "data": {
+                    "command_type": command_type,
+                    "results": results,
+                    "merged": merged,
+                    "summary": summary
+                },
+                "message": message
+            }
+            
+        except Exception as e:
+            logErrorJson(
+                error_message=f"Error en gather de comando: {str(e)}",
+                error_type=type(e).__name__,
+                origin=self.origin,
+                exception=e
+            )
+            return {
+                "status": False,
+                "data": None,
+                "message": f"Error: {str(e)}"
+            }
+    
+    async def gather_sql_query(
+        self,
+        adapter_type: str,
+        query: str,
+        database: Optional[str] = None,
+        runner_ids: Optional[List[str]] = None,
+        per_runner_timeout: int = 30,
+        deadline: float = 60,
+        merge: Optional[str] = "concat",
+        group_by: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta una consulta SQL en varios Runners y combina las filas resultantes.
+        
+        Args:
+            adapter_type: Tipo de base de datos (mysql|postgres|redis|mongo)
+            query: Query SQL a ejecutar
+            database: Nombre de la base de datos (opcional)
+            runner_ids: Runners destino (por defecto todos los conectados)
+            per_runner_timeout: Timeout en segundos por Runner
+            deadline: Tiempo máximo total en segundos
+            merge: "concat", "aggregate" o None para no combinar
+            group_by: Columnas de agrupación para merge="aggregate"
+            
+        Returns:
+            Diccionario con resultados por runner, filas combinadas y estadísticas
+        """
+        return await self.gather_command(
+            command_type="SQL_QUERY",
+            payload={
+                "adapter_type": adapter_type,
+                "query": query,
+                "database": database
+            },
+            runner_ids=runner_ids,
+            per_runner_timeout=per_runner_timeout,
+            deadline=deadline,
+            merge=merge,
+            group_by=group_by
+        )
@@ -0,0 +1,333 @@
+"""
+Registro de presencia de Runners en Redis y relay de comandos entre workers.
+
+Con varios workers de gunicorn cada proceso tiene su propio connection_manager.
+Este módulo publica en Redis qué worker mantiene cada Runner (con TTL de heartbeat)
+y permite que cualquier worker despache comandos a un Runner conectado en otro
+worker mediante pub/sub + lista de respuesta (BLPOP).
+
+El endpoint WebSocket de los Runners debe llamar a runner_relay.ensure_started()
+al registrar un Runner para que el worker publique su presencia y escuche relays.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from redis.asyncio import Redis as AsyncRedis
+
+from infrastructure.config.redis_config import RedisConfig
+from infrastructure.config.worker_identity import current_worker_id
+from infrastructure.metrics.latency import summarize_latencies
+from runner.application.runner_service import connection_manager
+from runner.domain.dataModel.model import RunnerCommand, RunnerResponse
+from validations.logger import logErrorJson
+
+
+class RunnerPresenceRegistry:
+    """
+    Índice de presencia de Runners compartido entre workers.
+
+    Estructura en Redis:
+        runner:presence:{runner_id} -> JSON con worker_id, heartbeat y registro (EX ttl)
+        runner:presence:index       -> SET con los runner_id publicados
+    """
+
+    KEY_PREFIX = "runner:presence:"
+    INDEX_KEY = "runner:presence:index"
+
+    def __init__(self, ttl: int = 90):
+        """
+        Args:
+            ttl: Segundos de vida de la presencia sin nuevo heartbeat
+        """
+        self.ttl = ttl
+
+    @property
+    def redis(self):
+        return RedisConfig.get_client()
+
+    def heartbeat(
+        self,
+        runner_id: str,
+        info: Optional[Dict[str, Any]] = None,
+        last_heartbeat: Optional[datetime] = None
+    ) -> None:
+        """
+        Publica (o renueva) la presencia de un Runner conectado a este worker.
+
+        Args:
+            runner_id: ID del Runner
+            info: Datos de registro (client_name, hostname, version, capabilities, ip_address)
+            last_heartbeat: Último heartbeat recibido del Runner (no la hora de publicación:
+                un Runner que dejó de responder debe verse vencido en los otros workers)
+        """
+        record = {
+            "runner_id": runner_id,
+            "worker_id": current_worker_id(),
+            "last_heartbeat": last_heartbeat.isoformat() if last_heartbeat else None,
+            **(info or {})
+        }
+        pipe = self.redis.pipeline()
+        pipe.set(f"{self.KEY_PREFIX}{runner_id}", json.dumps(record, default=str), ex=self.ttl)
+        pipe.sadd(self.INDEX_KEY, runner_id)
+        pipe.execute()
+
+    def remove(self, runner_id: str) -> None:
+        """Elimina la presencia de un Runner si pertenece a este worker."""
+        record = self.get(runner_id)
+        if record and record.get("worker_id") == current_worker_id():
+            pipe = self.redis.pipeline()
+            pipe.delete(f"{self.KEY_PREFIX}{runner_id}")
+            pipe.srem(self.INDEX_KEY, runner_id)
+            pipe.execute()
+
+    def get(self, runner_id: str) -> Optional[Dict[str, Any]]:
+        """Obtiene el registro de presencia de un Runner (None si expiró)."""
+        raw = self.redis.get(f"{self.KEY_PREFIX}{runner_id}")
+        return json.loads(raw) if raw else None
+
+    def owner_of(self, runner_id: str) -> Optional[str]:
+        """Retorna el worker_id que mantiene la conexión del Runner."""
+        record = self.get(runner_id)
+        return record.get("worker_id") if record else None
+
+    def list_runners(self) -> List[Dict[str, Any]]:
+        """
+        Lista los Runners con presencia vigente en cualquier worker.
+        Limpia del índice los Runners cuyo TTL expiró.
+        """
+        runner_ids = sorted(self.redis.smembers(self.INDEX_KEY))
+        if not runner_ids:
+            return []
+
+        values = self.redis.mget([f"{self.KEY_PREFIX}{runner_id}" for runner_id in runner_ids])
+        runners, expired = [], []
+        for runner_id, raw in zip(runner_ids, values):
+            if raw:
+                runners.append(json.loads(raw))
+            else:
+                expired.append(runner_id)
+
+        if expired:
+            self.redis.srem(self.INDEX_KEY, *expired)
+        return runners
+
+    def publish_local(self, manager) -> int:
+        """
+        Renueva la presencia de todos los Runners conectados a este worker.
+
+        Args:
+            manager: connection_manager local
+
+        Returns:
+            Cantidad de Runners publicados
+        """
+        published = 0
+        for runner_id in list(manager.active_connections.keys()):
+            info = {}
+            reg = manager.registered_runners.get(runner_id)
+            if reg is not None:
+                info = {
+                    "client_name": reg.client_name,
+                    "hostname": reg.hostname,
+                    "version": reg.version,
+                    "capabilities": reg.capabilities,
+                    "ip_address": reg.ip_address
+                }
+            self.heartbeat(runner_id, info, last_heartbeat=manager.last_heartbeat.get(runner_id))
+            published += 1
+        return published
+
+
+class RunnerCommandRelay:
+    """
+    Despacha comandos a cualquier Runner, esté conectado a este worker o a otro.
+
+    - Runner local: se envía directo por el connection_manager.
+    - Runner remoto: se publica en runner:relay:{worker_id} del worker dueño y
+      se espera la respuesta en runner:relay:reply:{command_id} con BLPOP.
+    """
+
+    CHANNEL_PREFIX = "runner:relay:"
+    REPLY_PREFIX = "runner:relay:reply:"
+    REPLY_TTL = 60
+
+    def __init__(
+        self,
+        manager,
+        presence: RunnerPresenceRegistry,
+        heartbeat_interval: int = 30,
+        redis: Optional[AsyncRedis] = None
+    ):
+        """
+        Args:
+            manager: connection_manager local
+            presence: Registro de presencia compartido
+            heartbeat_interval: Segundos entre publicaciones de presencia
+            redis: Cliente asíncrono propio (para relays que viven en su propio
+                event loop); por defecto el cliente compartido de RedisConfig
+        """
+        self.manager = manager
+        self.presence = presence
+        self.heartbeat_interval = heartbeat_interval
+        self._redis = redis
+        self.origin = "RunnerCommandRelay"
+        self._listener_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.timings = {"direct": deque(maxlen=1000), "relay": deque(maxlen=1000)}
+
+    @property
+    def redis(self) -> AsyncRedis:
+        return self._redis or RedisConfig.get_async_client()
+
+    # ------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------
+    async def ensure_started(self) -> None:
+        """Inicia (una vez por event loop) el listener de relays y el heartbeat de presencia."""
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen())
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        """Detiene las tareas de fondo y espera a que liberen su conexión."""
+        tasks = [task for task in (self._listener_task, self._heartbeat_task) if task and not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._listener_task = None
+        self._heartbeat_task = None
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.presence.publish_local, self.manager)
+            except Exception as e:
+                logErrorJson(
+                    error_message=f"Error publicando presencia de runners: {str(e)}",
+                    error_type=type(e).__name__,
+                    origin=self.origin,
+                    exception=e
+                )
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def _listen(self) -> None:
+        channel = f"{self.CHANNEL_PREFIX}{current_worker_id()}"
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    asyncio.create_task(self._handle_relayed(message["data"]))
+            except asyncio.CancelledError:
+                await pubsub.aclose()
+                raise
+            except Exception as e:
+                logErrorJson(
+                    error_message=f"Listener de relay de runners reiniciando: {str(e)}",
+                    error_type=type(e).__name__,
+                    origin=self.origin,
+                    exception=e
+                )
+                await pubsub.aclose()
+                await asyncio.sleep(1)
+
+    async def _handle_relayed(self, raw: str) -> None:
+        """Ejecuta un comando recibido desde otro worker y publica la respuesta."""
+        message = json.loads(raw)
+        reply_key = message["reply_to"]
+        try:
+            command = RunnerCommand.model_validate(message["command"])
+            response = await self.manager.send_command(
+                runner_id=message["runner_id"],
+                command=command,
+                wait_response=True,
+                timeout=message["timeout"]
+            )
+            reply = response.model_dump(mode="json")
+        except Exception as e:
+            reply = {"success": False, "data": None, "error": f"Error en relay: {str(e)}"}
+
+        pipe = self.redis.pipeline()
+        pipe.rpush(reply_key, json.dumps(reply, default=str))
+        pipe.expire(reply_key, self.REPLY_TTL)
+        await pipe.execute()
+
+    # ------------------------------------------------------------
+    # Despacho
+    # ------------------------------------------------------------
+    def is_local(self, runner_id: str) -> bool:
+        return runner_id in self.manager.active_connections
+
+    async def send_command(
+        self,
+        runner_id: str,
+        command: RunnerCommand,
+        wait_response: bool = True,
+        timeout: int = 30
+    ) -> Optional[RunnerResponse]:
+        """
+        Envía un comando a un Runner de cualquier worker.
+        Misma firma que connection_manager.send_command.
+
+        Raises:
+            ConnectionError: Si el Runner no tiene presencia o su worker no escucha
+            TimeoutError: Si no llega respuesta dentro del timeout
+        """
+        await self.ensure_started()
+        started = time.perf_counter()
+
+        if self.is_local(runner_id):
+            response = await self.manager.send_command(
+                runner_id=runner_id,
+                command=command,
+                wait_response=wait_response,
+                timeout=timeout
+            )
+            self.timings["direct"].append((time.perf_counter() - started) * 1000)
+            return response
+
+        owner = await asyncio.to_thread(self.presence.owner_of, runner_id)
+        if owner is None:
+            raise ConnectionError(f"Runner {runner_id} no está conectado a ningún worker")
+
+        redis = self.redis
+        reply_key = f"{self.REPLY_PREFIX}{command.command_id}"
+        message = json.dumps({
+            "runner_id": runner_id,
+            "command": command.model_dump(mode="json"),
+            "timeout": timeout,
+            "reply_to": reply_key
+        }, default=str)
+
+        receivers = await redis.publish(f"{self.CHANNEL_PREFIX}{owner}", message)
+        if not receivers:
+            raise ConnectionError(f"El worker {owner} del runner {runner_id} no está escuchando")
+
+        if not wait_response:
+            return None
+
+        reply = await redis.blpop([reply_key], timeout=timeout)
+        if reply is None:
+            raise TimeoutError(f"Timeout esperando respuesta relay del runner {runner_id}")
+
+        self.timings["relay"].append((time.perf_counter() - started) * 1000)
+        return RunnerResponse.model_validate(json.loads(reply[1]))
+
+    def latency_stats(self) -> Dict[str, Any]:
+        """Compara la latencia de despacho directo vs relay entre workers (ms)."""
+        return {
+            "direct": summarize_latencies(self.timings["direct"]),
+            "relay": summarize_latencies(self.timings["relay"])
+        }
+
+
+# Instancias compartidas por proceso
+runner_presence = RunnerPresenceRegistry()
+runner_relay = RunnerCommandRelay(connection_manager, runner_presence)
@@ -0,0 +1,12 @@
+import fakeredis
+import pytest
+
+from infrastructure.config.redis_config import RedisConfig
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Redis en memoria como cliente compartido de RedisConfig."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(RedisConfig, "_instance", client)
+    return client
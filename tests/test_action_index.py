@@ -0,0 +1,56 @@
+from langgraph.application.action_index import ActionIndex
+
+ACTIONS = [
+    {"source_key": "erp", "id": "consultar_saldo", "description": "Consulta el saldo disponible de una cuenta",
+     "tags": ["saldo", "cuenta"], "examples": ["cuánto dinero tengo en la cuenta"]},
+    {"source_key": "erp", "id": "emitir_factura", "description": "Genera la facturación electrónica de una venta",
+     "tags": ["factura"], "examples": ["hazme una factura para el cliente"]},
+    {"source_key": "crm", "id": "agendar_visita", "description": "Agenda una visita comercial con un cliente",
+     "tags": ["agenda", "visita"], "examples": ["programa una reunión el lunes"]},
+]
+
+
+def ids(results):
+    return [action["id"] for action, _ in results]
+
+
+def test_sync_only_revectorizes_changed_actions(monkeypatch):
+    index = ActionIndex()
+    assert index.sync(ACTIONS) == {"added": 3, "updated": 0, "removed": 0}
+    version = index.version
+
+    assert index.sync(ACTIONS) == {"added": 0, "updated": 0, "removed": 0}
+    assert index.version == version
+
+    vectorized = []
+    original = index._hash_counts
+    monkeypatch.setattr(index, "_hash_counts", lambda text: vectorized.append(text) or original(text))
+    changed = [dict(ACTIONS[0], description="Consulta el saldo y los movimientos de una cuenta"), ACTIONS[1]]
+
+    assert index.sync(changed) == {"added": 0, "updated": 1, "removed": 1}
+    assert len(vectorized) == 1
+    assert len(index) == 2 and index.version != version
+    assert "agendar_visita" not in ids(index.search("agendar una visita", top_k=3))
+
+
+def test_search_ranks_by_similarity_ignoring_accents():
+    index = ActionIndex()
+    index.sync(ACTIONS)
+
+    assert ids(index.search("cual es el saldo de mi cuenta", top_k=1)) == ["consultar_saldo"]
+    assert ids(index.search("facturacion de la venta", top_k=1)) == ["emitir_factura"]
+    # Los n-gramas de caracteres toleran variaciones de la palabra
+    assert ids(index.search("agendemos visitas", top_k=1)) == ["agendar_visita"]
+
+    results = index.search("cliente", top_k=3)
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+def test_search_respects_top_k_and_min_score():
+    index = ActionIndex()
+    assert index.search("saldo") == []
+
+    index.sync(ACTIONS)
+    assert len(index.search("cliente", top_k=1)) == 1
+    assert index.search("zzzz qqqq", min_score=0.2) == []
+    assert index.search("") == []
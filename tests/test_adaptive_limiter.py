@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from infrastructure.concurrency.adaptive_limiter import AdaptiveLimiter, LimiterOverloaded
+
+
+def single_slot_limiter(**kwargs) -> AdaptiveLimiter:
+    # max_limit=1: el aumento aditivo no abre un segundo cupo durante la prueba
+    return AdaptiveLimiter(initial_limit=1, max_limit=1, **kwargs)
+
+
+def wait_until(condition, timeout=2.0):
+    limit = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < limit, "condición no alcanzada"
+        time.sleep(0.005)
+
+
+def start_waiter(limiter, area, granted, timeout=2.0):
+    """Encola una llamada en un hilo y espera a que quede en la cola."""
+    queued = limiter.get_stats()["queued"]
+
+    def call():
+        with limiter.acquire(area=area, timeout=timeout):
+            granted.append(area)
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    wait_until(lambda: limiter.get_stats()["queued"] == queued + 1)
+    return thread
+
+
+def test_waiting_call_times_out_and_leaves_the_queue():
+    limiter = single_slot_limiter(max_wait=1.0)
+
+    with limiter.acquire():
+        started = time.monotonic()
+        with pytest.raises(LimiterOverloaded) as error:
+            with limiter.acquire(timeout=0.05):
+                pass
+
+    assert error.value.reason == "timeout"
+    assert 0.05 <= time.monotonic() - started < 0.5
+    stats = limiter.get_stats()
+    assert stats["timeouts"] == 1 and stats["queued"] == 0 and stats["in_flight"] == 0
+
+
+def test_full_queue_rejects_immediately():
+    limiter = single_slot_limiter(max_queue=1)
+    granted = []
+
+    with limiter.acquire():
+        waiter = start_waiter(limiter, "ventas", granted)
+        with pytest.raises(LimiterOverloaded) as error:
+            with limiter.acquire(timeout=5):
+                pass
+        assert error.value.reason == "queue_full"
+        assert error.value.retry_after > 0
+
+    waiter.join(2)
+    assert granted == ["ventas"]
+    assert limiter.get_stats()["rejected"] == 1
+
+
+def test_queued_areas_are_served_round_robin():
+    limiter = single_slot_limiter()
+    granted = []
+
+    with limiter.acquire():
+        # Ráfaga de "ventas" encolada antes que la única llamada de "cobranza"
+        threads = [start_waiter(limiter, area, granted) for area in ["ventas", "ventas", "ventas", "cobranza"]]
+        assert limiter.get_stats()["queued_by_area"] == {"ventas": 3, "cobranza": 1}
+
+    for thread in threads:
+        thread.join(2)
+    assert granted == ["ventas", "cobranza", "ventas", "ventas"]
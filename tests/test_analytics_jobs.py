@@ -0,0 +1,51 @@
+import pytest
+
+from analytics.application import analytics_jobs
+from analytics.application.uploads import resolve_upload
+from jobs.application.job_registry import get_job_handler
+from jobs.infrastructure.redis_job_queue import RedisJobQueue
+from jobs.infrastructure.worker import JobWorker
+from websocket.infrastructure.ws_push import ws_push
+
+
+@pytest.fixture
+def upload(tmp_path, monkeypatch):
+    monkeypatch.setattr("analytics.application.uploads.get_upload_dir", lambda: str(tmp_path))
+    path = tmp_path / "book.xlsx"
+    path.write_bytes(b"xlsx")
+    return path
+
+
+def test_resolve_upload_stays_inside_upload_dir(tmp_path):
+    assert resolve_upload("../../etc/passwd", str(tmp_path)) == str(tmp_path / "passwd")
+    assert resolve_upload("", str(tmp_path)) is None
+
+
+def test_excel_upload_survives_retries_and_is_deleted_after_last_failure(upload, fake_redis, monkeypatch):
+    monkeypatch.setattr(ws_push, "push", lambda *args, **kwargs: None)
+    monkeypatch.setattr(analytics_jobs, "analyze_workbook", lambda path, **kwargs: 1 / 0)
+    queue = RedisJobQueue()
+    queue.ensure_group()
+    worker = JobWorker(queue, consumer="c1", block_ms=10)
+    job_id = queue.enqueue("excel_analysis", {"upload_id": upload.name}, code_user="u1", max_retries=1)
+
+    [(message_id, _)] = queue.read("c1", block_ms=10)
+    worker.process(message_id, job_id)
+    assert queue.get_status(job_id)["status"] == "retrying"
+    assert upload.exists()
+
+    fake_redis.zadd(queue.RETRY_KEY, {job_id: 0})
+    queue.promote_due_retries()
+    [(message_id, _)] = queue.read("c1", block_ms=10)
+    worker.process(message_id, job_id)
+    assert queue.get_status(job_id)["status"] == "failed"
+    assert not upload.exists()
+
+
+def test_excel_upload_is_deleted_after_success(upload, monkeypatch):
+    monkeypatch.setattr(analytics_jobs, "analyze_workbook", lambda path, **kwargs: {"path": path})
+
+    result = get_job_handler("excel_analysis")({"upload_id": upload.name}, lambda *args: None)
+
+    assert result == {"path": str(upload)}
+    assert not upload.exists()
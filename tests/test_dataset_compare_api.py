@@ -0,0 +1,90 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from analytics.domain.analytics import analytics
+from runner.application.sql_guard import is_read_only_sql
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM ventas",
+    "select id from t;",
+    "WITH a AS (SELECT 1) SELECT * FROM a",
+    "show tables",
+])
+def test_read_only_queries_are_accepted(query):
+    assert is_read_only_sql(query)
+
+
+@pytest.mark.parametrize("query", [
+    "DELETE FROM ventas",
+    "DROP TABLE ventas",
+    "SELECT 1; DROP TABLE ventas",
+    "SELECT '--'; DROP TABLE ventas",
+    "WITH x AS (DELETE FROM t RETURNING *) SELECT * FROM x",
+    "SELECT * INTO copia FROM ventas",
+    "",
+])
+def test_write_or_multiple_statements_are_rejected(query):
+    assert not is_read_only_sql(query)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr("infrastructure.security.api_token.get_api_token", lambda: "s3cret")
+    enqueued = []
+    monkeypatch.setattr(
+        "analytics.infrastructure.controller.job_queue.enqueue",
+        lambda **kwargs: enqueued.append(kwargs) or "job-1"
+    )
+    app = FastAPI()
+    app.include_router(analytics)
+    test_client = TestClient(app)
+    test_client.enqueued = enqueued
+    return test_client
+
+
+def compare_body(query: str) -> dict:
+    source = {"type": "runner_sql", "adapter_type": "mysql", "query": query}
+    return {"code_user": "u1", "left": source, "right": source, "keys": ["id"]}
+
+
+def test_compare_requires_token(client):
+    response = client.post("/datasets/compare", json=compare_body("SELECT id FROM t"))
+
+    assert response.status_code == 401
+    assert client.enqueued == []
+
+
+def test_compare_rejects_write_sql(client):
+    response = client.post(
+        "/datasets/compare",
+        json=compare_body("DELETE FROM clientes"),
+        headers={"Authorization": "Bearer s3cret"}
+    )
+
+    assert response.status_code == 400
+    assert client.enqueued == []
+
+
+def test_compare_enqueues_read_only_sql(client):
+    response = client.post(
+        "/datasets/compare",
+        json=compare_body("SELECT id FROM t"),
+        headers={"Authorization": "Bearer s3cret"}
+    )
+
+    assert response.status_code == 202
+    assert client.enqueued[0]["job_type"] == "dataset_compare"
+
+
+def test_compare_disabled_without_configured_token(client, monkeypatch):
+    monkeypatch.setattr("infrastructure.security.api_token.get_api_token", lambda: "")
+
+    response = client.post(
+        "/datasets/compare",
+        json=compare_body("SELECT id FROM t"),
+        headers={"Authorization": "Bearer "}
+    )
+
+    assert response.status_code == 503
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from analytics.application.dataset_diff import DatasetDiff, chunks_from_rows
+
+
+def compare(left_rows, right_rows, left_chunk: int, right_chunk: int, keys=("id",)):
+    diff = DatasetDiff(keys=list(keys), partitions=2)
+    return diff.compare_datasets(
+        chunks_from_rows(left_rows, chunk_rows=left_chunk),
+        chunks_from_rows(right_rows, chunk_rows=right_chunk)
+    )["counts"]
+
+
+def test_mixed_type_keys_match_regardless_of_chunk_boundaries():
+    rows = [{"id": value, "total": 10} for value in [1, 2, "A"]]
+
+    counts = compare(rows, rows, left_chunk=3, right_chunk=2)
+
+    assert (counts["matched"], counts["only_left"], counts["only_right"]) == (3, 0, 0)
+    assert counts["changed"] == 0
+
+
+def test_mixed_type_values_hash_like_their_numeric_and_date_chunks():
+    day = datetime(2024, 5, 1, 12, 30)
+    rows = [
+        {"id": 1, "amount": 2.0, "when": day},
+        {"id": 2.0, "amount": 3.5, "when": day},
+        {"id": "B", "amount": "n/a", "when": "sin fecha"},
+        {"id": 4, "amount": None, "when": None},
+    ]
+
+    counts = compare(rows, rows, left_chunk=4, right_chunk=1)
+
+    assert (counts["matched"], counts["changed"], counts["only_left"], counts["only_right"]) == (4, 0, 0, 0)
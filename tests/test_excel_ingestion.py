@@ -0,0 +1,63 @@
+import pytest
+from openpyxl import Workbook
+
+from analytics.application import excel_ingestion
+from analytics.application.excel_ingestion import (
+    MIN_CHUNK_ROWS,
+    MemoryBudgetExceededError,
+    iter_sheet_chunks,
+    plan_workers
+)
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    path = tmp_path / "book.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["id", "monto"])
+    for index in range(4 * MIN_CHUNK_ROWS):
+        sheet.append([index, index * 1.5])
+    workbook.save(path)
+    return str(path)
+
+
+def rss_sequence(monkeypatch, values):
+    """Simula current_rss_mb: baseline primero y luego una lectura por chunk."""
+    readings = iter(values)
+    last = [values[-1]]
+
+    def fake_rss():
+        last[0] = next(readings, last[0])
+        return last[0]
+
+    monkeypatch.setattr(excel_ingestion, "current_rss_mb", fake_rss)
+
+
+def test_plan_workers_keeps_minimum_budget_per_worker(monkeypatch):
+    monkeypatch.setattr(excel_ingestion.os, "cpu_count", lambda: 16)
+
+    assert plan_workers(8, 512) == (4, 128)
+    assert plan_workers(2, 512) == (2, 256)
+    assert plan_workers(8, 512, max_workers=2) == (2, 256)
+    assert plan_workers(8, 64) == (1, 64)
+
+
+def test_high_baseline_rss_does_not_exceed_budget(workbook_path, monkeypatch):
+    # El proceso ya ocupa 2GB antes de leer: solo cuenta el crecimiento
+    rss_sequence(monkeypatch, [2048.0])
+
+    chunks = list(iter_sheet_chunks(workbook_path, memory_budget_mb=64, chunk_rows=MIN_CHUNK_ROWS))
+
+    assert sum(chunk.n_rows for chunk in chunks) == 4 * MIN_CHUNK_ROWS
+
+
+def test_rss_growth_halves_chunk_then_fails_at_minimum(workbook_path, monkeypatch):
+    rss_sequence(monkeypatch, [500.0, 600.0, 600.0, 600.0])
+
+    chunks = iter_sheet_chunks(workbook_path, memory_budget_mb=64, chunk_rows=2 * MIN_CHUNK_ROWS)
+
+    assert next(chunks).n_rows == 2 * MIN_CHUNK_ROWS
+    assert next(chunks).n_rows == MIN_CHUNK_ROWS
+    with pytest.raises(MemoryBudgetExceededError):
+        next(chunks)
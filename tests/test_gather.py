@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+
+from runner.application.gather_results import build_gather_summary, merge_sql_results, normalize_sql_rows
+
+
+def result(runner_id, status="success", data=None, latency_ms=10.0):
+    return {"runner_id": runner_id, "command_id": "c", "status": status, "data": data,
+            "error": None, "latency_ms": latency_ms}
+
+
+def test_normalize_sql_rows_supports_runner_formats():
+    expected = [{"zona": "norte", "monto": 10}]
+
+    assert normalize_sql_rows({"columns": ["zona", "monto"], "rows": [["norte", 10]]}) == expected
+    assert normalize_sql_rows({"rows": expected}) == expected
+    assert normalize_sql_rows({"data": expected}) == expected
+    assert normalize_sql_rows(expected + ["basura"]) == expected
+    assert normalize_sql_rows(None) == []
+
+
+def test_merge_concat_and_aggregate_skip_failed_runners():
+    results = [
+        result("r1", data=[{"zona": "norte", "monto": 10}, {"zona": "sur", "monto": 5}]),
+        result("r2", data={"columns": ["zona", "monto"], "rows": [["norte", 7]]}),
+        result("r3", status="error", data=[{"zona": "norte", "monto": 1000}])
+    ]
+
+    concat = merge_sql_results(results, mode="concat")
+    assert concat["row_count"] == 3
+    assert concat["columns"] == ["runner_id", "zona", "monto"]
+    assert {row["runner_id"] for row in concat["rows"]} == {"r1", "r2"}
+
+    aggregate = merge_sql_results(results, mode="aggregate", group_by=["zona"])
+    assert sorted(aggregate["rows"], key=lambda row: row["zona"]) == [
+        {"zona": "norte", "row_count": 2, "monto": 17},
+        {"zona": "sur", "row_count": 1, "monto": 5}
+    ]
+
+    with pytest.raises(ValueError):
+        merge_sql_results(results, mode="join")
+
+
+def test_summary_counts_statuses_and_latencies():
+    results = [result("r1", latency_ms=10), result("r2", status="error", latency_ms=30),
+               result("r3", status="timeout", latency_ms=None)]
+
+    summary = build_gather_summary(results, elapsed_ms=123.456, deadline_exceeded=True)
+
+    assert (summary["total"], summary["succeeded"], summary["failed"], summary["timed_out"]) == (3, 1, 1, 1)
+    assert summary["deadline_exceeded"] is True and summary["elapsed_ms"] == 123.46
+    assert summary["latency_ms"]["max"] == 30
+
+
+class FakeRelay:
+    """Relay con comportamiento por runner: respuesta, error o demora."""
+
+    def __init__(self, response_model, delays):
+        self.response_model = response_model
+        self.delays = delays
+
+    async def send_command(self, runner_id, command, wait_response=True, timeout=30):
+        await asyncio.sleep(self.delays.get(runner_id, 0))
+        if runner_id == "caido":
+            raise ConnectionError("runner desconectado")
+        return self.response_model.model_validate({
+            "success": True,
+            "data": {"columns": ["zona", "monto"], "rows": [[runner_id, 1]]},
+            "error": None
+        })
+
+
+@pytest.fixture
+def controller():
+    # El controlador importa el connection_manager, los modelos y el logger del Runner
+    controller_module = pytest.importorskip("runner.infrastructure.controller")
+    instance = controller_module.RunnerController()
+    instance.relay = FakeRelay(controller_module.RunnerResponse, {"rapido": 0.0, "medio": 0.05, "colgado": 5})
+    return instance
+
+
+def test_stream_yields_results_as_runners_answer(controller):
+    async def collect():
+        return [item async for item in controller.stream_command(
+            "SQL_QUERY", {"query": "select 1"}, runner_ids=["medio", "rapido"], deadline=2
+        )]
+
+    assert [item["runner_id"] for item in asyncio.run(collect())] == ["rapido", "medio"]
+
+
+def test_gather_reports_partial_failure_and_global_deadline(controller):
+    started = time.monotonic()
+    response = asyncio.run(controller.gather_sql_query(
+        adapter_type="postgres",
+        query="select zona, monto from ventas",
+        runner_ids=["rapido", "caido", "colgado"],
+        per_runner_timeout=10,
+        deadline=0.3
+    ))
+
+    assert time.monotonic() - started < 2
+    assert response["status"] is True
+    by_runner = {item["runner_id"]: item for item in response["data"]["results"]}
+    assert by_runner["rapido"]["status"] == "success"
+    assert by_runner["caido"]["status"] == "error" and "desconectado" in by_runner["caido"]["error"]
+    assert by_runner["colgado"]["status"] == "timeout" and by_runner["colgado"]["command_id"] is None
+
+    summary = response["data"]["summary"]
+    assert (summary["succeeded"], summary["failed"], summary["timed_out"]) == (1, 1, 1)
+    assert summary["deadline_exceeded"] is True
+    assert response["data"]["merged"]["rows"] == [{"runner_id": "rapido", "zona": "rapido", "monto": 1}]
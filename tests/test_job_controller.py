@@ -0,0 +1,36 @@
+import pytest
+from fastapi import HTTPException
+
+from jobs.domain.dataModel.model import JobRequest
+from jobs.infrastructure.controller import JobController
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.enqueued = []
+
+    def enqueue(self, job_type, payload, code_user, max_retries):
+        self.enqueued.append(job_type)
+        return "job-1"
+
+
+@pytest.mark.parametrize("job_type", ["excel_analysis", "dataset_compare", "no_existe"])
+def test_enqueue_rejects_non_public_job_types(job_type):
+    controller = JobController(JobRequest(job_type=job_type, code_user="u1"))
+    controller.queue = RecordingQueue()
+
+    with pytest.raises(HTTPException) as error:
+        controller.enqueue()
+
+    assert error.value.status_code == 400
+    assert controller.queue.enqueued == []
+
+
+def test_enqueue_accepts_public_job_type():
+    controller = JobController(JobRequest(job_type="healthcheck", code_user="u1"))
+    controller.queue = RecordingQueue()
+
+    response = controller.enqueue()
+
+    assert response.status_code == 202
+    assert controller.queue.enqueued == ["healthcheck"]
@@ -0,0 +1,77 @@
+import time
+
+from benchmarks.fakes import FakeProvider
+from infrastructure.adapters.llm_router import LLMRouter
+
+
+def test_hedging_is_off_by_default():
+    primary = FakeProvider("a", slow_rate=1.0, slow_ms=200)
+    secondary = FakeProvider("b", latency_ms=10)
+    router = LLMRouter([primary, secondary], hedge_default_delay=0.05)
+
+    result = router.generate("hola", timeout=2)
+
+    assert result["provider"] == "a" and result["hedged"] is False
+    assert secondary.calls == 0
+
+
+def test_hedge_after_observed_p95():
+    primary = FakeProvider("a", slow_rate=1.0, slow_ms=1000)
+    secondary = FakeProvider("b", latency_ms=10)
+    router = LLMRouter([primary, secondary], hedge=True, hedge_min_delay=0.01, min_samples=20)
+    for latency in [0.01] * 18 + [0.05, 0.08]:
+        router.stats["a"].latencies.append(latency)
+
+    # p95 de las muestras observadas, no el retraso por defecto
+    assert router._hedge_delay(primary) == 0.08
+
+    started = time.monotonic()
+    result = router.generate("hola", timeout=2)
+
+    assert result == {"text": "b: ok", "tokens": {}, "finish_reason": "STOP", "provider": "b", "hedged": True}
+    assert time.monotonic() - started < 0.5
+    assert router.stats["b"].counts["hedges"] == 1
+    assert router.stats["a"].counts["cancelled"] == 1
+
+
+def test_hedge_token_bucket_caps_hedged_calls():
+    primary = FakeProvider("a", slow_rate=1.0, slow_ms=100)
+    secondary = FakeProvider("b", slow_rate=1.0, slow_ms=100)
+    router = LLMRouter([primary, secondary], hedge=True, hedge_min_delay=0.01, hedge_default_delay=0.01, max_hedge_ratio=0.5)
+
+    for _ in range(4):
+        router.generate("hola", timeout=2)
+
+    # Bucket inicial de 1 token + 0.5 por llamada: hedge en las llamadas 1, 2 y 4
+    assert primary.calls + secondary.calls == 4 + 3
+    hedges = router.stats["a"].counts["hedges"] + router.stats["b"].counts["hedges"]
+    assert hedges == 3
+
+
+def test_failover_on_provider_error():
+    primary = FakeProvider("a", latency_ms=5, error_rate=1.0)
+    secondary = FakeProvider("b", latency_ms=5)
+    router = LLMRouter([primary, secondary])
+
+    result = router.generate("hola", timeout=2)
+
+    assert result["provider"] == "b" and result["hedged"] is False
+    assert router.stats["a"].counts["errors"] == 1
+    assert router.stats["b"].counts["wins"] == 1
+
+
+def test_failing_provider_cools_down_and_recovers():
+    primary = FakeProvider("a", latency_ms=5)
+    secondary = FakeProvider("b", latency_ms=5)
+    router = LLMRouter([primary, secondary], max_error_rate=0.5, cooldown=0.2)
+    router.stats["a"].record_success(0.01)
+    router.stats["b"].record_success(0.05)
+    assert [provider.name for provider in router.ranked()] == ["a", "b"]
+
+    for _ in range(5):
+        router.stats["a"].record_failure()
+    assert [provider.name for provider in router.ranked()] == ["b", "a"]
+    assert router.get_stats()["providers"][0]["cooling_down"] is True
+
+    time.sleep(0.25)
+    assert [provider.name for provider in router.ranked()] == ["a", "b"]
@@ -0,0 +1,34 @@
+import fakeredis
+
+from langgraph.application.lang_response import LangGraphResponse
+from langgraph.application.local_classifier import LocalIntentClassifier
+
+
+def test_llm_intent_with_history_is_not_stored_as_label():
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    classifier = LocalIntentClassifier()
+    classifier._known_intents = {"reporte_ventas"}
+
+    classifier.record_llm_result(redis_client, "sí", "reporte_ventas", None, store_label=False)
+    assert redis_client.llen(classifier.LABELS_KEY) == 0
+
+    classifier.record_llm_result(redis_client, "reporte de ventas", "reporte_ventas", None)
+    assert redis_client.llen(classifier.LABELS_KEY) == 1
+
+
+def test_newest_label_wins_for_relabeled_message(monkeypatch):
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    actions = [
+        {"source_key": "erp", "id": "ventas", "tags": ["reporte_ventas"], "examples": ["ventas del mes"]},
+        {"source_key": "erp", "id": "compras", "tags": ["reporte_compras"], "examples": ["compras del mes"]}
+    ]
+    monkeypatch.setattr(LangGraphResponse, "load_actions", staticmethod(lambda client: actions))
+    classifier = LocalIntentClassifier()
+    classifier._known_intents = {"reporte_ventas", "reporte_compras"}
+
+    classifier.record_llm_result(redis_client, "el reporte de siempre", "reporte_ventas", None)
+    classifier.record_llm_result(redis_client, "El reporte de siempre", "reporte_compras", None)
+    classifier.refresh(redis_client, force=True)
+
+    assert classifier.predict("el reporte de siempre")["intent"] == "reporte_compras"
+    assert len(classifier.index) == 3
@@ -0,0 +1,79 @@
+import fakeredis
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+
+from langgraph.infrastructure.redis_checkpointer import RedisCheckpointSaver
+
+
+@pytest.fixture
+def saver():
+    return RedisCheckpointSaver(redis=fakeredis.FakeRedis(), keep=3)
+
+
+def config(fence_token=None, checkpoint_id=None):
+    return {"configurable": {"thread_id": "u1", "checkpoint_ns": "", "checkpoint_id": checkpoint_id,
+                             "fence_token": fence_token}}
+
+
+def turn(saver, fence_token=None, steps=1):
+    """Un turno: lee el último checkpoint y escribe steps checkpoints encadenados."""
+    latest = saver.get_tuple(config(fence_token))
+    parent = latest.config["configurable"]["checkpoint_id"] if latest else None
+    written = []
+    for _ in range(steps):
+        checkpoint = empty_checkpoint()
+        saved = saver.put(config(fence_token, parent), checkpoint, {}, {})
+        parent = saved["configurable"]["checkpoint_id"]
+        written.append(parent)
+    return written
+
+
+def latest_id(saver, fence_token=None):
+    return saver.get_tuple(config(fence_token)).config["configurable"]["checkpoint_id"]
+
+
+def test_checkpoints_without_fence_token_stay_latest(saver):
+    turn(saver, fence_token=7, steps=2)
+    newest = turn(saver, fence_token=None, steps=2)[-1]
+
+    assert latest_id(saver) == newest
+
+
+def test_reset_fence_counter_does_not_hide_new_checkpoints(saver):
+    turn(saver, fence_token=500, steps=2)
+    newest = turn(saver, fence_token=1, steps=2)[-1]
+
+    assert latest_id(saver, fence_token=2) == newest
+
+
+def test_prune_keeps_the_newest_checkpoints(saver):
+    turn(saver, fence_token=9, steps=4)
+    newest = turn(saver, fence_token=None, steps=6)
+
+    # keep=3 + slack=5: la poda borra los más antiguos, nunca los del turno sin token
+    ids = [item.config["configurable"]["checkpoint_id"] for item in saver.list(config())]
+    assert 3 <= len(ids) < len(newest)
+    assert ids == newest[::-1][:len(ids)]
+    assert latest_id(saver) == newest[-1]
+
+
+def test_stale_owner_stays_below_new_owner(saver):
+    stale = RedisCheckpointSaver(redis=saver.redis, keep=3)
+    stale.get_tuple(config(2))
+    owner = turn(saver, fence_token=3)[-1]
+
+    late = stale.put(config(2), empty_checkpoint(), {}, {})["configurable"]["checkpoint_id"]
+
+    assert late > owner
+    assert latest_id(saver, fence_token=4) == owner
+
+
+def test_list_before_follows_index_order(saver):
+    turn(saver, fence_token=5, steps=2)
+    turn(saver, fence_token=None, steps=2)
+    ordered = [item.config["configurable"]["checkpoint_id"] for item in saver.list(config())]
+
+    for position, checkpoint_id in enumerate(ordered):
+        before = [item.config["configurable"]["checkpoint_id"]
+                  for item in saver.list(config(), before=config(checkpoint_id=checkpoint_id))]
+        assert before == ordered[position + 1:]
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from jobs.infrastructure.redis_job_queue import RedisJobQueue
+from jobs.infrastructure.worker import JobWorker
+from websocket.infrastructure.ws_push import ws_push
+
+
+@pytest.fixture
+def queue(fake_redis, monkeypatch):
+    monkeypatch.setattr(ws_push, "push", lambda *args, **kwargs: None)
+    queue = RedisJobQueue(visibility_timeout=1, retry_backoff=5, retry_backoff_max=20)
+    queue.ensure_group()
+    return queue
+
+
+def test_enqueue_stores_job_and_adds_message(queue, fake_redis):
+    job_id = queue.enqueue("healthcheck", {"steps": 2}, code_user="u1", max_retries=2)
+
+    job = queue.get_status(job_id)
+    assert job["status"] == "queued"
+    assert job["payload"] == {"steps": 2}
+    assert job["max_retries"] == 2
+    assert queue.read("c1", block_ms=10) == [(fake_redis.xrange(queue.STREAM_KEY)[0][0], job_id)]
+
+
+def test_reclaim_returns_messages_past_visibility_timeout(queue):
+    job_id = queue.enqueue("healthcheck", {}, code_user="u1")
+    [(message_id, _)] = queue.read("c1", block_ms=10)
+
+    assert queue.reclaim("c2") == []
+    time.sleep(1.1)
+    assert queue.reclaim("c2") == [(message_id, job_id)]
+
+
+def test_fail_schedules_retry_with_backoff(queue, fake_redis):
+    job_id = queue.enqueue("healthcheck", {}, code_user="u1", max_retries=2)
+    [(message_id, _)] = queue.read("c1", block_ms=10)
+    job = queue.start_attempt(job_id)
+
+    before = time.time()
+    assert queue.fail(message_id, job, "boom") == "retrying"
+
+    # Sin reencolado inmediato: el job espera su backoff en jobs:retry
+    assert fake_redis.xlen(queue.STREAM_KEY) == 0
+    due = fake_redis.zscore(queue.RETRY_KEY, job_id)
+    assert before + 5 <= due <= time.time() + 5
+    assert queue.promote_due_retries() == 0
+
+    fake_redis.zadd(queue.RETRY_KEY, {job_id: time.time() - 1})
+    assert queue.promote_due_retries() == 1
+    assert fake_redis.zcard(queue.RETRY_KEY) == 0
+    assert [job for _, job in queue.read("c1", block_ms=10)] == [job_id]
+
+
+def test_retry_delay_doubles_up_to_max(queue):
+    assert [queue.retry_delay(attempt) for attempt in range(1, 5)] == [5, 10, 20, 20]
+
+
+def test_fail_moves_to_dead_letter_when_retries_exhausted(queue, fake_redis):
+    job_id = queue.enqueue("healthcheck", {}, code_user="u1", max_retries=0)
+    [(message_id, _)] = queue.read("c1", block_ms=10)
+    job = queue.start_attempt(job_id)
+
+    assert queue.fail(message_id, job, "boom") == "failed"
+
+    [(_, dead)] = fake_redis.xrange(queue.DEAD_LETTER_KEY)
+    assert dead == {"job_id": job_id, "error": "boom"}
+    assert fake_redis.zcard(queue.RETRY_KEY) == 0
+    assert fake_redis.xpending(queue.STREAM_KEY, queue.GROUP)["pending"] == 0
+    assert queue.get_result(job_id)["status"] == "failed"
+
+
+def test_worker_retries_failing_handler_until_dead_letter(queue, fake_redis, monkeypatch):
+    calls = []
+
+    def flaky(payload, progress):
+        calls.append(payload)
+        raise RuntimeError("falla")
+
+    monkeypatch.setattr("jobs.infrastructure.worker.get_job_handler", lambda job_type: flaky)
+    worker = JobWorker(queue, consumer="c1", block_ms=10)
+    job_id = queue.enqueue("healthcheck", {"n": 1}, code_user="u1", max_retries=1)
+
+    for _ in range(2):
+        [(message_id, read_id)] = queue.read("c1", block_ms=10)
+        worker.process(message_id, read_id)
+        # Adelanta el backoff del reintento agendado
+        if fake_redis.zscore(queue.RETRY_KEY, job_id) is not None:
+            fake_redis.zadd(queue.RETRY_KEY, {job_id: 0})
+            queue.promote_due_retries()
+
+    assert len(calls) == 2
+    assert queue.get_status(job_id)["status"] == "failed"
+    assert fake_redis.xlen(queue.DEAD_LETTER_KEY) == 1
+
+
+def test_worker_completes_job(queue, monkeypatch):
+    monkeypatch.setattr("jobs.infrastructure.worker.get_job_handler", lambda job_type: lambda payload, progress: {"ok": True})
+    worker = JobWorker(queue, consumer="c1", block_ms=10)
+    job_id = queue.enqueue("healthcheck", {}, code_user="u1")
+
+    [(message_id, _)] = queue.read("c1", block_ms=10)
+    worker.process(message_id, job_id)
+
+    assert queue.get_result(job_id) == {"status": "completed", "result": {"ok": True}, "error": None}
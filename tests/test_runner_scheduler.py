@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+# El scheduler importa el connection_manager y los modelos del Runner
+runner_scheduler = pytest.importorskip("runner.application.runner_scheduler")
+model = pytest.importorskip("runner.domain.dataModel.model")
+
+NoEligibleRunnerError = runner_scheduler.NoEligibleRunnerError
+RunnerScheduler = runner_scheduler.RunnerScheduler
+
+
+class FakeManager:
+    """connection_manager con Runners locales y un envío configurable por runner."""
+
+    def __init__(self, runners, failures=()):
+        now = datetime.now()
+        self.active_connections = {runner_id: object() for runner_id in runners}
+        self.registered_runners = {
+            runner_id: SimpleNamespace(client_name=info.get("client", "acme"), capabilities=info.get("caps", ["SQL"]))
+            for runner_id, info in runners.items()
+        }
+        self.last_heartbeat = {
+            runner_id: now - timedelta(seconds=info.get("age", 0)) for runner_id, info in runners.items()
+        }
+        self.failures = set(failures)
+        self.sent = []
+
+    async def send_command(self, runner_id, command, wait_response=True, timeout=30):
+        self.sent.append((runner_id, command.command_id))
+        if runner_id in self.failures:
+            raise TimeoutError(f"{runner_id} no respondió")
+        return model.RunnerResponse.model_validate({"success": True, "data": runner_id, "error": None})
+
+
+def command(query="select 1"):
+    return model.RunnerCommand(
+        command_id="original",
+        command_type="SQL_QUERY",
+        payload={"adapter_type": "postgres", "query": query},
+        timeout=5
+    )
+
+
+def test_selects_least_loaded_then_fastest_runner():
+    scheduler = RunnerScheduler(FakeManager({"r1": {}, "r2": {}, "r3": {}}))
+    scheduler.in_flight["r1"] = 1
+    scheduler.latency_ms["r2"] = runner_scheduler.EWMA()
+    scheduler.latency_ms["r2"].update(80)
+    scheduler.latency_ms["r3"] = runner_scheduler.EWMA()
+    scheduler.latency_ms["r3"].update(20)
+
+    assert scheduler.select_runner() == "r3"
+    assert scheduler.select_runner(exclude=["r3"]) == "r2"
+
+
+def test_excludes_stale_and_non_matching_runners():
+    manager = FakeManager({
+        "viejo": {"age": 600},
+        "otro_cliente": {"client": "globex"},
+        "sin_sql": {"caps": ["FILES"]},
+        "ok": {}
+    })
+    scheduler = RunnerScheduler(manager, heartbeat_ttl=90)
+
+    assert scheduler.eligible_runners(capability="SQL", client_name="acme") == ["ok"]
+    assert not scheduler.is_fresh(manager.last_heartbeat["viejo"])
+    assert not scheduler.is_fresh(None)
+    with pytest.raises(NoEligibleRunnerError):
+        scheduler.select_runner(capability="SQL", client_name="acme", exclude=["ok"])
+
+
+def test_remote_presence_counts_as_eligible():
+    presence = SimpleNamespace(list_runners=lambda: [
+        {"runner_id": "remoto", "client_name": "acme", "capabilities": ["SQL"],
+         "last_heartbeat": datetime.now().isoformat()}
+    ])
+    scheduler = RunnerScheduler(FakeManager({}), presence=presence)
+
+    assert scheduler.eligible_runners(capability="SQL") == ["remoto"]
+
+
+def test_failed_runner_is_penalized_and_retry_uses_new_command_id():
+    manager = FakeManager({"r1": {}, "r2": {}}, failures=["r1"])
+    scheduler = RunnerScheduler(manager)
+
+    runner_id, response, attempts = asyncio.run(scheduler.dispatch(command(), timeout=2))
+
+    assert (runner_id, response.data, attempts) == ("r2", "r2", 2)
+    assert scheduler.latency_ms["r1"].value == 2000
+    assert scheduler.in_flight == {}
+    # Cada intento viaja con su propio id: una respuesta tardía de r1 no se confunde con la de r2
+    sent_ids = [command_id for _, command_id in manager.sent]
+    assert len(set(sent_ids)) == 2 and "original" not in sent_ids
+
+    manager.failures.clear()
+    assert scheduler.select_runner() == "r2"
+
+
+def test_non_idempotent_command_is_not_retried():
+    manager = FakeManager({"r1": {}, "r2": {}}, failures=["r1", "r2"])
+    scheduler = RunnerScheduler(manager)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(scheduler.dispatch(command("delete from ventas"), timeout=2))
+
+    assert len(manager.sent) == 1
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from infrastructure.concurrency.turn_lock import TurnLock, TurnLockTimeout
+
+LOCK_KEY = "turn:lock:u1"
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def test_second_turn_waits_for_the_first_and_gets_a_higher_token(redis):
+    lock = TurnLock(redis=redis, lease=5, max_wait=2)
+    first_holding, release_first = threading.Event(), threading.Event()
+    tokens, order = {}, []
+
+    def first():
+        with lock.hold("u1") as token:
+            tokens["first"] = token
+            first_holding.set()
+            release_first.wait(2)
+            order.append("first")
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    first_holding.wait(2)
+    threading.Timer(0.05, release_first.set).start()
+
+    with lock.hold("u1") as token:
+        tokens["second"] = token
+        order.append("second")
+    thread.join(2)
+
+    assert order == ["first", "second"]
+    assert tokens["second"] > tokens["first"]
+    assert lock.stats["contended"] == 1 and lock.stats["acquired"] == 2
+    assert redis.get(LOCK_KEY) is None
+
+
+def test_other_users_do_not_contend(redis):
+    lock = TurnLock(redis=redis, lease=5, max_wait=0.05)
+
+    with lock.hold("u1"), lock.hold("u2"):
+        pass
+
+    assert lock.stats["contended"] == 0
+
+
+def test_times_out_while_previous_turn_is_running(redis):
+    lock = TurnLock(redis=redis, lease=5, max_wait=0.05)
+
+    with lock.hold("u1"):
+        started = time.monotonic()
+        with pytest.raises(TurnLockTimeout) as error:
+            with lock.hold("u1"):
+                pass
+
+    assert 0.05 <= time.monotonic() - started < 0.5
+    assert error.value.retry_after >= 1.0
+    assert lock.stats["timeouts"] == 1
+    assert redis.get(LOCK_KEY) is None
+
+
+def test_release_after_lease_expired_keeps_new_owner(redis):
+    lock = TurnLock(redis=redis, lease=0.05, max_wait=1)
+
+    slow_turn = lock.hold("u1")
+    first_token = slow_turn.__enter__()
+    time.sleep(0.1)
+
+    # El lease venció: el siguiente turno lo toma sin esperar
+    new_turn = lock.hold("u1")
+    second_token = new_turn.__enter__()
+    new_owner = redis.get(LOCK_KEY)
+
+    slow_turn.__exit__(None, None, None)
+    assert redis.get(LOCK_KEY) == new_owner
+    assert lock.stats["expired_on_release"] == 1
+    assert lock.stats["contended"] == 0
+    assert second_token > first_token
+
+    new_turn.__exit__(None, None, None)
+    assert redis.get(LOCK_KEY) is None
@@ -0,0 +1,113 @@
+import json
+import threading
+
+import fakeredis
+import pytest
+
+from websocket.infrastructure.ws_dedup import PENDING_PREFIX, DuplicateInFlight, WSMessageDeduplicator
+
+KEY = "ws:dedup:u1:m1"
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def dedup(redis):
+    return WSMessageDeduplicator(redis=redis, window=60, lease=5, max_wait=0.3)
+
+
+def frame(text):
+    return json.dumps({"msg": text})
+
+
+def test_handler_does_not_run_when_every_claim_is_lost(dedup, redis, monkeypatch):
+    # El id se libera en cada espera pero otro reintento lo toma primero
+    redis.set(KEY, f"{PENDING_PREFIX}otro")
+    monkeypatch.setattr(dedup, "_wait_for_original", lambda *args: None)
+    calls = []
+
+    with pytest.raises(DuplicateInFlight):
+        dedup.run("u1", "m1", lambda: calls.append(1) or (frame("ok"), True))
+
+    assert calls == []
+    assert redis.get(KEY) == f"{PENDING_PREFIX}otro"
+    assert dedup.stats["claim_failures"] == 1
+
+
+def test_response_does_not_overwrite_marker_of_new_owner(dedup, redis):
+    def handler():
+        # El lease venció durante el turno y otro reintento tomó el id
+        redis.set(KEY, f"{PENDING_PREFIX}otro")
+        return frame("tarde"), True
+
+    assert dedup.run("u1", "m1", handler) == frame("tarde")
+    assert redis.get(KEY) == f"{PENDING_PREFIX}otro"
+    assert dedup.stats["lost_leases"] == 1
+
+
+def test_resent_message_replays_stored_response(dedup, redis):
+    calls = []
+
+    def handler():
+        calls.append(1)
+        return frame(f"respuesta {len(calls)}"), True
+
+    first = dedup.run("u1", "m1", handler)
+    second = dedup.run("u1", "m1", handler)
+
+    assert first == second == frame("respuesta 1")
+    assert calls == [1]
+    assert dedup.stats["replayed"] == 1
+    assert 0 < redis.ttl(KEY) <= 60
+
+
+def test_resent_message_waits_for_original_in_flight(dedup):
+    original_running, finish_original = threading.Event(), threading.Event()
+    calls, results = [], {}
+
+    def handler():
+        calls.append(1)
+        original_running.set()
+        finish_original.wait(2)
+        return frame("original"), True
+
+    thread = threading.Thread(target=lambda: results.setdefault("original", dedup.run("u1", "m1", handler)))
+    thread.start()
+    original_running.wait(2)
+    threading.Timer(0.05, finish_original.set).start()
+
+    resent = dedup.run("u1", "m1", handler)
+    thread.join(2)
+
+    assert resent == results["original"] == frame("original")
+    assert calls == [1]
+    assert dedup.stats["waited"] == 1 and dedup.stats["replayed"] == 1
+
+
+def test_resent_message_gives_up_while_original_keeps_running(dedup, redis):
+    redis.set(KEY, f"{PENDING_PREFIX}otro", px=5000)
+
+    with pytest.raises(DuplicateInFlight) as error:
+        dedup.run("u1", "m1", lambda: (frame("no"), True))
+
+    assert error.value.retry_after >= 1.0
+    assert dedup.stats["in_flight_timeouts"] == 1
+
+
+def test_uncacheable_response_releases_the_id(dedup, redis):
+    responses = iter([(frame("saturado"), False), (frame("ok"), True)])
+
+    assert dedup.run("u1", "m1", lambda: next(responses)) == frame("saturado")
+    assert redis.get(KEY) is None
+    assert dedup.run("u1", "m1", lambda: next(responses)) == frame("ok")
+    assert dedup.stats["not_cached"] == 1 and dedup.stats["processed"] == 2
+
+
+def test_handler_error_releases_the_id(dedup, redis):
+    with pytest.raises(ZeroDivisionError):
+        dedup.run("u1", "m1", lambda: 1 / 0)
+
+    assert redis.get(KEY) is None
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+
+from fastapi import WebSocketDisconnect
+
+from websocket.application.ws_pipeline import ConnectionPipeline, PipelineConfig
+
+
+class FakeWebSocket:
+    def __init__(self, messages, close_after: float):
+        self.messages = list(messages)
+        self.close_after = close_after
+        self.sent = []
+
+    async def receive_text(self) -> str:
+        if self.messages:
+            delay, message = self.messages.pop(0)
+            await asyncio.sleep(delay)
+            return message
+        await asyncio.sleep(self.close_after)
+        raise WebSocketDisconnect(code=1000)
+
+    async def send_text(self, data: str) -> None:
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        pass
+
+
+def test_timed_out_handler_does_not_overlap_next_turn(monkeypatch):
+    monkeypatch.setattr("websocket.application.ws_pipeline.TIMEOUT_GRACE", 0.05)
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def handler(raw_message, deadline):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        # Ignora el deadline: sigue corriendo después del timeout del pipeline
+        time.sleep(0.6 if raw_message == "lento" else 0.01)
+        with lock:
+            running -= 1
+        return raw_message
+
+    websocket = FakeWebSocket([(0, "lento"), (0.45, "rapido")], close_after=1.5)
+    pipeline = ConnectionPipeline(websocket, handler, PipelineConfig(idle_timeout=0), turn_timeout=0.4)
+
+    async def run():
+        try:
+            await pipeline.run()
+        except WebSocketDisconnect:
+            pass
+
+    asyncio.run(run())
+
+    assert max_running == 1
+    assert pipeline.stats["straggler_waits"] == 1
+    # El primero responde timeout; el segundo corre cuando el hilo del primero termina
+    assert '"stage":"handler"' in websocket.sent[0]
+    assert websocket.sent[1] == "rapido"
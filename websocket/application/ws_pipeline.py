@@ -0,0 +1,342 @@
+"""
+Pipeline por conexión WebSocket con colas acotadas y backpressure.
+
+Cada conexión tiene tres tareas independientes:
+    reader    -> lee frames del socket y los encola (cola de entrada acotada)
+    processor -> procesa los mensajes en orden, uno a la vez, en un hilo
+    sender    -> envía las respuestas y notificaciones (cola de salida acotada)
+
+Así la lectura y el envío nunca se bloquean entre sí y el orden de los
+mensajes del usuario se preserva. Si la salida se llena, el processor espera
+(backpressure) y, al llenarse la entrada, se aplica la política de desborde:
+    drop   -> se descarta el mensaje nuevo
+    reject -> se descarta y se responde un error 1008 al usuario
+    close  -> se cierra la conexión con 1008
+
+Coalescing: las notificaciones con coalesce_key (ej: progreso de un job) que
+aún no se enviaron se reemplazan por la más reciente en lugar de encolarse.
+
+Deadline: con turn_timeout, cada mensaje recibe un Deadline al leerse (la
+espera en cola cuenta) que el handler propaga al grafo. Si el handler no
+responde a tiempo, el pipeline envía un timeout y descarta su resultado; el
+siguiente mensaje no empieza hasta que ese hilo termine (un solo handler en
+curso por conexión, así los turnos del usuario nunca se solapan).
+
+Inactividad: con idle_timeout, una conexión sin mensajes del usuario durante
+ese tiempo (y sin turno en curso) se cierra con 1000; así las pestañas
+olvidadas liberan su cupo. Las notificaciones de fondo no cuentan como
+actividad. La detección de pares caídos es del servidor (ping/pong del
+protocolo, ver infrastructure/config/uvicorn_worker.py).
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from configparser import ConfigParser
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from infrastructure.concurrency.deadline import Deadline
+from infrastructure.serialization.json_codec import dumps_str
+from websocket.utils.utils import WSCode, build_error_response, build_timeout_response
+
+
+OVERFLOW_POLICIES = ("drop", "reject", "close")
+# Margen para que el handler responda su propio timeout antes que el pipeline
+TIMEOUT_GRACE = 1.0
+
+_handler_executor: Optional[ThreadPoolExecutor] = None
+_handler_executor_lock = threading.Lock()
+
+
+def get_handler_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    Pool de hilos de los handlers, compartido por las conexiones del worker.
+    Es propio (no el executor por defecto de asyncio, de cpu+4 hilos) para que
+    los mensajes lleguen al limitador de Gemini, que decide si esperan o se
+    rechazan, en lugar de quedar en una cola oculta sin límite de tiempo.
+    """
+    global _handler_executor
+    if _handler_executor is None:
+        with _handler_executor_lock:
+            if _handler_executor is None:
+                _handler_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ws-handler")
+    return _handler_executor
+
+
+class PipelineConfig:
+    """Parámetros del pipeline leídos de la sección [WS] de config.ini."""
+
+    def __init__(
+        self,
+        inbound_queue_size: int = 8,
+        outbound_queue_size: int = 32,
+        overflow_policy: str = "reject",
+        coalesce: bool = True,
+        flush_timeout: float = 5.0,
+        handler_threads: int = 64,
+        idle_timeout: float = 900.0
+    ):
+        """
+        Args:
+            inbound_queue_size: Mensajes del usuario pendientes de procesar
+            outbound_queue_size: Mensajes pendientes de enviar al usuario
+            overflow_policy: drop, reject o close al llenarse la entrada
+            coalesce: Reemplazar notificaciones pendientes con la misma coalesce_key
+            flush_timeout: Segundos para enviar lo pendiente antes de cerrar por error
+            handler_threads: Hilos del pool de handlers (compartido por todas las conexiones)
+            idle_timeout: Segundos sin mensajes del usuario antes de cerrar la conexión (0 = nunca)
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy debe ser una de {OVERFLOW_POLICIES}")
+        self.inbound_queue_size = inbound_queue_size
+        self.outbound_queue_size = outbound_queue_size
+        self.overflow_policy = overflow_policy
+        self.coalesce = coalesce
+        self.flush_timeout = flush_timeout
+        self.handler_threads = handler_threads
+        self.idle_timeout = idle_timeout
+
+    @classmethod
+    def from_config(cls) -> "PipelineConfig":
+        config = ConfigParser()
+        config.read("config.ini")
+        return cls(
+            inbound_queue_size=config.getint("WS", "inbound_queue_size", fallback=8),
+            outbound_queue_size=config.getint("WS", "outbound_queue_size", fallback=32),
+            overflow_policy=config.get("WS", "overflow_policy", fallback="reject"),
+            coalesce=config.getboolean("WS", "coalesce", fallback=True),
+            flush_timeout=config.getfloat("WS", "flush_timeout", fallback=5.0),
+            handler_threads=config.getint("WS", "handler_threads", fallback=64),
+            idle_timeout=config.getfloat("WS", "idle_timeout", fallback=900.0)
+        )
+
+
+class ConnectionPipeline:
+    """Reader, processor y sender desacoplados para una conexión."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        handler: Callable[[str, Optional[Deadline]], Union[str, Dict[str, Any]]],
+        config: Optional[PipelineConfig] = None,
+        turn_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            websocket: Conexión ya aceptada y autenticada
+            handler: Función síncrona (raw_message, deadline) -> respuesta (dict o JSON ya serializado); se ejecuta en un hilo
+            config: Parámetros del pipeline
+            turn_timeout: Segundos de presupuesto por mensaje (None = sin deadline)
+        """
+        self.websocket = websocket
+        self.handler = handler
+        self.config = config or PipelineConfig.from_config()
+        self.turn_timeout = turn_timeout
+
+        self._inbound: asyncio.Queue = asyncio.Queue(maxsize=self.config.inbound_queue_size)
+        self._outbound: Deque[Tuple[Optional[str], Optional[Union[str, Dict[str, Any]]]]] = deque()
+        self._latest: Dict[str, Union[str, Dict[str, Any]]] = {}
+        self._has_items = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self._has_space.set()
+        self._closed = False
+        self._busy = False
+        self._last_activity = time.monotonic()
+        # Handler que superó su deadline y sigue corriendo en su hilo
+        self._straggler: Optional[asyncio.Future] = None
+
+        self.stats = {"received": 0, "processed": 0, "sent": 0, "dropped": 0,
+                      "rejected": 0, "coalesced": 0, "push_dropped": 0, "timeouts": 0,
+                      "idle_closed": 0, "straggler_waits": 0}
+
+    # ------------------------------------------------------------
+    # Cola de salida
+    # ------------------------------------------------------------
+    async def _put_outbound(self, data: Union[str, Dict[str, Any]], coalesce_key: Optional[str] = None, wait: bool = True) -> bool:
+        if self._closed:
+            return False
+
+        if coalesce_key and self.config.coalesce and coalesce_key in self._latest:
+            self._latest[coalesce_key] = data
+            self.stats["coalesced"] += 1
+            return True
+
+        while len(self._outbound) >= self.config.outbound_queue_size:
+            if not wait or self._closed:
+                return False
+            self._has_space.clear()
+            await self._has_space.wait()
+
+        if coalesce_key and self.config.coalesce:
+            self._latest[coalesce_key] = data
+            self._outbound.append((coalesce_key, None))
+        else:
+            self._outbound.append((None, data))
+        self._has_items.set()
+        return True
+
+    async def send_json(self, data: Dict[str, Any], coalesce_key: Optional[str] = None) -> None:
+        """
+        Encola una notificación de fondo sin bloquear (ej: progreso de jobs).
+        Si la salida está llena se descarta.
+
+        Raises:
+            ConnectionError: Si el pipeline ya está cerrado
+        """
+        if self._closed:
+            raise ConnectionError("Pipeline cerrado")
+        if not await self._put_outbound(data, coalesce_key, wait=False):
+            self.stats["push_dropped"] += 1
+
+    # ------------------------------------------------------------
+    # Tareas
+    # ------------------------------------------------------------
+    async def _reader(self) -> None:
+        while True:
+            raw_message = await self.websocket.receive_text()
+            self._last_activity = time.monotonic()
+            self.stats["received"] += 1
+            deadline = Deadline.after(self.turn_timeout) if self.turn_timeout else None
+            try:
+                self._inbound.put_nowait((raw_message, deadline))
+                continue
+            except asyncio.QueueFull:
+                pass
+
+            policy = self.config.overflow_policy
+            if policy == "close":
+                await self.websocket.close(code=WSCode.POLICY_VIOLATION, reason="Demasiados mensajes en cola")
+                return
+            if policy == "reject":
+                self.stats["rejected"] += 1
+                error = build_error_response(
+                    error="Demasiados mensajes en cola",
+                    detail=f"Espera la respuesta de tus mensajes anteriores (máximo {self.config.inbound_queue_size} pendientes)",
+                    ws_code=WSCode.POLICY_VIOLATION
+                )
+                await self._put_outbound(error.model_dump_json(exclude_none=True), wait=False)
+            else:
+                self.stats["dropped"] += 1
+
+    async def _wait_straggler(self) -> None:
+        """Espera al handler anterior que superó su deadline antes de iniciar otro turno."""
+        straggler, self._straggler = self._straggler, None
+        if straggler is None or straggler.done():
+            return
+        self.stats["straggler_waits"] += 1
+        try:
+            await straggler
+        except Exception:
+            # Su resultado ya se descartó (el usuario recibió el timeout)
+            pass
+
+    async def _run_handler(self, raw_message: str, deadline: Optional[Deadline]) -> Union[str, Dict[str, Any]]:
+        await self._wait_straggler()
+        if deadline is not None and deadline.expired:
+            # Agotó su presupuesto esperando en la cola de entrada: no se procesa
+            self.stats["timeouts"] += 1
+            return build_timeout_response("queue").model_dump_json(exclude_none=True)
+
+        executor = get_handler_executor(self.config.handler_threads)
+        future = asyncio.get_running_loop().run_in_executor(executor, self.handler, raw_message, deadline)
+        if deadline is None:
+            return await future
+
+        # asyncio.wait no cancela el future: el pipeline sigue sabiendo si el hilo terminó
+        done, _ = await asyncio.wait({future}, timeout=deadline.remaining() + TIMEOUT_GRACE)
+        if future in done:
+            return future.result()
+
+        # El hilo se detiene en su próximo chequeo del deadline; su resultado se descarta
+        self._straggler = future
+        self.stats["timeouts"] += 1
+        return build_timeout_response("handler").model_dump_json(exclude_none=True)
+
+    async def _processor(self) -> None:
+        while True:
+            raw_message, deadline = await self._inbound.get()
+            self._busy = True
+            try:
+                result = await self._run_handler(raw_message, deadline)
+            finally:
+                self._busy = False
+                # El tiempo de procesamiento no cuenta como inactividad
+                self._last_activity = time.monotonic()
+            self.stats["processed"] += 1
+            # Si la salida está llena, esperar (backpressure hacia la entrada)
+            await self._put_outbound(result)
+
+    async def _sender(self) -> None:
+        while True:
+            while not self._outbound:
+                self._has_items.clear()
+                await self._has_items.wait()
+
+            coalesce_key, data = self._outbound.popleft()
+            if coalesce_key is not None:
+                data = self._latest.pop(coalesce_key)
+            self._has_space.set()
+
+            # Frames de texto (los clientes esperan string); JSON con orjson
+            await self.websocket.send_text(data if isinstance(data, str) else dumps_str(data))
+            self.stats["sent"] += 1
+
+    async def _idle_watch(self) -> None:
+        """Cierra la conexión tras idle_timeout sin mensajes del usuario."""
+        timeout = self.config.idle_timeout
+        while True:
+            idle = time.monotonic() - self._last_activity
+            if idle < timeout or self._busy or not self._inbound.empty():
+                await asyncio.sleep(max(timeout - idle, 1.0))
+                continue
+            self.stats["idle_closed"] += 1
+            await self.websocket.close(code=WSCode.NORMAL, reason="Conexión cerrada por inactividad")
+            return
+
+    async def _flush(self) -> None:
+        """Espera a que el sender vacíe la cola de salida."""
+        while self._outbound:
+            await asyncio.sleep(0.01)
+
+    async def run(self) -> None:
+        """
+        Ejecuta el pipeline hasta que el cliente se desconecte o falle el procesamiento.
+
+        Raises:
+            WebSocketDisconnect: Si el cliente cerró la conexión
+            Exception: El error del handler (tras enviar las respuestas pendientes)
+        """
+        reader = asyncio.create_task(self._reader())
+        processor = asyncio.create_task(self._processor())
+        sender = asyncio.create_task(self._sender())
+        tasks = {reader, processor, sender}
+        if self.config.idle_timeout:
+            tasks.add(asyncio.create_task(self._idle_watch()))
+
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            reader.cancel()
+
+            if processor in done and processor.exception() is not None and not sender.done():
+                try:
+                    await asyncio.wait_for(self._flush(), timeout=self.config.flush_timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._closed = True
+            self._has_space.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        for task in (reader, processor, sender):
+            if task.cancelled() or task.exception() is None:
+                continue
+            error = task.exception()
+            if task is sender and not isinstance(error, WebSocketDisconnect):
+                # Fallo al escribir: el cliente ya no está disponible
+                raise WebSocketDisconnect(code=1006) from error
+            raise error
@@ -15,6 +15,10 @@ class WsChatMessageRequest(BaseModel):
     area: str
     canal: str = "ws"
     params_required: Optional[Dict[str, Any]] = None
+    # Id del mensaje generado por el cliente: los reenvíos con el mismo id reciben la respuesta guardada
+    client_message_id: Optional[str] = None
+    # Frame ya parseado por el socket (se parsea una sola vez; no se persiste)
+    parsed_message: Optional[Dict[str, Any]] = Field(default=None, exclude=True)
 
 class WSSuccessResponse(BaseModel):
     success: bool = True
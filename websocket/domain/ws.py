@@ -1,9 +1,18 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 import json
-from websocket.domain.dataModel.model import WsChatMessageRequest
+from typing import Optional, Tuple
+from infrastructure.concurrency.adaptive_limiter import LimiterOverloaded
+from infrastructure.concurrency.deadline import Deadline, DeadlineExpired, turn_timeout_for_area
+from infrastructure.concurrency.turn_lock import TurnLockTimeout
+from infrastructure.serialization.json_codec import loads, looks_like_json_object
+from websocket.application.ws_pipeline import ConnectionPipeline
+from websocket.domain.dataModel.model import WSErrorResponse, WsChatMessageRequest
+from websocket.infrastructure.ws_admission import WSAdmissionRejected, reject_handshake, ws_admission
+from websocket.infrastructure.ws_push import ws_push
 from websocket.infrastructure.ws_controller import WSChatController
+from websocket.infrastructure.ws_dedup import DuplicateInFlight, normalize_message_id, ws_dedup
 from websocket.infrastructure.ws_security import WSSecurityManager
-from websocket.utils.utils import WSCode, build_error_response
+from websocket.utils.utils import WSCode, build_error_response, build_timeout_response
  
 ws = APIRouter()
 
@@ -17,18 +26,23 @@ async def ia_agent_ws(websocket: WebSocket):
         - code_user: Código del usuario (opcional)
         - fullname: Nombre completo del usuario (opcional)
         - area: Area de operacion (opcional, default: general)
+
+    Los mensajes pueden enviarse como texto o como JSON
+    {"message": "...", "client_message_id": "...", "params_required": {...}};
+    con client_message_id los reenvíos reciben la respuesta del original
+    sin volver a procesarse (ver ws_dedup).
     
     Ejemplo de conexión desde JavaScript:
         const ws = new WebSocket('ws://localhost:8000/ws/chat?token=secret123&code_user=USER001&fullname=Juan%20Perez&area=ventas');
+
+    La autenticación y el control de admisión (cupo del worker y del usuario)
+    se hacen antes de accept(): una conexión rechazada no llega a abrirse.
     """
-    # IMPORTANTE: Aceptar PRIMERO para hacer el handshake WebSocket
-    await websocket.accept()
-    
-    # 1️⃣ Ahora SI validamos después de aceptar
+    # 1️⃣ Validamos con los query params, antes de completar el handshake
     user_data = await WSSecurityManager.authenticate_websocket(websocket)
-    # Si la autenticación falló, cierra con código 1008
+    # Si la autenticación falló, se rechaza el handshake (403)
     if not user_data["authenticated"]:
-        await websocket.close(code=1008, reason=user_data.get("error", "Autenticación rechazada"))
+        await reject_handshake(websocket, WSAdmissionRejected(user_data.get("error", "Autenticación rechazada"), status_code=403))
         return
     
     # ✅ Auth pasó, continúa normally
@@ -39,50 +53,120 @@ async def ia_agent_ws(websocket: WebSocket):
     # Validar que code_user no esté vacío
     if not code_user:
         WSSecurityManager.log_connection("UNKNOWN", "ERROR - code_user vacío o no enviado", websocket)
-        await websocket.close(code=1008, reason="code_user es obligatorio")
+        await reject_handshake(websocket, WSAdmissionRejected("code_user es obligatorio", status_code=403))
         return
 
-    WSSecurityManager.log_connection(code_user, f"connect - code_user: {code_user}, fullname: {fullname}", websocket)
+    # 2️⃣ Cupo de conexiones del worker y del usuario (pestañas olvidadas, reconexiones en bucle)
+    try:
+        conn_id = await ws_admission.admit(code_user)
+    except WSAdmissionRejected as e:
+        WSSecurityManager.log_connection(code_user, f"rejected - {e.reason}", websocket)
+        await reject_handshake(websocket, e)
+        return
 
     try:
-        while True:
-            raw_message = await websocket.receive_text()
+        await websocket.accept()
+    except Exception:
+        await ws_admission.release(conn_id)
+        raise
+
+    WSSecurityManager.log_connection(code_user, f"connect - code_user: {code_user}, fullname: {fullname}", websocket)
 
-            parsed_message = None
+    def process_message(raw_message: str, deadline: Optional[Deadline]) -> str:
+        """Procesa un mensaje del usuario (se ejecuta en un hilo del pipeline) dentro de su deadline; retorna el frame JSON."""
+        # Parseo único del frame; el resultado viaja en el payload hasta el grafo
+        parsed_message = None
+        if looks_like_json_object(raw_message):
             try:
-                parsed_message = json.loads(raw_message)
+                parsed_message = loads(raw_message)
             except json.JSONDecodeError:
                 parsed_message = None
 
-            params_required = None
-            message = raw_message
-            if isinstance(parsed_message, dict) and "params_required" in parsed_message:
-                params_required = parsed_message.get("params_required")
-                message = parsed_message.get("message", "")
-
-            # ✅ Creamos el payload Pydantic
-            payload = WsChatMessageRequest(
-                message=message,
-                code_user=code_user,
-                fullname=fullname,
-                area=area,
-                params_required=params_required
-            )
-            # Enviamos el payload al controlador
-            controller = WSChatController(payload=payload)
+        params_required = None
+        client_message_id = None
+        message = raw_message
+        if isinstance(parsed_message, dict) and ("params_required" in parsed_message or "client_message_id" in parsed_message):
+            params_required = parsed_message.get("params_required")
+            client_message_id = normalize_message_id(parsed_message.get("client_message_id"))
+            message = parsed_message.get("message", "")
+
+        # ✅ Creamos el payload Pydantic
+        payload = WsChatMessageRequest(
+            message=message,
+            code_user=code_user,
+            fullname=fullname,
+            area=area,
+            params_required=params_required,
+            client_message_id=client_message_id,
+            parsed_message=parsed_message if isinstance(parsed_message, dict) else None
+        )
+        if not client_message_id:
+            return run_turn(payload, deadline)[0]
+
+        try:
+            # Reenvío del mismo mensaje: se responde lo guardado sin ejecutar el grafo
+            return ws_dedup.run(code_user, client_message_id, lambda: run_turn(payload, deadline), deadline=deadline)
+        except DuplicateInFlight as e:
+            return build_error_response(
+                error="Mensaje en proceso",
+                detail="Este mensaje aún se está procesando, intenta de nuevo en unos segundos",
+                ws_code=WSCode.TRY_AGAIN_LATER,
+                retry_after=e.retry_after
+            ).model_dump_json(exclude_none=True)
+
+    def run_turn(payload: WsChatMessageRequest, deadline: Optional[Deadline]) -> Tuple[str, bool]:
+        """
+        Ejecuta el turno y retorna (frame JSON, si se puede guardar para reenvíos).
+        Los errores transitorios no se guardan: un reintento debe volver a procesarse.
+        """
+        # Enviamos el payload al controlador
+        controller = WSChatController(payload=payload, deadline=deadline)
+        try:
             result = controller.wsController()
+        except LimiterOverloaded as e:
+            # Gemini saturado: responder de inmediato en lugar de esperar al timeout
+            return build_error_response(
+                error="Servicio saturado",
+                detail="Hay demasiadas consultas en curso, intenta de nuevo en unos segundos",
+                ws_code=WSCode.TRY_AGAIN_LATER,
+                retry_after=e.retry_after
+            ).model_dump_json(exclude_none=True), False
+        except TurnLockTimeout as e:
+            # Otro turno del mismo usuario (otra pestaña u otro worker) sigue en curso
+            return build_error_response(
+                error="Mensaje anterior en curso",
+                detail="Tu mensaje anterior aún se está procesando, intenta de nuevo en unos segundos",
+                ws_code=WSCode.TRY_AGAIN_LATER,
+                retry_after=e.retry_after
+            ).model_dump_json(exclude_none=True), False
+        except DeadlineExpired as e:
+            return build_timeout_response(e.stage).model_dump_json(exclude_none=True), False
 
-            # Convertir modelo Pydantic a dict para enviar como JSON
-            await websocket.send_json(result.model_dump(exclude_none=True))
+        # Serializar en el hilo del pipeline (el event loop solo envía el texto)
+        # Solo se guardan los turnos que llegaron al grafo (validación y rate limit no mutan estado)
+        return result.model_dump_json(exclude_none=True), not isinstance(result, WSErrorResponse)
+
+    # Lectura, procesamiento y envío desacoplados con colas acotadas
+    # Presupuesto de tiempo por turno según el área ([DEADLINES] en config.ini)
+    pipeline = ConnectionPipeline(websocket, process_message, turn_timeout=turn_timeout_for_area(area))
+    # Registrar el pipeline para recibir notificaciones en segundo plano desde cualquier worker (ej: progreso de jobs)
+    await ws_push.register(code_user, pipeline)
+
+    try:
+        await pipeline.run()
+        WSSecurityManager.log_connection(code_user, "disconnect", websocket, detail=str(pipeline.stats))
 
     except WebSocketDisconnect:
-        WSSecurityManager.log_connection(code_user, "disconnect", websocket)
+        WSSecurityManager.log_connection(code_user, "disconnect", websocket, detail=str(pipeline.stats))
     except Exception as e:
         WSSecurityManager.log_connection(code_user, f"ERROR: {str(e)}", websocket)
-        await websocket.send_json(
+        await websocket.send_text(
             build_error_response(
                 error="Conexión interrumpida",
                 detail=str(e),
                 ws_code=WSCode.INTERNAL_ERROR
-            ).model_dump(exclude_none=True)
+            ).model_dump_json(exclude_none=True)
         )
+    finally:
+        await ws_push.unregister(code_user, pipeline)
+        await ws_admission.release(conn_id, idle=bool(pipeline.stats["idle_closed"]))
@@ -0,0 +1,265 @@
+"""
+Control de admisión de conexiones WebSocket, antes del accept().
+
+Cada conexión nueva pide un cupo antes de completar el handshake; si no hay
+cupo se rechaza sin aceptarla (sin tareas, colas ni registro de presencia):
+
+    por worker   max_connections sockets abiertos en este proceso (contador local)
+    por usuario  max_per_user sockets del mismo code_user entre todos los workers
+
+El cupo por usuario vive en Redis para que las pestañas repartidas entre
+workers cuenten juntas:
+
+    ws:conns:{code_user}   ZSET id de conexión -> vencimiento (epoch)
+
+La reserva es optimista (WATCH + MULTI): se cuentan los cupos vigentes y, si
+hay espacio, se agrega el propio y se limpian los vencidos en la misma
+transacción. Cada worker renueva el vencimiento de sus conexiones cada
+heartbeat_interval; si el worker cae, sus cupos vencen solos tras ttl. Si
+Redis falla, la conexión se admite (el límite por usuario es una protección,
+no una condición de correctitud).
+
+Configuración en la sección [WS_ADMISSION] de config.ini:
+    [WS_ADMISSION]
+    enabled = true
+    max_connections = 1000
+    max_per_user = 5
+    ttl = 90
+    heartbeat_interval = 30
+"""
+import asyncio
+import time
+import uuid
+from collections import Counter
+from configparser import ConfigParser
+from typing import Any, Dict, Optional
+
+from fastapi import WebSocket
+from fastapi.responses import ORJSONResponse
+from redis.exceptions import WatchError
+
+from infrastructure.config.redis_config import RedisConfig
+from infrastructure.config.worker_identity import current_worker_id
+
+# Reintentos de la reserva si otra conexión del usuario modificó el ZSET
+RESERVE_ATTEMPTS = 3
+
+
+class WSAdmissionRejected(Exception):
+    """La conexión no tiene cupo (worker lleno o demasiados sockets del usuario)."""
+
+    def __init__(self, reason: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class WSAdmissionController:
+    """Cupos de sockets por worker y por usuario, con gauges de conexiones abiertas."""
+
+    KEY_PREFIX = "ws:conns:"
+
+    def __init__(
+        self,
+        max_connections: int = 1000,
+        max_per_user: int = 5,
+        ttl: int = 90,
+        heartbeat_interval: int = 30,
+        enabled: bool = True
+    ):
+        """
+        Args:
+            max_connections: Sockets abiertos como máximo en este worker (0 = sin límite)
+            max_per_user: Sockets abiertos como máximo por usuario entre todos los workers (0 = sin límite)
+            ttl: Segundos de vida del cupo de una conexión sin renovación (caída del worker)
+            heartbeat_interval: Segundos entre renovaciones de los cupos de este worker
+            enabled: Si es False se admite todo (los gauges se siguen registrando)
+        """
+        self.max_connections = max_connections
+        self.max_per_user = max_per_user
+        self.ttl = ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.enabled = enabled
+        # id de conexión -> code_user (conexiones abiertas en este worker)
+        self._open: Dict[str, str] = {}
+        self._per_user: Counter = Counter()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.stats = {
+            "admitted": 0, "rejected_worker": 0, "rejected_user": 0,
+            "released": 0, "idle_closed": 0, "redis_errors": 0
+        }
+
+    @classmethod
+    def from_config(cls) -> "WSAdmissionController":
+        config = ConfigParser()
+        config.read("config.ini")
+        return cls(
+            max_connections=config.getint("WS_ADMISSION", "max_connections", fallback=1000),
+            max_per_user=config.getint("WS_ADMISSION", "max_per_user", fallback=5),
+            ttl=config.getint("WS_ADMISSION", "ttl", fallback=90),
+            heartbeat_interval=config.getint("WS_ADMISSION", "heartbeat_interval", fallback=30),
+            enabled=config.getboolean("WS_ADMISSION", "enabled", fallback=True)
+        )
+
+    # ------------------------------------------------------------
+    # Ciclo de vida (event loop del worker con sockets)
+    # ------------------------------------------------------------
+    def start(self) -> None:
+        """Inicia la renovación periódica de los cupos de este worker."""
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        if self._heartbeat_task and not self._heartbeat_task.done():
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+        self._heartbeat_task = None
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self.enabled or not self.max_per_user or not self._open:
+                continue
+            try:
+                expires = time.time() + self.ttl
+                pipe = RedisConfig.get_async_client().pipeline(transaction=False)
+                for conn_id, code_user in list(self._open.items()):
+                    key = f"{self.KEY_PREFIX}{code_user}"
+                    pipe.zadd(key, {conn_id: expires})
+                    pipe.expire(key, self.ttl)
+                await pipe.execute()
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                print(f"⚠️ Error renovando cupos de WebSocket: {e}")
+
+    # ------------------------------------------------------------
+    # Admisión
+    # ------------------------------------------------------------
+    async def admit(self, code_user: str) -> str:
+        """
+        Reserva un cupo para una conexión nueva del usuario (llamar antes de accept()).
+
+        Returns:
+            Id de la conexión, a devolver con release() al cerrarla
+
+        Raises:
+            WSAdmissionRejected: Si el worker o el usuario no tienen cupo
+        """
+        if self.enabled and self.max_connections and len(self._open) >= self.max_connections:
+            self.stats["rejected_worker"] += 1
+            raise WSAdmissionRejected(
+                f"Servidor con el máximo de conexiones ({self.max_connections}), intenta de nuevo en unos segundos",
+                status_code=503,
+                retry_after=5.0
+            )
+
+        conn_id = f"{current_worker_id()}:{uuid.uuid4().hex[:12]}"
+        # El cupo local se toma antes de ir a Redis: otro handshake del mismo loop lo ve
+        self._open[conn_id] = code_user
+        self._per_user[code_user] += 1
+
+        if self.enabled and self.max_per_user:
+            try:
+                reserved = await self._reserve(code_user, conn_id)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                print(f"⚠️ No se pudo verificar el cupo de WebSocket de {code_user}: {e}")
+                reserved = True
+            if not reserved:
+                self._forget(conn_id)
+                self.stats["rejected_user"] += 1
+                raise WSAdmissionRejected(
+                    f"Máximo de {self.max_per_user} conexiones abiertas por usuario; cierra otras pestañas",
+                    status_code=429
+                )
+
+        self.stats["admitted"] += 1
+        return conn_id
+
+    async def _reserve(self, code_user: str, conn_id: str) -> bool:
+        key = f"{self.KEY_PREFIX}{code_user}"
+        async with RedisConfig.get_async_client().pipeline(transaction=True) as pipe:
+            for _ in range(RESERVE_ATTEMPTS):
+                now = time.time()
+                try:
+                    await pipe.watch(key)
+                    if await pipe.zcount(key, now, "+inf") >= self.max_per_user:
+                        await pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    pipe.zremrangebyscore(key, "-inf", now)
+                    pipe.zadd(key, {conn_id: now + self.ttl})
+                    pipe.expire(key, self.ttl)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+        # Contención sostenida sobre el mismo usuario: se admite
+        return True
+
+    async def release(self, conn_id: str, idle: bool = False) -> None:
+        """
+        Libera el cupo de una conexión cerrada.
+
+        Args:
+            conn_id: Id retornado por admit()
+            idle: Si la conexión se cerró por inactividad (solo para métricas)
+        """
+        code_user = self._forget(conn_id)
+        if code_user is None:
+            return
+        self.stats["released"] += 1
+        if idle:
+            self.stats["idle_closed"] += 1
+        if self.enabled and self.max_per_user:
+            try:
+                await RedisConfig.get_async_client().zrem(f"{self.KEY_PREFIX}{code_user}", conn_id)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                print(f"⚠️ No se pudo liberar el cupo de WebSocket de {code_user}: {e}")
+
+    def _forget(self, conn_id: str) -> Optional[str]:
+        code_user = self._open.pop(conn_id, None)
+        if code_user is not None:
+            self._per_user[code_user] -= 1
+            if self._per_user[code_user] <= 0:
+                del self._per_user[code_user]
+        return code_user
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "worker_id": current_worker_id(),
+            "open": len(self._open),
+            "users": len(self._per_user),
+            "max_connections": self.max_connections,
+            "max_per_user": self.max_per_user,
+            "top_users": dict(self._per_user.most_common(5)),
+            **self.stats
+        }
+
+
+async def reject_handshake(websocket: WebSocket, rejection: WSAdmissionRejected) -> None:
+    """
+    Rechaza el handshake sin aceptar el socket.
+
+    Con la extensión websocket.http.response del servidor se responde el status
+    HTTP con el motivo en JSON; si no, el cierre previo al accept() llega como 403.
+    """
+    try:
+        headers = {"Retry-After": str(int(rejection.retry_after))} if rejection.retry_after else None
+        await websocket.send_denial_response(ORJSONResponse(
+            status_code=rejection.status_code,
+            content={"status": False, "msg": rejection.reason, "data": None},
+            headers=headers
+        ))
+    except RuntimeError:
+        await websocket.close(code=1008, reason=rejection.reason)
+
+
+# Instancia compartida por proceso
+ws_admission = WSAdmissionController.from_config()
@@ -0,0 +1,72 @@
+"""
+Registro local (por worker) de conexiones WebSocket activas por usuario.
+Permite enviar mensajes al socket de un usuario desde tareas de fondo; para
+enviar desde otro worker o proceso se usa ws_push (presencia en Redis).
+
+Se registra el WebSocket o su ConnectionPipeline; con el pipeline los envíos
+de fondo pasan por la cola de salida de la conexión (sin escrituras concurrentes).
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from infrastructure.serialization.json_codec import dumps_str
+
+
+class WSConnectionRegistry:
+    """Conexiones WebSocket abiertas en este proceso, indexadas por code_user."""
+
+    def __init__(self):
+        # WebSocket o ConnectionPipeline (cualquier objeto con send_json)
+        self._connections: Dict[str, Set[Any]] = defaultdict(set)
+
+    def register(self, code_user: str, connection: Any) -> None:
+        self._connections[code_user].add(connection)
+
+    def unregister(self, code_user: str, connection: Any) -> None:
+        sockets = self._connections.get(code_user)
+        if not sockets:
+            return
+        sockets.discard(connection)
+        if not sockets:
+            self._connections.pop(code_user, None)
+
+    def users(self) -> List[str]:
+        """Usuarios con al menos un socket abierto en este worker."""
+        return list(self._connections)
+
+    def is_connected(self, code_user: str) -> bool:
+        return bool(self._connections.get(code_user))
+
+    def count(self) -> int:
+        """Cantidad total de sockets abiertos en este worker."""
+        return sum(len(sockets) for sockets in self._connections.values())
+
+    async def send_to_user(self, code_user: str, data: Dict[str, Any], coalesce_key: Optional[str] = None) -> int:
+        """
+        Envía un mensaje JSON a todos los sockets del usuario en este worker.
+
+        Args:
+            code_user: Usuario destino
+            data: Mensaje JSON
+            coalesce_key: Clave para reemplazar un envío pendiente equivalente (solo pipelines)
+
+        Returns:
+            Cantidad de sockets que recibieron el mensaje
+        """
+        delivered = 0
+        for connection in list(self._connections.get(code_user, ())):
+            try:
+                if isinstance(connection, WebSocket):
+                    await connection.send_text(dumps_str(data))
+                else:
+                    await connection.send_json(data, coalesce_key=coalesce_key)
+                delivered += 1
+            except Exception:
+                self.unregister(code_user, connection)
+        return delivered
+
+
+# Instancia compartida por proceso
+ws_connections = WSConnectionRegistry()
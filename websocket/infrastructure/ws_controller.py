@@ -1,12 +1,16 @@
-from langgraph.infrastructure.lang_controller import LangGraphController
+from typing import Optional
+
+from infrastructure.concurrency.deadline import Deadline
 from websocket.application.response import WsChatAplicationResponse
 from websocket.domain.dataModel.model import WsChatMessageRequest
 
 class WSChatController:
-    def __init__(self, payload: WsChatMessageRequest):
+    def __init__(self, payload: WsChatMessageRequest, deadline: Optional[Deadline] = None):
         self.payload = payload
         self.wsresponse = WsChatAplicationResponse(payload)
-        self.langgraph = LangGraphController(payload)
+        # Import perezoso: el grafo (langgraph) se carga con el primer mensaje, no al arrancar el worker
+        from langgraph.infrastructure.lang_controller import LangGraphController
+        self.langgraph = LangGraphController(payload, deadline=deadline)
 
     def wsController(self):
 
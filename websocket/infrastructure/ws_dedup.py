@@ -0,0 +1,250 @@
+"""
+Mensajes idempotentes por client_message_id.
+
+Los clientes móviles reenvían el mismo mensaje cuando la red falla; sin
+deduplicación cada reenvío vuelve a clasificar con el LLM y a mutar el estado.
+Si el frame trae client_message_id, la respuesta del turno se guarda en Redis
+y un reenvío dentro de la ventana recibe la misma respuesta sin ejecutar el grafo:
+
+    ws:dedup:{code_user}:{client_message_id}
+        "pending:{owner}"   turno en curso (SET NX, expira con el lease)
+        respuesta JSON      frame ya enviado (EXPIRE window)
+
+Si el reenvío llega mientras el original sigue en curso (ej: reconexión en
+otro worker), espera su respuesta hasta max_wait o el deadline del turno.
+Solo se guardan las respuestas de turnos ejecutados; los errores transitorios
+(saturación, timeouts, rate limit) liberan el id para que el reintento se
+procese. Si Redis falla, el mensaje se procesa sin deduplicar.
+
+Configuración en la sección [WS_DEDUP] de config.ini:
+    [WS_DEDUP]
+    enabled = true
+    window = 300
+    lease = 60
+    max_wait = 20
+"""
+import threading
+import time
+import uuid
+from configparser import ConfigParser
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from redis.exceptions import WatchError
+
+from infrastructure.concurrency.deadline import Deadline
+from infrastructure.config.redis_config import RedisConfig
+
+# Largo máximo aceptado de client_message_id (ids más largos se ignoran)
+MAX_MESSAGE_ID_LENGTH = 128
+PENDING_PREFIX = "pending:"
+# Intentos de tomar el id si el original libera la marca mientras se espera
+CLAIM_ATTEMPTS = 3
+# Espera entre lecturas mientras el original sigue en curso (segundos)
+POLL_INTERVAL = 0.05
+
+
+class DuplicateInFlight(Exception):
+    """El mensaje original sigue en curso tras la espera máxima."""
+
+    def __init__(self, client_message_id: str, retry_after: float):
+        super().__init__(f"Mensaje '{client_message_id}' aún en proceso")
+        self.client_message_id = client_message_id
+        self.retry_after = retry_after
+
+
+def normalize_message_id(value: Any) -> Optional[str]:
+    """client_message_id válido del frame, o None si no viene o no es usable."""
+    if not isinstance(value, (str, int)) or isinstance(value, bool):
+        return None
+    value = str(value).strip()
+    return value if 0 < len(value) <= MAX_MESSAGE_ID_LENGTH else None
+
+
+class WSMessageDeduplicator:
+    """Ventana de deduplicación de respuestas por (code_user, client_message_id)."""
+
+    KEY = "ws:dedup:{code_user}:{client_message_id}"
+
+    def __init__(self, redis=None, window: int = 300, lease: float = 60.0, max_wait: float = 20.0, enabled: bool = True):
+        """
+        Args:
+            redis: Cliente Redis (por defecto RedisConfig.get_client(), resuelto en cada uso)
+            window: Segundos que se recuerda la respuesta de un mensaje
+            lease: Segundos de vida de la marca "en curso" si el worker cae
+            max_wait: Segundos máximos de espera por un original en curso
+            enabled: Si es False todos los mensajes se procesan
+        """
+        self._redis = redis
+        self.window = window
+        self.lease = lease
+        self.max_wait = max_wait
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stats = {"processed": 0, "replayed": 0, "waited": 0, "in_flight_timeouts": 0,
+                      "not_cached": 0, "claim_failures": 0, "lost_leases": 0, "redis_errors": 0}
+
+    @classmethod
+    def from_config(cls) -> "WSMessageDeduplicator":
+        config = ConfigParser()
+        config.read("config.ini")
+        return cls(
+            window=config.getint("WS_DEDUP", "window", fallback=300),
+            lease=config.getfloat("WS_DEDUP", "lease", fallback=60.0),
+            max_wait=config.getfloat("WS_DEDUP", "max_wait", fallback=20.0),
+            enabled=config.getboolean("WS_DEDUP", "enabled", fallback=True)
+        )
+
+    @property
+    def redis(self):
+        return self._redis if self._redis is not None else RedisConfig.get_client()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def run(
+        self,
+        code_user: str,
+        client_message_id: str,
+        handler: Callable[[], Tuple[str, bool]],
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """
+        Ejecuta el turno una sola vez por id dentro de la ventana.
+
+        Args:
+            code_user: Usuario
+            client_message_id: Id enviado por el cliente
+            handler: Procesa el mensaje; retorna (frame JSON, si se puede guardar)
+            deadline: Presupuesto del turno; acota la espera por un original en curso
+
+        Returns:
+            Frame JSON de la respuesta (propia o del mensaje original)
+
+        Raises:
+            DuplicateInFlight: Si el original sigue en curso tras la espera máxima
+                o no se pudo tomar el id en CLAIM_ATTEMPTS intentos
+        """
+        if not self.enabled:
+            return handler()[0]
+
+        key = self.KEY.format(code_user=code_user, client_message_id=client_message_id)
+        owner = f"{PENDING_PREFIX}{uuid.uuid4().hex}"
+        lease = max(self.lease, deadline.remaining() + 1.0) if deadline is not None else self.lease
+        cached = None
+        claimed = False
+        try:
+            # Si el original falló (marca liberada) el reintento toma el id y lo procesa
+            for _ in range(CLAIM_ATTEMPTS):
+                if self.redis.set(key, owner, nx=True, px=int(lease * 1000)):
+                    claimed = True
+                    break
+                cached = self._wait_for_original(key, client_message_id, deadline)
+                if cached is not None:
+                    break
+        except DuplicateInFlight:
+            raise
+        except Exception as e:
+            self._count("redis_errors")
+            print(f"⚠️ No se pudo deduplicar el mensaje {client_message_id} de {code_user}: {e}")
+            return handler()[0]
+
+        if cached is not None:
+            self._count("replayed")
+            return cached
+        if not claimed:
+            # Otro reintento tomó el id cada vez que se liberó: no ejecutar sin ser dueño
+            self._count("claim_failures")
+            raise DuplicateInFlight(client_message_id, retry_after=1.0)
+
+        try:
+            response, cacheable = handler()
+        except BaseException:
+            self._release(key, owner)
+            raise
+
+        self._count("processed")
+        if not cacheable:
+            self._count("not_cached")
+            self._release(key, owner)
+            return response
+        self._store(key, owner, response)
+        return response
+
+    def _wait_for_original(self, key: str, client_message_id: str, deadline: Optional[Deadline]) -> Optional[str]:
+        """
+        Respuesta del original (esperando si sigue en curso).
+        None si la marca desapareció (el original falló o expiró): el llamador intenta tomar el id.
+        """
+        wait_limit = min(self.max_wait, deadline.remaining()) if deadline is not None else self.max_wait
+        started = time.monotonic()
+        waited = False
+        while True:
+            value = self.redis.get(key)
+            if isinstance(value, bytes):
+                value = value.decode("utf-8")
+            if value is None:
+                return None
+            if not value.startswith(PENDING_PREFIX):
+                return value
+            if not waited:
+                waited = True
+                self._count("waited")
+            elapsed = time.monotonic() - started
+            if elapsed >= wait_limit:
+                self._count("in_flight_timeouts")
+                raise DuplicateInFlight(client_message_id, retry_after=round(max(1.0, self.max_wait - elapsed), 1))
+            time.sleep(min(POLL_INTERVAL, wait_limit - elapsed))
+
+    def _store(self, key: str, owner: str, response: str) -> None:
+        """
+        Reemplaza la marca "en curso" por la respuesta solo si sigue siendo nuestra
+        (compare-and-set con WATCH): si el lease venció y otro reintento tomó el id,
+        su marca no se pisa.
+        """
+        try:
+            with self.redis.pipeline() as pipe:
+                pipe.watch(key)
+                current = pipe.get(key)
+                if isinstance(current, bytes):
+                    current = current.decode("utf-8")
+                if current != owner:
+                    pipe.unwatch()
+                    self._count("lost_leases")
+                    return
+                pipe.multi()
+                pipe.set(key, response, ex=self.window)
+                pipe.execute()
+        except WatchError:
+            self._count("lost_leases")
+        except Exception as e:
+            self._count("redis_errors")
+            print(f"⚠️ No se pudo guardar la respuesta del mensaje {key}: {e}")
+
+    def _release(self, key: str, owner: str) -> None:
+        """Borra la marca "en curso" solo si sigue siendo nuestra (compare-and-delete con WATCH)."""
+        try:
+            with self.redis.pipeline() as pipe:
+                pipe.watch(key)
+                current = pipe.get(key)
+                if isinstance(current, bytes):
+                    current = current.decode("utf-8")
+                if current != owner:
+                    pipe.unwatch()
+                    return
+                pipe.multi()
+                pipe.delete(key)
+                pipe.execute()
+        except WatchError:
+            pass
+        except Exception as e:
+            self._count("redis_errors")
+            print(f"⚠️ No se pudo liberar el id de mensaje {key}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"enabled": self.enabled, "window_s": self.window, **self.stats}
+
+
+# Instancia compartida por proceso
+ws_dedup = WSMessageDeduplicator.from_config()
@@ -0,0 +1,337 @@
+"""
+Push a los WebSockets de usuarios desde cualquier proceso (workers, jobs, runners).
+
+Solo el worker que mantiene el socket puede escribir en él. Este módulo publica
+en Redis en qué workers tiene sockets cada usuario y enruta los mensajes al
+canal del worker dueño:
+
+    ws:presence:{code_user}   HASH worker_id -> último heartbeat (epoch), EXPIRE ttl
+    ws:push:{worker_id}       canal pub/sub del worker: lotes JSON de mensajes
+
+push() no bloquea: encola el mensaje y un hilo de fondo lo envía. Mientras un
+envío está en curso (o durante linger_ms) los mensajes siguientes se acumulan:
+cada lote hace una sola consulta de presencia (pipeline) y un PUBLISH por
+worker destino. Dos mensajes del mismo usuario con el mismo coalesce_key dentro
+de un lote se reemplazan (solo viaja el último; ej: progreso de un job). El
+worker receptor vuelve a coalescer en la cola de salida del socket.
+
+Si el dueño es este mismo worker, el lote se entrega directo en el event loop
+sin pasar por Redis.
+
+Configuración en la sección [WS_PUSH] de config.ini:
+    [WS_PUSH]
+    linger_ms = 2
+    presence_ttl = 90
+    heartbeat_interval = 30
+"""
+import asyncio
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from configparser import ConfigParser
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from infrastructure.config.redis_config import RedisConfig
+from infrastructure.config.worker_identity import current_worker_id
+from infrastructure.metrics.latency import summarize_latencies
+from infrastructure.serialization.json_codec import dumps_str, loads
+from websocket.infrastructure.ws_connections import WSConnectionRegistry, ws_connections
+
+# Muestras de latencia de entrega que se conservan para los percentiles
+LATENCY_SAMPLES = 2048
+
+
+class WSPresenceRegistry:
+    """Workers con sockets abiertos de cada usuario, compartido entre procesos."""
+
+    KEY_PREFIX = "ws:presence:"
+
+    def __init__(self, ttl: int = 90):
+        """
+        Args:
+            ttl: Segundos de vida de la presencia de un worker sin nuevo heartbeat
+        """
+        self.ttl = ttl
+
+    @property
+    def redis(self):
+        return RedisConfig.get_client()
+
+    async def add(self, code_user: str) -> None:
+        key = f"{self.KEY_PREFIX}{code_user}"
+        pipe = RedisConfig.get_async_client().pipeline()
+        pipe.hset(key, current_worker_id(), int(time.time()))
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def remove(self, code_user: str, worker_id: Optional[str] = None) -> None:
+        await RedisConfig.get_async_client().hdel(f"{self.KEY_PREFIX}{code_user}", worker_id or current_worker_id())
+
+    async def heartbeat(self, users: List[str]) -> None:
+        """Renueva la presencia de este worker para los usuarios conectados localmente."""
+        if not users:
+            return
+        now = int(time.time())
+        worker_id = current_worker_id()
+        pipe = RedisConfig.get_async_client().pipeline(transaction=False)
+        for code_user in users:
+            key = f"{self.KEY_PREFIX}{code_user}"
+            pipe.hset(key, worker_id, now)
+            pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    def owners(self, users: List[str]) -> Dict[str, List[str]]:
+        """
+        Workers vigentes de cada usuario (una sola consulta en pipeline).
+        Los workers sin heartbeat dentro del ttl (caídos) se limpian del hash.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for code_user in users:
+            pipe.hgetall(f"{self.KEY_PREFIX}{code_user}")
+        now = time.time()
+        owners: Dict[str, List[str]] = {}
+        stale: List[Tuple[str, List[str]]] = []
+        for code_user, workers in zip(users, pipe.execute()):
+            alive = [worker for worker, seen in workers.items() if now - float(seen) <= self.ttl]
+            owners[code_user] = alive
+            if len(alive) < len(workers):
+                stale.append((code_user, [worker for worker in workers if worker not in alive]))
+        if stale:
+            pipe = self.redis.pipeline(transaction=False)
+            for code_user, workers in stale:
+                pipe.hdel(f"{self.KEY_PREFIX}{code_user}", *workers)
+            pipe.execute()
+        return owners
+
+
+class WSPushBus:
+    """Envío de mensajes a usuarios en cualquier worker, con lotes y coalescencia."""
+
+    CHANNEL_PREFIX = "ws:push:"
+
+    def __init__(
+        self,
+        connections: WSConnectionRegistry,
+        presence: WSPresenceRegistry,
+        linger_ms: float = 2.0,
+        heartbeat_interval: int = 30
+    ):
+        """
+        Args:
+            connections: Registro local de sockets
+            presence: Registro de presencia compartido
+            linger_ms: Espera antes de enviar un lote para acumular mensajes
+            heartbeat_interval: Segundos entre renovaciones de presencia
+        """
+        self.connections = connections
+        self.presence = presence
+        self.linger = linger_ms / 1000.0
+        self.heartbeat_interval = heartbeat_interval
+        # (code_user, coalesce_key o secuencia) -> (coalesce_key, mensaje, instante del push)
+        self._pending: "OrderedDict[Tuple[str, Any], Tuple[Optional[str], Dict[str, Any], float]]" = OrderedDict()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.stats = {
+            "pushed": 0, "coalesced": 0, "batches": 0, "published": 0,
+            "local": 0, "no_owner": 0, "delivered": 0, "undelivered": 0
+        }
+
+    @classmethod
+    def from_config(cls) -> "WSPushBus":
+        config = ConfigParser()
+        config.read("config.ini")
+        return cls(
+            ws_connections,
+            WSPresenceRegistry(ttl=config.getint("WS_PUSH", "presence_ttl", fallback=90)),
+            linger_ms=config.getfloat("WS_PUSH", "linger_ms", fallback=2.0),
+            heartbeat_interval=config.getint("WS_PUSH", "heartbeat_interval", fallback=30)
+        )
+
+    # ------------------------------------------------------------
+    # Ciclo de vida (event loop del worker con sockets)
+    # ------------------------------------------------------------
+    def start(self) -> None:
+        """Inicia el listener del canal de este worker y el heartbeat de presencia."""
+        self._loop = asyncio.get_running_loop()
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen())
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        for task in (self._listener_task, self._heartbeat_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listener_task = None
+        self._heartbeat_task = None
+        self._loop = None
+
+    async def register(self, code_user: str, connection: Any) -> None:
+        """Registra un socket local y publica la presencia del worker si es el primero del usuario."""
+        first = not self.connections.is_connected(code_user)
+        self.connections.register(code_user, connection)
+        if first:
+            try:
+                await self.presence.add(code_user)
+            except Exception as e:
+                print(f"⚠️ No se pudo publicar la presencia de {code_user}: {e}")
+
+    async def unregister(self, code_user: str, connection: Any) -> None:
+        self.connections.unregister(code_user, connection)
+        if not self.connections.is_connected(code_user):
+            try:
+                await self.presence.remove(code_user)
+            except Exception as e:
+                print(f"⚠️ No se pudo retirar la presencia de {code_user}: {e}")
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.presence.heartbeat(self.connections.users())
+            except Exception as e:
+                print(f"⚠️ Error renovando presencia de sockets: {e}")
+
+    async def _listen(self) -> None:
+        channel = f"{self.CHANNEL_PREFIX}{current_worker_id()}"
+        while True:
+            pubsub = RedisConfig.get_async_client().pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    await self._deliver(loads(message["data"]))
+            except asyncio.CancelledError:
+                await pubsub.aclose()
+                raise
+            except Exception as e:
+                print(f"⚠️ Listener de push de WebSocket reiniciando: {e}")
+                await pubsub.aclose()
+                await asyncio.sleep(1)
+
+    async def _deliver(self, items: List[Dict[str, Any]]) -> None:
+        """Entrega un lote a los sockets locales (desde Redis o directo desde este worker)."""
+        for item in items:
+            code_user = item["u"]
+            delivered = await self.connections.send_to_user(code_user, item["d"], coalesce_key=item.get("k"))
+            with self._lock:
+                if delivered:
+                    self.stats["delivered"] += 1
+                    self._latencies.append((time.time() - item["t"]) * 1000)
+                else:
+                    self.stats["undelivered"] += 1
+            if not delivered and not self.connections.is_connected(code_user):
+                # El socket se cerró después de la consulta de presencia
+                try:
+                    await self.presence.remove(code_user)
+                except Exception:
+                    pass
+
+    # ------------------------------------------------------------
+    # Envío (cualquier hilo o proceso)
+    # ------------------------------------------------------------
+    def push(self, code_user: str, data: Dict[str, Any], coalesce_key: Optional[str] = None) -> None:
+        """
+        Encola un mensaje para los sockets del usuario, estén en el worker que estén.
+
+        Args:
+            code_user: Usuario destino
+            data: Mensaje JSON (frame completo del WebSocket)
+            coalesce_key: Mensajes con la misma clave se reemplazan si aún no se enviaron
+        """
+        with self._lock:
+            key = (code_user, coalesce_key if coalesce_key is not None else next(self._seq))
+            if key in self._pending:
+                self.stats["coalesced"] += 1
+            self._pending[key] = (coalesce_key, data, time.time())
+            self.stats["pushed"] += 1
+            self._idle.clear()
+            self._ensure_thread()
+        self._wake.set()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Espera a que se envíen los mensajes encolados (ej: antes de terminar un proceso)."""
+        return self._idle.wait(timeout)
+
+    def _ensure_thread(self) -> None:
+        # Por proceso: con gunicorn --preload los hilos del master no existen en los workers
+        if self._thread is None or self._thread_pid != os.getpid():
+            self._thread = threading.Thread(target=self._run, name="ws-push", daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            if self.linger:
+                time.sleep(self.linger)
+            with self._lock:
+                self._wake.clear()
+                batch, self._pending = self._pending, OrderedDict()
+            if batch:
+                try:
+                    self._send(batch)
+                except Exception as e:
+                    print(f"⚠️ Error enviando push de WebSocket ({len(batch)} mensajes): {e}")
+            with self._lock:
+                if not self._pending:
+                    self._idle.set()
+
+    def _send(self, batch: "OrderedDict[Tuple[str, Any], Tuple[Optional[str], Dict[str, Any], float]]") -> None:
+        users = list(dict.fromkeys(code_user for code_user, _ in batch))
+        owners = self.presence.owners(users)
+        me = current_worker_id()
+        by_worker: Dict[str, List[Dict[str, Any]]] = {}
+        no_owner = 0
+        for (code_user, _), (coalesce_key, data, pushed_at) in batch.items():
+            workers = owners.get(code_user) or []
+            if not workers:
+                no_owner += 1
+            item = {"u": code_user, "k": coalesce_key, "d": data, "t": pushed_at}
+            for worker in workers:
+                by_worker.setdefault(worker, []).append(item)
+
+        local = by_worker.pop(me, None) if self._loop is not None else None
+        if local:
+            asyncio.run_coroutine_threadsafe(self._deliver(local), self._loop)
+        if by_worker:
+            pipe = self.presence.redis.pipeline(transaction=False)
+            for worker, items in by_worker.items():
+                pipe.publish(f"{self.CHANNEL_PREFIX}{worker}", dumps_str(items))
+            pipe.execute()
+
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["published"] += len(by_worker)
+            self.stats["local"] += len(local or ())
+            self.stats["no_owner"] += no_owner
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "worker_id": current_worker_id(),
+                "local_sockets": self.connections.count(),
+                "pending": len(self._pending),
+                "delivery_ms": summarize_latencies(self._latencies),
+                **self.stats
+            }
+
+
+# Instancia compartida por proceso
+ws_push = WSPushBus.from_config()
@@ -49,9 +49,22 @@ def build_error_response(
     return response
 
 
+def build_timeout_response(stage: Optional[str] = None) -> WSErrorResponse:
+    """
+    Respuesta estándar cuando un turno agota su presupuesto de tiempo (deadline).
+    """
+    return build_error_response(
+        error="Tiempo de espera agotado",
+        detail="Tu consulta tardó demasiado, intenta de nuevo en unos segundos",
+        ws_code=WSCode.TRY_AGAIN_LATER,
+        **({"stage": stage} if stage else {})
+    )
+
+
 # Códigos WebSocket comunes como constantes
 class WSCode:
     """Códigos WebSocket estándar para respuestas"""
     NORMAL = 1000            # Operación exitosa
     POLICY_VIOLATION = 1008  # Violación de política (validación, auth, etc.)
     INTERNAL_ERROR = 1011    # Error interno del servidor
+    TRY_AGAIN_LATER = 1013   # Servicio saturado, reintentar más tarde